@@ -0,0 +1,15 @@
+# backend/agents/__init__.py
+from ..core.agent_registry import AgentSpec
+
+# LISTA OFICIAL DE PLUGINS (Entry Point do sistema de agentes)
+# Apenas metadados: o módulo agent_impls é importado no primeiro uso de um dos agentes.
+AGENT_PLUGINS = [
+    AgentSpec("Pesquisador_Agente", "backend.agents.agent_impls:Pesquisador_Agente", modes=("SERVER",), resources=("io",),
+              endpoints=("/data/search_index",)),
+    AgentSpec("Engenheiro_Agente", "backend.agents.agent_impls:Engenheiro_Agente", modes=("SERVER",), resources=("cpu", "io"),
+              endpoints=("/system/deploy_patch",)),
+    AgentSpec("Sensor_Agente", "backend.agents.agent_impls:Sensor_Agente", modes=("EDGE",), resources=("io",),
+              endpoints=("/telemetry/send",)),
+    AgentSpec("WorkerSimples", "backend.agents.agent_impls:WorkerSimples", modes=("EDGE",), resources=("cpu",),
+              endpoints=("/data/simple_echo",)),
+]
@@ -3,10 +3,12 @@ import time
 from typing import Any, Dict
 # Importa o Protocolo e a Base do Core
 from ..core.agente_manager import WorkerBase 
-from ..core.protocol import AgentMessage, AgentResponse 
+from ..core.protocolo import AgentMessage, AgentResponse 
 # Importa o Logger e o Simulator das Utilities
 from ..utilities.logger import CORTEX_LOGGER 
 from ..utilities.network_simulator import NETWORK_SIMULATOR 
+# Journal local para payloads de saída pendentes (modo EDGE)
+from ..persistence.local_journal import get_local_journal, KIND_OUTBOUND
 
 class WorkerSimples(WorkerBase):
     """Implementação simples para uso em modo EDGE e Auto-Modulação."""
@@ -139,18 +141,39 @@ class Engenheiro_Agente(WorkerBase):
 class Sensor_Agente(WorkerBase):
     """Worker de baixa capacidade para coleta de dados (EDGE)."""
     
+    TELEMETRY_ENDPOINT = "/telemetry/send"
+    
+    def _flush_cached_payloads(self) -> int:
+        """Reenvia payloads de telemetria retidos no journal local. Para no primeiro erro de rede."""
+        journal = get_local_journal()
+        sent = 0
+        for entry in journal.pending(KIND_OUTBOUND):
+            if entry.data.get("endpoint") != self.TELEMETRY_ENDPOINT:
+                continue
+            try:
+                NETWORK_SIMULATOR.simulate_request(endpoint=entry.data["endpoint"], data=entry.data["payload"])
+            except ConnectionError:
+                break
+            journal.ack(entry.seq)
+            sent += 1
+        return sent
+    
     def execute_task(self, message: AgentMessage) -> AgentResponse:
         start_time = time.time()
         agent_name = self.name
+        payload = {"data_size": "1024_bytes", "task_id": message.task_id}
         
         try:
             # Simula envio de dados de telemetria
             response_data = NETWORK_SIMULATOR.simulate_request(
-                endpoint="/telemetry/send", 
-                data={"data_size": "1024_bytes"},
+                endpoint=self.TELEMETRY_ENDPOINT, 
+                data=payload,
             )
             
-            output = f"Sensor_Agente [{agent_name}] reportou telemetria. Status: {response_data['status']}"
+            # Uplink disponível: drena a telemetria retida durante falhas anteriores
+            flushed = self._flush_cached_payloads()
+            
+            output = f"Sensor_Agente [{agent_name}] reportou telemetria. Status: {response_data['status']} (Reenviados do cache: {flushed})"
             
             return AgentResponse(
                 message_id=message.message_id,
@@ -164,7 +187,8 @@ class Sensor_Agente(WorkerBase):
             )
         
         except ConnectionError as e:
-            # Falha de rede
+            # Falha de rede: retém o payload no journal local para reenvio posterior
+            get_local_journal().append(KIND_OUTBOUND, {"endpoint": self.TELEMETRY_ENDPOINT, "payload": payload}, sync=True)
             return AgentResponse(
                 message_id=message.message_id,
                 task_id=message.task_id,
@@ -0,0 +1,43 @@
+# backend/benchmarks/bench_cold_start.py
+"""
+Mede o tempo de cold start (processo novo) de cenários de importação do CORTEX.
+Uso: python -m backend.benchmarks.bench_cold_start [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SCENARIOS = {
+    "import backend.core": ("import backend.core", {}),
+    "AgenteManager(EDGE)": ("from backend.core import AgenteManager; AgenteManager('EDGE')", {}),
+    "AgenteManager(EDGE), sem entry points": (
+        "from backend.core import AgenteManager; AgenteManager('EDGE')", {"CORTEX_AGENT_ENTRY_POINTS": "0"}),
+}
+
+_HARNESS = (
+    "import time, sys; _t = time.perf_counter(); {code}; "
+    "sys.stdout.write(repr((time.perf_counter() - _t) * 1000) + '\\n')"
+)
+
+
+def _measure(code: str, env: dict, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _HARNESS.format(code=code)], capture_output=True,
+                             text=True, env={**os.environ, **env}, check=True).stdout
+        samples.append(float(out.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start de importação do CORTEX.")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    for label, (code, env) in SCENARIOS.items():
+        print(f"{label:<42} {_measure(code, env, args.runs):8.1f} ms (mediana de {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
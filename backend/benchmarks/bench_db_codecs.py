@@ -0,0 +1,109 @@
+# backend/benchmarks/bench_db_codecs.py
+"""
+Benchmark de encode/decode dos modelos de persistência (TaskDBModel).
+Uso: python -m backend.benchmarks.bench_db_codecs [--traces 200] [--iterations 500]
+"""
+import argparse
+import json
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Callable, Dict, Any
+
+from ..persistence.db_models import TaskDBModel, CODECS, decode_blob
+
+
+def make_realistic_task(n_traces: int) -> SimpleNamespace:
+    """Cria uma Task com o formato do domínio e um trace multi-pass de n_traces passos."""
+    trace_history = []
+    for i in range(n_traces):
+        trace_history.append(SimpleNamespace(
+            timestamp=time.time() + i,
+            agent_name="Pesquisador_Agente" if i % 2 else "Engenheiro_Agente",
+            action_description=f"Executando via Agente (passo {i})",
+            result_data={
+                "output_data": f"Pesquisador_Agente analisou dados externos. Hash: {hash(i)}" * 2,
+                "next_action": "DELEGATE_TO_Engenheiro_Agente" if i % 2 else "TASK_COMPLETED",
+                "exec_time": 123.456 + i,
+            },
+            success=True,
+        ))
+    return SimpleNamespace(
+        task_id=f"TASK-{uuid.uuid4().hex[:8]}",
+        description="Analisar e estruturar o plano de desenvolvimento do Módulo 1 (Scheduler).",
+        context=SimpleNamespace(
+            session_id=str(uuid.uuid4()),
+            cortex_mode="SERVER",
+            initial_prompt="Analisar e estruturar o plano de desenvolvimento.",
+            environment_vars={"tenant": "acme", "region": "sa-east-1"},
+        ),
+        status=SimpleNamespace(value="COMPLETED"),
+        priority=SimpleNamespace(value=2),
+        required_agent="Pesquisador_Agente",
+        delegated_to="Engenheiro_Agente",
+        creation_time=time.time(),
+        last_update_time=time.time(),
+        final_result={"fix_applied": True, "details": "Dados recebidos do /system/deploy_patch"},
+        trace_history=trace_history,
+    )
+
+
+def _legacy_encode(task) -> str:
+    """Serialização original (JSON + __dict__ por trace + result_data duplamente codificado)."""
+    rows = [{
+        "timestamp": t.timestamp,
+        "agent_name": t.agent_name,
+        "action_description": t.action_description,
+        "result_data_json": json.dumps(t.result_data),
+        "success": t.success,
+    } for t in task.trace_history]
+    return json.dumps(rows)
+
+
+def _timeit(fn: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6  # µs por operação
+
+
+def run(n_traces: int, iterations: int) -> Dict[str, Dict[str, float]]:
+    task = make_realistic_task(n_traces)
+    results: Dict[str, Dict[str, float]] = {}
+
+    legacy_blob = _legacy_encode(task)
+    results["legacy-json"] = {
+        "encode_us": _timeit(lambda: _legacy_encode(task), iterations),
+        "decode_us": _timeit(lambda: [json.loads(r["result_data_json"]) for r in json.loads(legacy_blob)], iterations),
+        "size_bytes": len(legacy_blob.encode("utf-8")),
+    }
+
+    for codec in CODECS.values():
+        model = TaskDBModel.from_core(task, codec)
+        blob = model.trace_history_json
+        columns = {f: getattr(model, f) for f in TaskDBModel.__dataclass_fields__ if not f.startswith("_")}
+        results[codec.name] = {
+            "encode_us": _timeit(lambda: TaskDBModel.from_core(task, codec), iterations),
+            "decode_us": _timeit(lambda: decode_blob(blob), iterations),
+            # Leitura de status/resultado: a decodificação preguiçosa não toca no trace.
+            "status_only_us": _timeit(lambda: TaskDBModel(**columns).final_result, iterations),
+            "size_bytes": len(blob),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos codecs de persistência do CORTEX.")
+    parser.add_argument("--traces", type=int, nargs="+", default=[10, 200])
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    for n_traces in args.traces:
+        print(f"\n--- Task com {n_traces} traces ({args.iterations} iterações) ---")
+        for name, metrics in run(n_traces, args.iterations).items():
+            line = " | ".join(f"{k}: {v:,.1f}" for k, v in metrics.items())
+            print(f"{name:<12} {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# backend/benchmarks/bench_lease_claims.py
+"""
+Throughput de claims do SQLiteLeaseStore com vários processos em um único host.
+Cada processo reivindica lotes, simula o trabalho do agente (sleep) e conclui as Tasks.
+Mede apenas o protocolo de leases (claim/complete, exclusividade entre nós): o CERNEScheduler,
+o CERNE e o TaskRepository não participam.
+Uso: python -m backend.benchmarks.bench_lease_claims [--tasks 2000] [--work-ms 10] [--nodes 1,2,4,8]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import List
+
+from ..persistence.task_leases import SQLiteLeaseStore, default_node_id
+
+
+def _seed_tasks(path: str, count: int):
+    store = SQLiteLeaseStore(path)
+    conn = store._conn().raw
+    now = time.time()
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO Tasks (task_id, description, status, priority, required_agent, creation_time) "
+        "VALUES (?, ?, 'PENDING', ?, 'WorkerSimples', ?)",
+        [(f"TASK-{i:06d}", "bench", 1 + i % 4, now + i * 1e-6) for i in range(count)])
+    conn.execute("COMMIT")
+
+
+def _node(path: str, batch: int, work_ms: float, results):
+    store = SQLiteLeaseStore(path)
+    node_id = default_node_id()
+    store.register(node_id)
+    conn = store._conn().raw
+    processed: List[str] = []
+    while True:
+        rows = store.claim(node_id, batch)
+        if not rows:
+            break
+        for row in rows:
+            time.sleep(work_ms / 1000.0)  # Trabalho do agente (I/O simulado)
+            conn.execute("UPDATE Tasks SET status = 'COMPLETED', last_update_time = ? WHERE task_id = ?",
+                         (time.time(), row["task_id"]))
+            store.complete(node_id, row["task_id"])
+            processed.append(row["task_id"])
+    store.deregister(node_id)
+    results.put(processed)
+
+
+def run(tasks: int, nodes: int, batch: int, work_ms: float):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cortex.db")
+        _seed_tasks(path, tasks)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_node, args=(path, batch, work_ms, results)) for _ in range(nodes)]
+        start = time.perf_counter()
+        [w.start() for w in workers]
+        processed = [results.get() for _ in workers]
+        [w.join() for w in workers]
+        elapsed = time.perf_counter() - start
+    all_ids = [task_id for chunk in processed for task_id in chunk]
+    return {"nodes": nodes, "throughput_tps": len(all_ids) / elapsed, "processed": len(all_ids),
+            "duplicates": len(all_ids) - len(set(all_ids))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput de claims do SQLiteLeaseStore por número de processos.")
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--work-ms", type=float, default=10.0)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--nodes", default="1,2,4,8")
+    args = parser.parse_args()
+
+    baseline = None
+    for nodes in (int(n) for n in args.nodes.split(",")):
+        result = run(args.tasks, nodes, args.batch, args.work_ms)
+        baseline = baseline or result["throughput_tps"]
+        print(f"nós={nodes:<3} {result['throughput_tps']:9.1f} tasks/s  "
+              f"escala={result['throughput_tps'] / baseline:5.2f}x  "
+              f"processadas={result['processed']}  duplicadas={result['duplicates']}")
+
+
+if __name__ == "__main__":
+    main()
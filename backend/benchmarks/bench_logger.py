@@ -0,0 +1,47 @@
+# backend/benchmarks/bench_logger.py
+"""
+Microbenchmark do custo por chamada do CortexLogger (medido no thread chamador).
+Uso: python -m backend.benchmarks.bench_logger [--calls 100000]
+"""
+import argparse
+import os
+import logging
+import time
+
+from ..utilities.logger import CortexLogger
+
+
+def _per_call_ns(logger: CortexLogger, calls: int) -> float:
+    extra = {'task_id': 'TASK-bench', 'priority': 2}
+    start = time.perf_counter_ns()
+    for i in range(calls):
+        logger.info("Task enfileirada.", extra_data=extra)
+    return (time.perf_counter_ns() - start) / calls
+
+
+def run(calls: int):
+    scenarios = {
+        "disabled (WARNING)": dict(log_level="WARNING"),
+        "enabled text (sync)": dict(async_writer=False),
+        "enabled text (async)": dict(async_writer=True, overflow_policy="drop_newest"),
+        "enabled json (async)": dict(async_writer=True, log_format="json", overflow_policy="drop_newest"),
+    }
+    results = {}
+    for i, (label, kwargs) in enumerate(scenarios.items()):
+        with open(os.devnull, "w") as sink:
+            logger = CortexLogger(name=f"CORTEX_BENCH_{i}", stream=sink, **kwargs)
+            results[label] = _per_call_ns(logger, calls)
+            logger.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark do CortexLogger.")
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+    for label, ns in run(args.calls).items():
+        print(f"{label:<24} {ns:>10.0f} ns/chamada")
+
+
+if __name__ == "__main__":
+    main()
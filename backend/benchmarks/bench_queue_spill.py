@@ -0,0 +1,105 @@
+# backend/benchmarks/bench_queue_spill.py
+"""
+Memória da TaskQueue com backlog crescente, com e sem spill para disco.
+Enfileira N Tasks (com contexto e trace), mede a memória alocada (tracemalloc) e drena a fila
+verificando a ordem de prioridade.
+Uso: python -m backend.benchmarks.bench_queue_spill [--sizes 10000,100000,1000000] [--watermark 10000]
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from ..core.scheduler import TaskQueue
+from ..utilities.logger import CORTEX_LOGGER
+from .simulate_load import SimPriority
+
+PRIORITIES = list(SimPriority)
+
+
+@dataclass
+class BenchContext:
+    """Campos do GlobalContext serializados junto com a Task."""
+    session_id: str
+    cortex_mode: str
+    initial_prompt: str
+    environment_vars: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BenchTask:
+    """Task com o mesmo formato de corpo (descrição, contexto e trace) gravado no spill."""
+    task_id: str
+    description: str
+    context: BenchContext
+    priority: SimPriority
+    required_agent: str
+    creation_time: float = field(default_factory=time.time)
+    trace_history: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _task(i: int, payload: str) -> BenchTask:
+    context = BenchContext(session_id=f"S-{i % 64}", cortex_mode="SERVER", initial_prompt=payload,
+                           environment_vars={'tenant': f"t{i % 16}"})
+    return BenchTask(task_id=f"TASK-{i:08d}", description=payload, context=context,
+                     priority=PRIORITIES[i % len(PRIORITIES)], required_agent="Pesquisador_Agente")
+
+
+def run(size: int, watermark: int, prefetch: int, payload_bytes: int):
+    payload = "x" * payload_bytes
+    gc.collect()
+    tracemalloc.start()
+    queue = TaskQueue(memory_watermark=watermark, prefetch=prefetch)
+    start = time.perf_counter()
+    for i in range(size):
+        queue.enqueue(_task(i, payload))
+    enqueue_s = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    spill_bytes = queue.spill_bytes()
+    resident = queue.resident_size()
+
+    # Ordem: prioridades não crescentes e FIFO dentro de cada tenant (o fair share intercala tenants)
+    start, last_priority, last_by_tenant, ordered = time.perf_counter(), None, {}, True
+    while True:
+        task = queue.dequeue()
+        if task is None:
+            break
+        tenant = task.context.environment_vars['tenant']
+        key = (-task.priority.value, task.creation_time)
+        ordered = ordered and (last_priority is None or key[0] >= last_priority) \
+            and key >= last_by_tenant.get(tenant, key)
+        last_priority, last_by_tenant[tenant] = key[0], key
+        queue.task_done(task)
+    dequeue_s = time.perf_counter() - start
+    queue.close()
+    tracemalloc.stop()
+    return {
+        'size': size,
+        'watermark': watermark,
+        'resident_tasks': resident,
+        'memory_mb': round(current / 2 ** 20, 1),
+        'peak_mb': round(peak / 2 ** 20, 1),
+        'spill_mb': round(spill_bytes / 2 ** 20, 1),
+        'enqueue_per_s': round(size / enqueue_s),
+        'dequeue_per_s': round(size / dequeue_s),
+        'ordered': ordered,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memória da TaskQueue com spill para disco")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--watermark", type=int, default=10000, help="0 desativa o spill (linha de base)")
+    parser.add_argument("--prefetch", type=int, default=256)
+    parser.add_argument("--payload-bytes", type=int, default=1024)
+    args = parser.parse_args(argv)
+    CORTEX_LOGGER.logger.setLevel("WARNING")  # Um log por enqueue dominaria a medição
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(json.dumps(run(size, args.watermark, args.prefetch, args.payload_bytes)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+# backend/benchmarks/cortex_bench.py
+"""
+cortex-bench: benchmark ponta a ponta do CORTEX.
+
+Percorre o caminho real submit -> Scheduler -> CERNE -> Agente -> Repositório com padrões
+de chegada configuráveis (constant, poisson, burst, step) e mix de agentes/prioridades/tenants.
+Reporta throughput, latência ponta a ponta e espera em fila (p50/p95/p99, também por tenant) e memória.
+O resultado é um JSON comparável entre commits; com --baseline o comando falha (exit 1)
+se alguma métrica regredir além de --threshold.
+
+Uso:
+    CORTEX_MODE=CI_TEST python -m backend.benchmarks.cortex_bench --pattern poisson --rate 20 --duration 30 \\
+        --agent-mix Pesquisador_Agente=0.7,Engenheiro_Agente=0.3 --output bench.json
+    python -m backend.benchmarks.cortex_bench ... --baseline bench.json --threshold 10
+    python -m backend.benchmarks.cortex_bench --pattern step --rate 20 --step-factor 5 --autoscale --max-workers 16
+    python -m backend.benchmarks.cortex_bench --tenant-mix noisy=0.9,quiet=0.1 --priority-mix MEDIUM=1
+
+Fair share entre tenants (comparar com CORTEX_TENANT_KEY=none, que põe todas as Tasks em uma fila FIFO única):
+    python -m backend.benchmarks.cortex_bench --pattern constant --rate 60 --duration 5 --workers 2 \
+        --priority-mix MEDIUM=1 --tenant-mix noisy=0.9,quiet=0.1 --agent-mix Engenheiro_Agente=1 \
+        --net-profile backend/benchmarks/net_profiles/fixed_50ms.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .stats import summarize
+
+PATTERNS = ("constant", "poisson", "burst", "step")
+DEFAULT_AGENT_MIX = {
+    "SERVER": {"Pesquisador_Agente": 0.7, "Engenheiro_Agente": 0.3},
+    "EDGE": {"WorkerSimples": 0.8, "Sensor_Agente": 0.2},
+}
+DEFAULT_PRIORITY_MIX = {"LOW": 0.2, "MEDIUM": 0.6, "HIGH": 0.15, "CRITICAL": 0.05}
+
+# Métricas comparadas no modo de regressão: (caminho no JSON, maior é melhor)
+REGRESSION_METRICS = (
+    (("throughput_tps",), True),
+    (("e2e_ms", "p50"), False),
+    (("e2e_ms", "p95"), False),
+    (("e2e_ms", "p99"), False),
+    (("queue_wait_ms", "p99"), False),
+    (("memory", "peak_rss_mb"), False),
+)
+
+
+def parse_mix(spec: Optional[str], default: Dict[str, float]) -> Dict[str, float]:
+    """Converte 'A=0.7,B=0.3' em {'A': 0.7, 'B': 0.3}."""
+    if not spec:
+        return dict(default)
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1.0)
+    return mix
+
+
+def arrival_offsets(pattern: str, rate: float, duration_s: float, rng: random.Random,
+                    burst_size: int = 50, burst_interval_s: float = 5.0, step_factor: float = 4.0) -> Iterator[float]:
+    """
+    Gera os instantes (s, relativos ao início) das submissões para o padrão informado.
+    'step': três fases iguais de chegadas constantes: rate, rate * step_factor e rate novamente.
+    """
+    if pattern == "constant":
+        count = int(rate * duration_s)
+        for i in range(count):
+            yield i / rate
+    elif pattern == "poisson":
+        t = rng.expovariate(rate)
+        while t < duration_s:
+            yield t
+            t += rng.expovariate(rate)
+    elif pattern == "step":
+        phase = duration_s / 3.0
+        t = 0.0
+        for phase_rate in (rate, rate * step_factor, rate):
+            end = t + phase
+            count = int(phase_rate * phase)
+            for i in range(count):
+                yield t + i / phase_rate
+            t = end
+    elif pattern == "burst":
+        t = 0.0
+        while t < duration_s:
+            for _ in range(burst_size):
+                yield t
+            t += burst_interval_s
+    else:
+        raise ValueError(f"Padrão de chegada desconhecido: '{pattern}'.")
+
+
+class _RecordingRepository:
+    """
+    Envolve o TaskRepository real e registra o instante em que cada Task é persistida
+    em estado terminal (COMPLETED/FAILED). Saves intermediários (PENDING, RETRY, DELEGATED)
+    não contam como conclusão.
+    """
+
+    def __init__(self, repository):
+        from ..core.status_hub import TERMINAL_STATUS_VALUES  # Import tardio, como em build_stack
+
+        self._repository = repository
+        self._terminal = TERMINAL_STATUS_VALUES
+        self._lock = threading.Lock()
+        self.finished: Dict[str, Tuple[float, str]] = {}
+        self.all_finished = threading.Event()
+        self.expected: Optional[int] = None
+
+    def __getattr__(self, name):
+        return getattr(self._repository, name)
+
+    def save(self, task):
+        self._repository.save(task)
+        now = time.perf_counter()
+        status = task.status.value if hasattr(task.status, "value") else task.status
+        if status not in self._terminal:
+            return
+        with self._lock:
+            if task.task_id not in self.finished:
+                self.finished[task.task_id] = (now, status)
+                if self.expected is not None and len(self.finished) >= self.expected:
+                    self.all_finished.set()
+
+
+def _queue_wait_quantiles(before: Dict[Any, Any], after: Dict[Any, Any], histogram=None,
+                          labels: Optional[Tuple[str, ...]] = None) -> Dict[str, float]:
+    """Quantis (limite superior do bucket, ms) da espera em fila entre dois snapshots."""
+    from ..utilities.metrics import QUEUE_WAIT_SECONDS, window_quantiles
+
+    quantiles, count = window_quantiles(histogram or QUEUE_WAIT_SECONDS, before, after, (0.5, 0.95, 0.99), labels)
+    result = {f"p{round(q * 100)}": bound * 1000.0 for q, bound in quantiles.items()}
+    result["count"] = count
+    return result
+
+
+def _queue_wait_snapshot(histogram=None) -> Dict[str, Any]:
+    from ..utilities.metrics import QUEUE_WAIT_SECONDS
+    return (histogram or QUEUE_WAIT_SECONDS).series_snapshot()
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build_stack(mode: str, workers: Optional[int] = None, autoscale: bool = False, max_workers: int = 16):
+    """
+    Monta o caminho real de execução (imports tardios: respeitam o ambiente configurado pelo CLI).
+    :return: (scheduler, repositório instrumentado, autoscaler ou None).
+    """
+    from ..core.agente_manager import AgenteManager
+    from ..core.autoscaler import Autoscaler, ConcurrencyLimits, ScalingPolicy
+    from ..core.cerne import CERNE
+    from ..core.scheduler import CERNEScheduler
+    from ..persistence.task_repository import TaskRepository
+
+    repository = _RecordingRepository(TaskRepository())
+    limits = ConcurrencyLimits.from_env() if autoscale else None
+    scheduler = CERNEScheduler(CERNE(AgenteManager(mode), concurrency=limits), repository, workers=workers)
+    autoscaler = None
+    if autoscale:
+        policy = ScalingPolicy.from_env()
+        policy.max_workers = max_workers
+        autoscaler = Autoscaler(scheduler, policy, limits)
+    return scheduler, repository, autoscaler
+
+
+def run_benchmark(config: Dict[str, Any]) -> Dict[str, Any]:
+    from ..core.dataclasses import GlobalContext, TaskPriority
+    from ..utilities.metrics import QUEUE_TENANT_WAIT_SECONDS
+
+    rng = random.Random(config["seed"])
+    scheduler, repository, autoscaler = build_stack(config["mode"], config["workers"], config["autoscale"],
+                                                    config["max_workers"])
+    agents, agent_weights = zip(*config["agent_mix"].items())
+    priorities, priority_weights = zip(*config["priority_mix"].items())
+    tenants, tenant_weights = zip(*config["tenant_mix"].items()) if config["tenant_mix"] else ((), ())
+    offsets = list(arrival_offsets(config["pattern"], config["rate"], config["duration_s"], rng,
+                                   config["burst_size"], config["burst_interval_s"], config["step_factor"]))
+    repository.expected = len(offsets)
+
+    rss_before = _peak_rss_mb()
+    queue_before = _queue_wait_snapshot()
+    tenant_before = _queue_wait_snapshot(QUEUE_TENANT_WAIT_SECONDS)
+    scheduler.start()
+    if autoscaler is not None:
+        autoscaler.start()
+    submitted: Dict[str, float] = {}
+    start = time.perf_counter()
+    clock_start = autoscaler._clock.now() if autoscaler is not None else None
+    for offset in offsets:
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        metadata = {'tenant': rng.choices(tenants, tenant_weights)[0]} if tenants else {}
+        context = GlobalContext(session_id=f"bench-{uuid.uuid4().hex[:8]}", cortex_mode=config["mode"],
+                                initial_prompt="cortex-bench", environment_vars=metadata)
+        submitted_at = time.perf_counter()
+        task = scheduler.submit_task(
+            f"cortex-bench task {len(submitted)}", context,
+            TaskPriority[rng.choices(priorities, priority_weights)[0]],
+            rng.choices(agents, agent_weights)[0],
+        )
+        submitted[task.task_id] = submitted_at
+    submit_done = time.perf_counter()
+
+    drained = repository.all_finished.wait(config["drain_timeout_s"]) if offsets else True
+    elapsed = time.perf_counter() - start
+    if autoscaler is not None:
+        autoscaler.stop()
+    scheduler.stop()
+
+    e2e_ms = [(repository.finished[t][0] - s) * 1000.0 for t, s in submitted.items() if t in repository.finished]
+    statuses: Dict[str, int] = {}
+    for _, status in repository.finished.values():
+        statuses[status] = statuses.get(status, 0) + 1
+    results = {
+        "throughput_tps": round(len(repository.finished) / elapsed, 3) if elapsed else 0.0,
+        "offered_tps": round(len(submitted) / (submit_done - start), 3) if submitted and submit_done > start else None,
+        "elapsed_s": round(elapsed, 3),
+        "drained": drained,
+        "tasks": {"submitted": len(submitted), "finished": len(repository.finished), "by_status": statuses},
+        "e2e_ms": summarize(e2e_ms),
+        "queue_wait_ms": _queue_wait_quantiles(queue_before, _queue_wait_snapshot()),
+        "memory": {"peak_rss_mb": round(_peak_rss_mb(), 1), "rss_growth_mb": round(_peak_rss_mb() - rss_before, 1)},
+    }
+    if tenants:
+        tenant_after = _queue_wait_snapshot(QUEUE_TENANT_WAIT_SECONDS)
+        results["tenant_queue_wait_ms"] = {
+            tenant: _queue_wait_quantiles(tenant_before, tenant_after, QUEUE_TENANT_WAIT_SECONDS, (tenant,))
+            for tenant in tenants}
+    if autoscaler is not None:
+        worker_events = [e for e in autoscaler.events if e.target == "workers"]
+        results["autoscale"] = {
+            "workers_peak": max([e.new for e in worker_events] + [scheduler.worker_count]),
+            "workers_final": scheduler.worker_count,
+            "events": [{"t_s": round(e.timestamp - clock_start, 2), "target": e.target, "old": e.old,
+                        "new": e.new, "reason": e.reason} for e in autoscaler.events],
+        }
+    return results
+
+
+def _metric(results: Dict[str, Any], path: Tuple[str, ...]) -> Optional[float]:
+    value: Any = results
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold_pct: float) -> List[Dict[str, Any]]:
+    """Lista as métricas que regrediram mais que threshold_pct em relação ao baseline."""
+    regressions = []
+    for path, higher_is_better in REGRESSION_METRICS:
+        now, before = _metric(current, path), _metric(baseline, path)
+        # 0.0 é um valor válido (ex.: throughput zerado); só a ausência do dado ou um baseline nulo é ignorado
+        if now is None or not before:
+            continue
+        change_pct = (now - before) / before * 100.0
+        worse = -change_pct if higher_is_better else change_pct
+        if worse > threshold_pct:
+            regressions.append({"metric": ".".join(path), "baseline": before, "current": now,
+                                "change_pct": round(change_pct, 2)})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="cortex-bench", description="Benchmark ponta a ponta do CORTEX.")
+    parser.add_argument("--mode", default="SERVER", choices=("SERVER", "EDGE"))
+    parser.add_argument("--pattern", default="poisson", choices=PATTERNS)
+    parser.add_argument("--rate", type=float, default=10.0, help="Submissões por segundo (constant/poisson).")
+    parser.add_argument("--duration", type=float, default=30.0, help="Janela de submissão (s).")
+    parser.add_argument("--burst-size", type=int, default=50)
+    parser.add_argument("--burst-interval", type=float, default=5.0)
+    parser.add_argument("--step-factor", type=float, default=4.0, help="Multiplicador da fase central (step).")
+    parser.add_argument("--workers", type=int, default=None, help="Workers iniciais do Scheduler.")
+    parser.add_argument("--autoscale", action="store_true", help="Ativa o Autoscaler (eventos no resultado).")
+    parser.add_argument("--max-workers", type=int, default=16)
+    parser.add_argument("--agent-mix", help="Ex.: Pesquisador_Agente=0.7,Engenheiro_Agente=0.3")
+    parser.add_argument("--priority-mix", help="Ex.: HIGH=0.2,MEDIUM=0.8")
+    parser.add_argument("--tenant-mix", help="Ex.: noisy=0.9,quiet=0.1 (metadata 'tenant' das Tasks).")
+    parser.add_argument("--seed", type=int, default=42, help="Seed das chegadas e do NetworkSimulator.")
+    parser.add_argument("--net-profile", help="JSON de perfis do NetworkSimulator (CORTEX_NET_PROFILE_FILE).")
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Arquivo JSON de resultados.")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparação.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regressão máxima tolerada (%%).")
+    args = parser.parse_args(argv)
+
+    # Configurado antes dos imports do Core: o NetworkSimulator e o Logger são Singletons de módulo.
+    os.environ.setdefault("CORTEX_MODE", "CI_TEST")
+    os.environ["CORTEX_NET_SEED"] = str(args.seed)
+    if args.net_profile:
+        os.environ["CORTEX_NET_PROFILE_FILE"] = args.net_profile
+    from ..utilities.logger import CORTEX_LOGGER
+    CORTEX_LOGGER.logger.setLevel("WARNING")
+
+    config = {
+        "mode": args.mode, "pattern": args.pattern, "rate": args.rate, "duration_s": args.duration,
+        "burst_size": args.burst_size, "burst_interval_s": args.burst_interval, "step_factor": args.step_factor,
+        "workers": args.workers, "autoscale": args.autoscale, "max_workers": args.max_workers, "seed": args.seed,
+        "agent_mix": parse_mix(args.agent_mix, DEFAULT_AGENT_MIX[args.mode]),
+        "priority_mix": parse_mix(args.priority_mix, DEFAULT_PRIORITY_MIX),
+        "tenant_mix": parse_mix(args.tenant_mix, {}),
+        "net_profile": args.net_profile, "drain_timeout_s": args.drain_timeout,
+    }
+    document = {
+        "meta": {"commit": _git_commit(), "timestamp": time.time(), "python": platform.python_version(),
+                 "platform": platform.platform(), "config": config},
+        "results": run_benchmark(config),
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare_results(document["results"], baseline["results"], args.threshold)
+        document["regressions"] = regressions
+        document["baseline_commit"] = baseline.get("meta", {}).get("commit")
+        exit_code = 1 if regressions else 0
+
+    output = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(output + "\n")
+    print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
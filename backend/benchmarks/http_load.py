@@ -0,0 +1,103 @@
+# backend/benchmarks/http_load.py
+"""
+Harness de carga para a Interface HTTP do CORTEX.
+Mede requisições/segundo e latência p50/p99 por endpoint contra um backend local.
+
+Uso:
+    python -m backend.interface.http_server --workers 4 &
+    python -m backend.benchmarks.http_load --url http://127.0.0.1:8000 --duration 15 --concurrency 64
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import aiohttp
+
+from .stats import percentile
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, latency_ms: float, ok: bool):
+        self.latencies[endpoint].append(latency_ms)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, elapsed_s: float) -> Dict[str, Dict[str, float]]:
+        return {
+            endpoint: {
+                "requests": len(samples),
+                "rps": len(samples) / elapsed_s,
+                "p50_ms": percentile(samples, 50),
+                "p99_ms": percentile(samples, 99),
+                "errors": self.errors[endpoint],
+            }
+            for endpoint, samples in self.latencies.items()
+        }
+
+
+async def _timed(session: aiohttp.ClientSession, stats: LoadStats, label: str, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    ok = False
+    body = None
+    try:
+        async with session.request(method, url, **kwargs) as resp:
+            body = await resp.json(content_type=None)
+            ok = resp.status < 400
+    except aiohttp.ClientError:
+        pass
+    stats.record(label, (time.perf_counter() - start) * 1000, ok)
+    return body if ok else None
+
+
+async def _client_loop(session, base_url: str, stats: LoadStats, deadline: float, task_ids: List[str]):
+    """Ciclo de um cliente: submete, consulta status e verifica health."""
+    i = 0
+    while time.perf_counter() < deadline:
+        i += 1
+        submitted = await _timed(
+            session, stats, "POST /task/submit", "POST", f"{base_url}/task/submit",
+            json={"description": f"Carga sintética #{i}", "priority": "MEDIUM"}
+        )
+        if submitted and "task_id" in submitted:
+            task_ids.append(submitted["task_id"])
+        if task_ids:
+            await _timed(session, stats, "GET /task/{id}", "GET", f"{base_url}/task/{task_ids[-1]}")
+        await _timed(session, stats, "GET /health", "GET", f"{base_url}/health")
+
+
+async def run_load(base_url: str, duration_s: float, concurrency: int) -> Dict[str, Dict[str, float]]:
+    stats = LoadStats()
+    task_ids: List[str] = []
+    # Conexões keep-alive reutilizadas entre requisições (um pool por harness)
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        deadline = start + duration_s
+        await asyncio.gather(*(
+            _client_loop(session, base_url, stats, deadline, task_ids) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+    return stats.report(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harness de carga HTTP do CORTEX.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args.url.rstrip("/"), args.duration, args.concurrency))
+    print(f"\n{'Endpoint':<22} {'Req':>8} {'RPS':>10} {'p50 ms':>9} {'p99 ms':>9} {'Erros':>7}")
+    for endpoint, m in sorted(report.items()):
+        print(f"{endpoint:<22} {m['requests']:>8} {m['rps']:>10.1f} {m['p50_ms']:>9.2f} {m['p99_ms']:>9.2f} {m['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+# backend/benchmarks/simulate_load.py
+"""
+Simulação de eventos discretos (relógio virtual) do caminho de despacho do CORTEX.
+
+A TaskQueue do Scheduler, o RetryPolicy, o NetworkSimulator e os timeouts de agente
+rodam sobre um VirtualClock: nenhum time.sleep real é executado, então um dia de tráfego
+é reproduzido em segundos. Reporta linha do tempo da profundidade da fila, percentis de
+latência e tempestades de retentativas (janelas em que retries dominam os despachos).
+
+O despacho pelos workers é modelado aqui: o CERNEScheduler roda em threads e rejeita o
+VirtualClock, cujo tempo só avança por este laço de eventos.
+
+Uso:
+    python -m backend.benchmarks.simulate_load --duration 86400 --rate 2 --workers 4 --seed 7
+    python -m backend.benchmarks.simulate_load --arrivals trafego.jsonl --net-profile perfis.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, Optional
+
+from .stats import summarize
+from ..core.retry_policy import RetryPolicy
+from ..core.scheduler import TaskQueue
+from ..utilities.clock import VirtualClock
+from ..utilities.logger import CORTEX_LOGGER
+from ..utilities.network_simulator import NetworkSimulator
+
+DEFAULT_ENDPOINT_MIX = {"/data/simple_echo": 0.5, "/data/search_index": 0.4, "/system/deploy_patch": 0.1}
+DEFAULT_PRIORITY_MIX = {"LOW": 0.2, "MEDIUM": 0.6, "HIGH": 0.15, "CRITICAL": 0.05}
+
+
+class SimPriority(IntEnum):
+    """Espelha os níveis de TaskPriority (a TaskQueue usa .value e .name)."""
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    CRITICAL = 4
+
+
+@dataclass
+class SimTask:
+    """Task mínima aceita pela TaskQueue (task_id, priority, creation_time)."""
+    task_id: str
+    priority: SimPriority
+    endpoint: str
+    creation_time: float
+    retries: int = 0
+    enqueued_at: float = 0.0
+
+
+@dataclass
+class SimulationConfig:
+    duration_s: float = 3600.0
+    arrival_rate: float = 5.0          # Chegadas Poisson por segundo (ignorado com arrivals_file)
+    workers: int = 1                   # Threads de Scheduler despachando em paralelo
+    timeout_s: float = 30.0            # Timeout por chamada de agente
+    seed: int = 42
+    endpoint_mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_ENDPOINT_MIX))
+    priority_mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_PRIORITY_MIX))
+    arrivals_file: Optional[str] = None  # JSONL: {"t": s, "endpoint": ..., "priority": ...}
+    sample_interval_s: float = 60.0
+    storm_window_s: float = 60.0
+    storm_share: float = 0.5           # Fração de despachos que são retries para caracterizar tempestade
+    storm_min_retries: int = 10
+
+
+@dataclass
+class _Window:
+    dispatches: int = 0
+    retries: int = 0
+    failures: int = 0
+
+
+class DiscreteEventSimulation:
+    """Reproduz chegadas, fila, execução, falhas e backoffs em tempo virtual."""
+
+    def __init__(self, config: SimulationConfig, network: Optional[NetworkSimulator] = None,
+                 clock: Optional[VirtualClock] = None):
+        """
+        :param network: Simulador de rede; deve ter sido criado com o mesmo 'clock' virtual.
+        """
+        self.config = config
+        self.clock = clock or VirtualClock()
+        self.queue = TaskQueue(self.clock)
+        self.network = network or NetworkSimulator(seed=config.seed, clock=self.clock.now, sleep=self.clock.sleep)
+        self._rng = random.Random(f"{config.seed}:arrivals")
+        self._idle_workers = config.workers
+        self._in_flight = 0
+        self._task_counter = 0
+        self._arrived_at: Dict[str, float] = {}
+
+        self.latencies: List[float] = []
+        self.queue_waits: List[float] = []
+        self.timeline: List[Dict[str, float]] = []
+        self.windows: Dict[int, _Window] = {}
+        self.counts = {"submitted": 0, "completed": 0, "failed": 0, "retries": 0, "timeouts": 0, "outage_failures": 0}
+
+    # --- Geração de Carga ---
+
+    def _weighted(self, mix: Dict[str, float]) -> str:
+        return self._rng.choices(list(mix), weights=list(mix.values()))[0]
+
+    def _new_task(self, endpoint: Optional[str] = None, priority: Optional[str] = None) -> SimTask:
+        self._task_counter += 1
+        return SimTask(
+            task_id=f"SIM-{self._task_counter:08d}",
+            priority=SimPriority[priority or self._weighted(self.config.priority_mix)],
+            endpoint=endpoint or self._weighted(self.config.endpoint_mix),
+            creation_time=self.clock.now(),
+        )
+
+    def _poisson_arrival(self):
+        self._submit(self._new_task())
+        delay = self._rng.expovariate(self.config.arrival_rate)
+        if self.clock.now() + delay <= self.config.duration_s:
+            self.clock.call_later(delay, self._poisson_arrival)
+
+    def _replay_arrivals(self) -> Iterator[Dict[str, Any]]:
+        with open(self.config.arrivals_file, "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _replayed_arrival(self, records: Iterator[Dict[str, Any]], record: Dict[str, Any]):
+        self._submit(self._new_task(record.get("endpoint"), record.get("priority")))
+        following = next(records, None)
+        if following is not None:
+            self.clock.call_at(float(following["t"]), self._replayed_arrival, records, following)
+
+    # --- Fila e Execução ---
+
+    def _window(self) -> _Window:
+        index = int(self.clock.now() // self.config.storm_window_s)
+        window = self.windows.get(index)
+        if window is None:
+            window = self.windows[index] = _Window()
+        return window
+
+    def _submit(self, task: SimTask):
+        self.counts["submitted"] += 1
+        self._arrived_at[task.task_id] = self.clock.now()
+        self._enqueue(task)
+
+    def _enqueue(self, task: SimTask):
+        task.enqueued_at = self.clock.now()
+        self.queue.enqueue(task)
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._idle_workers and not self.queue.is_empty():
+            task = self.queue.dequeue()
+            self.queue_waits.append(self.clock.now() - task.enqueued_at)
+            self._idle_workers -= 1
+            self._in_flight += 1
+
+            window = self._window()
+            window.dispatches += 1
+            if task.retries:
+                window.retries += 1
+
+            latency_ms, failed, in_outage = self.network.draw(task.endpoint)
+            service_s = latency_ms / 1000.0
+            timed_out = service_s > self.config.timeout_s
+            if timed_out:
+                service_s = self.config.timeout_s
+            self.clock.call_later(service_s, self._complete, task, failed or timed_out, timed_out, in_outage)
+
+    def _complete(self, task: SimTask, failed: bool, timed_out: bool, in_outage: bool):
+        self._idle_workers += 1
+        self._in_flight -= 1
+        if not failed:
+            self.counts["completed"] += 1
+            self.latencies.append(self.clock.now() - self._arrived_at.pop(task.task_id))
+        else:
+            self._window().failures += 1
+            self.counts["timeouts"] += timed_out
+            self.counts["outage_failures"] += in_outage
+            if RetryPolicy.should_retry(task.retries):
+                task.retries += 1
+                self.counts["retries"] += 1
+                self.clock.call_later(RetryPolicy.get_wait_time(task.retries), self._enqueue, task)
+            else:
+                self.counts["failed"] += 1
+                self._arrived_at.pop(task.task_id, None)
+        self._dispatch()
+
+    def _sample(self):
+        self.timeline.append({"t": self.clock.now(), "queue_depth": self.queue.qsize(), "in_flight": self._in_flight})
+        if self.clock.now() < self.config.duration_s or self._in_flight or self.clock.pending_events:
+            self.clock.call_later(self.config.sample_interval_s, self._sample)
+
+    # --- Execução e Relatório ---
+
+    def run(self) -> Dict[str, Any]:
+        if self.config.arrivals_file:
+            records = self._replay_arrivals()
+            first = next(records, None)
+            if first is not None:
+                self.clock.call_at(float(first["t"]), self._replayed_arrival, records, first)
+        else:
+            self.clock.call_later(self._rng.expovariate(self.config.arrival_rate), self._poisson_arrival)
+        self.clock.call_at(0.0, self._sample)
+
+        wall_start = time.perf_counter()
+        self.clock.run()
+        wall_s = time.perf_counter() - wall_start
+        return self.report(wall_s)
+
+    def _retry_storms(self) -> List[Dict[str, Any]]:
+        """Agrupa janelas consecutivas em que retries dominam os despachos."""
+        storms: List[Dict[str, Any]] = []
+        size = self.config.storm_window_s
+        for index in sorted(self.windows):
+            window = self.windows[index]
+            share = window.retries / window.dispatches if window.dispatches else 0.0
+            if window.retries < self.config.storm_min_retries or share < self.config.storm_share:
+                continue
+            if storms and storms[-1]["end_s"] == index * size:
+                storm = storms[-1]
+                storm["end_s"] += size
+                storm["retries"] += window.retries
+                storm["dispatches"] += window.dispatches
+                storm["peak_share"] = max(storm["peak_share"], round(share, 3))
+            else:
+                storms.append({"start_s": index * size, "end_s": (index + 1) * size, "retries": window.retries,
+                               "dispatches": window.dispatches, "peak_share": round(share, 3)})
+        return storms
+
+    def report(self, wall_s: float) -> Dict[str, Any]:
+        simulated_s = self.clock.now()
+        return {
+            "seed": self.config.seed,
+            "simulated_s": simulated_s,
+            "wall_s": round(wall_s, 3),
+            "speedup": round(simulated_s / wall_s, 1) if wall_s else None,
+            "events": self.clock.processed_events,
+            "tasks": dict(self.counts),
+            "latency_s": summarize(self.latencies),
+            "queue_wait_s": summarize(self.queue_waits),
+            "max_queue_depth": max((p["queue_depth"] for p in self.timeline), default=0),
+            "retry_storms": self._retry_storms(),
+            "queue_depth_timeline": self.timeline,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulação de carga do CORTEX em relógio virtual.")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Duração simulada das chegadas (s).")
+    parser.add_argument("--rate", type=float, default=5.0, help="Chegadas Poisson por segundo.")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por chamada de agente (s).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--arrivals", help="Arquivo JSONL de chegadas gravadas ({'t': s, ...}).")
+    parser.add_argument("--net-profile", help="JSON de perfis do NetworkSimulator.")
+    parser.add_argument("--sample-interval", type=float, default=60.0)
+    parser.add_argument("--output", help="Grava o relatório completo (com linha do tempo) em JSON.")
+    args = parser.parse_args(argv)
+
+    # Logs por Task dominariam o tempo de uma simulação com centenas de milhares de eventos
+    CORTEX_LOGGER.logger.setLevel("WARNING")
+
+    config = SimulationConfig(duration_s=args.duration, arrival_rate=args.rate, workers=args.workers,
+                              timeout_s=args.timeout, seed=args.seed, arrivals_file=args.arrivals,
+                              sample_interval_s=args.sample_interval)
+    clock = VirtualClock()
+    network = None
+    if args.net_profile:
+        with open(args.net_profile, "r", encoding="utf-8") as fh:
+            network = NetworkSimulator.from_config(json.load(fh), seed=args.seed, clock=clock.now, sleep=clock.sleep)
+    report = DiscreteEventSimulation(config, network, clock).run()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    summary = {k: v for k, v in report.items() if k != "queue_depth_timeline"}
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+# backend/benchmarks/stats.py
+"""Utilitários estatísticos compartilhados pelos benchmarks."""
+from typing import Dict, List, Sequence
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentil por ordenação (nearest-rank)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float], pcts: Sequence[float] = (50, 95, 99)) -> Dict[str, float]:
+    """Resumo {pXX, max, count} de uma amostra (ordenada uma única vez)."""
+    ordered = sorted(samples)
+    summary = {f"p{int(p)}": percentile(ordered, p) for p in pcts}
+    summary["max"] = ordered[-1] if ordered else 0.0
+    summary["count"] = len(ordered)
+    return summary
@@ -0,0 +1,37 @@
+# backend/core/__init__.py
+
+# Expõe as classes essenciais do 'core' com carregamento tardio (PEP 562):
+# nenhum submódulo (e nenhuma dependência pesada, como mysql.connector) é importado
+# até que o atributo seja acessado pela primeira vez.
+# A importação interna (e.g., de __main__.py) deve usar imports relativos (e.g., from .cerne import CERNE).
+import importlib
+
+# Atributo público -> submódulo que o define
+_LAZY_ATTRIBUTES = {
+    "CORTEX": ".__main__",
+    "CERNE": ".cerne",
+    "AgenteManager": ".agente_manager",
+    "WorkerBase": ".agente_manager",
+    "AgentSpec": ".agent_registry",
+    "Task": ".dataclasses",
+    "TaskStatus": ".dataclasses",
+    "TaskPriority": ".dataclasses",
+    "GlobalContext": ".dataclasses",
+    "CERNEScheduler": ".scheduler",
+}
+
+# Lista de módulos a serem expostos publicamente pelo pacote
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Acessos seguintes não passam por __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,21 +1,47 @@
 # backend/core/__main__.py (Versão Final com Teste de Persistência)
 
+import os
 import sys
+import uuid
 import mysql.connector
 
 # Importações de módulos do projeto
-from ..persistence.task_repository import TaskRepository
-from ..core.dataclasses import Task, TaskStatus, TaskPriority # Importar apenas o necessário
+from ..persistence.task_repository import TaskRepository, TaskRepositoryPool
+from ..core.dataclasses import Task, TaskStatus, TaskPriority, GlobalContext # Importar apenas o necessário
+from ..core.agente_manager import AgenteManager
+from ..core.autoscaler import ConcurrencyLimits
+from ..core.cerne import CERNE
+from ..core.offload import OffloadForwarder
+from ..core.scheduler import CERNEScheduler
+from ..persistence.local_journal import get_local_journal
 
 # Define o erro para captura no bloco principal
 MySQLError = mysql.connector.Error
 
 class CORTEX:
-    def __init__(self):
+    def __init__(self, mode: str = None):
+        """
+        Monta o caminho de execução: Repositório -> AgenteManager -> CERNE -> Scheduler.
+        :param mode: 'SERVER' ou 'EDGE' (padrão: CORTEX_MODE; outros valores, como CI_TEST, usam SERVER).
+        """
         self._initialized = False 
         print("CORTEX: Inicializando componentes...")
+        mode = mode or os.environ.get("CORTEX_MODE", "SERVER")
+        self.mode = mode if mode in ("SERVER", "EDGE") else "SERVER"
         # A inicialização do TaskRepository tentará a conexão ou entrará em mocking.
         self.task_repo = TaskRepository()
+        # Leituras da Interface HTTP: conexões próprias (a do Scheduler é serializada entre os workers)
+        self.api_repo = TaskRepositoryPool()
+        self.agente_manager = AgenteManager(self.mode)
+        # Modo EDGE: journal local e offload ao SERVER (CORTEX_OFFLOAD_URL), compartilhados por CERNE e Scheduler
+        journal = get_local_journal() if self.mode == "EDGE" else None
+        offloader = OffloadForwarder.from_env(journal) if journal is not None else None
+        # Limites por agente só existem com o Autoscaler (que os ajusta em execução)
+        self.concurrency = ConcurrencyLimits.from_env() if os.environ.get("CORTEX_AUTOSCALE") == "1" else None
+        self.cerne = CERNE(self.agente_manager, offloader=offloader, concurrency=self.concurrency)
+        self.scheduler = CERNEScheduler(self.cerne, self.task_repo, journal=journal, offloader=offloader)
+        # Arquivo frio: criado pela Interface HTTP quando CORTEX_ARCHIVE_ENABLED=1
+        self.archiver = None
         self._initialized = True
 
     def run(self):
@@ -26,12 +52,13 @@ class CORTEX:
         if self.task_repo.conn is not None:
             print("CORTEX: Rodando teste de persistência...")
             nova_tarefa = Task(
-                task_id="", 
-                content="Analisar e estruturar o plano de desenvolvimento do Módulo 1 (Scheduler) e do Agente Core.",
+                task_id=f"TASK-{uuid.uuid4().hex[:8]}", 
+                description="Analisar e estruturar o plano de desenvolvimento do Módulo 1 (Scheduler) e do Agente Core.",
+                context=GlobalContext(session_id=str(uuid.uuid4()), cortex_mode=self.mode),
                 priority=TaskPriority.HIGH
             )
             # Força o salvamento da primeira tarefa real
-            self.task_repo.save_task(nova_tarefa)
+            self.task_repo.save(nova_tarefa)
             print("Teste de persistência concluído.")
         else:
             print("CORTEX: Teste de persistência ignorado (Modo MOCKING/CI_TEST).")
@@ -0,0 +1,98 @@
+# backend/core/agent_registry.py
+"""
+Descoberta de plugins de Agentes por metadados.
+
+Cada agente é descrito por um AgentSpec (nome, alvo 'modulo:Classe' e tags de capacidade),
+sem importar o módulo do agente. O módulo só é importado em AgentSpec.load(), no primeiro uso.
+
+Fontes de specs:
+  1. Agentes embutidos: backend.agents.AGENT_PLUGINS.
+  2. Entry points do grupo 'cortex.agents' de pacotes instalados. As tags podem ser
+     declaradas como extras do entry point (ex.: 'meu_pkg.agentes:Tradutor [SERVER,io]'),
+     caso em que o alvo não é carregado na descoberta; sem extras, o entry point deve
+     apontar para um AgentSpec (ou lista de AgentSpecs).
+     CORTEX_AGENT_ENTRY_POINTS=0 desliga esta varredura (startup mínimo em EDGE).
+"""
+import importlib
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..utilities.logger import CORTEX_LOGGER
+
+ENTRY_POINT_GROUP = "cortex.agents"
+
+# Tags de capacidade reconhecidas
+MODE_TAGS = ("SERVER", "EDGE")
+RESOURCE_TAGS = ("cpu", "io")
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """Metadados de um plugin de Agente (declarados sem importar a implementação)."""
+    name: str
+    target: str                          # 'pacote.modulo:Classe'
+    modes: Tuple[str, ...] = ("SERVER",)  # Modos CORTEX em que o agente é carregado
+    resources: Tuple[str, ...] = ()       # Perfil de recurso dominante: 'cpu' e/ou 'io'
+    endpoints: Tuple[str, ...] = ()       # Endpoints externos chamados (cotas do RateLimiter)
+
+    def __post_init__(self):
+        unknown = [t for t in self.modes if t not in MODE_TAGS] + [t for t in self.resources if t not in RESOURCE_TAGS]
+        if unknown:
+            raise ValueError(f"AgentSpec '{self.name}': tags desconhecidas {unknown}.")
+
+    @classmethod
+    def from_tags(cls, name: str, target: str, tags: Iterable[str]) -> "AgentSpec":
+        tags = [t.strip() for t in tags if t.strip()]
+        return cls(name, target,
+                   modes=tuple(t.upper() for t in tags if t.upper() in MODE_TAGS),
+                   resources=tuple(t.lower() for t in tags if t.upper() not in MODE_TAGS))
+
+    def supports(self, mode: str) -> bool:
+        return mode in self.modes
+
+    def load(self):
+        """Importa o módulo do agente e retorna a classe (primeiro uso)."""
+        module_name, _, attribute = self.target.partition(":")
+        return getattr(importlib.import_module(module_name), attribute)
+
+
+def _entry_point_specs(group: str) -> List[AgentSpec]:
+    # importlib.metadata é caro de importar (email, zipfile...): só quando a varredura ocorre
+    from importlib.metadata import entry_points
+
+    specs: List[AgentSpec] = []
+    for ep in entry_points(group=group):
+        try:
+            if ep.extras:
+                specs.append(AgentSpec.from_tags(ep.name, f"{ep.module}:{ep.attr}", ep.extras))
+                continue
+            loaded = ep.load()
+            specs.extend(loaded if isinstance(loaded, (list, tuple)) else [loaded])
+        except Exception as e:
+            CORTEX_LOGGER.error(f"Entry point de agente inválido ignorado: '{ep.name}': {e}",
+                                extra_data={'entry_point': ep.value})
+    return specs
+
+
+_DISCOVERED: Optional[Dict[str, AgentSpec]] = None
+
+
+def discover_agent_specs(group: str = ENTRY_POINT_GROUP, refresh: bool = False) -> Dict[str, AgentSpec]:
+    """
+    Retorna {nome: AgentSpec} de todos os agentes conhecidos (resultado em cache por processo).
+    Entry points com o mesmo nome de um agente embutido o substituem.
+    """
+    global _DISCOVERED
+    if _DISCOVERED is not None and not refresh:
+        return _DISCOVERED
+    from ..agents import AGENT_PLUGINS  # Apenas specs: não importa as implementações
+
+    discovered = {spec.name: spec for spec in AGENT_PLUGINS}
+    scan = os.environ.get("CORTEX_AGENT_ENTRY_POINTS", "1") not in ("0", "false", "False")
+    for spec in (_entry_point_specs(group) if scan else ()):
+        if spec.name in discovered:
+            CORTEX_LOGGER.warning(f"Agente '{spec.name}' substituído por entry point.", extra_data={'target': spec.target})
+        discovered[spec.name] = spec
+    _DISCOVERED = discovered
+    return discovered
@@ -1,10 +1,12 @@
 import os
-from typing import Dict, Type, Any
+from typing import Dict, List, Tuple, Type, Any, TYPE_CHECKING
 from abc import ABC, abstractmethod
 from ..utilities.logger import CORTEX_LOGGER
-from .protocol import AgentMessage, AgentResponse 
-# Importa a lista de plugins do novo diretório
-from ...agents import AGENT_PLUGINS 
+# Descoberta por metadados: nenhum módulo de agente é importado até o primeiro uso
+from .agent_registry import AgentSpec, discover_agent_specs
+
+if TYPE_CHECKING:
+    from .protocolo import AgentMessage, AgentResponse
 
 # --- 1. Classes de Abstração (Manutenção da Interface de Domínio) ---
 
@@ -19,7 +21,7 @@ class WorkerBase(ABC):
         self.config = config or {}
         
     @abstractmethod
-    def execute_task(self, message: AgentMessage) -> AgentResponse: 
+    def execute_task(self, message: "AgentMessage") -> "AgentResponse": 
         """Método principal para execução de tarefas delegadas pelo CERNE."""
         pass
         
@@ -31,45 +33,42 @@ class WorkerBase(ABC):
 class AgenteManager:
     """
     Gerenciador de Agentes (Workers) do C.O.R.T.E.X.
-    Carrega agentes dinamicamente através da lista AGENT_PLUGINS.
+    Descobre agentes por metadados (AgentSpec / entry points 'cortex.agents') e importa
+    a implementação de cada agente apenas no primeiro uso.
     """
     
     def __init__(self, mode: str):
         self._mode = mode
-        self._agent_map: Dict[str, Type[WorkerBase]] = {}
+        self._specs: Dict[str, AgentSpec] = {}
+        self._agent_map: Dict[str, Type[WorkerBase]] = {}  # Classes já importadas
         self._load_plugins()
         
     def _load_plugins(self):
-        """Carrega a lista de classes de agentes disponíveis com base no modo CORTEX."""
-        
-        # Iterar sobre a lista de plugins importada
-        for AgentClass in AGENT_PLUGINS:
-            # Assumimos uma convenção simples para o filtro (nome da classe)
-            agent_name = AgentClass.__name__
-            is_server_agent = "Engenheiro" in agent_name or "Pesquisador" in agent_name
-            is_edge_agent = "Sensor" in agent_name or "Simples" in agent_name
-            
-            if self._mode == "SERVER" and is_server_agent:
-                self._register_agent_class(AgentClass)
-            elif self._mode == "EDGE" and is_edge_agent:
-                self._register_agent_class(AgentClass)
-            # Nota: Um sistema real usaria decorators ou metadados na AgentClass para filtro.
+        """Seleciona os agentes cujas tags de capacidade incluem o modo CORTEX atual."""
+        for spec in discover_agent_specs().values():
+            if spec.supports(self._mode):
+                self._specs[spec.name] = spec
 
         CORTEX_LOGGER.info(
-            f"AgenteManager: Carregados {len(self._agent_map)} plugins para o modo '{self._mode}'.",
-            extra_data={'mode': self._mode, 'agents': list(self._agent_map.keys())}
+            f"AgenteManager: Carregados {len(self._specs)} plugins para o modo '{self._mode}'.",
+            extra_data={'mode': self._mode, 'agents': list(self._specs.keys())}
         )
 
-    def _register_agent_class(self, AgentClass: Type[WorkerBase]):
-         agent_name = AgentClass.__name__
-         self._agent_map[agent_name] = AgentClass
-         CORTEX_LOGGER.info(f"Plugin carregado: {agent_name}")
-
+    def _resolve_agent_class(self, agent_name: str) -> Type[WorkerBase]:
+        """Importa a classe do agente no primeiro uso (e a mantém em cache)."""
+        AgentClass = self._agent_map.get(agent_name)
+        if AgentClass is None:
+            spec = self._specs.get(agent_name)
+            if spec is None:
+                return None
+            AgentClass = self._agent_map[agent_name] = spec.load()
+            CORTEX_LOGGER.info(f"Plugin carregado: {agent_name}", extra_data={'target': spec.target})
+        return AgentClass
 
     def register_agent(self, agent_class: Type[WorkerBase]):
         """Registra um novo agente dinamicamente (usado pelo CERNE na Auto-Modulação)."""
         agent_name = agent_class.__name__
-        if agent_name in self._agent_map:
+        if agent_name in self._agent_map or agent_name in self._specs:
             CORTEX_LOGGER.warning(f"Tentativa de registrar agente duplicado: '{agent_name}'.")
             return
             
@@ -79,13 +78,27 @@ class AgenteManager:
             extra_data={'agent_name': agent_name}
         )
 
+    def list_agents(self) -> List[str]:
+        """Nomes dos agentes disponíveis no modo atual (sem importá-los)."""
+        return sorted(set(self._specs) | set(self._agent_map))
+
+    def agents_with_resource(self, resource: str) -> List[str]:
+        """Agentes do modo atual com a tag de recurso informada ('cpu' ou 'io')."""
+        return sorted(name for name, spec in self._specs.items() if resource in spec.resources)
+
+    def endpoints_for(self, agent_name: str) -> Tuple[str, ...]:
+        """Endpoints externos declarados no AgentSpec do agente (vazio se desconhecido ou dinâmico)."""
+        spec = self._specs.get(agent_name)
+        return spec.endpoints if spec is not None else ()
+
     def get_agent(self, agent_name: str, config: Dict[str, Any] = None) -> WorkerBase:
         """Instancia e retorna um agente pelo nome."""
         
-        AgentClass = self._agent_map.get(agent_name)
+        AgentClass = self._resolve_agent_class(agent_name)
         if not AgentClass:
             CORTEX_LOGGER.error(
                 f"Agente '{agent_name}' não encontrado no mapeamento atual.",
                 extra_data={'requested_agent': agent_name}
             )
             raise ValueError(f"Agente '{agent_name}' não encontrado.")
+        return AgentClass(name=agent_name, config=config)
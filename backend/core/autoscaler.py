@@ -0,0 +1,377 @@
+# backend/core/autoscaler.py
+"""
+Autoescalonamento adaptativo da capacidade de execução.
+
+O Autoscaler amostra periodicamente a profundidade da fila, o p95 da espera em fila
+(janela desde a amostra anterior) e a latência p95 por agente, e ajusta:
+
+  - o número de workers do Scheduler, entre [min_workers, max_workers];
+  - o limite de concorrência de cada agente com limite configurado (ConcurrencyLimits).
+
+Histerese: o aumento exige 'up_samples' amostras consecutivas acima dos limiares e o
+recuo exige 'down_samples' amostras consecutivas abaixo dos limiares inferiores; entre
+eles há uma banda morta que zera as sequências. Cada direção tem seu cooldown. O aumento
+é proporcional à pressão (até max_step workers); o recuo remove um worker por vez.
+
+Para agentes, o controle é AIMD sobre a latência: se o p95 passa de 'agent_latency_tolerance'
+vezes a linha de base (menor p95 recente), o limite cai 25% (o recurso a jusante está saturado);
+se a latência está na linha de base e houve espera por vagas na janela, o limite sobe de 1.
+
+Cada decisão é registrada como evento (log estruturado, métrica e histórico em memória).
+
+Integração: a interface HTTP (init_cortex) inicia o Autoscaler com CORTEX_AUTOSCALE=1. O ajuste
+por agente exige que o CERNE seja construído com os mesmos ConcurrencyLimits passados aqui; o
+CORTEX os cria a partir de CORTEX_AGENT_CONCURRENCY nesse modo (o cortex_bench faz o mesmo com --autoscale).
+"""
+import math
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Deque, Dict, List, Optional
+
+from ..utilities.clock import SYSTEM_CLOCK
+from ..utilities.logger import CORTEX_LOGGER
+from ..utilities.metrics import (METRICS, QUEUE_WAIT_SECONDS, AGENT_EXECUTION_SECONDS, window_quantiles)
+
+AUTOSCALE_EVENTS_TOTAL = METRICS.counter(
+    "cortex_autoscale_events_total", "Decisões de escalonamento por alvo e direção.", ["target", "direction"])
+AGENT_CONCURRENCY_LIMIT = METRICS.gauge(
+    "cortex_agent_concurrency_limit", "Limite de execuções simultâneas por agente.", ["agent"])
+
+
+# --- Concorrência por Agente ---
+
+class _AgentSlots:
+    """Semáforo redimensionável com contagem de esperas (saturação)."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self.waits = 0    # Aquisições que precisaram esperar desde a última leitura
+        self.waiting = 0  # Threads bloqueadas neste momento aguardando uma vaga
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            if self.in_use >= self.limit:
+                self.waits += 1
+                self.waiting += 1
+                try:
+                    while self.in_use >= self.limit:
+                        self._cond.wait()
+                finally:
+                    self.waiting -= 1
+            self.in_use += 1
+
+    def release(self):
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify()
+
+    def set_limit(self, limit: int):
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+    def take_waits(self) -> int:
+        with self._cond:
+            waits, self.waits = self.waits, 0
+            return waits
+
+
+class ConcurrencyLimits:
+    """
+    Limites de execuções simultâneas por agente (usados pelo CERNE em volta de execute_task).
+    Agentes sem limite configurado (e sem default_limit) não são restringidos.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default_limit: Optional[int] = None):
+        self._default_limit = default_limit
+        self._lock = threading.Lock()
+        self._slots: Dict[str, _AgentSlots] = {}
+        for agent, limit in (limits or {}).items():
+            self.set_limit(agent, limit)
+
+    @classmethod
+    def from_env(cls) -> "ConcurrencyLimits":
+        """CORTEX_AGENT_CONCURRENCY='Pesquisador_Agente=8,Engenheiro_Agente=2' e CORTEX_AGENT_CONCURRENCY_DEFAULT."""
+        limits = {}
+        for item in os.environ.get("CORTEX_AGENT_CONCURRENCY", "").split(","):
+            name, _, value = item.partition("=")
+            if name.strip() and value:
+                limits[name.strip()] = int(value)
+        default = os.environ.get("CORTEX_AGENT_CONCURRENCY_DEFAULT")
+        return cls(limits, int(default) if default else None)
+
+    def _get(self, agent: str) -> Optional[_AgentSlots]:
+        slots = self._slots.get(agent)
+        if slots is None and self._default_limit is not None:
+            with self._lock:
+                slots = self._slots.get(agent)
+                if slots is None:
+                    slots = self._slots[agent] = _AgentSlots(self._default_limit)
+                    AGENT_CONCURRENCY_LIMIT.labels(agent).set(self._default_limit)
+        return slots
+
+    @contextmanager
+    def slot(self, agent: str):
+        """Reserva uma vaga de execução do agente (bloqueia enquanto o limite estiver atingido)."""
+        slots = self._get(agent)
+        if slots is None:
+            yield
+            return
+        slots.acquire()
+        try:
+            yield
+        finally:
+            slots.release()
+
+    def limit(self, agent: str) -> Optional[int]:
+        slots = self._slots.get(agent)
+        return slots.limit if slots is not None else None
+
+    def set_limit(self, agent: str, limit: int):
+        limit = max(1, int(limit))
+        with self._lock:
+            slots = self._slots.get(agent)
+            if slots is None:
+                self._slots[agent] = _AgentSlots(limit)
+            else:
+                slots.set_limit(limit)
+        AGENT_CONCURRENCY_LIMIT.labels(agent).set(limit)
+
+    def agents(self) -> List[str]:
+        with self._lock:
+            return list(self._slots)
+
+    def take_waits(self, agent: str) -> int:
+        slots = self._slots.get(agent)
+        return slots.take_waits() if slots is not None else 0
+
+    def waiting(self) -> int:
+        """Threads bloqueadas aguardando vaga em qualquer agente (workers parados pelo limite)."""
+        with self._lock:
+            slots = list(self._slots.values())
+        return sum(s.waiting for s in slots)
+
+
+# --- Política e Eventos ---
+
+@dataclass
+class ScalingPolicy:
+    """Limites e limiares do Autoscaler (tempos em segundos)."""
+    min_workers: int = 1
+    max_workers: int = 16
+    interval_s: float = 1.0
+    target_wait_s: float = 0.25      # p95 da espera acima disto: pressão alta
+    low_wait_s: float = 0.05         # p95 abaixo disto (e fila vazia, workers ociosos): pressão baixa
+    depth_per_worker: float = 4.0    # Fila acima de workers * depth_per_worker: pressão alta
+    low_utilization: float = 0.5     # Fração de workers ocupados abaixo da qual sobra capacidade
+    up_samples: int = 2
+    down_samples: int = 5
+    up_cooldown_s: float = 2.0
+    down_cooldown_s: float = 10.0
+    max_step: int = 4
+    agent_min: int = 1
+    agent_max: int = 32
+    agent_latency_tolerance: float = 2.0
+    agent_cooldown_s: float = 5.0
+
+    @classmethod
+    def from_env(cls) -> "ScalingPolicy":
+        """Sobrescreve os campos com CORTEX_AUTOSCALE_<CAMPO> (ex.: CORTEX_AUTOSCALE_MAX_WORKERS=32)."""
+        policy = cls()
+        for name, value in asdict(policy).items():
+            raw = os.environ.get(f"CORTEX_AUTOSCALE_{name.upper()}")
+            if raw is not None:
+                setattr(policy, name, type(value)(raw))
+        return policy
+
+
+@dataclass
+class AutoscaleSample:
+    timestamp: float
+    workers: int
+    busy: int
+    queue_depth: int
+    wait_p95_s: float
+    agent_p95_s: Dict[str, float] = field(default_factory=dict)
+    slot_waiters: int = 0  # Workers bloqueados em ConcurrencyLimits.slot() (não contam em 'busy')
+
+
+@dataclass
+class ScalingEvent:
+    timestamp: float
+    target: str          # 'workers' ou 'agent:<nome>'
+    old: int
+    new: int
+    reason: str
+    sample: Dict[str, Any]
+
+    @property
+    def direction(self) -> str:
+        return "up" if self.new > self.old else "down"
+
+
+# --- Controlador ---
+
+class Autoscaler(threading.Thread):
+    """Controlador periódico da capacidade do Scheduler e da concorrência por agente."""
+
+    def __init__(self, scheduler, policy: Optional[ScalingPolicy] = None,
+                 limits: Optional[ConcurrencyLimits] = None, clock=SYSTEM_CLOCK, history: int = 256):
+        """
+        :param scheduler: CERNEScheduler (worker_count, busy_workers, queue_depth(), resize()).
+        :param limits: Limites por agente ajustados pelo controlador (os mesmos passados ao CERNE).
+        """
+        super().__init__(name="Autoscaler-Thread", daemon=True)
+        self._scheduler = scheduler
+        self.policy = policy or ScalingPolicy.from_env()
+        self._limits = limits
+        self._clock = clock
+        self._stop_event = threading.Event()
+        self.events: Deque[ScalingEvent] = deque(maxlen=history)
+        self._wait_snapshot = QUEUE_WAIT_SECONDS.series_snapshot()
+        self._agent_snapshot = AGENT_EXECUTION_SECONDS.series_snapshot()
+        self._high_streak = 0
+        self._low_streak = 0
+        self._last_up = float("-inf")
+        self._last_change = float("-inf")
+        self._agent_baseline: Dict[str, float] = {}
+        self._agent_last_change: Dict[str, float] = {}
+
+    # --- Amostragem ---
+
+    def sample(self) -> AutoscaleSample:
+        """Lê o estado atual e as janelas dos histogramas desde a amostra anterior."""
+        wait_after = QUEUE_WAIT_SECONDS.series_snapshot()
+        wait_quantiles, _ = window_quantiles(QUEUE_WAIT_SECONDS, self._wait_snapshot, wait_after, (0.95,))
+        self._wait_snapshot = wait_after
+
+        agent_after = AGENT_EXECUTION_SECONDS.series_snapshot()
+        agent_p95 = {}
+        for labels in agent_after:
+            quantiles, count = window_quantiles(AGENT_EXECUTION_SECONDS, self._agent_snapshot, agent_after,
+                                                (0.95,), labels=labels)
+            if count:
+                agent_p95[labels[0]] = quantiles[0.95]
+        self._agent_snapshot = agent_after
+
+        slot_waiters = self._limits.waiting() if self._limits is not None else 0
+        return AutoscaleSample(
+            timestamp=self._clock.now(),
+            workers=self._scheduler.worker_count,
+            busy=max(0, self._scheduler.busy_workers - slot_waiters),
+            queue_depth=self._scheduler.queue_depth(),
+            wait_p95_s=wait_quantiles[0.95],
+            agent_p95_s=agent_p95,
+            slot_waiters=slot_waiters,
+        )
+
+    # --- Decisão ---
+
+    def step(self) -> List[ScalingEvent]:
+        """Uma iteração do controlador: amostra, decide e aplica. Retorna os eventos gerados."""
+        sample = self.sample()
+        events = []
+        event = self._scale_workers(sample)
+        if event is not None:
+            events.append(event)
+        if self._limits is not None:
+            events.extend(self._scale_agents(sample))
+        for event in events:
+            self._record(event)
+        return events
+
+    def _scale_workers(self, sample: AutoscaleSample) -> Optional[ScalingEvent]:
+        policy, workers, now = self.policy, sample.workers, sample.timestamp
+        depth_pressure = sample.queue_depth / (workers * policy.depth_per_worker)
+        wait_pressure = sample.wait_p95_s / policy.target_wait_s
+        # Workers bloqueados no limite de um agente: a fila espera pelo agente (ajustado pelo AIMD),
+        # não por workers. Sem esta condição, um corte do limite faria o pool crescer até max_workers.
+        high = (depth_pressure > 1.0 or wait_pressure > 1.0) and sample.slot_waiters == 0
+        low = (sample.wait_p95_s < policy.low_wait_s and sample.queue_depth == 0
+               and sample.busy < workers * policy.low_utilization)
+
+        if high:
+            self._high_streak, self._low_streak = self._high_streak + 1, 0
+        elif low:
+            self._high_streak, self._low_streak = 0, self._low_streak + 1
+        else:
+            # Banda morta: nenhuma sequência progride
+            self._high_streak = self._low_streak = 0
+            return None
+
+        if (high and self._high_streak >= policy.up_samples and workers < policy.max_workers
+                and now - self._last_up >= policy.up_cooldown_s):
+            # Pressão limitada: o p95 pode cair no bucket +Inf
+            desired = math.ceil(workers * min(max(depth_pressure, wait_pressure), policy.max_workers))
+            new = min(policy.max_workers, workers + max(1, min(policy.max_step, desired - workers)))
+            reason = f"fila={sample.queue_depth} espera_p95={sample.wait_p95_s:.3f}s"
+            self._last_up = self._last_change = now
+            self._high_streak = 0
+        elif (low and self._low_streak >= policy.down_samples and workers > policy.min_workers
+              and now - self._last_change >= policy.down_cooldown_s):
+            new = workers - 1
+            reason = f"ocupados={sample.busy}/{workers} espera_p95={sample.wait_p95_s:.3f}s"
+            self._last_change = now
+            self._low_streak = 0
+        else:
+            return None
+
+        self._scheduler.resize(new)
+        return ScalingEvent(now, "workers", workers, new, reason, asdict(sample))
+
+    def _scale_agents(self, sample: AutoscaleSample) -> List[ScalingEvent]:
+        policy, now, events = self.policy, sample.timestamp, []
+        for agent in self._limits.agents():
+            limit = self._limits.limit(agent)
+            waits = self._limits.take_waits(agent)
+            p95 = sample.agent_p95_s.get(agent)
+            if p95 is None:
+                continue
+            # Linha de base: menor p95 recente, relaxada lentamente para acompanhar mudanças de regime
+            baseline = min(p95, self._agent_baseline.get(agent, p95) * 1.05)
+            self._agent_baseline[agent] = baseline
+            if now - self._agent_last_change.get(agent, float("-inf")) < policy.agent_cooldown_s:
+                continue
+
+            if p95 > baseline * policy.agent_latency_tolerance and limit > policy.agent_min:
+                new = max(policy.agent_min, math.floor(limit * 0.75))
+                reason = f"latência_p95={p95:.3f}s base={baseline:.3f}s"
+            elif waits and p95 <= baseline * (1 + policy.agent_latency_tolerance) / 2 and limit < policy.agent_max:
+                new = limit + 1
+                reason = f"esperas={waits} latência_p95={p95:.3f}s"
+            else:
+                continue
+            self._limits.set_limit(agent, new)
+            self._agent_last_change[agent] = now
+            events.append(ScalingEvent(now, f"agent:{agent}", limit, new, reason, asdict(sample)))
+        return events
+
+    def _record(self, event: ScalingEvent):
+        self.events.append(event)
+        AUTOSCALE_EVENTS_TOTAL.labels(event.target.split(":")[0], event.direction).inc()
+        CORTEX_LOGGER.info(
+            f"Autoscaler: {event.target} {event.old} -> {event.new} ({event.reason}).",
+            extra_data={'event': 'autoscale', 'target': event.target, 'old': event.old, 'new': event.new,
+                        'reason': event.reason, 'queue_depth': event.sample['queue_depth'],
+                        'wait_p95_s': event.sample['wait_p95_s']}
+        )
+
+    # --- Ciclo de Vida ---
+
+    def run(self):
+        CORTEX_LOGGER.info("Autoscaler iniciado.", extra_data={'policy': asdict(self.policy)})
+        while not self._stop_event.wait(self.policy.interval_s):
+            try:
+                self.step()
+            except Exception as e:
+                CORTEX_LOGGER.error(f"Falha no ciclo do Autoscaler: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
@@ -1,10 +1,16 @@
+from contextlib import nullcontext
 from typing import Any, Dict, Optional
 import uuid
 import time
 from .agente_manager import AgenteManager, WorkerBase
 from .dataclasses import Task, TaskStatus, TaskPriority, GlobalContext, ExecutionTrace
-from .protocol import AgentMessage, AgentResponse 
+from .protocolo import AgentMessage, AgentResponse 
+from .status_hub import StatusHub, STATUS_HUB
+from ..persistence.blob_store import BlobStore, get_blob_store
 from ..utilities.logger import CORTEX_LOGGER 
+from ..utilities.metrics import AGENT_EXECUTION_SECONDS, AGENT_RESPONSES_TOTAL
+from ..utilities.tracing import TRACER
+from ..utilities.profiler import AgentTimer
 
 class CERNE: 
     """
@@ -14,11 +20,51 @@ class CERNE:
     
     # ... (Métodos __init__ e _create_new_adhoc_agent permanecem os mesmos)
     
-    def __init__(self, agente_manager: AgenteManager):
+    def __init__(self, agente_manager: AgenteManager, status_hub: StatusHub = STATUS_HUB, offloader=None,
+                 concurrency=None, blob_store: Optional[BlobStore] = None):
+        """
+        :param offloader: OffloadForwarder (modo EDGE): Tasks cujo agente alvo só roda em SERVER
+                          são encaminhadas ao SERVER em vez de acionar a Auto-Modulação.
+        :param concurrency: ConcurrencyLimits: limita execuções simultâneas por agente (ajustado pelo Autoscaler).
+        :param blob_store: Destino das saídas grandes de agentes (padrão: blob store do processo).
+                           O trace guarda apenas a referência por hash.
+        """
         self._manager = agente_manager
+        self._status_hub = status_hub
+        self._offloader = offloader
+        self._concurrency = concurrency
+        self._blob_store = blob_store
         CORTEX_LOGGER.info("CERNE (Kernel Lógico) ativado. Loop de Raciocínio Multi-Pass pronto.")
 
-    # ... (Método _create_new_adhoc_agent permanece o mesmo)
+    @property
+    def blob_store(self) -> BlobStore:
+        if self._blob_store is None:
+            self._blob_store = get_blob_store()
+        return self._blob_store
+
+    def endpoints_for(self, task: Task):
+        """Endpoints externos do agente que executará o próximo ciclo da Task (cotas do RateLimiter)."""
+        agent_name = task.delegated_to if task.status == TaskStatus.DELEGATED else task.required_agent
+        return self._manager.endpoints_for(agent_name) if agent_name else ()
+
+    def _update_status(self, task: Task, status: TaskStatus, agent_name: str, message: str, **kwargs):
+        """Aplica a transição de status na Task e a publica no StatusHub (push para assinantes)."""
+        task.update_status(status, agent_name, message, **kwargs)
+        self._status_hub.publish(task, agent_name, message, kwargs.get('result'))
+
+    def _create_new_adhoc_agent(self, purpose: str, complexity: str) -> str:
+        """
+        Auto-Modulação: registra no AgenteManager um agente ad hoc derivado do WorkerSimples
+        e retorna seu nome. Reutiliza o agente se ele já foi criado neste processo.
+        """
+        # Importado sob demanda: as implementações de agentes só carregam no primeiro uso
+        from ..agents.agent_impls import WorkerSimples
+
+        agent_name = f"{purpose}_{complexity}"
+        if agent_name not in self._manager.list_agents():
+            agent_class = type(agent_name, (WorkerSimples,), {'__doc__': f"Agente ad hoc ({purpose}, {complexity})."})
+            self._manager.register_agent(agent_class)
+        return agent_name
     
     # --- Novo: Método de Gerenciamento de Ciclo ---
     
@@ -29,6 +75,9 @@ class CERNE:
         # Aqui, o CERNE decide se a Task precisa de análise inicial ou se é uma retomada.
         if task.status in [TaskStatus.PENDING, TaskStatus.RETRY]:
             return self._execute_task_cycle(task, is_initial_run=True)
+        # Encadeamento: o próximo agente vem da sugestão registrada no último trace
+        if task.status == TaskStatus.DELEGATED:
+            return self._execute_task_cycle(task, is_initial_run=False)
         
         # Para outros status (ex: WAITING_BACKOFF), a lógica de retomada será adicionada no Scheduler.
         CORTEX_LOGGER.warning(f"Task {task.task_id} está no status {task.status.value}. Ignorando processamento neste ciclo.", extra_data={'task_id': task.task_id})
@@ -40,41 +89,64 @@ class CERNE:
         # Configura o contexto do Logger para esta Task
         CORTEX_LOGGER.set_task_context(task.task_id)
         CORTEX_LOGGER.info(f"Iniciando ciclo de execução.", extra_data={'task_id': task.task_id, 'initial_run': is_initial_run})
+        TRACER.set_task(task.task_id)
+        success = False
+        try:
+            with TRACER.span("cerne.cycle", {'task_id': task.task_id, 'initial_run': is_initial_run}) as cycle_span:
+                self._run_cycle_phases(task, is_initial_run)
+                cycle_span.set_attribute('status', task.status.value)
+            success = task.status not in (TaskStatus.FAILED, TaskStatus.RETRY)
+        finally:
+            # Mesmo com exceção: o contexto de tracing e de log não vaza para a próxima Task da thread.
+            # Falhas (FAILED/RETRY ou exceção) liberam os registros retidos da Task.
+            TRACER.set_task(None)
+            CORTEX_LOGGER.end_task_context(success=success)
+        return task
+
+    def _run_cycle_phases(self, task: Task, is_initial_run: bool):
+        """Fases do ciclo, cada uma em seu span (encerrado também quando a fase lança exceção)."""
 
         # 1. FASE DE ANÁLISE (e Determinação do Próximo Agente)
-        # O agente alvo é o 'required_agent' se for uma execução inicial, ou o sugerido pela última resposta.
-        required_agent_name = task.required_agent
-        
-        # Simulação de Lógica de Encadeamento: Se a task já tem trace, o próximo agente pode ser determinado pela sugestão
-        if not is_initial_run and task.trace_history:
-            last_trace = task.trace_history[-1]
-            # Assumimos que o campo 'result' do trace contém o AgentResponse desempacotado
-            suggested_action = last_trace.result_data.get('next_action') 
-            
-            if suggested_action and suggested_action.startswith("DELEGATE_TO_"):
-                required_agent_name = suggested_action.replace("DELEGATE_TO_", "")
-                task.update_status(TaskStatus.ANALYSIS, "CERNE", f"Encadeamento: Alvo definido como {required_agent_name}")
-            else:
-                # Caso a sugestão não seja de encadeamento, usa o agente inicial ou o último delegado.
-                required_agent_name = task.delegated_to or task.required_agent
-        
+        with TRACER.span("cerne.analysis"):
+            # O agente alvo é o 'required_agent' se for uma execução inicial, ou o sugerido pela última resposta.
+            required_agent_name = task.required_agent
+
+            # Simulação de Lógica de Encadeamento: Se a task já tem trace, o próximo agente pode ser determinado pela sugestão
+            if not is_initial_run and task.trace_history:
+                last_trace = task.trace_history[-1]
+                # Assumimos que o campo 'result' do trace contém o AgentResponse desempacotado
+                suggested_action = last_trace.result_data.get('next_action')
+
+                if suggested_action and suggested_action.startswith("DELEGATE_TO_"):
+                    required_agent_name = suggested_action.replace("DELEGATE_TO_", "")
+                    self._update_status(task, TaskStatus.ANALYSIS, "CERNE", f"Encadeamento: Alvo definido como {required_agent_name}")
+                else:
+                    # Caso a sugestão não seja de encadeamento, usa o agente inicial ou o último delegado.
+                    required_agent_name = task.delegated_to or task.required_agent
+
         # 2. FASE DE DELEGAÇÃO e 3. FASE DE REVISÃO (Mapeamento de Agente)
-        try:
-            worker = self._manager.get_agent(required_agent_name)
-        except ValueError:
-            # Caso o agente não exista ou falhe na inicialização, tenta Auto-Modulação
-            task.update_status(TaskStatus.ANALYSIS, "CERNE", "Agente indisponível. Acionando Auto-Modulação.")
-            new_agent_name = self._create_new_adhoc_agent(
-                purpose="Revisor_AdHoc", 
-                complexity="Simples" if task.context.cortex_mode == "EDGE" else "COMPLETO"
-            )
-            worker = self._manager.get_agent(new_agent_name)
-            required_agent_name = new_agent_name
-            
-        task.delegated_to = required_agent_name
+        with TRACER.span("cerne.delegation", {'requested_agent': required_agent_name}) as phase_span:
+            try:
+                worker = self._manager.get_agent(required_agent_name)
+            except ValueError:
+                if self._offloader is not None and self._offloader.can_offload(required_agent_name):
+                    # Agente pesado indisponível neste nó EDGE: encaminha a Task ao SERVER
+                    self._offload_task(task, required_agent_name, phase_span)
+                    return
+                # Caso o agente não exista ou falhe na inicialização, tenta Auto-Modulação
+                self._update_status(task, TaskStatus.ANALYSIS, "CERNE", "Agente indisponível. Acionando Auto-Modulação.")
+                new_agent_name = self._create_new_adhoc_agent(
+                    purpose="Revisor_AdHoc", 
+                    complexity="Simples" if task.context.cortex_mode == "EDGE" else "COMPLETO"
+                )
+                worker = self._manager.get_agent(new_agent_name)
+                required_agent_name = new_agent_name
+
+            task.delegated_to = required_agent_name
+            phase_span.set_attribute('agent', required_agent_name)
         
         # 4. FASE DE EXECUÇÃO
-        task.update_status(TaskStatus.IN_PROGRESS, "CERNE", f"Executando via {required_agent_name}")
+        self._update_status(task, TaskStatus.IN_PROGRESS, "CERNE", f"Executando via {required_agent_name}")
         
         execution_message = AgentMessage(
             task_id=task.task_id,
@@ -84,48 +156,81 @@ class CERNE:
         )
         
         try:
-            response: AgentResponse = worker.execute_task(message=execution_message)
+            with TRACER.span("agent.execute_task", {'agent': required_agent_name, 'message_id': execution_message.message_id}) as agent_span:
+                slot = self._concurrency.slot(required_agent_name) if self._concurrency is not None else nullcontext()
+                with slot, AgentTimer(required_agent_name):
+                    response: AgentResponse = worker.execute_task(message=execution_message)
+                agent_span.set_attribute('status_code', response.status_code)
+                agent_span.set_attribute('success', response.success)
+            AGENT_EXECUTION_SECONDS.labels(required_agent_name).observe(response.execution_time_ms / 1000.0)
+            AGENT_RESPONSES_TOTAL.labels(required_agent_name, response.status_code, response.success).inc()
             
             # Processamento da Resposta Estruturada
             
             # 5. NOVO: LÓGICA DE DECISÃO MULTI-PASS
-            final_status = TaskStatus.COMPLETED
-            next_action = response.suggested_next_action
-            
-            if not response.success:
-                # Caso de Falha de Execução (inclui falha de rede tratada pelo Agente)
-                
-                if next_action == "RETRY_IN_BACKOFF":
-                    final_status = TaskStatus.RETRY # Novo status de espera ativa
-                    CORTEX_LOGGER.warning("Agente sugeriu RETRY_IN_BACKOFF. Task será re-enfileirada.")
-                elif next_action == "EXTERNAL_MANUAL_REVIEW":
-                    final_status = TaskStatus.FAILED # Estado terminal
-                    CORTEX_LOGGER.critical("Agente sugeriu REVISÃO MANUAL. Task movida para FAILED.")
-                else:
-                    final_status = TaskStatus.FAILED
-                    CORTEX_LOGGER.error(f"Falha de execução não tratada: {response.log_message}")
-
-            elif next_action not in ["TASK_COMPLETED", "TASK_COMPLETED_SIMPLE"]:
-                # Caso de Sucesso e Sugestão de Continuação (Encadeamento)
-                final_status = TaskStatus.DELEGATED # Estado intermediário para indicar que requer novo ciclo
-                task.required_agent = required_agent_name # Manter o agente atual para o trace
-                CORTEX_LOGGER.info(f"Encadeamento sugerido: {next_action}. Task requer novo ciclo.")
-            
-            # Atualiza o trace com dados estruturados da resposta
-            task.update_status(
-                final_status, 
-                required_agent_name, 
-                response.log_message, 
-                result={'output_data': response.output_data, 'next_action': next_action, 'exec_time': response.execution_time_ms}, 
-                success=response.success
-            )
+            with TRACER.span("cerne.review", {'next_action': response.suggested_next_action}) as review_span:
+                final_status = TaskStatus.COMPLETED
+                next_action = response.suggested_next_action
+
+                if not response.success:
+                    # Caso de Falha de Execução (inclui falha de rede tratada pelo Agente)
+
+                    if next_action == "RETRY_IN_BACKOFF":
+                        final_status = TaskStatus.RETRY # Novo status de espera ativa
+                        CORTEX_LOGGER.warning("Agente sugeriu RETRY_IN_BACKOFF. Task será re-enfileirada.")
+                    elif next_action == "EXTERNAL_MANUAL_REVIEW":
+                        final_status = TaskStatus.FAILED # Estado terminal
+                        CORTEX_LOGGER.critical("Agente sugeriu REVISÃO MANUAL. Task movida para FAILED.")
+                    else:
+                        final_status = TaskStatus.FAILED
+                        CORTEX_LOGGER.error(f"Falha de execução não tratada: {response.log_message}")
+
+                elif next_action not in ["TASK_COMPLETED", "TASK_COMPLETED_SIMPLE"]:
+                    # Caso de Sucesso e Sugestão de Continuação (Encadeamento)
+                    final_status = TaskStatus.DELEGATED # Estado intermediário para indicar que requer novo ciclo
+                    task.required_agent = required_agent_name # Manter o agente atual para o trace
+                    CORTEX_LOGGER.info(f"Encadeamento sugerido: {next_action}. Task requer novo ciclo.")
+
+                # Atualiza o trace com dados estruturados da resposta
+                self._update_status(
+                    task,
+                    final_status, 
+                    required_agent_name, 
+                    response.log_message, 
+                    result={'output_data': self.blob_store.externalize(response.output_data), 'next_action': next_action, 'exec_time': response.execution_time_ms}, 
+                    success=response.success
+                )
+                review_span.set_attribute('final_status', final_status.value)
             
         except Exception as e:
             # ERRO FATAL (não tratado pelo Agente, ex: falha de memória do CERNE)
             error_message = f"ERRO FATAL (CERNE) na execução do agente {required_agent_name}: {e}"
-            task.update_status(TaskStatus.FAILED, required_agent_name, error_message, result=error_message, success=False)
+            AGENT_RESPONSES_TOTAL.labels(required_agent_name, "exception", False).inc()
             task.final_result = error_message
+            self._update_status(task, TaskStatus.FAILED, required_agent_name, error_message, result=error_message, success=False)
             CORTEX_LOGGER.critical(f"Execução FALHA IRRECUPERÁVEL. Status final: {TaskStatus.FAILED.value}", extra_data={'error': str(e)})
-            
-        CORTEX_LOGGER.set_task_context(None)
+
+    def _offload_task(self, task: Task, agent_name: str, phase_span):
+        """Grava a Task no buffer de offload; o resultado volta via concluir_offload()."""
+        self._offloader.submit(task, agent_name)
+        task.delegated_to = agent_name
+        phase_span.set_attribute('agent', agent_name)
+        phase_span.set_attribute('offload', True)
+        self._update_status(task, TaskStatus.DELEGATED, "CERNE", f"Offload: {agent_name} encaminhado ao SERVER")
+
+    def concluir_offload(self, task: Task, result: Dict[str, Any]) -> Task:
+        """Aplica ao estado local o resultado de uma Task executada no SERVER (offload)."""
+        status = TaskStatus(result['status'])
+        agent_name = result.get('delegated_to') or task.delegated_to or "SERVER"
+        task.delegated_to = agent_name
+        task.final_result = self.blob_store.externalize(result.get('final_result'))
+        self._update_status(
+            task,
+            status,
+            agent_name,
+            f"Resultado de offload recebido do SERVER ({status.value}).",
+            result={'output_data': task.final_result, 'offload': True,
+                    'remote_trace': self.blob_store.externalize(result.get('trace_history', []))},
+            success=status == TaskStatus.COMPLETED
+        )
         return task
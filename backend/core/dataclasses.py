@@ -1,32 +1,74 @@
 # backend/core/dataclasses.py (Arquivo NOVO)
 
-from dataclasses import dataclass
-from typing import Literal
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional
 
-# Definições de Tipos (Módulos/Strings)
-TaskStatus = Literal["PENDING", "PROCESSING", "COMPLETED", "FAILED"]
-TaskPriority = Literal["HIGH", "MEDIUM", "LOW"]
 
-@dataclass
-class Task:
-    """ Representa uma tarefa a ser processada pelo CORTEX. """
-    task_id: str
-    content: str
-    status: TaskStatus = "PENDING"
-    priority: TaskPriority = "MEDIUM"
-    created_at: str = ""
+class TaskStatus(Enum):
+    """ Estados do ciclo de vida de uma Task (persistidos pelo valor). """
+    PENDING = "PENDING"
+    ANALYSIS = "ANALYSIS"
+    IN_PROGRESS = "IN_PROGRESS"
+    DELEGATED = "DELEGATED"
+    RETRY = "RETRY"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class TaskPriority(Enum):
+    """ Prioridade da Task: valores maiores são despachados primeiro. """
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    CRITICAL = 4
+
 
 @dataclass
 class ExecutionTrace:
     """ Rastreia logs e eventos durante a execução de uma Task. """
-    trace_id: str
-    task_id: str
-    log_message: str
-    timestamp: str
+    timestamp: float
+    agent_name: str
+    action_description: str
+    result_data: Any = None
+    success: bool = True
 
-@dataclass
+
+@dataclass(frozen=True)
 class GlobalContext:
-    """ Mantém configurações de estado global. """
-    db_connection_status: str = "DISCONNECTED"
-    api_key_valid: bool = False
-    # Adicione outros campos conforme a necessidade
+    """ Contexto da sessão que originou a Task (propagado aos agentes e persistido com ela). """
+    session_id: str
+    cortex_mode: str = "SERVER"
+    initial_prompt: str = ""
+    environment_vars: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Task:
+    """ Representa uma tarefa a ser processada pelo CORTEX. """
+    task_id: str
+    description: str
+    context: GlobalContext
+    priority: TaskPriority = TaskPriority.MEDIUM
+    required_agent: Optional[str] = None
+    status: TaskStatus = TaskStatus.PENDING
+    delegated_to: Optional[str] = None
+    creation_time: float = field(default_factory=time.time)
+    last_update_time: float = field(default_factory=time.time)
+    final_result: Any = None
+    trace_history: List[ExecutionTrace] = field(default_factory=list)
+
+    def update_status(self, status: TaskStatus, agent_name: str, message: str, result: Any = None,
+                      success: bool = True):
+        """ Aplica a transição de status e registra o passo no histórico de execução. """
+        now = time.time()
+        self.status = status
+        self.last_update_time = now
+        self.trace_history.append(ExecutionTrace(
+            timestamp=now,
+            agent_name=agent_name,
+            action_description=message,
+            result_data=result,
+            success=success
+        ))
@@ -0,0 +1,343 @@
+# backend/core/fair_share.py
+"""
+Fair share entre tenants na TaskQueue.
+
+A prioridade continua estrita entre classes. Dentro de cada classe, as Tasks são agrupadas em
+fluxos por tenant e despachadas por Deficit Round Robin: a cada visita, o fluxo recebe um
+quantum igual ao peso do tenant e despacha uma Task por unidade de déficit. Um tenant que
+inunda a fila disputa apenas a sua fatia, em vez de atrasar os demais pelo backlog inteiro.
+
+Tenants com limite de Tasks em execução (in-flight) saem da rodada ao atingi-lo e voltam
+quando uma de suas Tasks termina (done()). O custo por despacho é O(1) amortizado no número
+de tenants (mais uma varredura das poucas classes de prioridade).
+
+O tenant vem dos metadados da requisição (GlobalContext.environment_vars[CORTEX_TENANT_KEY]);
+Tasks sem tenant compartilham o tenant 'default' e mantêm a ordem FIFO anterior.
+
+Com spill, a reidratação de um fluxo é solicitada quando o seu lote em memória cai à metade e
+executada pela TaskQueue fora do lock (next_refill/refilled). Um fluxo com o lote vazio e Tasks
+no disco fica fora da rodada até a leitura ser concluída.
+"""
+import heapq
+import itertools
+import os
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from ..persistence.queue_spill import SpillRun
+
+DEFAULT_TENANT = "default"
+OTHER_TENANTS_LABEL = "_other"
+
+
+def _parse_map(spec: str, cast: Callable[[str], Any]) -> Dict[str, Any]:
+    """'acme=4,beta=0.5' -> {'acme': 4.0, 'beta': 0.5}."""
+    result = {}
+    for item in spec.split(","):
+        name, _, value = item.strip().rpartition("=")
+        if name:
+            result[name] = cast(value)
+    return result
+
+
+@dataclass
+class TenantPolicy:
+    """Chave de tenant, pesos de DRR e limites de Tasks em execução por tenant."""
+    tenant_key: str = "tenant"
+    weights: Dict[str, float] = field(default_factory=dict)
+    max_in_flight: Dict[str, int] = field(default_factory=dict)
+    default_weight: float = 1.0
+    default_max_in_flight: int = 0   # 0 = sem limite
+    metric_tenants: int = 100        # Tenants com série própria nas métricas; os demais somam em '_other'
+    _labelled: Set[str] = field(default_factory=set, repr=False)
+
+    def __post_init__(self):
+        if self.default_weight <= 0 or any(weight <= 0 for weight in self.weights.values()):
+            raise ValueError("Pesos de tenant devem ser positivos.")
+
+    @classmethod
+    def from_env(cls) -> "TenantPolicy":
+        """
+        CORTEX_TENANT_KEY (padrão 'tenant'), CORTEX_TENANT_WEIGHTS='acme=4,beta=0.5',
+        CORTEX_TENANT_MAX_IN_FLIGHT='acme=8', CORTEX_TENANT_DEFAULT_WEIGHT (1),
+        CORTEX_TENANT_DEFAULT_MAX_IN_FLIGHT (0 = sem limite) e CORTEX_TENANT_METRIC_LIMIT (100).
+        """
+        return cls(
+            tenant_key=os.environ.get("CORTEX_TENANT_KEY", "tenant"),
+            weights=_parse_map(os.environ.get("CORTEX_TENANT_WEIGHTS", ""), float),
+            max_in_flight=_parse_map(os.environ.get("CORTEX_TENANT_MAX_IN_FLIGHT", ""), int),
+            default_weight=float(os.environ.get("CORTEX_TENANT_DEFAULT_WEIGHT", "1")),
+            default_max_in_flight=int(os.environ.get("CORTEX_TENANT_DEFAULT_MAX_IN_FLIGHT", "0")),
+            metric_tenants=int(os.environ.get("CORTEX_TENANT_METRIC_LIMIT", "100")),
+        )
+
+    def tenant_of(self, task) -> str:
+        environment = getattr(getattr(task, "context", None), "environment_vars", None)
+        tenant = environment.get(self.tenant_key) if environment else None
+        return str(tenant) if tenant not in (None, "") else DEFAULT_TENANT
+
+    def weight(self, tenant: str) -> float:
+        return self.weights.get(tenant, self.default_weight)
+
+    def cap(self, tenant: str) -> int:
+        return self.max_in_flight.get(tenant, self.default_max_in_flight)
+
+    def metric_label(self, tenant: str) -> str:
+        """Rótulo do tenant nas métricas, com cardinalidade limitada a metric_tenants séries."""
+        if tenant in self._labelled:
+            return tenant
+        if len(self._labelled) < self.metric_tenants:
+            self._labelled.add(tenant)
+            return tenant
+        return OTHER_TENANTS_LABEL
+
+
+class _Flow:
+    """Tasks de um tenant em uma classe de prioridade: heap em memória e fila de spill opcional."""
+    __slots__ = ("tenant", "priority", "heap", "run", "deficit", "scheduled")
+
+    def __init__(self, tenant: str, priority: int):
+        self.tenant = tenant
+        self.priority = priority
+        self.heap: List[tuple] = []
+        self.run: Optional[SpillRun] = None
+        self.deficit = 0.0
+        self.scheduled = False   # Presente na rodada da classe
+
+    def __len__(self) -> int:
+        return len(self.heap) + (len(self.run) if self.run is not None else 0)
+
+    def blocked(self) -> bool:
+        """Cabeça desconhecida: lote em memória vazio e Tasks no spill aguardando reidratação."""
+        return self.run is not None and self.run.blocked
+
+    def head_in_run(self) -> bool:
+        head = self.run.head() if self.run is not None else None
+        return head is not None and (not self.heap or head[:3] < self.heap[0][:3])
+
+
+class _Tenant:
+    __slots__ = ("name", "flows", "queued", "in_flight", "capped")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.flows: Dict[int, _Flow] = {}   # Prioridade invertida -> fluxo
+        self.queued = 0
+        self.in_flight = 0
+        self.capped = False
+
+
+class FairQueue:
+    """
+    Fluxos por (prioridade, tenant) com DRR dentro de cada prioridade.
+    Entradas: (prioridade invertida, tempo de criação, sequência, ...); cada fluxo é ordenado pela chave.
+    Não é thread-safe (a TaskQueue serializa o acesso; a I/O dos SpillRun fica com ela, fora do lock).
+    """
+
+    def __init__(self, policy: TenantPolicy, make_run: Optional[Callable[[str], SpillRun]] = None,
+                 max_open_spills: int = 64):
+        """
+        :param make_run: Cria a fila de spill de um fluxo (None desativa o spill).
+        :param max_open_spills: Fluxos com arquivos de spill abertos; os menos recentes liberam os descritores.
+        """
+        self._policy = policy
+        self._make_run = make_run
+        self._max_open_spills = max_open_spills
+        self._rounds: Dict[int, Deque[_Flow]] = {}
+        self._tenants: Dict[str, _Tenant] = {}
+        self._open_spills: "OrderedDict[SpillRun, None]" = OrderedDict()
+        self._refills: Deque[SpillRun] = deque()   # Reidratações solicitadas e ainda não iniciadas
+        self._run_ids = itertools.count()
+        self.size = 0
+        self.capped_size = 0   # Tasks de tenants no limite de in-flight
+        self.heap_size = 0     # Entradas residentes nos heaps (base da marca d'água)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def ready(self) -> int:
+        """Tasks elegíveis para despacho agora."""
+        return self.size - self.capped_size
+
+    def push(self, tenant: str, entry: tuple, spill: bool = False) -> Optional[SpillRun]:
+        """
+        Adiciona a entrada ao fluxo do tenant.
+        :return: A fila de spill que recebeu a entrada (o chamador executa flush() fora do lock) ou None.
+        """
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._tenants[tenant] = _Tenant(tenant)
+        flow = state.flows.get(entry[0])
+        if flow is None:
+            flow = state.flows[entry[0]] = _Flow(tenant, entry[0])
+        run = self._spill(flow, entry) if spill and self._make_run is not None else None
+        if run is None:
+            heapq.heappush(flow.heap, entry)
+            self.heap_size += 1
+        state.queued += 1
+        self.size += 1
+        if state.capped:
+            self.capped_size += 1
+        elif not flow.scheduled:
+            self._schedule(flow)
+        return run
+
+    def _schedule(self, flow: _Flow):
+        flow.scheduled = True
+        flow.deficit = 0.0
+        rounds = self._rounds.get(flow.priority)
+        if rounds is None:
+            rounds = self._rounds[flow.priority] = deque()
+        rounds.append(flow)
+
+    def _spill(self, flow: _Flow, entry: tuple) -> Optional[SpillRun]:
+        """Chaves fora de ordem (ex.: retries com tempo de criação antigo) permanecem no heap."""
+        if flow.run is None:
+            flow.run = self._make_run(f"p{-flow.priority}-f{next(self._run_ids)}")
+        key = entry[:3]
+        if not flow.run.accepts(key):
+            return None
+        flow.run.push(key, entry)
+        self._touch(flow.run)
+        return flow.run
+
+    def _touch(self, run: SpillRun):
+        """LRU das filas com descritores de spill abertos (muitos tenants não esgotam os descritores do processo)."""
+        self._open_spills[run] = None
+        self._open_spills.move_to_end(run)
+        if len(self._open_spills) > self._max_open_spills:
+            oldest, _ = self._open_spills.popitem(last=False)
+            oldest.release_files()
+
+    def _request_refill(self, run: SpillRun):
+        if run.request_refill():
+            self._refills.append(run)
+
+    def next_refill(self) -> Optional[SpillRun]:
+        """Próxima reidratação solicitada: o chamador executa run.read_batch() fora do lock e aplica com refilled()."""
+        while self._refills:
+            run = self._refills.popleft()
+            if run.refill_size:
+                return run
+        return None
+
+    def refilled(self, run: SpillRun, records: List[tuple]):
+        """Aplica o lote lido (lista vazia após falha de leitura: a reidratação volta a ser solicitável)."""
+        run.refilled(records)
+        if records and run in self._open_spills:
+            self._touch(run)
+
+    def pop(self) -> Optional[Tuple[str, tuple, bool]]:
+        """
+        Remove a próxima entrada: classe de maior prioridade com fluxos elegíveis e DRR entre eles.
+        Fluxos aguardando reidratação são pulados; se a classe tiver apenas esses, nada é retornado
+        (as classes inferiores não passam à frente) até a leitura ser aplicada.
+        :return: (tenant, entrada, veio do spill) ou None se nada estiver elegível agora.
+        """
+        if not self.ready:
+            return None
+        for priority in sorted(self._rounds):
+            rounds = self._rounds[priority]
+            blocked = 0   # Fluxos bloqueados consecutivos na rodada
+            while rounds:
+                flow = rounds[0]
+                tenant = self._tenants[flow.tenant]
+                if tenant.capped:
+                    # Remoção preguiçosa: o fluxo volta à rodada em done()
+                    rounds.popleft()
+                    flow.scheduled = False
+                    continue
+                if flow.blocked():
+                    self._request_refill(flow.run)
+                    blocked += 1
+                    if blocked >= len(rounds):
+                        return None
+                    rounds.rotate(-1)
+                    continue
+                if flow.deficit < 1.0:
+                    flow.deficit += self._policy.weight(flow.tenant)
+                    if flow.deficit < 1.0:
+                        blocked = 0
+                        rounds.rotate(-1)
+                        continue
+                return self._serve(rounds, flow, tenant)
+        return None
+
+    def _serve(self, rounds: Deque[_Flow], flow: _Flow, tenant: _Tenant) -> Tuple[str, tuple, bool]:
+        flow.deficit -= 1.0
+        from_run = False
+        if flow.head_in_run():
+            from_run = True
+            entry = flow.run.pop()
+            self._request_refill(flow.run)
+        else:
+            entry = heapq.heappop(flow.heap)
+            self.heap_size -= 1
+        tenant.queued -= 1
+        tenant.in_flight += 1
+        self.size -= 1
+        if not len(flow):
+            rounds.popleft()
+            flow.scheduled = False
+            del tenant.flows[flow.priority]
+            self._drop_run(flow)
+        elif flow.deficit < 1.0:
+            rounds.rotate(-1)
+        cap = self._policy.cap(tenant.name)
+        if cap and tenant.in_flight >= cap:
+            tenant.capped = True
+            self.capped_size += tenant.queued
+        return tenant.name, entry, from_run
+
+    def done(self, tenant: str) -> bool:
+        """
+        Registra o fim de uma Task despachada do tenant.
+        :return: True se o tenant saiu do limite de in-flight (Tasks voltaram a ser elegíveis).
+        """
+        state = self._tenants.get(tenant)
+        if state is None or not state.in_flight:
+            return False
+        state.in_flight -= 1
+        released = False
+        if state.capped and state.in_flight < self._policy.cap(tenant):
+            state.capped = False
+            self.capped_size -= state.queued
+            for flow in state.flows.values():
+                if not flow.scheduled:
+                    self._schedule(flow)
+            released = state.queued > 0
+        if not state.in_flight and not state.flows:
+            del self._tenants[tenant]
+        return released
+
+    def _drop_run(self, flow: _Flow):
+        if flow.run is not None:
+            self._open_spills.pop(flow.run, None)
+            flow.run.close()
+            flow.run = None
+
+    def in_flight(self, tenant: str) -> int:
+        state = self._tenants.get(tenant)
+        return state.in_flight if state is not None else 0
+
+    def resident(self) -> int:
+        """Entradas com corpo em memória (heaps + lotes reidratados)."""
+        return self.heap_size + sum(len(flow.run.buffer) for flow in self._flows() if flow.run is not None)
+
+    def spill_bytes(self) -> int:
+        return sum(flow.run.spill.bytes_on_disk for flow in self._flows() if flow.run is not None)
+
+    def _flows(self):
+        return (flow for state in self._tenants.values() for flow in state.flows.values())
+
+    def close(self):
+        """Descarta os fluxos e suas filas de spill."""
+        for flow in list(self._flows()):
+            self._drop_run(flow)
+        self._tenants.clear()
+        self._rounds.clear()
+        self._open_spills.clear()
+        self._refills.clear()
+        self.size = self.capped_size = self.heap_size = 0
@@ -0,0 +1,543 @@
+# backend/core/offload.py
+"""
+Offload EDGE -> SERVER com store-and-forward em lotes.
+
+Um nó EDGE que não serve o agente alvo de uma Task (ex.: Engenheiro_Agente) a encaminha
+a um CORTEX em modo SERVER em vez de recorrer a um agente ad-hoc:
+
+  1. OffloadForwarder.submit() grava a Task no journal local (KIND_OFFLOAD, fsync imediato).
+     O journal é o buffer de store-and-forward: entradas sobrevivem à perda do uplink e a reinícios.
+  2. Uma thread envia as entradas ainda não aceitas em lotes comprimidos (zlib sobre encode_blob)
+     para POST /offload/batch. Em falha de rede, aguarda com backoff exponencial e reenvia.
+  3. Outra thread faz long-poll em POST /offload/results: o SERVER devolve, em lotes, os resultados
+     das Tasks concluídas assim que terminam. O resultado é aplicado ao estado local da Task
+     (via callback) e só então confirmado no journal e, no poll seguinte, ao SERVER.
+
+Semântica at-least-once: o SERVER deduplica por (origem, task_id) — em memória e, após reinícios,
+pelo Repositório — e retém cada resultado até a confirmação; o EDGE ignora resultados repetidos
+de Tasks já confirmadas.
+"""
+import asyncio
+import itertools
+import os
+import random
+import socket
+import threading
+import time
+import urllib.request
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from ..persistence.db_models import encode_blob, decode_blob
+from ..persistence.blob_store import find_refs, get_blob_store
+from ..persistence.local_journal import LocalJournal, JournalEntry, KIND_OFFLOAD
+from ..utilities.logger import CORTEX_LOGGER
+from ..utilities.metrics import METRICS
+
+OFFLOAD_BATCH_PATH = "/offload/batch"
+OFFLOAD_RESULTS_PATH = "/offload/results"
+OFFLOAD_CONTENT_TYPE = "application/x-cortex-offload"
+
+# Long-poll máximo aceito pelo receptor (segundos)
+MAX_RESULTS_WAIT_S = 30.0
+
+OFFLOAD_BATCHES_TOTAL = METRICS.counter(
+    "cortex_offload_batches_total", "Lotes de offload trocados com o SERVER.", ["direction", "outcome"])
+OFFLOAD_BYTES_TOTAL = METRICS.counter(
+    "cortex_offload_bytes_total", "Bytes de lotes de offload (antes/depois da compressão).", ["direction", "encoding"])
+OFFLOAD_BACKLOG = METRICS.gauge(
+    "cortex_offload_backlog", "Tasks de offload no journal local ainda não resolvidas.")
+
+
+# --- Formato dos Lotes ---
+
+def pack_batch(value: Any, direction: str = "tx") -> bytes:
+    """Serializa (codec do repositório) e comprime um lote."""
+    raw = encode_blob(value)
+    packed = zlib.compress(raw, 6)
+    OFFLOAD_BYTES_TOTAL.labels(direction, "raw").inc(len(raw))
+    OFFLOAD_BYTES_TOTAL.labels(direction, "zlib").inc(len(packed))
+    return packed
+
+
+def unpack_batch(payload: bytes) -> Any:
+    return decode_blob(zlib.decompress(payload))
+
+
+def task_payload(task, agent_name: str) -> Dict[str, Any]:
+    """Campos da Task necessários para executá-la no SERVER (mesmo formato do journal KIND_TASK)."""
+    context = task.context
+    return {
+        'task_id': task.task_id,
+        'description': task.description,
+        'context': {
+            'session_id': context.session_id,
+            'cortex_mode': context.cortex_mode,
+            'initial_prompt': context.initial_prompt,
+            'environment_vars': context.environment_vars,
+        },
+        'priority': task.priority.name,
+        'required_agent': agent_name,
+    }
+
+
+def task_result(task) -> Dict[str, Any]:
+    """
+    Resultado de uma Task concluída no SERVER, no formato devolvido ao EDGE.
+    Referências do blob store local são substituídas pelo conteúdo (o EDGE não acessa este disco).
+    """
+    result = {
+        'task_id': task.task_id,
+        'status': task.status.value if hasattr(task.status, "value") else task.status,
+        'delegated_to': task.delegated_to,
+        'final_result': task.final_result,
+        'trace_history': [t if isinstance(t, dict) else dict(t.__dict__) for t in task.trace_history],
+    }
+    if find_refs(result):
+        result = get_blob_store().resolve(result)
+    return result
+
+
+# --- Transporte ---
+
+class HttpOffloadTransport:
+    """Transporte HTTP (stdlib) até a Interface de um CORTEX SERVER."""
+
+    def __init__(self, base_url: str, timeout_s: float = 10.0, token: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self._timeout_s = timeout_s
+        self._headers = {"Content-Type": OFFLOAD_CONTENT_TYPE}
+        if token:
+            self._headers["X-Offload-Token"] = token
+
+    def post(self, path: str, payload: bytes, timeout: Optional[float] = None) -> bytes:
+        """Envia um lote. Erros de rede e respostas não-2xx propagam como exceção (OSError/HTTPError)."""
+        request = urllib.request.Request(self.base_url + path, data=payload, headers=self._headers, method="POST")
+        with urllib.request.urlopen(request, timeout=timeout or self._timeout_s) as response:
+            return response.read()
+
+
+# --- Lado EDGE ---
+
+class OffloadForwarder:
+    """
+    Encaminha Tasks a um SERVER com store-and-forward no journal local e recebe os resultados.
+    O callback on_result(task, data, result) é chamado na thread de resultados; 'task' é o objeto
+    submetido neste processo ou None (Task recuperada do journal após reinício), e 'data' é o
+    payload gravado no journal. Após aplicar o resultado, o chamador deve invocar ack(task_id).
+    """
+
+    def __init__(self, transport, journal: LocalJournal,
+                 on_result: Optional[Callable[[Any, Dict[str, Any], Dict[str, Any]], None]] = None,
+                 origin: Optional[str] = None, batch_size: int = 32, linger_s: float = 0.05,
+                 poll_wait_s: float = 10.0, max_backoff_s: float = 30.0):
+        """
+        :param transport: Objeto com post(path, payload, timeout) -> bytes (ex.: HttpOffloadTransport).
+        :param origin: Identificador deste nó EDGE no SERVER (padrão: hostname).
+        :param batch_size: Máximo de Tasks por lote enviado.
+        :param linger_s: Espera para acumular Tasks em um lote após a primeira submissão.
+        :param poll_wait_s: Duração do long-poll de resultados.
+        :param max_backoff_s: Teto do backoff exponencial durante a perda do uplink.
+        """
+        self._transport = transport
+        self._journal = journal
+        self.on_result = on_result
+        self.origin = origin or socket.gethostname()
+        self._batch_size = batch_size
+        self._linger_s = linger_s
+        self._poll_wait_s = min(poll_wait_s, MAX_RESULTS_WAIT_S)
+        self._max_backoff_s = max_backoff_s
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, Any] = {}      # Tasks submetidas neste processo
+        # Índice task_id -> entrada KIND_OFFLOAD pendente no journal (ordem de gravação), carregado
+        # uma única vez: submit/ack/envio não reordenam as pendências do journal a cada chamada
+        self._entries: "OrderedDict[str, JournalEntry]" = OrderedDict(
+            (e.data['task_id'], e) for e in journal.pending(KIND_OFFLOAD))
+        self._queued: "OrderedDict[str, JournalEntry]" = OrderedDict(self._entries)  # Ainda não aceitas
+        OFFLOAD_BACKLOG.set(len(self._entries))
+        self._accepted: Set[str] = set()      # Aceitas pelo SERVER (não reenviar)
+        self._received: Set[str] = set()      # Resultado entregue ao callback, aguardando ack()
+        self._server_acks: List[str] = []     # Confirmações a enviar no próximo poll
+        self._forward_wake = threading.Event()
+        self._results_wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._uplink_up = True
+        self._threads: List[threading.Thread] = []
+
+    @classmethod
+    def from_env(cls, journal: LocalJournal, **kwargs) -> Optional["OffloadForwarder"]:
+        """Forwarder configurado por CORTEX_OFFLOAD_URL (None se o offload estiver desligado)."""
+        url = os.environ.get("CORTEX_OFFLOAD_URL")
+        if not url:
+            return None
+        transport = HttpOffloadTransport(url, token=os.environ.get("CORTEX_OFFLOAD_TOKEN"))
+        kwargs.setdefault("batch_size", int(os.environ.get("CORTEX_OFFLOAD_BATCH", "32")))
+        return cls(transport, journal, **kwargs)
+
+    # --- API ---
+
+    def can_offload(self, agent_name: str) -> bool:
+        """True se o agente é conhecido e roda em modo SERVER."""
+        from .agent_registry import discover_agent_specs
+
+        spec = discover_agent_specs().get(agent_name)
+        return spec is not None and spec.supports("SERVER")
+
+    def submit(self, task, agent_name: str) -> int:
+        """Grava a Task no buffer local (durável) e agenda o envio. Idempotente por task_id."""
+        with self._lock:
+            self._tasks[task.task_id] = task
+            entry = self._entries.get(task.task_id)
+            if entry is None:
+                data = task_payload(task, agent_name)
+                entry = JournalEntry(seq=self._journal.append(KIND_OFFLOAD, data, sync=True), kind=KIND_OFFLOAD, data=data)
+                self._entries[task.task_id] = self._queued[task.task_id] = entry
+            OFFLOAD_BACKLOG.set(len(self._entries))
+        self._forward_wake.set()
+        return entry.seq
+
+    def ack(self, task_id: str):
+        """Confirma que o resultado foi aplicado localmente: libera o journal e o SERVER."""
+        with self._lock:
+            entry = self._entries.pop(task_id, None)
+            self._queued.pop(task_id, None)
+            self._tasks.pop(task_id, None)
+            self._accepted.discard(task_id)
+            self._received.discard(task_id)
+            self._server_acks.append(task_id)
+            OFFLOAD_BACKLOG.set(len(self._entries))
+        if entry is not None:
+            self._journal.ack(entry.seq, sync=True)
+        self._results_wake.set()
+
+    def is_offloaded(self, task_id: str) -> bool:
+        """True se a Task foi submetida por este processo e aguarda o resultado do SERVER."""
+        with self._lock:
+            return task_id in self._tasks
+
+    def backlog(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def uplink_up(self) -> bool:
+        return self._uplink_up
+
+    # --- Ciclo de Vida ---
+
+    def start(self):
+        for target, name in ((self._forward_loop, "Offload-Forwarder"), (self._results_loop, "Offload-Results")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        CORTEX_LOGGER.info(
+            f"Offload EDGE->SERVER ativo: {getattr(self._transport, 'base_url', self._transport)}",
+            extra_data={'origin': self.origin, 'backlog': self.backlog()}
+        )
+
+    def stop(self):
+        self._stop_event.set()
+        self._forward_wake.set()
+        self._results_wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    # --- Envio ---
+
+    def _unsent(self) -> List[JournalEntry]:
+        """Próximo lote ainda não aceito pelo SERVER, em ordem de gravação."""
+        with self._lock:
+            return list(itertools.islice(self._queued.values(), self._batch_size))
+
+    def _forward_loop(self):
+        failures = 0
+        while not self._stop_event.is_set():
+            batch = self._unsent()
+            if not batch:
+                self._forward_wake.wait(1.0)
+                self._forward_wake.clear()
+                continue
+            if len(batch) < self._batch_size and self._linger_s:
+                self._stop_event.wait(self._linger_s)
+                batch = self._unsent()
+            try:
+                reply = unpack_batch(self._transport.post(
+                    OFFLOAD_BATCH_PATH, pack_batch({'origin': self.origin, 'tasks': [e.data for e in batch]})))
+            except Exception as e:
+                failures += 1
+                OFFLOAD_BATCHES_TOTAL.labels("tx", "error").inc()
+                self._uplink_lost(e, failures)
+                continue
+            failures = 0
+            self._uplink_restored()
+            OFFLOAD_BATCHES_TOTAL.labels("tx", "ok").inc()
+            with self._lock:
+                self._accepted.update(reply['accepted'])
+                for task_id in reply['accepted']:
+                    self._queued.pop(task_id, None)
+            self._results_wake.set()
+            CORTEX_LOGGER.info(
+                f"Lote de offload aceito pelo SERVER: {len(reply['accepted'])} Tasks.",
+                extra_data={'origin': self.origin, 'duplicates': reply.get('duplicates', 0)}
+            )
+
+    # --- Recebimento de Resultados ---
+
+    def _results_loop(self):
+        failures = 0
+        while not self._stop_event.is_set():
+            with self._lock:
+                outstanding = [t for t in self._accepted if t not in self._received]
+                acks = list(self._server_acks)
+            if not outstanding and not acks:
+                self._results_wake.wait(1.0)
+                self._results_wake.clear()
+                continue
+            wait = self._poll_wait_s if outstanding else 0.0
+            request = {'origin': self.origin, 'outstanding': outstanding, 'ack': acks, 'wait': wait}
+            try:
+                reply = unpack_batch(self._transport.post(
+                    OFFLOAD_RESULTS_PATH, pack_batch(request), timeout=wait + 10.0))
+            except Exception as e:
+                failures += 1
+                OFFLOAD_BATCHES_TOTAL.labels("rx", "error").inc()
+                self._uplink_lost(e, failures)
+                continue
+            failures = 0
+            self._uplink_restored()
+            OFFLOAD_BATCHES_TOTAL.labels("rx", "ok").inc()
+            with self._lock:
+                del self._server_acks[:len(acks)]
+                # Tasks que o SERVER não conhece (ex.: reiniciado antes de concluí-las) são reenviadas
+                self._accepted.difference_update(reply['unknown'])
+                for task_id in reply['unknown']:
+                    if task_id in self._entries:
+                        self._queued[task_id] = self._entries[task_id]
+            if reply['unknown']:
+                self._forward_wake.set()
+            for result in reply['results']:
+                self._deliver(result)
+
+    def _deliver(self, result: Dict[str, Any]):
+        task_id = result['task_id']
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry is None:
+                # Resultado repetido de Task já confirmada localmente
+                self._server_acks.append(task_id)
+                return
+            if task_id in self._received:
+                return
+            self._received.add(task_id)
+            task = self._tasks.get(task_id)
+        try:
+            self.on_result(task, entry.data, result)
+        except Exception as e:
+            with self._lock:
+                self._received.discard(task_id)
+            CORTEX_LOGGER.error(f"Falha ao aplicar resultado de offload: {e}", extra_data={'task_id': task_id})
+
+    # --- Estado do Uplink ---
+
+    def _uplink_lost(self, error: Exception, failures: int):
+        if self._uplink_up:
+            self._uplink_up = False
+            CORTEX_LOGGER.warning(
+                f"Uplink de offload indisponível; Tasks retidas no journal local: {error}",
+                extra_data={'origin': self.origin, 'backlog': self.backlog()}
+            )
+        delay = min(self._max_backoff_s, 0.5 * 2 ** (failures - 1))
+        self._stop_event.wait(delay * random.uniform(0.5, 1.0))
+
+    def _uplink_restored(self):
+        if not self._uplink_up:
+            self._uplink_up = True
+            CORTEX_LOGGER.info("Uplink de offload restabelecido.", extra_data={'origin': self.origin, 'backlog': self.backlog()})
+
+
+# --- Lado SERVER ---
+
+class OffloadReceiver:
+    """
+    Recebe lotes de Tasks de nós EDGE, as submete ao Scheduler local e retém os resultados
+    (por origem) até que o EDGE confirme o recebimento.
+
+    O estado em memória não sobrevive a um reinício do SERVER: Tasks reenviadas pelo EDGE
+    (listadas em 'unknown') são deduplicadas contra o Repositório antes de nova submissão.
+    """
+
+    def __init__(self, submit: Callable[[Dict[str, Any]], Any], max_results_per_batch: int = 64,
+                 result_ttl_s: float = 3600.0, load_task: Optional[Callable[[str], Any]] = None):
+        """
+        :param submit: Submete o payload de uma Task (formato task_payload) ao Scheduler local.
+        :param max_results_per_batch: Máximo de resultados por resposta de /offload/results.
+        :param result_ttl_s: Retenção máxima de um resultado não confirmado.
+        :param load_task: Carrega a Task persistida (core) pelo task_id, ou None se desconhecida.
+        """
+        self._submit = submit
+        self._load_task = load_task
+        self._max_results = max_results_per_batch
+        self._result_ttl_s = result_ttl_s
+        self._cond = threading.Condition()
+        self._inflight: Set[Tuple[str, str]] = set()            # (origem, task_id) em execução
+        self._origins: Dict[str, Set[str]] = {}                 # task_id -> origens que a submeteram
+        self._results: Dict[str, "OrderedDict[str, Dict[str, Any]]"] = {}
+        # Long-polls asyncio em espera por origem: (event loop, evento) acordados em task_finished
+        self._waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    def handle(self, path: str, payload: bytes) -> bytes:
+        """Ponto de entrada do transporte (rota HTTP): despacha pelo caminho."""
+        request = unpack_batch(payload)
+        if path == OFFLOAD_BATCH_PATH:
+            return pack_batch(self.accept_batch(request['origin'], request['tasks']))
+        if path == OFFLOAD_RESULTS_PATH:
+            return pack_batch(self.collect_results(
+                request['origin'], request.get('outstanding', ()), request.get('ack', ()), request.get('wait', 0.0)))
+        raise ValueError(f"Caminho de offload desconhecido: {path}")
+
+    async def handle_async(self, path: str, payload: bytes, run_blocking: Callable[..., Awaitable[Any]]) -> bytes:
+        """
+        Variante de handle() para a rota HTTP assíncrona. O trabalho não bloqueante (codificação,
+        submissão, coleta) roda via run_blocking (executor); o long-poll de /offload/results aguarda
+        no event loop, sem reter uma thread do executor durante a espera.
+        """
+        if path != OFFLOAD_RESULTS_PATH:
+            return await run_blocking(self.handle, path, payload)
+        request = await run_blocking(unpack_batch, payload)
+        origin, outstanding = request['origin'], list(request.get('outstanding', ()))
+        deadline = time.monotonic() + max(0.0, min(request.get('wait', 0.0), MAX_RESULTS_WAIT_S))
+        # Registrado antes da primeira coleta: um resultado concluído entre a coleta e a espera não se perde
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            self._waiters.setdefault(origin, set()).add(waiter)
+        try:
+            reply = await run_blocking(self.collect_results, origin, outstanding, request.get('ack', ()))
+            while not reply['results'] and outstanding:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                waiter[1].clear()
+                reply = await run_blocking(self.collect_results, origin, outstanding, ())
+        finally:
+            with self._cond:
+                waiters = self._waiters.get(origin)
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[origin]
+        return await run_blocking(pack_batch, reply)
+
+    def accept_batch(self, origin: str, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        accepted, duplicates = [], 0
+        for data in tasks:
+            task_id = data['task_id']
+            with self._cond:
+                known = (origin, task_id) in self._inflight or task_id in self._results.get(origin, ())
+                if not known:
+                    self._inflight.add((origin, task_id))
+                    self._origins.setdefault(task_id, set()).add(origin)
+            if known or self._resume_persisted(origin, task_id):
+                duplicates += 1
+            else:
+                try:
+                    self._submit(data)
+                except Exception as e:
+                    with self._cond:
+                        self._inflight.discard((origin, task_id))
+                        origins = self._origins.get(task_id)
+                        origins.discard(origin)
+                        if not origins:
+                            del self._origins[task_id]
+                    CORTEX_LOGGER.error(f"Falha ao submeter Task de offload: {e}", extra_data={'task_id': task_id, 'origin': origin})
+                    continue
+            accepted.append(task_id)
+        CORTEX_LOGGER.info(
+            f"Lote de offload recebido de '{origin}': {len(accepted)} Tasks.",
+            extra_data={'origin': origin, 'duplicates': duplicates}
+        )
+        return {'accepted': accepted, 'duplicates': duplicates}
+
+    def _resume_persisted(self, origin: str, task_id: str) -> bool:
+        """
+        Deduplicação pelo Repositório de uma Task recém-registrada para a origem. Já persistida, não
+        é submetida de novo: concluída, o resultado é montado a partir do estado persistido; em
+        andamento, foi retomada pela recuperação do Scheduler e task_finished o entrega à origem.
+        :return: False se a Task é desconhecida (ou a consulta falhou) e deve ser submetida.
+        """
+        if self._load_task is None:
+            return False
+        try:
+            task = self._load_task(task_id)
+        except Exception as e:
+            CORTEX_LOGGER.warning(f"Falha ao consultar Task de offload no Repositório: {e}",
+                                  extra_data={'task_id': task_id, 'origin': origin})
+            return False
+        if task is None:
+            return False
+        if task.status.value in ("COMPLETED", "FAILED"):
+            result = task_result(task)
+            with self._cond:
+                origins = self._origins.get(task_id)
+                # task_finished pode ter entregue o resultado entre o registro e a consulta
+                if origins is not None and origin in origins:
+                    origins.discard(origin)
+                    if not origins:
+                        del self._origins[task_id]
+                    self._deliver(origin, task_id, (time.monotonic(), result))
+                    self._cond.notify_all()
+        return True
+
+    def task_finished(self, task):
+        """Listener de conclusão do Scheduler: retém o resultado se a Task veio de um EDGE."""
+        with self._cond:
+            origins = self._origins.pop(task.task_id, None)
+            if not origins:
+                return
+            result = (time.monotonic(), task_result(task))
+            for origin in origins:
+                self._deliver(origin, task.task_id, result)
+            self._cond.notify_all()
+
+    def _deliver(self, origin: str, task_id: str, result: Tuple[float, Dict[str, Any]]):
+        """Move a Task de in-flight para os resultados da origem e acorda seus long-polls (sob _cond)."""
+        self._inflight.discard((origin, task_id))
+        self._results.setdefault(origin, OrderedDict())[task_id] = result
+        for loop, event in self._waiters.get(origin, ()):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # Event loop já encerrado
+
+    def collect_results(self, origin: str, outstanding, ack, wait: float = 0.0) -> Dict[str, Any]:
+        """
+        Confirma resultados já entregues e devolve os disponíveis entre 'outstanding'
+        (long-poll de até 'wait' segundos). 'unknown' lista Tasks pendentes no EDGE que
+        este SERVER não conhece (devem ser reenviadas).
+        """
+        outstanding = set(outstanding)
+        deadline = time.monotonic() + max(0.0, min(wait, MAX_RESULTS_WAIT_S))
+        with self._cond:
+            results = self._results.setdefault(origin, OrderedDict())
+            for task_id in ack:
+                results.pop(task_id, None)
+            self._expire(results)
+            ready = [t for t in results if t in outstanding]
+            while not ready and outstanding:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    break
+                ready = [t for t in results if t in outstanding]
+            unknown = [t for t in outstanding if (origin, t) not in self._inflight and t not in results]
+            batch = [results[t][1] for t in ready[:self._max_results]]
+        return {'results': batch, 'unknown': unknown}
+
+    def _expire(self, results: "OrderedDict[str, Any]"):
+        """Descarta resultados nunca confirmados (ex.: EDGE reinstalado) após result_ttl_s."""
+        cutoff = time.monotonic() - self._result_ttl_s
+        while results and next(iter(results.values()))[0] < cutoff:
+            results.popitem(last=False)
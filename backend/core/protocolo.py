@@ -5,7 +5,8 @@ from ..core.dataclasses import TaskStatus, ExecutionTrace # Reutiliza tipos do C
 
 # --- 1. Pacote de Requisição do CERNE para o Agente ---
 
-@dataclass(frozen=True) # A mensagem de requisição é imutável
+# kw_only: message_id tem default e precede campos obrigatórios (a mensagem é sempre criada por nome)
+@dataclass(frozen=True, kw_only=True) # A mensagem de requisição é imutável
 class AgentMessage:
     """
     Pacote de dados de requisição enviado pelo CERNE para um Worker.
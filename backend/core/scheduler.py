@@ -1,12 +1,27 @@
+import os
 import threading
 import queue
 import time
 import uuid
-from typing import Optional, Dict, List
+import itertools
+import heapq
+from typing import Any, Callable, Optional, Dict, List, Tuple
 from .cerne import CERNE
+from .status_hub import StatusHub, STATUS_HUB
+from .fair_share import FairQueue, TenantPolicy
 from .dataclasses import Task, TaskStatus, TaskPriority, GlobalContext
-from ..persistence.task_repository import TaskRepository # Importa o repositório formalizado
+from .retry_policy import RetryPolicy, MAX_RETRIES
+from ..persistence.task_repository import TaskRepository, task_from_row # Importa o repositório formalizado
+from ..persistence.local_journal import LocalJournal, KIND_TASK, KIND_OFFLOAD
+from ..persistence.task_leases import LeaseStore, LeaseHeartbeat, default_node_id
+from ..persistence.queue_spill import SpillFile, SpillRun, make_spill_directory, remove_spill_directory
 from ..utilities.logger import CORTEX_LOGGER # Importa o Logger Singleton
+from ..utilities.metrics import (QUEUE_DEPTH, QUEUE_WAIT_SECONDS, QUEUE_TENANT_WAIT_SECONDS, QUEUE_SPILLED,
+                                 QUEUE_REHYDRATE_SECONDS, REPOSITORY_SAVE_SECONDS, SCHEDULER_WORKERS, SCHEDULER_DEFERRED,
+                                 SCHEDULER_DEFERRED_TOTAL)
+from ..utilities.tracing import TRACER
+from ..utilities.clock import SYSTEM_CLOCK, SystemClock, VirtualClock
+from ..utilities.rate_limiter import RateLimiter, RATE_LIMITER
 
 # --- Fila de Prioridade ---
 
@@ -14,32 +29,193 @@ class TaskQueue:
     """
     Fila de Prioridade que armazena Tasks. 
     Usa a prioridade da Task para determinar a ordem de processamento.
+
+    Dentro de cada prioridade, as Tasks são divididas por tenant e despachadas com fair share
+    (Deficit Round Robin, pesos e limites de in-flight por tenant; ver fair_share.py).
+
+    Fila em dois níveis: até 'memory_watermark' Tasks residentes ficam em heaps em memória;
+    acima disso, o corpo das novas Tasks é gravado em filas de spill no disco (uma por fluxo)
+    e reidratado em lotes de 'prefetch' pouco antes do despacho. A serialização e a I/O do
+    spill rodam fora do lock da fila (em enqueue e take), sem bloquear os demais workers.
     """
-    def __init__(self):
-        # A fila armazena (prioridade invertida, tempo de criação, Task).
-        self._queue = queue.PriorityQueue()
-        CORTEX_LOGGER.info("TaskQueue inicializada.")
+    def __init__(self, clock=SYSTEM_CLOCK, memory_watermark: Optional[int] = None,
+                 prefetch: Optional[int] = None, spill_dir: Optional[str] = None,
+                 tenant_policy: Optional[TenantPolicy] = None):
+        """
+        :param clock: Relógio usado para medir a espera em fila (VirtualClock em modo simulação).
+        :param memory_watermark: Máximo de Tasks residentes antes do spill
+                                 (padrão: CORTEX_QUEUE_MEMORY_WATERMARK ou 10000; 0 desativa o spill).
+        :param prefetch: Tasks reidratadas por leitura do spill (padrão: CORTEX_QUEUE_PREFETCH ou 256).
+        :param spill_dir: Diretório base do spill (padrão: CORTEX_QUEUE_SPILL_DIR ou o temp do sistema).
+        :param tenant_policy: Pesos e limites por tenant (padrão: TenantPolicy.from_env()).
+        """
+        self._clock = clock
+        # Entradas: (prioridade invertida, tempo de criação, sequência, instante de enfileiramento, Task).
+        # A sequência desempata tuplas iguais sem comparar objetos Task.
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._memory_watermark = int(os.environ.get("CORTEX_QUEUE_MEMORY_WATERMARK", "10000")) \
+            if memory_watermark is None else memory_watermark
+        self._prefetch = prefetch or int(os.environ.get("CORTEX_QUEUE_PREFETCH", "256"))
+        self._spill_base = spill_dir
+        self._spill_dir: Optional[str] = None  # Criado sob demanda no primeiro spill
+        self._tenant_policy = tenant_policy or TenantPolicy.from_env()
+        self._flows = FairQueue(self._tenant_policy, self._make_run,
+                                int(os.environ.get("CORTEX_QUEUE_SPILL_MAX_OPEN", "64")))
+        CORTEX_LOGGER.info("TaskQueue inicializada.", extra_data={'memory_watermark': self._memory_watermark})
+
+    @property
+    def tenant_policy(self) -> TenantPolicy:
+        return self._tenant_policy
 
-    def enqueue(self, task: Task):
-        """Adiciona uma Task à fila com base em sua prioridade."""
+    def _make_run(self, name: str) -> SpillRun:
+        if self._spill_dir is None:
+            self._spill_dir = make_spill_directory(self._spill_base)
+        return SpillRun(SpillFile(self._spill_dir, name), self._prefetch)
+
+    def enqueue(self, task: Task, enqueued_at: Optional[float] = None):
+        """
+        Adiciona uma Task à fila com base em sua prioridade.
+        :param enqueued_at: Instante do enfileiramento original (Task devolvida à fila, ex.: após
+                            adiamento por cota), para que a espera medida inclua o tempo adiado.
+        """
         # Prioridade é invertida: valor mais alto (CRITICAL) tem a menor tupla para ser processado primeiro.
-        priority_tuple = (-task.priority.value, task.creation_time, task)
-        self._queue.put(priority_tuple)
+        if enqueued_at is None:
+            enqueued_at = self._clock.now()
+        entry = (-task.priority.value, task.creation_time, next(self._sequence), enqueued_at, task)
+        tenant = self._tenant_policy.tenant_of(task)
+        with self._cond:
+            spill = self._memory_watermark > 0 and self._flows.heap_size >= self._memory_watermark
+            run = self._flows.push(tenant, entry, spill)
+            self._cond.notify()
+        spilled = run is not None
+        if spilled:
+            run.flush()  # Serialização e gravação fora do lock
+        QUEUE_DEPTH.labels(task.priority.name).inc()
+        if spilled:
+            QUEUE_SPILLED.labels(task.priority.name).inc()
         CORTEX_LOGGER.info(
             f"Task enfileirada. Prioridade: {task.priority.value}.",
-            extra_data={'task_id': task.task_id, 'priority': task.priority.value}
+            extra_data={'task_id': task.task_id, 'priority': task.priority.value, 'tenant': tenant,
+                        'spilled': spilled}
         )
 
-    def dequeue(self) -> Optional[Task]:
-        """Remove e retorna a Task de maior prioridade."""
-        try:
-            _, _, task = self._queue.get_nowait()
-            return task
-        except queue.Empty:
+    def dequeue(self, timeout: Optional[float] = None) -> Optional[Task]:
+        """
+        Remove e retorna a Task de maior prioridade (fair share entre tenants da mesma prioridade).
+        Tasks de tenants no limite de in-flight não são retornadas até task_done().
+        :param timeout: Se informado, aguarda até 'timeout' segundos (tempo real) por uma Task.
+        """
+        popped = self.take(timeout)
+        if popped is None:
             return None
+        task, enqueued_at = popped
+        self.observe_wait(task, enqueued_at)
+        return task
+
+    def take(self, timeout: Optional[float] = None) -> Optional[Tuple[Task, float]]:
+        """
+        Como dequeue(), mas sem registrar a espera em fila: retorna (Task, instante de enfileiramento).
+        O chamador registra a espera com observe_wait() quando a Task for de fato despachada.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            with self._cond:
+                popped = self._flows.pop()
+                refill = self._flows.next_refill()
+                if popped is None and refill is None:
+                    # Nada elegível (ou reidratação em andamento em outro worker)
+                    remaining = deadline - time.monotonic() if deadline is not None else 0
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+                    continue
+            if refill is not None:
+                try:
+                    self._rehydrate(refill)
+                except Exception as e:
+                    if popped is None:
+                        raise
+                    # A Task já retirada segue para despacho; o lote volta a ser solicitado no próximo take
+                    CORTEX_LOGGER.error("Falha ao reidratar o spill da fila.", extra_data={'error': str(e)})
+            if popped is not None:
+                break
+        _, (_, _, _, enqueued_at, task), from_run = popped
+        if from_run:
+            QUEUE_SPILLED.labels(task.priority.name).dec()
+        QUEUE_DEPTH.labels(task.priority.name).dec()
+        return task, enqueued_at
+
+    def _rehydrate(self, run: SpillRun):
+        """Lê o lote solicitado do spill fora do lock e o aplica ao fluxo."""
+        start = time.perf_counter()
+        records = []
+        try:
+            records = run.read_batch()
+        finally:
+            with self._cond:
+                self._flows.refilled(run, records)  # Vazio após falha: a leitura volta a ser solicitável
+                self._cond.notify_all()
+        QUEUE_REHYDRATE_SECONDS.observe(time.perf_counter() - start)
+
+    def observe_wait(self, task: Task, enqueued_at: float):
+        """Registra a espera em fila (métricas e span) de uma Task despachada."""
+        tenant = self._tenant_policy.tenant_of(task)
+        wait_s = self._clock.now() - enqueued_at
+        QUEUE_WAIT_SECONDS.labels(task.priority.name).observe(wait_s)
+        QUEUE_TENANT_WAIT_SECONDS.labels(self._tenant_policy.metric_label(tenant)).observe(wait_s)
+        if TRACER.enabled:
+            now_ns = time.time_ns()
+            TRACER.record_span("scheduler.queue_wait", now_ns - int(wait_s * 1e9), now_ns,
+                               {'task_id': task.task_id, 'priority': task.priority.name, 'tenant': tenant})
+
+    def task_done(self, task: Task):
+        """Sinaliza o fim do despacho de uma Task retornada por dequeue() (libera o in-flight do tenant)."""
+        with self._cond:
+            if self._flows.done(self._tenant_policy.tenant_of(task)):
+                self._cond.notify_all()
 
     def is_empty(self):
-        return self._queue.empty()
+        return self._flows.size == 0
+
+    def qsize(self) -> int:
+        return self._flows.size
+
+    def ready_size(self) -> int:
+        """Tasks elegíveis para despacho (exclui as de tenants no limite de in-flight)."""
+        return self._flows.ready
+
+    def resident_size(self) -> int:
+        """Tasks com corpo completo em memória (heaps + lotes reidratados)."""
+        with self._cond:
+            return self._flows.resident()
+
+    def spill_bytes(self) -> int:
+        with self._cond:
+            return self._flows.spill_bytes()
+
+    def close(self):
+        """Descarta os segmentos de spill (o estado durável está no repositório/journal)."""
+        with self._cond:
+            self._flows.close()
+            if self._spill_dir is not None:
+                remove_spill_directory(self._spill_dir)
+                self._spill_dir = None
+
+# --- Workers ---
+
+class _SchedulerWorker(threading.Thread):
+    """Thread worker do pool do Scheduler: consome a TaskQueue até ser aposentada."""
+    _ids = itertools.count(1)
+
+    def __init__(self, scheduler: "CERNEScheduler"):
+        super().__init__(name=f"CERNEScheduler-Worker-{next(self._ids)}", daemon=True)
+        self._scheduler = scheduler
+        self.retired = threading.Event()
+
+    def run(self):
+        self._scheduler._worker_loop(self)
+
 
 # --- O Scheduler Principal ---
 
@@ -49,60 +225,539 @@ class CERNEScheduler(threading.Thread):
     Utiliza o TaskRepository para carregar e persistir o estado das Tasks.
     """
     # ATENÇÃO: O construtor foi ajustado para receber TaskRepository
-    def __init__(self, cerne_instance: CERNE, task_repository: TaskRepository):
+    def __init__(self, cerne_instance: CERNE, task_repository: TaskRepository, journal: Optional[LocalJournal] = None,
+                 clock=SYSTEM_CLOCK, lease_store: Optional[LeaseStore] = None, node_id: Optional[str] = None,
+                 claim_batch: Optional[int] = None, offloader=None, workers: Optional[int] = None,
+                 rate_limiter: Optional[RateLimiter] = None, prepaid_hold_s: Optional[float] = None,
+                 max_deferred: Optional[int] = None, status_hub: StatusHub = STATUS_HUB):
+        """
+        :param lease_store: Ativa o modo distribuído: a fila local é alimentada por claims
+                            de lotes na fila compartilhada do repositório (vários nós).
+        :param node_id: Identificador deste nó nos leases (padrão: host-pid-aleatório).
+        :param claim_batch: Tasks reivindicadas por claim (padrão: CORTEX_CLAIM_BATCH ou 8).
+        :param offloader: OffloadForwarder (modo EDGE). Deve ser o mesmo passado ao CERNE;
+                          o Scheduler controla seu ciclo de vida e aplica os resultados recebidos.
+        :param workers: Threads worker iniciais (padrão: CORTEX_SCHEDULER_WORKERS ou 1).
+                        Ajustável em execução via resize() (ex.: pelo Autoscaler).
+        :param rate_limiter: Cotas por endpoint (padrão: RATE_LIMITER do processo). Tasks cujo endpoint
+                             está sem tokens são adiadas em vez de despachadas para bloquear um worker.
+        :param prepaid_hold_s: Tempo máximo que uma Task liberada retém os tokens adquiridos enquanto
+                               aguarda um worker (padrão: CORTEX_RATE_LIMIT_PREPAID_HOLD_S ou 1); depois
+                               eles voltam ao bucket e a Task os adquire de novo no despacho.
+        :param max_deferred: Máximo de Tasks adiadas em memória (padrão: CORTEX_RATE_LIMIT_MAX_DEFERRED
+                             ou 256). Atingido o limite, os workers deixam de retirar Tasks da fila: o
+                             backlog preso à cota permanece na TaskQueue (spill em disco e fair share).
+        :param status_hub: Recebe um evento 'persisted' após cada save do ciclo (long-poll da API).
+        :param clock: Relógio da fila, dos backoffs e das cotas. start() exige um relógio real: um
+                      VirtualClock é rejeitado (passos síncronos de _dispatch_next aceitam relógios falsos).
+        """
         super().__init__(name="CERNEScheduler-Thread")
+        self._clock = clock
         self._cerne = cerne_instance
         self._repository = task_repository
-        self._task_queue = TaskQueue()
+        self._status_hub = status_hub
+        self._task_queue = TaskQueue(clock)
         self._running = False
+        # Journal local (modo EDGE): garante que Tasks submetidas sobrevivam a reinícios/perda do DB.
+        self._journal = journal
+        self._journal_seqs: Dict[str, int] = {}
+        # Modo distribuído (fila compartilhada por leases)
+        self._lease_store = lease_store
+        self.node_id = node_id or default_node_id()
+        self._claim_batch = claim_batch or int(os.environ.get("CORTEX_CLAIM_BATCH", "8"))
+        self._heartbeat: Optional[LeaseHeartbeat] = None
+        # Offload EDGE -> SERVER: resultados chegam na thread do forwarder e são aplicados nesta thread
+        self._offloader = offloader
+        self._offload_results: "queue.SimpleQueue" = queue.SimpleQueue()
+        # Listeners de conclusão (Tasks em estado terminal), ex.: OffloadReceiver no SERVER
+        self._completion_listeners: List[Callable[[Task], Any]] = []
+        # Pool de workers: a thread do Scheduler faz manutenção (claims, offload); os workers executam Tasks
+        self._initial_workers = workers or int(os.environ.get("CORTEX_SCHEDULER_WORKERS", "1"))
+        self._workers: List[_SchedulerWorker] = []
+        self._pool_lock = threading.Lock()
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+        # Espera bloqueante na fila apenas com o relógio real (relógios falsos avançam via sleep)
+        self._blocking_dequeue = isinstance(clock, SystemClock)
+        # O TaskRepository mantém uma única conexão: acessos dos workers são serializados
+        # (a Interface HTTP lê por um TaskRepositoryPool com conexões próprias)
+        self._repository_lock = threading.Lock()
+        # Limitação de taxa: Tasks adiadas por bucket esgotado (heap por prioridade) e Tasks liberadas
+        # com os tokens já adquiridos (repassados à chamada externa via RateLimiter.prepaid)
+        self._rate_limiter = rate_limiter if rate_limiter is not None else RATE_LIMITER
+        self._deferred: Dict[str, List[tuple]] = {}
+        self._deferred_lock = threading.Lock()
+        self._deferred_seq = itertools.count()
+        self._prepaid_tasks: Dict[str, Tuple[float, List[str]]] = {}  # task_id -> (liberação, endpoints)
+        self._prepaid_hold_s = prepaid_hold_s if prepaid_hold_s is not None \
+            else float(os.environ.get("CORTEX_RATE_LIMIT_PREPAID_HOLD_S", "1"))
+        self._max_deferred = max_deferred or int(os.environ.get("CORTEX_RATE_LIMIT_MAX_DEFERRED", "256"))
+        self._deferred_size = 0  # Total nos heaps de _deferred (protegido por _deferred_lock)
+        self._deferred_room = threading.Event()  # Sinalizado quando há espaço para adiar Tasks
+        self._deferred_room.set()
+        # Modo local: retentativas por Task e Tasks em RETRY aguardando o backoff (heap por instante)
+        self._local_retries: Dict[str, int] = {}
+        self._retry_timers: List[tuple] = []
+        self._retry_lock = threading.Lock()
         CORTEX_LOGGER.info("CERNEScheduler criado. Pronto para gerenciar execução assíncrona.")
 
-    def run(self):
-        """O Loop principal da Thread do Scheduler."""
-        self._running = True
-        CORTEX_LOGGER.info(f"Scheduler Thread '{self.name}' iniciada.")
-        
-        # 1. Recuperar tarefas pendentes da última sessão (Recuperação de estado)
-        pending_tasks = self._repository.find_pending_tasks()
+    def start(self):
+        """
+        Recupera o estado da última sessão antes de iniciar a thread: Tasks submetidas depois
+        de start() nunca são re-enfileiradas em duplicidade pela recuperação.
+        """
+        if isinstance(self._clock, VirtualClock):
+            # O VirtualClock só avança pelo seu laço de eventos (single-thread): com threads, os workers
+            # girariam sem espera e disputariam _now. A simulação usa a TaskQueue diretamente (simulate_load).
+            raise ValueError("VirtualClock não é suportado pelo Scheduler em threads; use simulate_load.")
+        self._recover()
+        super().start()
+
+    def _recover(self):
+        """Re-enfileira as Tasks não terminais do Repositório e as entradas pendentes do journal."""
+        # 1. Recuperar tarefas pendentes da última sessão (Recuperação de estado).
+        # No modo distribuído a recuperação é feita pelos claims: leases de nós mortos expiram.
+        if self._lease_store is not None:
+            self._lease_store.register(self.node_id)
+            self._heartbeat = LeaseHeartbeat(self._lease_store, self.node_id)
+            self._heartbeat.start()
+            pending_tasks = []
+        else:
+            pending_tasks = self._repository.find_pending_tasks()
+        if self._journal is not None:
+            # Tasks encaminhadas ao SERVER (DELEGATED no banco) aguardam o resultado do offload
+            offloaded = {e.data['task_id'] for e in self._journal.pending(KIND_OFFLOAD)}
+            pending_tasks = [task for task in pending_tasks if task.task_id not in offloaded]
         for task in pending_tasks:
             self._task_queue.enqueue(task)
             CORTEX_LOGGER.warning(
                 f"Tarefa pendente recuperada e re-enfileirada.",
                 extra_data={'task_id': task.task_id, 'status': task.status.value}
             )
+
+        # 1.1 Reproduzir entradas não confirmadas do journal local (Tasks que não chegaram ao DB)
+        if self._journal is not None:
+            self._replay_journal({task.task_id for task in pending_tasks})
+
+    def run(self):
+        """O Loop principal da Thread do Scheduler."""
+        self._running = True
+        CORTEX_LOGGER.info(f"Scheduler Thread '{self.name}' iniciada.")
+
+        if self._offloader is not None:
+            self._offloader.on_result = lambda task, data, result: self._offload_results.put((task, data, result))
+            self._offloader.start()
+
+        self.resize(self._initial_workers)
             
         while self._running:
-            task = self._task_queue.dequeue()
-            
-            if task:
-                CORTEX_LOGGER.info(f"Iniciando processamento da Task.", extra_data={'task_id': task.task_id})
-                
-                # O CERNE recebe a Task, processa e a retorna atualizada
-                # Nota: Futuramente, este método deve ser 'resume_task' para continuar o trace.
-                updated_task = self._cerne.processar_tarefa(
-                    task.description, 
-                    task.context, 
-                    task.required_agent
-                )
-                
-                # Persistir o resultado final usando o Repositório
+            if self._offloader is not None:
+                self._apply_offload_results()
+            if self._retry_timers:
+                self._release_retries()
+            pause = self._release_deferred() if self._deferred or self._prepaid_tasks else 0.1
+            # Modo distribuído: mantém a fila local abastecida para todos os workers
+            # (sem acumular leases de Tasks adiadas por cota que outros nós poderiam executar)
+            if (self._lease_store is not None and self._task_queue.qsize() < self.worker_count
+                    and self.deferred_count() < self._claim_batch * self.worker_count
+                    and self._claim_tasks()):
+                continue
+            # Aguarda um momento (ou até o próximo token de um bucket com Tasks adiadas)
+            self._clock.sleep(min(0.1, pause))
+
+    # --- Pool de Workers ---
+
+    @property
+    def worker_count(self) -> int:
+        """Workers ativos (exclui os aposentados que ainda concluem a Task atual)."""
+        with self._pool_lock:
+            return sum(1 for w in self._workers if not w.retired.is_set())
+
+    @property
+    def busy_workers(self) -> int:
+        return self._busy
+
+    def queue_depth(self) -> int:
+        """
+        Tasks prontas para despacho. Exclui as adiadas por cota e as de tenants no limite de
+        in-flight: mais workers não as aceleram.
+        """
+        return self._task_queue.ready_size()
+
+    def deferred_count(self) -> int:
+        with self._deferred_lock:
+            return self._deferred_size
+
+    def resize(self, count: int) -> int:
+        """
+        Ajusta o número de workers (mínimo 1). Workers removidos terminam a Task em curso antes de sair.
+        :return: Número de workers ativos após o ajuste.
+        """
+        count = max(1, count)
+        with self._pool_lock:
+            self._workers = [w for w in self._workers if w.is_alive() or not w.retired.is_set()]
+            active = [w for w in self._workers if not w.retired.is_set()]
+            for _ in range(count - len(active)):
+                worker = _SchedulerWorker(self)
+                self._workers.append(worker)
+                worker.start()
+            for worker in active[count:]:
+                worker.retired.set()
+        SCHEDULER_WORKERS.set(count)
+        return count
+
+    def _worker_loop(self, worker: _SchedulerWorker):
+        while self._running and not worker.retired.is_set():
+            if not self._dispatch_next(worker.name) and not self._blocking_dequeue:
+                self._clock.sleep(0.5)
+
+    def _dispatch_next(self, worker_name: str) -> bool:
+        """
+        Retira a próxima Task da fila e a processa (ou a adia, se a cota do endpoint estiver esgotada).
+        :return: False se a fila não tinha Task elegível (ou o limite de Tasks adiadas foi atingido).
+        """
+        if not self._deferred_room.is_set():
+            # Sem espaço para adiar: a Task poderia ser de um bucket esgotado; aguarda uma liberação
+            if self._blocking_dequeue:
+                self._deferred_room.wait(0.5)
+            return False
+        popped = self._task_queue.take(timeout=0.5 if self._blocking_dequeue else None)
+        if popped is None:
+            return False
+        task, enqueued_at = popped
+        endpoints = self._cerne.endpoints_for(task) if self._rate_limiter.enabled else ()
+        if endpoints and self._defer_if_throttled(task, endpoints, enqueued_at):
+            self._task_queue.task_done(task)  # Adiada: não ocupa o in-flight do tenant até ser liberada
+            return True
+        # A espera em fila inclui o tempo adiado por cota (enqueued_at é o do enfileiramento original)
+        self._task_queue.observe_wait(task, enqueued_at)
+        with self._busy_lock:
+            self._busy += 1
+        try:
+            TRACER.set_task(task.task_id)
+            with TRACER.span("scheduler.process_task", {'task_id': task.task_id, 'priority': task.priority.name}), \
+                    self._rate_limiter.prepaid(endpoints):
+                self._process_task(task)
+        except Exception as e:
+            CORTEX_LOGGER.error(f"Falha no processamento da Task pelo worker: {e}",
+                                extra_data={'task_id': task.task_id, 'worker': worker_name})
+            self._release_failed_cycle(task)
+        finally:
+            TRACER.set_task(None)
+            self._task_queue.task_done(task)
+            with self._busy_lock:
+                self._busy -= 1
+        return True
+
+    # --- Limitação de Taxa ---
+
+    def _defer_if_throttled(self, task: Task, endpoints, enqueued_at: float) -> bool:
+        """
+        Adquire os tokens dos endpoints da Task para o despacho. Sem tokens (ou com Tasks já
+        adiadas no mesmo bucket, que têm precedência), a Task é adiada.
+        :return: True se a Task foi adiada.
+        """
+        with self._deferred_lock:
+            if self._prepaid_tasks.pop(task.task_id, None) is not None:
+                return False  # Liberada por _release_deferred com tokens adquiridos
+            buckets = [b for b in map(self._rate_limiter.bucket_for, endpoints) if b is not None]
+            blocked = next((b for b in buckets if self._deferred.get(b)), None)
+            if blocked is None:
+                _, blocked = self._rate_limiter.try_acquire_all(endpoints)
+                if blocked is None:
+                    return False
+            self._park(blocked, task, enqueued_at)
+        CORTEX_LOGGER.info(
+            f"Task adiada: cota do endpoint esgotada ({blocked}).",
+            extra_data={'task_id': task.task_id, 'bucket': blocked}
+        )
+        return True
+
+    def _park(self, bucket: str, task: Task, enqueued_at: float):
+        """Adia a Task no heap do bucket. Chamado com _deferred_lock."""
+        heapq.heappush(self._deferred.setdefault(bucket, []),
+                       (-task.priority.value, task.creation_time, next(self._deferred_seq), enqueued_at, task))
+        self._deferred_size += 1
+        if self._deferred_size >= self._max_deferred:
+            self._deferred_room.clear()
+        SCHEDULER_DEFERRED.labels(bucket).inc()
+        SCHEDULER_DEFERRED_TOTAL.labels(bucket).inc()
+
+    def _release_deferred(self) -> float:
+        """
+        Devolve à fila as Tasks adiadas cujos tokens já podem ser adquiridos (em ordem de prioridade)
+        e devolve aos buckets os tokens de Tasks liberadas que não chegaram a um worker em prepaid_hold_s.
+        :return: Segundos até o próximo token de um bucket que ainda tem Tasks adiadas.
+        """
+        released, next_wait = [], 0.1
+        now = self._clock.now()
+        with self._deferred_lock:
+            self._refund_prepaid(now - self._prepaid_hold_s)
+            for bucket in list(self._deferred):
+                heap = self._deferred[bucket]
+                while heap:
+                    _, _, _, enqueued_at, task = heap[0]
+                    endpoints = self._cerne.endpoints_for(task)
+                    wait, blocked = self._rate_limiter.try_acquire_all(endpoints)
+                    if blocked == bucket:
+                        next_wait = min(next_wait, wait)
+                        break
+                    heapq.heappop(heap)
+                    self._deferred_size -= 1
+                    SCHEDULER_DEFERRED.labels(bucket).dec()
+                    if blocked is not None:
+                        self._park(blocked, task, enqueued_at)  # Outro endpoint da Task está esgotado
+                        continue
+                    self._prepaid_tasks[task.task_id] = (now, endpoints)
+                    released.append((task, enqueued_at))
+                if not heap:
+                    del self._deferred[bucket]
+            if self._deferred_size < self._max_deferred:
+                self._deferred_room.set()
+        for task, enqueued_at in released:
+            self._task_queue.enqueue(task, enqueued_at)
+        return next_wait
+
+    def _refund_prepaid(self, released_before: float):
+        """
+        Devolve os tokens de Tasks liberadas antes de 'released_before' e ainda não despachadas.
+        Elas continuam na fila e adquirem os tokens novamente ao chegar a um worker.
+        Chamado com _deferred_lock.
+        """
+        for task_id, (released_at, endpoints) in list(self._prepaid_tasks.items()):
+            if released_at <= released_before:
+                del self._prepaid_tasks[task_id]
+                for bucket in dict.fromkeys(b for b in map(self._rate_limiter.bucket_for, endpoints) if b is not None):
+                    self._rate_limiter.refund(bucket)
+
+    def _process_task(self, task: Task):
+        """Executa um ciclo do CERNE para a Task e persiste o resultado."""
+        CORTEX_LOGGER.info(f"Iniciando processamento da Task.", extra_data={'task_id': task.task_id})
+        
+        # O CERNE recebe a Task, processa e a retorna atualizada
+        # Nota: Futuramente, este método deve ser 'resume_task' para continuar o trace.
+        updated_task = self._cerne.processar_tarefa(task)
+        retry_at = self._retry_at(updated_task)
+        
+        # Persistir o resultado final usando o Repositório
+        with self._repository_lock:
+            with TRACER.span("repository.save", {'task_id': task.task_id}):
+                save_start = time.perf_counter()
                 self._repository.save(updated_task)
-                CORTEX_LOGGER.info(f"Task finalizada e estado persistido. Status: {updated_task.status.value}", extra_data={'task_id': task.task_id})
-                
+                REPOSITORY_SAVE_SECONDS.observe(time.perf_counter() - save_start)
+            # Traces por linha (leitura paginada pela API de status)
+            with TRACER.span("repository.append_traces", {'task_id': task.task_id}):
+                self._repository.append_traces(updated_task)
+        CORTEX_LOGGER.info(f"Task finalizada e estado persistido. Status: {updated_task.status.value}", extra_data={'task_id': task.task_id})
+        # Os eventos do CERNE antecedem o save: leitores do Repositório aguardam este
+        self._status_hub.publish(updated_task, "Scheduler", "Estado persistido.", persisted=True)
+
+        # O estado do ciclo está no repositório: a entrada KIND_TASK do journal já cumpriu seu papel
+        # (inclusive em RETRY/DELEGATED, que de outro modo seriam reproduzidas a cada reinício).
+        # Tasks encaminhadas ao SERVER seguem cobertas pela entrada KIND_OFFLOAD do forwarder.
+        self._ack_journal(updated_task.task_id)
+        if updated_task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+            self._notify_completion(updated_task)
+        self._settle_lease(updated_task, retry_at)
+        self._schedule_next_cycle(updated_task, retry_at)
+
+    def _retry_at(self, task: Task) -> Optional[float]:
+        """
+        Instante da próxima tentativa de uma Task em RETRY, pelo backoff do RetryPolicy: relógio de
+        parede no modo distribuído (como os leases), relógio do Scheduler no modo local.
+        Esgotadas as retentativas, a Task vai para FAILED.
+        """
+        if task.status != TaskStatus.RETRY:
+            return None
+        if self._lease_store is not None:
+            retries = self._lease_store.retries(task.task_id)
+        else:
+            retries = self._local_retries.get(task.task_id, 0)
+        wait = RetryPolicy.get_wait_time(retries + 1)
+        if wait is None:
+            task.update_status(TaskStatus.FAILED, "Scheduler", f"Retentativas esgotadas ({MAX_RETRIES}).", success=False)
+            return None
+        if self._lease_store is not None:
+            return time.time() + wait
+        self._local_retries[task.task_id] = retries + 1
+        return self._clock.now() + wait
+
+    def _schedule_next_cycle(self, task: Task, retry_at: Optional[float]):
+        """
+        Modo local: re-enfileira Tasks que exigem novo ciclo (no modo distribuído, _settle_lease as
+        devolve à fila compartilhada). DELEGATED por encadeamento volta imediatamente; RETRY após o backoff.
+        """
+        if self._lease_store is not None:
+            return
+        if task.status == TaskStatus.RETRY and retry_at is not None:
+            with self._retry_lock:
+                heapq.heappush(self._retry_timers, (retry_at, next(self._deferred_seq), task))
+        elif task.status == TaskStatus.DELEGATED:
+            if self._offloader is None or not self._offloader.is_offloaded(task.task_id):
+                self._task_queue.enqueue(task)
+        else:
+            self._local_retries.pop(task.task_id, None)
+
+    def _release_retries(self):
+        """Devolve à fila as Tasks em RETRY cujo backoff terminou (modo local)."""
+        now = self._clock.now()
+        due = []
+        with self._retry_lock:
+            while self._retry_timers and self._retry_timers[0][0] <= now:
+                due.append(heapq.heappop(self._retry_timers)[2])
+        for task in due:
+            self._task_queue.enqueue(task)
+
+    def _settle_lease(self, task: Task, retry_at: Optional[float]):
+        """Destino do lease após o ciclo: removido apenas em estado terminal."""
+        if self._lease_store is None:
+            return
+        if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+            self._lease_store.complete(self.node_id, task.task_id)
+        elif task.status == TaskStatus.RETRY:
+            self._lease_store.release(self.node_id, task.task_id, retry_at, retried=True)
+        elif (task.status == TaskStatus.DELEGATED and self._offloader is not None
+              and self._offloader.is_offloaded(task.task_id)):
+            # Aguardando o SERVER: o heartbeat renova o lease até _apply_offload_results
+            pass
+        else:
+            # DELEGATED por encadeamento: o próximo ciclo fica disponível a qualquer nó imediatamente
+            self._lease_store.release(self.node_id, task.task_id, time.time())
+
+    def _release_failed_cycle(self, task: Task):
+        """
+        Ciclo interrompido por exceção (antes de _settle_lease): sem esta liberação o heartbeat
+        renovaria o lease indefinidamente. A Task volta à fila compartilhada com o backoff do
+        RetryPolicy, como um RETRY; esgotadas as retentativas, é persistida como FAILED.
+        """
+        if self._lease_store is None:
+            return
+        try:
+            wait = RetryPolicy.get_wait_time(self._lease_store.retries(task.task_id) + 1)
+            if wait is None:
+                task.update_status(TaskStatus.FAILED, "Scheduler", f"Retentativas esgotadas ({MAX_RETRIES}).", success=False)
+                with self._repository_lock:
+                    self._repository.save(task)
+                self._lease_store.complete(self.node_id, task.task_id)
+                self._notify_completion(task)
             else:
-                # Aguarda um momento para evitar loop ativo
-                time.sleep(0.5)
+                self._lease_store.release(self.node_id, task.task_id, time.time() + wait, retried=True)
+        except Exception as e:
+            CORTEX_LOGGER.error(f"Falha ao liberar o lease após erro no ciclo: {e}",
+                                extra_data={'task_id': task.task_id, 'node_id': self.node_id})
+
+    def _claim_tasks(self) -> int:
+        """Reivindica um lote da fila compartilhada (prioridade decrescente) e o enfileira localmente."""
+        try:
+            rows = self._lease_store.claim(self.node_id, self._claim_batch)
+        except Exception as e:
+            CORTEX_LOGGER.error(f"Falha ao reivindicar Tasks da fila compartilhada: {e}", extra_data={'node_id': self.node_id})
+            return 0
+        for row in rows:
+            task = task_from_row(row)
+            self._task_queue.enqueue(task)
+        return len(rows)
+
+    def add_completion_listener(self, listener: Callable[[Task], Any]):
+        """
+        Registra um callback chamado após persistir uma Task terminal. É executado na thread
+        worker que processou a Task (vários workers em paralelo): o listener deve ser thread-safe.
+        """
+        self._completion_listeners.append(listener)
+
+    def _notify_completion(self, task: Task):
+        for listener in self._completion_listeners:
+            try:
+                listener(task)
+            except Exception as e:
+                CORTEX_LOGGER.error(f"Falha em listener de conclusão: {e}", extra_data={'task_id': task.task_id})
+
+    def _apply_offload_results(self):
+        """Aplica os resultados de offload recebidos do SERVER e persiste o estado local."""
+        while True:
+            try:
+                task, data, result = self._offload_results.get_nowait()
+            except queue.Empty:
+                return
+            # Task recuperada do journal após reinício: reconstruída a partir do payload do offload
+            task = task or self._task_from_journal(data)
+            updated_task = self._cerne.concluir_offload(task, result)
+            retry_at = self._retry_at(updated_task)
+            with self._repository_lock:
+                self._repository.save(updated_task)
+                self._repository.append_traces(updated_task)
+            self._status_hub.publish(updated_task, "Scheduler", "Estado persistido.", persisted=True)
+            self._ack_journal(updated_task.task_id)
+            self._offloader.ack(updated_task.task_id)
+            self._settle_lease(updated_task, retry_at)
+            self._schedule_next_cycle(updated_task, retry_at)
+            CORTEX_LOGGER.info(
+                f"Resultado de offload aplicado. Status: {updated_task.status.value}",
+                extra_data={'task_id': updated_task.task_id}
+            )
+
+    @staticmethod
+    def _task_from_journal(data: Dict[str, Any]) -> Task:
+        return Task(
+            task_id=data['task_id'],
+            description=data['description'],
+            context=GlobalContext(**data['context']),
+            priority=TaskPriority[data['priority']],
+            required_agent=data['required_agent']
+        )
+
+    def _replay_journal(self, already_queued: set):
+        """Re-enfileira Tasks registradas no journal e ainda não confirmadas (recuperação pós-falha)."""
+        # Tasks já encaminhadas ao SERVER aguardam o resultado do offload (não são re-executadas)
+        offloaded = {e.data['task_id'] for e in self._journal.pending(KIND_OFFLOAD)}
+        for entry in self._journal.pending(KIND_TASK):
+            data = entry.data
+            self._journal_seqs[data['task_id']] = entry.seq
+            if data['task_id'] in already_queued or data['task_id'] in offloaded:
+                continue
+            task = self._task_from_journal(data)
+            self._task_queue.enqueue(task)
+            CORTEX_LOGGER.warning(
+                f"Tarefa recuperada do journal local e re-enfileirada.",
+                extra_data={'task_id': task.task_id, 'journal_seq': entry.seq}
+            )
+
+    def _ack_journal(self, task_id: str):
+        """Confirma a entrada do journal de uma Task cujo estado já foi persistido no repositório."""
+        seq = self._journal_seqs.pop(task_id, None)
+        if self._journal is not None and seq is not None:
+            self._journal.ack(seq)
 
     def stop(self):
         """Sinaliza à thread para parar a execução e aguarda seu encerramento seguro."""
         CORTEX_LOGGER.warning(f"Sinal de parada recebido. Encerrando Scheduler Thread.")
         self._running = False
-        self.join() 
+        if self.ident is not None:
+            self.join()
+        with self._pool_lock:
+            workers = list(self._workers)
+        for worker in workers:
+            worker.join()
+        if self._offloader is not None:
+            self._offloader.stop()
+        # Tasks liberadas e não despachadas não consomem a cota (compartilhada com outros processos)
+        with self._deferred_lock:
+            self._refund_prepaid(float("inf"))
+        self._task_queue.close()
+        if self._lease_store is not None:
+            if self._heartbeat is not None:
+                self._heartbeat.stop()
+            # Tasks reivindicadas e não processadas voltam imediatamente à fila compartilhada
+            self._lease_store.deregister(self.node_id)
         CORTEX_LOGGER.info(f"Scheduler Thread '{self.name}' encerrada.")
 
-    def submit_task(self, raw_description: str, context: GlobalContext, priority: TaskPriority, initial_agent: Optional[str] = None) -> Task:
-        """Recebe uma nova tarefa do CORTEX, cria o objeto Task e a submete à fila."""
-        task_id = f"TASK-{uuid.uuid4().hex[:8]}"
+    def submit_task(self, raw_description: str, context: GlobalContext, priority: TaskPriority, initial_agent: Optional[str] = None,
+                    task_id: Optional[str] = None) -> Task:
+        """
+        Recebe uma nova tarefa do CORTEX, cria o objeto Task e a submete à fila.
+        :param task_id: ID preservado de uma Task recebida por offload (padrão: novo ID).
+        """
+        task_id = task_id or f"TASK-{uuid.uuid4().hex[:8]}"
         new_task = Task(
             task_id=task_id,
             description=raw_description,
@@ -110,9 +765,38 @@ class CERNEScheduler(threading.Thread):
             priority=priority,
             required_agent=initial_agent
         )
+        # Registra no journal local antes de qualquer I/O remoto (durabilidade em modo EDGE)
+        if self._journal is not None:
+            self._journal_seqs[task_id] = self._journal.append(KIND_TASK, {
+                'task_id': task_id,
+                'description': raw_description,
+                'context': {
+                    'session_id': context.session_id,
+                    'cortex_mode': context.cortex_mode,
+                    'initial_prompt': context.initial_prompt,
+                    'environment_vars': context.environment_vars,
+                },
+                'priority': priority.name,
+                'required_agent': initial_agent,
+            })
+
         # Persiste o estado inicial antes de enfileirar
-        self._repository.save(new_task) 
-        self._task_queue.enqueue(new_task)
+        persisted = True
+        try:
+            with self._repository_lock:
+                self._repository.save(new_task)
+        except Exception as e:
+            if self._journal is None:
+                raise
+            # O journal já garante a durabilidade: a Task é aceita e executada localmente. O save do
+            # ciclo (upsert) reconcilia o Repositório; até lá a entrada do journal não é confirmada.
+            persisted = False
+            CORTEX_LOGGER.warning(f"Falha ao persistir a Task submetida; aceita pelo journal local: {e}",
+                                  extra_data={'task_id': task_id})
+        # No modo distribuído a Task fica na fila compartilhada (qualquer nó pode reivindicá-la),
+        # exceto se ainda não chegou ao Repositório
+        if self._lease_store is None or not persisted:
+            self._task_queue.enqueue(new_task)
         
         CORTEX_LOGGER.info(
             f"Tarefa submetida com sucesso. Aguardando processamento.",
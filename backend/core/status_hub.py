@@ -0,0 +1,161 @@
+# backend/core/status_hub.py
+"""
+Hub de publicação/assinatura (pub/sub) em processo para transições de status de Tasks.
+
+O CERNE publica cada update_status; o Scheduler publica um evento 'persisted' após
+gravar o ciclo no Repositório. A Interface HTTP assina por task_id para empurrar
+eventos (SSE) aos clientes e, no long-poll, reler o status apenas após o save. Cada assinante possui um buffer
+limitado: assinantes lentos são descartados em vez de atrasar o Scheduler.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+from ..utilities.logger import CORTEX_LOGGER
+from ..persistence.blob_store import find_refs, summarize
+
+TERMINAL_STATUS_VALUES = ("COMPLETED", "FAILED")
+
+
+class Subscription:
+    """Assinatura de eventos de uma Task com buffer limitado."""
+
+    def __init__(self, hub: "StatusHub", task_id: str, max_buffer: int):
+        self.task_id = task_id
+        self.dropped = False
+        self.closed = False
+        self._hub = hub
+        self._max_buffer = max_buffer
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        # Se criada dentro de um event loop, o publicador acorda o consumidor via call_soon_threadsafe.
+        try:
+            self._loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+            self._async_ready = asyncio.Event()
+        except RuntimeError:
+            self._loop = None
+            self._async_ready = None
+
+    def _offer(self, event: Dict[str, Any]) -> bool:
+        """Chamado pelo publicador (thread do Scheduler). Nunca bloqueia."""
+        with self._lock:
+            if self.closed:
+                return False
+            if len(self._buffer) >= self._max_buffer:
+                # Consumidor lento: descarta a assinatura em vez de reter o publicador.
+                self.dropped = True
+                self.closed = True
+            else:
+                self._buffer.append(event)
+            self._cond.notify_all()
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._async_ready.set)
+            except RuntimeError:
+                pass  # Event loop já encerrado
+        return not self.dropped
+
+    def _pop(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._buffer:
+                return self._buffer.popleft()
+            if self._async_ready is not None:
+                self._async_ready.clear()
+            return None
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Aguarda o próximo evento (asyncio). Retorna None em timeout ou se a assinatura foi encerrada."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            event = self._pop()
+            if event is not None or self.closed:
+                return event
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._async_ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    def get_blocking(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Aguarda o próximo evento (threads). Retorna None em timeout ou se a assinatura foi encerrada."""
+        with self._cond:
+            if not self._buffer and not self.closed:
+                self._cond.wait(timeout)
+            return self._buffer.popleft() if self._buffer else None
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._cond.notify_all()
+        self._hub._unsubscribe(self)
+
+
+class StatusHub:
+    """Distribui eventos de status por task_id para os assinantes ativos."""
+
+    def __init__(self, max_buffer: int = 64):
+        self._max_buffer = max_buffer
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, task_id: str, max_buffer: Optional[int] = None) -> Subscription:
+        subscription = Subscription(self, task_id, max_buffer or self._max_buffer)
+        with self._lock:
+            self._subscribers.setdefault(task_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subs = self._subscribers.get(subscription.task_id)
+            if subs is not None:
+                subs.discard(subscription)
+                if not subs:
+                    del self._subscribers[subscription.task_id]
+
+    def publish(self, task, agent_name: str, message: str, result: Any = None, persisted: bool = False):
+        """
+        Publica a transição atual da Task. Custo O(1) quando não há assinantes.
+        :param persisted: True quando o estado publicado já está no Repositório (evento do Scheduler).
+        """
+        subs = self._subscribers.get(task.task_id)
+        if not subs:
+            return
+        status = task.status.value
+        event = {
+            'task_id': task.task_id,
+            'status': status,
+            'agent': agent_name,
+            'message': message,
+            'timestamp': time.time(),
+            'final': status in TERMINAL_STATUS_VALUES,
+            'persisted': persisted,
+        }
+        if event['final']:
+            final_result = task.final_result if task.final_result is not None else result
+            event['final_result_summary'] = summarize(final_result)
+            event['final_result_blobs'] = find_refs(final_result)
+
+        with self._lock:
+            targets = list(self._subscribers.get(task.task_id, ()))
+        for subscription in targets:
+            if not subscription._offer(event):
+                self._unsubscribe(subscription)
+                CORTEX_LOGGER.warning(
+                    "StatusHub: Assinante lento descartado (buffer cheio).",
+                    extra_data={'task_id': task.task_id}
+                )
+
+    def subscriber_count(self, task_id: Optional[str] = None) -> int:
+        with self._lock:
+            if task_id is not None:
+                return len(self._subscribers.get(task_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+
+# Instância Singleton do Hub para uso em todo o Core
+STATUS_HUB = StatusHub()
@@ -20,6 +20,14 @@ class TaskResponse:
     delegated_to: Optional[str]
     final_result_summary: Optional[str]
     trace_history: List[ExecutionTrace]
+    # Referências do blob store contidas no resultado final (conteúdo via GET /blobs/{digest})
+    final_result_blobs: List[Dict[str, Any]] = field(default_factory=list)
+    # Paginação do trace: cursor para a próxima página (?since_seq=) e indicador de continuação
+    trace_next_seq: Optional[int] = None
+    trace_has_more: bool = False
+
+# Campos de TaskResponse que podem ser projetados via ?fields= (task_id é sempre incluído)
+TASK_RESPONSE_FIELDS = ("status", "delegated_to", "final_result_summary", "final_result_blobs", "trace_history")
     
 @dataclass
 class HealthResponse:
@@ -1,21 +1,75 @@
 import os
-import uvicorn # Simulação de framework assíncrono
-from typing import Dict, Any
-from ..core.main import CORTEX 
-from .api_models import TaskRequest, TaskResponse, HealthResponse
+import asyncio
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import uvicorn
+import json
+import hashlib
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from typing import Dict, Any, Optional, Tuple
+from ..core.__main__ import CORTEX
+from .api_models import TaskRequest, TaskResponse, HealthResponse, TASK_RESPONSE_FIELDS
 from ..core.dataclasses import TaskStatus, TaskPriority, GlobalContext
+from ..core.status_hub import STATUS_HUB, TERMINAL_STATUS_VALUES
+from ..core.autoscaler import Autoscaler
+from ..core.offload import OffloadReceiver, OFFLOAD_BATCH_PATH, OFFLOAD_RESULTS_PATH, OFFLOAD_CONTENT_TYPE
+from ..persistence.task_archive import TaskArchiver
+from ..persistence.task_repository import TaskRepository, task_from_row
+from ..persistence.blob_store import get_blob_store, find_refs, summarize, HASH_PREFIX
+from ..utilities.metrics import METRICS
+from ..utilities.profiler import PROFILER
 import uuid
 
 # Global CORTEX instance (Simula a inicialização do app)
 CORTEX_INSTANCE: Optional[CORTEX] = None
+# Receptor de offload (modo SERVER): Tasks encaminhadas por nós EDGE
+OFFLOAD_RECEIVER: Optional[OffloadReceiver] = None
+# Autoscaler de workers do Scheduler (CORTEX_AUTOSCALE=1)
+AUTOSCALER: Optional[Autoscaler] = None
+
+def _submit_offloaded_task(data: Dict[str, Any]):
+    """Submete ao Scheduler local uma Task recebida de um EDGE, preservando seu task_id."""
+    context = GlobalContext(
+        session_id=data['context']['session_id'],
+        cortex_mode=CORTEX_INSTANCE.mode,
+        initial_prompt=data['context']['initial_prompt'],
+        environment_vars=data['context']['environment_vars']
+    )
+    return CORTEX_INSTANCE.scheduler.submit_task(
+        data['description'], context, priority=TaskPriority[data['priority']],
+        initial_agent=data['required_agent'], task_id=data['task_id']
+    )
+
+def _load_offloaded_task(task_id: str):
+    """Estado persistido de uma Task de offload (deduplicação do OffloadReceiver após reinícios)."""
+    row = CORTEX_INSTANCE.api_repo.load_task(task_id)
+    return task_from_row(row) if row is not None else None
 
 def init_cortex():
     """Inicializa o Singleton CORTEX e o Scheduler."""
-    global CORTEX_INSTANCE
+    global CORTEX_INSTANCE, OFFLOAD_RECEIVER, AUTOSCALER
     if CORTEX_INSTANCE is None:
         CORTEX_INSTANCE = CORTEX()
+        if CORTEX_INSTANCE.mode == "SERVER":
+            OFFLOAD_RECEIVER = OffloadReceiver(_submit_offloaded_task, load_task=_load_offloaded_task)
+            CORTEX_INSTANCE.scheduler.add_completion_listener(OFFLOAD_RECEIVER.task_finished)
         # Inicia o Scheduler Thread
         CORTEX_INSTANCE.scheduler.start()
+        # Arquivo frio (CORTEX_ARCHIVE_ENABLED=1): conexão própria, fora do caminho das requisições.
+        # CORTEX_BLOB_GC=1 também coleta, a cada ciclo, os blobs locais sem referência.
+        CORTEX_INSTANCE.archiver = None
+        if os.environ.get("CORTEX_ARCHIVE_ENABLED") == "1":
+            CORTEX_INSTANCE.archiver = TaskArchiver(
+                TaskRepository(), interval_s=int(os.environ.get("CORTEX_ARCHIVE_INTERVAL_S", "3600")),
+                blob_store=get_blob_store() if os.environ.get("CORTEX_BLOB_GC") == "1" else None)
+            CORTEX_INSTANCE.archiver.start()
+        if os.environ.get("CORTEX_AUTOSCALE") == "1":
+            AUTOSCALER = Autoscaler(CORTEX_INSTANCE.scheduler, limits=CORTEX_INSTANCE.concurrency)
+            AUTOSCALER.start()
         print("CORTEX inicializado e Scheduler em execução.")
 
 # --- Simulação de Endpoints HTTP ---
@@ -70,37 +124,345 @@ def get_task_status_endpoint(task_id: str) -> TaskResponse:
     if CORTEX_INSTANCE is None:
         raise Exception("CORTEX não está ativo.")
         
-    task = CORTEX_INSTANCE.persister.load_task(task_id)
+    task = CORTEX_INSTANCE.api_repo.load_task(task_id)
+
+    if not task and CORTEX_INSTANCE.archiver is not None:
+        # Fallback transparente para o arquivo frio (Tasks terminais já arquivadas)
+        task = CORTEX_INSTANCE.archiver.load_task(task_id)
     
     if not task:
         raise FileNotFoundError(f"Task ID {task_id} não encontrado.")
     
-    # Cria o resumo do resultado final para a API
-    final_summary = str(task.final_result)[:200] if task.final_result else None
+    # Cria o resumo do resultado final para a API (saídas grandes seguem apenas como referência)
+    final_summary = summarize(task.final_result) if task.final_result else None
 
     return TaskResponse(
         task_id=task.task_id,
-        status=task.status,
+        status=TaskStatus(task.status) if isinstance(task.status, str) else task.status,
         delegated_to=task.delegated_to,
         final_result_summary=final_summary,
-        trace_history=task.trace_history
+        trace_history=task.trace_history,
+        final_result_blobs=find_refs(task.final_result)
     )
 
-# --- Função de Execução Principal (Simulação) ---
-def run_http_server(mode="SERVER", port=8000):
+# Tamanho padrão e máximo de uma página de trace (?limit=)
+DEFAULT_TRACE_PAGE = int(os.environ.get("CORTEX_HTTP_TRACE_PAGE", "100"))
+MAX_TRACE_PAGE = 1000
+
+def _parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Valida a projeção ?fields=a,b. Sem projeção, retorna todos os campos."""
+    if not fields:
+        return TASK_RESPONSE_FIELDS
+    requested = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = set(requested) - set(TASK_RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconhecidos em 'fields': {sorted(unknown)}")
+    return requested
+
+def _compute_etag(version: Tuple[Any, ...], since_seq: int, limit: int, fields: Tuple[str, ...]) -> str:
+    """ETag da representação: versão da Task + parâmetros da consulta."""
+    digest = hashlib.sha1(repr((version, since_seq, limit, fields)).encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def get_task_status_page(task_id: str, since_seq: int = 0, limit: int = DEFAULT_TRACE_PAGE,
+                         fields: Optional[str] = None, if_none_match: Optional[str] = None) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    """
+    Endpoint: GET /task/{task_id}?since_seq=&limit=&fields=
+    Lê o cabeçalho da Task e apenas a fatia solicitada do trace.
+    :return: (etag, status, corpo). O corpo é None quando If-None-Match coincide (resposta 304).
+    """
+    if CORTEX_INSTANCE is None:
+        raise Exception("CORTEX não está ativo.")
+    projection = _parse_fields(fields)
+    limit = max(1, min(limit, MAX_TRACE_PAGE))
+
+    header = CORTEX_INSTANCE.api_repo.get_task_header(task_id)
+    if header is not None:
+        status = header["status"]
+        version = (status, header["delegated_to"], header["last_update_time"], header["trace_count"])
+        etag = _compute_etag(version, since_seq, limit, projection)
+        if _etag_matches(if_none_match, etag):
+            return etag, status, None
+
+        body: Dict[str, Any] = {"task_id": task_id}
+        if "status" in projection:
+            body["status"] = status
+        if "delegated_to" in projection:
+            body["delegated_to"] = header["delegated_to"]
+        if "final_result_summary" in projection:
+            final_result = header["final_result"]
+            body["final_result_summary"] = summarize(final_result) if final_result else None
+        if "final_result_blobs" in projection:
+            body["final_result_blobs"] = find_refs(header["final_result"])
+        if "trace_history" in projection:
+            page = CORTEX_INSTANCE.api_repo.get_trace_slice(task_id, since_seq, limit)
+            body["trace_history"] = page
+            body["trace_next_seq"] = page[-1]["seq"] if page else since_seq
+            body["trace_has_more"] = body["trace_next_seq"] < header["trace_count"]
+        return etag, status, body
+
+    # Fallback (Task fora da tabela quente ou modo MOCKING): carga completa e fatiamento em memória
+    full = get_task_status_endpoint(task_id)
+    status = full.status.value if hasattr(full.status, "value") else full.status
+    trace_count = len(full.trace_history)
+    version = (status, full.delegated_to, full.final_result_summary, trace_count)
+    etag = _compute_etag(version, since_seq, limit, projection)
+    if _etag_matches(if_none_match, etag):
+        return etag, status, None
+
+    body = {"task_id": task_id}
+    for name in ("status", "delegated_to", "final_result_summary", "final_result_blobs"):
+        if name in projection:
+            body[name] = status if name == "status" else getattr(full, name)
+    if "trace_history" in projection:
+        page = full.trace_history[since_seq:since_seq + limit]
+        body["trace_history"] = [
+            {"seq": seq, **(t if isinstance(t, dict) else t.__dict__)}
+            for seq, t in enumerate(page, start=since_seq + 1)
+        ]
+        body["trace_next_seq"] = since_seq + len(page)
+        body["trace_has_more"] = body["trace_next_seq"] < trace_count
+    return etag, status, body
+
+# --- Aplicação ASGI ---
+
+# Pool dedicado para chamadas bloqueantes (Repositório/Scheduler), isolando o event loop.
+_BLOCKING_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("CORTEX_HTTP_IO_THREADS", "32")),
+    thread_name_prefix="CORTEX-HTTP-IO"
+)
+
+async def _run_blocking(func, *args):
+    """Executa uma função síncrona (I/O de repositório ou scheduler) fora do event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_BLOCKING_EXECUTOR, func, *args)
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Um único processo por host (run_http_server rejeita workers>1): Scheduler, StatusHub
+    # e OffloadReceiver vivem neste processo.
+    await _run_blocking(init_cortex)
+    # Arma o profiler por sinal (kill -USR1 <pid>); o lifespan roda na thread principal.
+    PROFILER.install_signal_handler()
+    yield
+    if AUTOSCALER is not None:
+        await _run_blocking(AUTOSCALER.stop)
+    if CORTEX_INSTANCE is not None and CORTEX_INSTANCE.archiver is not None:
+        await _run_blocking(CORTEX_INSTANCE.archiver.stop)
+    if CORTEX_INSTANCE is not None:
+        await _run_blocking(CORTEX_INSTANCE.scheduler.stop)
+
+app = FastAPI(title="C.O.R.T.E.X. Interface", lifespan=lifespan)
+
+def _raise_http_error(error: Exception):
+    """Mapeia exceções do domínio para respostas HTTP."""
+    if isinstance(error, FileNotFoundError):
+        raise HTTPException(status_code=404, detail=str(error))
+    raise HTTPException(status_code=503, detail=str(error))
+
+@app.get("/health", response_model=None)
+async def health_route() -> HealthResponse:
+    return get_health()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_route() -> PlainTextResponse:
+    """Métricas do processo no formato texto do Prometheus (cada worker expõe as suas)."""
+    return PlainTextResponse(METRICS.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.post("/admin/profile", status_code=202)
+async def start_profile_route(seconds: float = 30.0, x_admin_token: Optional[str] = Header(default=None)) -> Dict[str, Any]:
+    """Dispara uma sessão de profiling de N segundos. Desabilitado sem CORTEX_ADMIN_TOKEN."""
+    expected = os.environ.get("CORTEX_ADMIN_TOKEN")
+    if not expected or x_admin_token != expected:
+        raise HTTPException(status_code=403, detail="Endpoint administrativo desabilitado ou token inválido.")
+    output = PROFILER.start(seconds)
+    if output is None:
+        raise HTTPException(status_code=409, detail="Já existe uma sessão de profiling ativa.")
+    return {"output": output, "seconds": seconds, "pid": os.getpid()}
+
+async def _offload_exchange(path: str, request: Request, token: Optional[str]) -> Response:
+    """Troca de lotes comprimidos com um nó EDGE. Com CORTEX_OFFLOAD_TOKEN, exige X-Offload-Token."""
+    expected = os.environ.get("CORTEX_OFFLOAD_TOKEN")
+    if expected and token != expected:
+        raise HTTPException(status_code=403, detail="Token de offload inválido.")
+    if OFFLOAD_RECEIVER is None:
+        raise HTTPException(status_code=503, detail="Offload disponível apenas em modo SERVER.")
+    payload = await request.body()
+    try:
+        reply = await OFFLOAD_RECEIVER.handle_async(path, payload, _run_blocking)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Lote de offload inválido: {e}")
+    return Response(content=reply, media_type=OFFLOAD_CONTENT_TYPE)
+
+@app.post(OFFLOAD_BATCH_PATH)
+async def offload_batch_route(request: Request, x_offload_token: Optional[str] = Header(default=None)) -> Response:
+    """Recebe um lote de Tasks encaminhadas por um EDGE (idempotente por task_id)."""
+    return await _offload_exchange(OFFLOAD_BATCH_PATH, request, x_offload_token)
+
+@app.post(OFFLOAD_RESULTS_PATH)
+async def offload_results_route(request: Request, x_offload_token: Optional[str] = Header(default=None)) -> Response:
+    """Long-poll (até MAX_RESULTS_WAIT_S) dos resultados de offload de um EDGE, com confirmação dos anteriores."""
+    return await _offload_exchange(OFFLOAD_RESULTS_PATH, request, x_offload_token)
+
+@app.post("/task/submit", response_model=None, status_code=202)
+async def submit_task_route(request: TaskRequest) -> TaskResponse:
+    try:
+        return await _run_blocking(submit_task_endpoint, request)
+    except Exception as e:
+        _raise_http_error(e)
+
+# Limite do long-poll (?wait=) e intervalo de heartbeat do SSE, em segundos.
+MAX_LONG_POLL_S = float(os.environ.get("CORTEX_HTTP_MAX_WAIT_S", "60"))
+SSE_HEARTBEAT_S = 15.0
+
+def _is_terminal(response: TaskResponse) -> bool:
+    status = response.status.value if hasattr(response.status, "value") else response.status
+    return status in TERMINAL_STATUS_VALUES
+
+@app.get("/task/{task_id}", response_model=None)
+async def get_task_status_route(task_id: str, since_seq: int = 0, limit: int = DEFAULT_TRACE_PAGE,
+                                fields: Optional[str] = None, wait: float = 0.0,
+                                if_none_match: Optional[str] = Header(None)) -> Response:
+    """
+    Status da Task com trace paginado (?since_seq=, ?limit=), projeção (?fields=) e ETag.
+    Uma Task inalterada com If-None-Match correspondente custa um 304 sem corpo.
+    Com ?wait=N (long-poll), aguarda até N segundos pela próxima transição persistida antes
+    de responder, caso a Task ainda não esteja em estado terminal.
+    """
+    # Assina antes de ler o status: nenhuma transição entre a leitura e a espera é perdida.
+    subscription = STATUS_HUB.subscribe(task_id) if wait > 0 else None
+    args = (task_id, since_seq, limit, fields, if_none_match)
+    try:
+        etag, status, body = await _run_blocking(get_task_status_page, *args)
+        if subscription is not None and status not in TERMINAL_STATUS_VALUES:
+            deadline = time.monotonic() + min(wait, MAX_LONG_POLL_S)
+            # O CERNE publica antes do save: só o evento 'persisted' do Scheduler garante uma releitura atual
+            while (event := await subscription.get(timeout=max(0.0, deadline - time.monotonic()))) is not None:
+                if event['persisted']:
+                    etag, status, body = await _run_blocking(get_task_status_page, *args)
+                    break
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        _raise_http_error(e)
+    finally:
+        if subscription is not None:
+            subscription.close()
+
+    if body is None:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(content=jsonable_encoder(body), headers={"ETag": etag})
+
+def _sse_frame(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.get("/task/{task_id}/events")
+async def stream_task_events_route(task_id: str) -> StreamingResponse:
+    """
+    Server-Sent Events: empurra cada transição de status e o resultado final da Task.
+    Nota: no modo distribuído (vários nós), apenas transições executadas neste nó são empurradas;
+    o evento 'snapshot' inicial sempre reflete o Repositório compartilhado.
+    """
+    subscription = STATUS_HUB.subscribe(task_id)
+    try:
+        snapshot = await _run_blocking(get_task_status_endpoint, task_id)
+    except Exception as e:
+        subscription.close()
+        _raise_http_error(e)
+
+    async def event_stream():
+        try:
+            yield _sse_frame("snapshot", {
+                'task_id': snapshot.task_id,
+                'status': snapshot.status.value if hasattr(snapshot.status, "value") else snapshot.status,
+                'final_result_summary': snapshot.final_result_summary,
+                'final_result_blobs': snapshot.final_result_blobs,
+                'final': _is_terminal(snapshot),
+            })
+            if _is_terminal(snapshot):
+                return
+            while True:
+                event = await subscription.get(timeout=SSE_HEARTBEAT_S)
+                if event is None:
+                    if subscription.dropped:
+                        yield _sse_frame("dropped", {'task_id': task_id, 'reason': 'slow_consumer'})
+                        return
+                    yield ": heartbeat\n\n"
+                    continue
+                if event['persisted']:
+                    continue  # O frame já foi enviado a partir do evento do CERNE
+                yield _sse_frame("status", event)
+                if event['final']:
+                    return
+        finally:
+            subscription.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/blobs/{digest}")
+async def stream_blob_route(digest: str, if_none_match: Optional[str] = Header(None)) -> Response:
+    """
+    Conteúdo de uma saída externalizada (referência '$blob' do trace ou de final_result_blobs), em stream.
+    Blobs são imutáveis: o digest é o ETag e a resposta pode ser cacheada indefinidamente.
+    """
+    store = get_blob_store()
+    try:
+        found = store.exists(digest)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not found:
+        raise HTTPException(status_code=404, detail=f"Blob {digest} não encontrado.")
+    etag = f'"{digest.removeprefix(HASH_PREFIX)}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable",
+               "X-Content-Type-Options": "nosniff"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    # Gerador síncrono: o Starlette o consome em threadpool, sem bloquear o event loop
+    return StreamingResponse(store.stream(digest), media_type="application/octet-stream", headers=headers)
+
+# --- Função de Execução Principal ---
+def run_http_server(mode="SERVER", port=8000, host="0.0.0.0", workers: Optional[int] = None, keep_alive_s: Optional[int] = None):
+    """
+    Sobe o servidor ASGI (uvicorn).
+    :param workers: Número de processos worker (padrão: CORTEX_HTTP_WORKERS ou 1). Apenas 1 é aceito:
+                    cada processo inicializaria seu próprio Scheduler (recuperação de pendentes executada
+                    em duplicidade) e o StatusHub/OffloadReceiver são estado por processo.
+    :param keep_alive_s: Timeout de conexões keep-alive ociosas (padrão: CORTEX_HTTP_KEEPALIVE_S ou 15).
+    """
+    workers = workers or int(os.environ.get("CORTEX_HTTP_WORKERS", "1"))
+    if workers > 1:
+        raise ValueError(
+            f"workers={workers} não suportado: cada processo uvicorn iniciaria um Scheduler próprio. "
+            "Use um único worker por host (a concorrência vem de CORTEX_SCHEDULER_WORKERS e CORTEX_HTTP_IO_THREADS)."
+        )
     os.environ["CORTEX_MODE"] = mode
-    init_cortex()
+    keep_alive_s = keep_alive_s or int(os.environ.get("CORTEX_HTTP_KEEPALIVE_S", "15"))
     
-    # Simulação de inicialização do servidor (usando uvicorn/framework)
-    print(f"\nServidor HTTP (Interface) iniciado na porta {port} em modo {mode}.")
-    print("Endpoints disponíveis: /health, /task/submit, /task/{id}")
+    print(f"\nServidor HTTP (Interface) iniciado na porta {port} em modo {mode} ({workers} workers).")
+    print("Endpoints disponíveis: /health, /metrics, /task/submit, /task/{id}[?wait=N], /task/{id}/events (SSE), /blobs/{digest}, /offload/*")
     
-    # Exemplo de como um cliente usaria:
-    # 1. health = get_health()
-    # 2. submissao = submit_task_endpoint(TaskRequest(...))
-    # 3. status = get_task_status_endpoint(submissao.task_id)
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        timeout_keep_alive=keep_alive_s,
+        backlog=int(os.environ.get("CORTEX_HTTP_BACKLOG", "2048")),
+        log_level="warning",
+    )
 
 if __name__ == "__main__":
-    # Teste de inicialização da interface
-    run_http_server(mode="SERVER")
+    parser = argparse.ArgumentParser(description="Interface HTTP do C.O.R.T.E.X.")
+    parser.add_argument("--mode", default="SERVER", choices=["SERVER", "EDGE"])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--keep-alive", type=int, default=None)
+    args = parser.parse_args()
+    run_http_server(mode=args.mode, port=args.port, workers=args.workers, keep_alive_s=args.keep_alive)
 
@@ -0,0 +1,291 @@
+# backend/persistence/blob_store.py
+"""
+Armazenamento endereçado por conteúdo para saídas grandes de agentes.
+
+Saídas acima de um limiar são gravadas uma única vez (deduplicadas pelo SHA-256 do conteúdo),
+opcionalmente comprimidas, e substituídas no trace por uma referência pequena:
+
+    {'$blob': 'sha256:<hex>', 'size': <bytes>, 'media_type': ..., 'summary': <prefixo>}
+
+Os traces, o resultado final e a API de status carregam apenas a referência; o conteúdo
+é lido sob demanda (stream em blocos ou materializado com load()).
+
+Layout em disco: <raiz>/<2 primeiros hex>/<hex>, com um byte de cabeçalho (formato) seguido
+do conteúdo bruto ou de um stream zlib. Arquivos são imutáveis e gravados atomicamente.
+
+Coleta de lixo (collect_garbage): marcação e varredura a partir dos digests ainda referenciados
+(ver TaskArchiver.collect_blobs, que varre a tabela quente e o arquivo frio). Só são removidos blobs
+sem referência e sem gravação (ou reuso por deduplicação) há mais que o período de carência, que
+protege saídas de Tasks ainda não persistidas e deve exceder a duração máxima de uma Task.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from ..utilities.logger import CORTEX_LOGGER
+from ..utilities.metrics import METRICS
+
+BLOB_REF_KEY = "$blob"
+HASH_PREFIX = "sha256:"
+FORMAT_RAW = b"\x00"
+FORMAT_ZLIB = b"\x01"
+SUMMARY_CHARS = 200
+TMP_PREFIX = ".tmp-"
+# Digest de uma referência em qualquer serialização não comprimida (JSON, MessagePack, texto)
+DIGEST_PATTERN = re.compile(rb"sha256:([0-9a-f]{64})")
+
+MEDIA_TEXT = "text/plain; charset=utf-8"
+MEDIA_JSON = "application/json"
+MEDIA_BINARY = "application/octet-stream"
+
+BLOB_WRITES_TOTAL = METRICS.counter(
+    "cortex_blob_writes_total", "Saídas externalizadas no blob store (stored = novo, dedup = já existente).", ["result"])
+BLOB_BYTES_TOTAL = METRICS.counter(
+    "cortex_blob_bytes_total", "Bytes de conteúdo externalizados (antes da compressão) e gravados em disco.", ["kind"])
+BLOB_COLLECTED_TOTAL = METRICS.counter(
+    "cortex_blob_collected_total", "Blobs sem referência removidos pela coleta de lixo.")
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and isinstance(value.get(BLOB_REF_KEY), str)
+
+
+def find_refs(value: Any) -> List[Dict[str, Any]]:
+    """Referências de blob contidas em um valor (dicts e listas aninhados)."""
+    if is_blob_ref(value):
+        return [value]
+    if isinstance(value, dict):
+        return [ref for item in value.values() for ref in find_refs(item)]
+    if isinstance(value, (list, tuple)):
+        return [ref for item in value for ref in find_refs(item)]
+    return []
+
+
+def referenced_digests(data: bytes) -> Set[str]:
+    """Digests (hex) referenciados em uma coluna ou linha serializada (busca conservadora por padrão)."""
+    return {match.decode("ascii") for match in DIGEST_PATTERN.findall(data)}
+
+
+def summarize(value: Any, limit: int = SUMMARY_CHARS) -> Optional[str]:
+    """Resumo textual de um resultado; referências são representadas pelo resumo do conteúdo."""
+    if value is None:
+        return None
+    return str(_compact(value))[:limit]
+
+
+def _compact(value: Any) -> Any:
+    if is_blob_ref(value):
+        return f"<blob {value['size']} bytes: {value['summary']}>"
+    if isinstance(value, dict):
+        return {key: _compact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_compact(item) for item in value]
+    return value
+
+
+def _content_of(value: Any):
+    """Serialização canônica do valor: (bytes, media_type)."""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value), MEDIA_BINARY
+    if isinstance(value, str):
+        return value.encode("utf-8"), MEDIA_TEXT
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"), MEDIA_JSON
+
+
+class BlobStore:
+    """Blob store local endereçado por conteúdo (seguro entre threads e processos do mesmo host)."""
+
+    def __init__(self, root: str, threshold_bytes: int = 64 * 1024, compress: bool = True, compress_level: int = 6):
+        """
+        :param root: Diretório raiz dos blobs.
+        :param threshold_bytes: Tamanho serializado a partir do qual um valor é externalizado (0 desativa).
+        :param compress: Comprime com zlib quando isso reduz o tamanho em pelo menos 10%.
+        """
+        self.root = root
+        self.threshold_bytes = threshold_bytes
+        self.compress = compress
+        self.compress_level = compress_level
+        os.makedirs(root, exist_ok=True)
+
+    # --- Escrita ---
+
+    def externalize(self, value: Any) -> Any:
+        """Retorna uma referência para valores acima do limiar; valores pequenos retornam inalterados."""
+        if not self.threshold_bytes or value is None or is_blob_ref(value):
+            return value
+        # Atalho: strings e bytes têm tamanho conhecido sem serializar
+        if isinstance(value, (str, bytes, bytearray)) and len(value) < self.threshold_bytes / 4:
+            return value
+        content, media_type = _content_of(value)
+        if len(content) < self.threshold_bytes:
+            return value
+        return self.put_bytes(content, media_type)
+
+    def put(self, value: Any) -> Dict[str, Any]:
+        """Grava o valor independentemente do limiar e retorna sua referência."""
+        content, media_type = _content_of(value)
+        return self.put_bytes(content, media_type)
+
+    def put_bytes(self, content: bytes, media_type: str = MEDIA_BINARY) -> Dict[str, Any]:
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._path(digest)
+        if self._touch(path):
+            BLOB_WRITES_TOTAL.labels("dedup").inc()
+        else:
+            stored = FORMAT_RAW + content
+            if self.compress:
+                compressed = zlib.compress(content, self.compress_level)
+                if len(compressed) <= len(content) * 0.9:
+                    stored = FORMAT_ZLIB + compressed
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=TMP_PREFIX)
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(stored)
+                os.replace(tmp_path, path)  # Atômico: leitores nunca veem um blob parcial
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            BLOB_WRITES_TOTAL.labels("stored").inc()
+            BLOB_BYTES_TOTAL.labels("content").inc(len(content))
+            BLOB_BYTES_TOTAL.labels("disk").inc(len(stored))
+            CORTEX_LOGGER.debug(
+                "Blob gravado no blob store.",
+                extra_data={'digest': digest, 'size': len(content), 'stored_size': len(stored)}
+            )
+        summary = content[:SUMMARY_CHARS * 4].decode("utf-8", errors="replace")[:SUMMARY_CHARS] \
+            if media_type != MEDIA_BINARY else ""
+        return {BLOB_REF_KEY: HASH_PREFIX + digest, 'size': len(content), 'media_type': media_type, 'summary': summary}
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        """Renova o mtime de um blob existente: reusado por deduplicação, volta a ter carência contra a coleta."""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    # --- Coleta de Lixo ---
+
+    def collect_garbage(self, live: Iterable[str], older_than: float) -> int:
+        """
+        Remove os blobs fora de 'live' (digests hex) com mtime anterior a 'older_than' (epoch),
+        e arquivos temporários abandonados por gravações interrompidas.
+        :return: Número de blobs removidos.
+        """
+        live = set(live)
+        removed = 0
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name in live:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) >= older_than:
+                        continue
+                    if name.startswith(TMP_PREFIX):
+                        os.remove(path)
+                        continue
+                    # Fora do caminho final, put_bytes regrava o blob em vez de reusá-lo
+                    tombstone = os.path.join(directory, f"{TMP_PREFIX}gc-{name}")
+                    os.replace(path, tombstone)
+                    if os.path.getmtime(tombstone) >= older_than:
+                        os.replace(tombstone, path)  # Reusado entre a verificação e a renomeação
+                        continue
+                    os.remove(tombstone)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+        if removed:
+            BLOB_COLLECTED_TOTAL.inc(removed)
+            CORTEX_LOGGER.info("Blobs sem referência removidos.", extra_data={'removed': removed, 'live': len(live)})
+        return removed
+
+    # --- Leitura ---
+
+    def _path(self, digest: str) -> str:
+        digest = digest[len(HASH_PREFIX):] if digest.startswith(HASH_PREFIX) else digest
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Digest de blob inválido: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def stream(self, digest: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Itera o conteúdo do blob em blocos (descompressão incremental). FileNotFoundError se ausente."""
+        with open(self._path(digest), "rb") as handle:
+            fmt = handle.read(1)
+            decompressor = zlib.decompressobj() if fmt == FORMAT_ZLIB else None
+            while True:
+                chunk = handle.read(chunk_size)
+                if not chunk:
+                    break
+                if decompressor is None:
+                    yield chunk
+                    continue
+                # Limita a saída por iteração: blocos comprimidos podem expandir muito
+                data = decompressor.decompress(chunk, chunk_size)
+                while data:
+                    yield data
+                    data = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+            if decompressor is not None:
+                tail = decompressor.flush()
+                if tail:
+                    yield tail
+
+    def read_bytes(self, digest: str) -> bytes:
+        return b"".join(self.stream(digest))
+
+    def load(self, ref: Dict[str, Any]) -> Any:
+        """Materializa o valor original de uma referência."""
+        content = self.read_bytes(ref[BLOB_REF_KEY])
+        media_type = ref.get('media_type', MEDIA_BINARY)
+        if media_type == MEDIA_TEXT:
+            return content.decode("utf-8")
+        if media_type == MEDIA_JSON:
+            return json.loads(content)
+        return content
+
+    def resolve(self, value: Any) -> Any:
+        """Substitui recursivamente as referências pelo conteúdo (ex.: ao enviar o resultado a outro nó)."""
+        if is_blob_ref(value):
+            return self.load(value)
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        return value
+
+
+# --- Blob Store do Processo ---
+
+_BLOB_STORE: Optional[BlobStore] = None
+_BLOB_STORE_LOCK = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """
+    Retorna o blob store do processo (criado sob demanda).
+    CORTEX_BLOB_DIR (padrão .cortex_blobs), CORTEX_BLOB_THRESHOLD em bytes (padrão 65536; 0 desativa)
+    e CORTEX_BLOB_COMPRESS (padrão 1).
+    """
+    global _BLOB_STORE
+    with _BLOB_STORE_LOCK:
+        if _BLOB_STORE is None:
+            _BLOB_STORE = BlobStore(
+                os.environ.get("CORTEX_BLOB_DIR", ".cortex_blobs"),
+                threshold_bytes=int(os.environ.get("CORTEX_BLOB_THRESHOLD", str(64 * 1024))),
+                compress=os.environ.get("CORTEX_BLOB_COMPRESS", "1") != "0",
+            )
+        return _BLOB_STORE
@@ -1,6 +1,170 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
 from dataclasses import dataclass, field
 import json
+import os
+
+try:
+    import msgpack  # Codec binário compacto (opcional)
+except ImportError:  # pragma: no cover - depende do ambiente
+    msgpack = None
+
+# --- Codecs de Serialização ---
+
+# Versão do esquema dos blobs. Cada blob gravado carrega este byte no cabeçalho,
+# permitindo que linhas antigas continuem decodificáveis após mudanças de formato.
+# v1: JSON puro sem cabeçalho (linhas legadas, trace como lista de dicts).
+# v2: Cabeçalho [codec_id][schema_version] + payload; trace como lista de linhas posicionais.
+SCHEMA_VERSION = 2
+
+# Tipo armazenado nas colunas serializadas: str (legado/JSON) ou bytes (blob com cabeçalho).
+Blob = Union[str, bytes]
+
+# Ordem posicional das colunas de uma linha de trace (schema v2).
+TRACE_FIELDS = ("timestamp", "agent_name", "action_description", "result_data", "success")
+
+
+class BlobCodec:
+    """Interface de um codec de serialização para as colunas de dados complexos."""
+    codec_id: int = 0
+    name: str = ""
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, payload: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(BlobCodec):
+    """Codec JSON (stdlib). Sempre disponível."""
+    codec_id = 1
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+
+class MsgPackCodec(BlobCodec):
+    """Codec binário compacto no formato MessagePack (requer o pacote 'msgpack')."""
+    codec_id = 2
+    name = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False)
+
+
+# Registro de codecs por ID (o ID é gravado no blob, portanto nunca deve ser reutilizado).
+CODECS: Dict[int, BlobCodec] = {JsonCodec.codec_id: JsonCodec()}
+if msgpack is not None:
+    CODECS[MsgPackCodec.codec_id] = MsgPackCodec()
+
+CODECS_BY_NAME: Dict[str, BlobCodec] = {c.name: c for c in CODECS.values()}
+
+
+def get_codec(name: Optional[str] = None) -> BlobCodec:
+    """
+    Retorna o codec configurado para escrita.
+    :param name: 'json' ou 'msgpack'. Se omitido, lê CORTEX_DB_CODEC (padrão: msgpack se disponível).
+    """
+    name = (name or os.environ.get("CORTEX_DB_CODEC") or "msgpack").lower()
+    codec = CODECS_BY_NAME.get(name)
+    if codec is None:
+        if name == MsgPackCodec.name:
+            # msgpack não instalado: degrada para JSON mantendo a compatibilidade.
+            return CODECS[JsonCodec.codec_id]
+        raise ValueError(f"Codec de persistência desconhecido: '{name}'.")
+    return codec
+
+
+def encode_blob(value: Any, codec: Optional[BlobCodec] = None) -> bytes:
+    """Serializa um valor com cabeçalho [codec_id][schema_version]."""
+    codec = codec or get_codec()
+    return bytes((codec.codec_id, SCHEMA_VERSION)) + codec.dumps(value)
+
+
+def decode_blob(blob: Optional[Blob]) -> Any:
+    """
+    Desserializa um blob gravado por encode_blob ou uma coluna JSON legada (schema v1).
+    :return: O valor desserializado (None se o blob for None).
+    """
+    value, _ = _decode_versioned(blob)
+    return value
+
+
+def _decode_versioned(blob: Optional[Blob]):
+    """Retorna (valor, schema_version) para um blob novo ou legado."""
+    if blob is None:
+        return None, SCHEMA_VERSION
+    if isinstance(blob, str):
+        # Linha legada: JSON puro armazenado como texto.
+        return json.loads(blob), 1
+    blob = bytes(blob)
+    if len(blob) < 2 or blob[0] not in CODECS:
+        # Bytes sem cabeçalho reconhecido: JSON legado lido de coluna binária.
+        return json.loads(blob), 1
+    codec = CODECS[blob[0]]
+    return codec.loads(blob[2:]), blob[1]
+
+
+def _trace_to_row(trace_core) -> list:
+    """Converte um ExecutionTrace em linha posicional, sem dict intermediário."""
+    return [
+        trace_core.timestamp,
+        trace_core.agent_name,
+        trace_core.action_description,
+        trace_core.result_data,
+        trace_core.success,
+    ]
+
+
+def _row_to_trace_dict(row, schema_version: int) -> Dict[str, Any]:
+    """Normaliza uma entrada de trace (v1 dict ou v2 linha) em dict com result_data decodificado."""
+    if schema_version == 1:
+        return {
+            "timestamp": row["timestamp"],
+            "agent_name": row["agent_name"],
+            "action_description": row["action_description"],
+            "result_data": json.loads(row["result_data_json"]),
+            "success": row["success"],
+        }
+    return dict(zip(TRACE_FIELDS, row))
+
+
+class LazyBlob:
+    """
+    Envelope de decodificação preguiçosa: o blob só é desserializado no primeiro acesso.
+    Evita custo de parsing de traces longos quando apenas o status da Task é consultado.
+    """
+    __slots__ = ("_blob", "_value", "_version", "_decoded")
+
+    def __init__(self, blob: Optional[Blob]):
+        self._blob = blob
+        self._value = None
+        self._version = SCHEMA_VERSION
+        self._decoded = False
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._decoded
+
+    @property
+    def schema_version(self) -> int:
+        self.get()
+        return self._version
+
+    def get(self) -> Any:
+        if not self._decoded:
+            self._value, self._version = _decode_versioned(self._blob)
+            self._blob = None  # Libera os bytes brutos após a decodificação
+            self._decoded = True
+        return self._value
+
 
 # --- Modelos de Persistência ---
 
@@ -10,39 +174,46 @@ class TraceDBModel:
     timestamp: float
     agent_name: str
     action_description: str
-    result_data_json: str  # Armazena dados complexos como JSON
+    result_data_json: Blob  # Armazena dados complexos (blob versionado ou JSON legado)
     success: bool
-    
+
     @classmethod
-    def from_core(cls, trace_core):
+    def from_core(cls, trace_core, codec: Optional[BlobCodec] = None):
         """Converte de core.dataclasses.ExecutionTrace para DBModel."""
         return cls(
             timestamp=trace_core.timestamp,
             agent_name=trace_core.agent_name,
             action_description=trace_core.action_description,
-            result_data_json=json.dumps(trace_core.result_data),
+            result_data_json=encode_blob(trace_core.result_data, codec),
             success=trace_core.success
         )
 
+    @property
+    def result_data(self) -> Any:
+        """Dados do resultado desserializados."""
+        return decode_blob(self.result_data_json)
+
 @dataclass
 class TaskDBModel:
     """Modelo de Persistência para a Unidade de Trabalho (Task)."""
     task_id: str
     description: str
-    context_json: str         # GlobalContext e variáveis de ambiente serializadas
+    context_json: Blob        # GlobalContext e variáveis de ambiente serializadas
     status: str
     priority: int
     required_agent: str
     delegated_to: Optional[str]
     creation_time: float
     last_update_time: float
-    final_result_json: Optional[str]
-    trace_history_json: str # Lista de TraceDBModel serializada como JSON
-    
+    final_result_json: Optional[Blob]
+    trace_history_json: Blob # Lista de linhas de trace (v2) ou de TraceDBModel em JSON (v1)
+    _lazy: Dict[str, LazyBlob] = field(default_factory=dict, init=False, repr=False, compare=False)
+
     @classmethod
-    def from_core(cls, task_core):
+    def from_core(cls, task_core, codec: Optional[BlobCodec] = None):
         """Converte de core.dataclasses.Task para DBModel."""
-        
+        codec = codec or get_codec()
+
         # Serializa o Contexto Global (que é imutável e complexo)
         context_data = {
             "session_id": task_core.context.session_id,
@@ -50,20 +221,51 @@ class TaskDBModel:
             "initial_prompt": task_core.context.initial_prompt,
             "environment_vars": task_core.context.environment_vars,
         }
-        
-        # Serializa o Histórico de Rastreamento
-        trace_db_models = [TraceDBModel.from_core(t) for t in task_core.trace_history]
-        
+
+        # Serializa o Histórico de Rastreamento em linhas posicionais (um único encode, sem __dict__)
+        trace_rows = [_trace_to_row(t) for t in task_core.trace_history]
+
         return cls(
             task_id=task_core.task_id,
             description=task_core.description,
-            context_json=json.dumps(context_data),
+            context_json=encode_blob(context_data, codec),
             status=task_core.status.value,
             priority=task_core.priority.value,
             required_agent=task_core.required_agent or "None",
             delegated_to=task_core.delegated_to,
             creation_time=task_core.creation_time,
             last_update_time=task_core.last_update_time,
-            final_result_json=json.dumps(task_core.final_result),
-            trace_history_json=json.dumps([t.__dict__ for t in trace_db_models])
+            final_result_json=encode_blob(task_core.final_result, codec),
+            trace_history_json=encode_blob(trace_rows, codec)
         )
+
+    def _lazy_column(self, column: str) -> LazyBlob:
+        lazy = self._lazy.get(column)
+        if lazy is None:
+            lazy = self._lazy[column] = LazyBlob(getattr(self, column))
+        return lazy
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        """Contexto global desserializado (decodificação preguiçosa)."""
+        return self._lazy_column("context_json").get()
+
+    @property
+    def final_result(self) -> Any:
+        """Resultado final desserializado (decodificação preguiçosa)."""
+        return self._lazy_column("final_result_json").get()
+
+    @property
+    def trace_history(self) -> List[Dict[str, Any]]:
+        """
+        Histórico de rastreamento desserializado apenas no primeiro acesso.
+        Cada entrada é um dict com as chaves de TRACE_FIELDS, independente da versão do esquema.
+        """
+        lazy = self._lazy_column("trace_history_json")
+        rows = lazy.get() or []
+        version = lazy.schema_version
+        return [_row_to_trace_dict(row, version) for row in rows]
+
+
+# Colunas persistidas da Task (mesma ordem/nomes de TaskDBModel)
+TASK_COLUMNS = [name for name in TaskDBModel.__dataclass_fields__ if not name.startswith("_")]
@@ -0,0 +1,296 @@
+# backend/persistence/local_journal.py
+"""
+Journal local (write-ahead) para o modo EDGE.
+
+Registra Tasks submetidas e payloads de saída pendentes em segmentos append-only
+mapeados em memória, para que sobrevivam à perda do banco/uplink e a reinícios do processo.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from .db_models import encode_blob, decode_blob
+from ..utilities.logger import CORTEX_LOGGER
+
+# Cabeçalho de registro: tamanho do payload, CRC32, tipo, sequência.
+RECORD_HEADER = struct.Struct("<IIBQ")
+RECORD_ENTRY = 1
+RECORD_ACK = 2
+
+# Tipos de entrada suportados pelo journal.
+KIND_TASK = "task"
+KIND_OUTBOUND = "outbound"
+KIND_OFFLOAD = "offload"  # Tasks encaminhadas ao SERVER (store-and-forward do offload EDGE)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".wal"
+
+
+@dataclass
+class JournalEntry:
+    """Entrada não confirmada (unacknowledged) recuperada ou gravada no journal."""
+    seq: int
+    kind: str
+    data: Dict[str, Any]
+
+
+class _Segment:
+    """Arquivo de segmento pré-alocado e mapeado em memória."""
+
+    def __init__(self, path: str, index: int, size: int):
+        self.path = path
+        self.index = index
+        self.size = size
+        self.offset = 0
+        self.entries: Set[int] = set()  # Sequências de ENTRY ainda não confirmadas neste segmento
+        self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        if os.path.getsize(path) < size:
+            self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+    def write(self, record: bytes):
+        self._mmap[self.offset:self.offset + len(record)] = record
+        self.offset += len(record)
+
+    def has_room(self, length: int) -> bool:
+        # Reserva espaço para um cabeçalho vazio que marca o fim do segmento.
+        return self.offset + length + RECORD_HEADER.size <= self.size
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.close()
+
+
+class LocalJournal:
+    """
+    Journal append-only baseado em segmentos (mmap) com fsync em lote e recuperação pós-falha.
+    Entradas permanecem pendentes até serem confirmadas via ack(); segmentos totalmente
+    confirmados são compactados (removidos) em ordem.
+    """
+
+    def __init__(self, directory: str, segment_size: int = 4 * 1024 * 1024,
+                 fsync_batch: int = 64, fsync_interval_ms: int = 50, background_flush: bool = True):
+        """
+        :param directory: Diretório dos arquivos de segmento.
+        :param segment_size: Tamanho pré-alocado de cada segmento (bytes).
+        :param fsync_batch: Número de registros não sincronizados que dispara um fsync.
+        :param fsync_interval_ms: Intervalo máximo até que registros pendentes sejam sincronizados.
+        :param background_flush: Se True, uma thread sincroniza registros pendentes periodicamente.
+        """
+        self._directory = directory
+        self._segment_size = segment_size
+        self._fsync_batch = fsync_batch
+        self._fsync_interval = fsync_interval_ms / 1000.0
+        self._lock = threading.RLock()
+        self._segments: List[_Segment] = []
+        self._pending: Dict[int, JournalEntry] = {}
+        self._entry_segment: Dict[int, _Segment] = {}
+        self._next_seq = 1
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+        self._flusher: Optional[threading.Thread] = None
+        if background_flush:
+            self._flusher = threading.Thread(target=self._flush_loop, name="LocalJournal-Flusher", daemon=True)
+            self._flusher.start()
+
+    # --- Recuperação ---
+
+    def _segment_paths(self) -> List[str]:
+        names = sorted(
+            n for n in os.listdir(self._directory)
+            if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)
+        )
+        return [os.path.join(self._directory, n) for n in names]
+
+    def _recover(self):
+        """Varre os segmentos existentes e reconstrói o conjunto de entradas não confirmadas."""
+        acked: Set[int] = set()
+        for path in self._segment_paths():
+            index = int(os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            segment = _Segment(path, index, max(self._segment_size, os.path.getsize(path)))
+            self._scan_segment(segment, acked)
+            self._segments.append(segment)
+
+        for seq in acked:
+            self._discard(seq)
+
+        if not self._segments:
+            self._roll_segment()
+
+        if self._pending:
+            CORTEX_LOGGER.warning(
+                f"LocalJournal: {len(self._pending)} entradas não confirmadas recuperadas.",
+                extra_data={'journal_dir': self._directory, 'pending': len(self._pending)}
+            )
+        self._compact()
+
+    def _scan_segment(self, segment: _Segment, acked: Set[int]):
+        """Lê registros válidos do segmento; para no primeiro registro vazio ou corrompido."""
+        buf = segment._mmap
+        offset = 0
+        while offset + RECORD_HEADER.size <= segment.size:
+            length, crc, rtype, seq = RECORD_HEADER.unpack_from(buf, offset)
+            end = offset + RECORD_HEADER.size + length
+            if length == 0 or end > segment.size:
+                break
+            payload = bytes(buf[offset + RECORD_HEADER.size:end])
+            if zlib.crc32(payload, zlib.crc32(struct.pack("<BQ", rtype, seq))) != crc:
+                # Escrita parcial (falha no meio do registro): descarta a cauda.
+                CORTEX_LOGGER.warning(
+                    "LocalJournal: Registro corrompido descartado na recuperação.",
+                    extra_data={'segment': segment.path, 'offset': offset}
+                )
+                break
+            self._next_seq = max(self._next_seq, seq + 1)
+            if rtype == RECORD_ENTRY:
+                record = decode_blob(payload)
+                entry = JournalEntry(seq=seq, kind=record["kind"], data=record["data"])
+                self._pending[seq] = entry
+                self._entry_segment[seq] = segment
+                segment.entries.add(seq)
+            elif rtype == RECORD_ACK:
+                acked.add(seq)
+            offset = end
+        segment.offset = offset
+        # Zera a cauda inválida para que novas escritas não sejam confundidas com lixo.
+        if offset + RECORD_HEADER.size <= segment.size:
+            buf[offset:offset + RECORD_HEADER.size] = bytes(RECORD_HEADER.size)
+
+    # --- Escrita ---
+
+    def _roll_segment(self):
+        index = self._segments[-1].index + 1 if self._segments else 1
+        if self._segments:
+            self._segments[-1].flush()
+        path = os.path.join(self._directory, f"{SEGMENT_PREFIX}{index:06d}{SEGMENT_SUFFIX}")
+        self._segments.append(_Segment(path, index, self._segment_size))
+
+    def _write_record(self, rtype: int, seq: int, payload: bytes, sync: bool):
+        crc = zlib.crc32(payload, zlib.crc32(struct.pack("<BQ", rtype, seq)))
+        record = RECORD_HEADER.pack(len(payload), crc, rtype, seq) + payload
+        if len(record) + RECORD_HEADER.size > self._segment_size:
+            raise ValueError(f"Registro de {len(record)} bytes excede o tamanho do segmento do journal.")
+        if not self._segments[-1].has_room(len(record)):
+            self._roll_segment()
+        segment = self._segments[-1]
+        segment.write(record)
+        self._unsynced += 1
+        if sync or self._unsynced >= self._fsync_batch or time.monotonic() - self._last_sync >= self._fsync_interval:
+            self._sync()
+        return segment
+
+    def _sync(self):
+        if self._unsynced:
+            self._segments[-1].flush()
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, kind: str, data: Dict[str, Any], sync: bool = False) -> int:
+        """
+        Adiciona uma entrada ao journal.
+        :param kind: KIND_TASK, KIND_OUTBOUND ou KIND_OFFLOAD.
+        :param data: Payload serializável da entrada.
+        :param sync: Se True, força o fsync imediato (sem aguardar o lote).
+        :return: Número de sequência da entrada (usado em ack()).
+        """
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            segment = self._write_record(RECORD_ENTRY, seq, encode_blob({"kind": kind, "data": data}), sync)
+            self._pending[seq] = JournalEntry(seq=seq, kind=kind, data=data)
+            self._entry_segment[seq] = segment
+            segment.entries.add(seq)
+            return seq
+
+    def ack(self, seq: int, sync: bool = False):
+        """Confirma uma entrada; ela não será mais reproduzida após reinício."""
+        with self._lock:
+            if seq not in self._pending:
+                return
+            self._write_record(RECORD_ACK, seq, encode_blob(None), sync)
+            self._discard(seq)
+            self._compact()
+
+    def _discard(self, seq: int):
+        self._pending.pop(seq, None)
+        segment = self._entry_segment.pop(seq, None)
+        if segment is not None:
+            segment.entries.discard(seq)
+
+    def _compact(self):
+        """Remove, em ordem, segmentos antigos cujas entradas foram todas confirmadas."""
+        while len(self._segments) > 1 and not self._segments[0].entries:
+            segment = self._segments.pop(0)
+            segment.close()
+            os.remove(segment.path)
+            CORTEX_LOGGER.info(
+                "LocalJournal: Segmento totalmente confirmado compactado.",
+                extra_data={'segment': segment.path}
+            )
+
+    # --- Leitura / Reprodução ---
+
+    def pending(self, kind: Optional[str] = None) -> List[JournalEntry]:
+        """Retorna as entradas não confirmadas, em ordem de gravação."""
+        with self._lock:
+            return [e for _, e in sorted(self._pending.items()) if kind is None or e.kind == kind]
+
+    def find(self, kind: str, key: str, value: Any) -> Optional[int]:
+        """Retorna a sequência da primeira entrada pendente cujo data[key] == value."""
+        for entry in self.pending(kind):
+            if entry.data.get(key) == value:
+                return entry.seq
+        return None
+
+    # --- Ciclo de Vida ---
+
+    def flush(self):
+        """Força a sincronização dos registros pendentes em disco."""
+        with self._lock:
+            self._sync()
+
+    def _flush_loop(self):
+        while not self._closed:
+            time.sleep(self._fsync_interval)
+            with self._lock:
+                if self._closed:
+                    return
+                if self._unsynced:
+                    self._sync()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._sync()
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+
+
+# --- Acesso ao Journal do Processo ---
+
+_JOURNAL: Optional[LocalJournal] = None
+_JOURNAL_LOCK = threading.Lock()
+
+
+def get_local_journal() -> LocalJournal:
+    """Retorna o journal local do processo (criado sob demanda em CORTEX_JOURNAL_DIR)."""
+    global _JOURNAL
+    with _JOURNAL_LOCK:
+        if _JOURNAL is None:
+            _JOURNAL = LocalJournal(os.environ.get("CORTEX_JOURNAL_DIR", ".cortex_journal"))
+        return _JOURNAL
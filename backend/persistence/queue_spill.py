@@ -0,0 +1,285 @@
+# backend/persistence/queue_spill.py
+"""
+Armazenamento de transbordo (spill) da TaskQueue.
+
+Acima da marca d'água de memória, a TaskQueue grava o corpo completo das Tasks
+em filas FIFO no disco (uma por fluxo de prioridade e tenant) e as reidrata em lotes
+pouco antes do despacho. Cada fila é uma sequência de segmentos append-only;
+segmentos totalmente lidos são removidos.
+
+A serialização e a I/O acontecem fora do lock da TaskQueue: sob o lock, SpillRun apenas
+registra as entradas a gravar e as reidratações solicitadas; a gravação (flush) e a leitura
+(read_batch) são serializadas pelo lock de I/O de cada fila.
+
+O spill não é durável: a fonte de verdade continua sendo o repositório/journal,
+e o diretório de spill é descartado ao fechar a fila (ou na próxima execução, se o processo morrer).
+Os registros são serializados com pickle por serem privados ao processo que os grava
+(a Task completa, incluindo trace e contexto, precisa voltar idêntica).
+"""
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+import threading
+from collections import deque
+from typing import Any, Deque, List, Optional, Tuple
+
+# Cabeçalho de registro: tamanho do payload
+SPILL_HEADER = struct.Struct("<I")
+SEGMENT_SUFFIX = ".spill"
+
+
+class SpillFile:
+    """FIFO de registros em segmentos append-only no disco. Não é thread-safe (SpillRun serializa o acesso)."""
+
+    def __init__(self, directory: str, name: str, segment_bytes: int = 64 * 1024 * 1024):
+        """
+        :param directory: Diretório dos segmentos (exclusivo da fila dona).
+        :param name: Prefixo dos arquivos de segmento (ex.: a classe de prioridade).
+        :param segment_bytes: Tamanho a partir do qual um novo segmento de escrita é aberto.
+        """
+        self._directory = directory
+        self._name = name
+        self._segment_bytes = segment_bytes
+        self._segments: Deque[str] = deque()  # Caminhos em ordem; o último é o de escrita
+        self._next_index = 0
+        self._writer = None
+        self._written = 0          # Bytes no segmento de escrita
+        self._reader = None
+        self._reader_path: Optional[str] = None
+        self._reader_offset = 0    # Posição de leitura preservada por release()
+        self._count = 0            # Registros gravados e ainda não lidos
+        self.bytes_on_disk = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _open_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+        path = os.path.join(self._directory, f"{self._name}-{self._next_index:08d}{SEGMENT_SUFFIX}")
+        self._next_index += 1
+        self._segments.append(path)
+        self._writer = open(path, "wb")
+        self._written = 0
+
+    def append(self, record: Any) -> int:
+        """Grava um registro no fim da fila. :return: Bytes gravados."""
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._writer is None and self._segments and self._written < self._segment_bytes:
+            self._writer = open(self._segments[-1], "ab")  # Reaberto após release()
+        elif self._writer is None or self._written >= self._segment_bytes:
+            self._open_writer()
+        self._writer.write(SPILL_HEADER.pack(len(payload)))
+        self._writer.write(payload)
+        size = SPILL_HEADER.size + len(payload)
+        self._written += size
+        self._count += 1
+        self.bytes_on_disk += size
+        return size
+
+    def read(self, max_records: int) -> List[Any]:
+        """Lê (e consome) até max_records registros do início da fila, em ordem de gravação."""
+        records = []
+        if self._writer is not None:
+            # Registros completos no disco antes da leitura (o escritor pode ter parte de um registro no buffer)
+            self._writer.flush()
+        while len(records) < max_records and self._count:
+            if self._reader is None:
+                path = self._segments[0]
+                self._reader = open(path, "rb")
+                if path == self._reader_path:
+                    self._reader.seek(self._reader_offset)  # Retoma após release()
+                self._reader_path = path
+            header = self._reader.read(SPILL_HEADER.size)
+            if not header:
+                if self._reader_path == self._segments[-1]:
+                    break
+                self._drop_read_segment()
+                continue
+            (length,) = SPILL_HEADER.unpack(header)
+            records.append(pickle.loads(self._reader.read(length)))
+            self._count -= 1
+            self.bytes_on_disk -= SPILL_HEADER.size + length
+        if not self._count and self._reader is not None:
+            # Fila vazia: recomeça em um segmento novo para liberar o espaço em disco
+            self._drop_read_segment()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            os.remove(self._segments.popleft())
+            self._written = 0
+        return records
+
+    def release(self):
+        """Fecha os descritores abertos, preservando as posições (reabertos sob demanda na próxima operação)."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader is not None:
+            self._reader_offset = self._reader.tell()
+            self._reader.close()
+            self._reader = None
+
+    def _drop_read_segment(self):
+        self._reader.close()
+        self._reader = None
+        if self._reader_path != self._segments[-1]:
+            os.remove(self._segments.popleft())
+        self._reader_path = None
+
+    def close(self):
+        for handle in (self._reader, self._writer):
+            if handle is not None:
+                handle.close()
+        self._reader = self._writer = None
+        for path in self._segments:
+            if os.path.exists(path):
+                os.remove(path)
+        self._segments.clear()
+        self._count = 0
+        self.bytes_on_disk = 0
+
+
+class SpillRun:
+    """
+    Uma fila de spill ordenada: um buffer reidratado na frente e o restante no disco.
+
+    O estado em memória (push, pop, head, request_refill, refilled) é alterado sob o lock do dono;
+    a I/O (flush, read_batch) roda fora dele, serializada pelo lock de I/O da fila. Entradas
+    aguardam o flush em uma FIFO e são gravadas na ordem de push. Com o buffer vazio e registros
+    fora dele (blocked), a cabeça da fila só é conhecida após a reidratação.
+    """
+
+    def __init__(self, spill: SpillFile, prefetch: int):
+        self.spill = spill
+        self.prefetch = prefetch
+        self.buffer: Deque[Tuple] = deque()
+        self.last_key: Optional[Tuple] = None
+        self.spilled = 0       # Registros fora do buffer (aguardando flush, no disco ou em leitura)
+        self.refill_size = 0   # > 0: reidratação solicitada e ainda não aplicada
+        self._pending: Deque[Tuple] = deque()
+        self._io_lock = threading.Lock()
+        self._release_requested = False
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self.buffer) + self.spilled
+
+    def accepts(self, key: Tuple) -> bool:
+        """O spill só recebe chaves em ordem crescente, o que mantém cada fila ordenada sem índice em memória."""
+        return self.last_key is None or key > self.last_key
+
+    def push(self, key: Tuple, entry: Tuple):
+        """Fila vazia: a entrada vira a cabeça em memória; senão aguarda o flush para o disco."""
+        self.last_key = key
+        if len(self) == 0:
+            self.buffer.append(entry)
+            return
+        self._pending.append(entry)
+        self.spilled += 1
+
+    @property
+    def blocked(self) -> bool:
+        return not self.buffer and self.spilled > 0
+
+    def head(self) -> Optional[Tuple]:
+        return self.buffer[0] if self.buffer else None
+
+    def pop(self) -> Tuple:
+        entry = self.buffer.popleft()
+        if not len(self):
+            self.last_key = None
+        return entry
+
+    def request_refill(self) -> bool:
+        """
+        Solicita o próximo lote quando o buffer cai à metade do prefetch (antes de esvaziar).
+        :return: True se a leitura foi solicitada agora (o chamador executa read_batch fora do lock).
+        """
+        if self.refill_size or not self.spilled or len(self.buffer) > self.prefetch // 2:
+            return False
+        self.refill_size = min(self.spilled, max(1, self.prefetch - len(self.buffer)))
+        return True
+
+    def refilled(self, records: List[Tuple]):
+        """Aplica o lote lido por read_batch (lista vazia após falha: a leitura pode ser solicitada de novo)."""
+        self.buffer.extend(records)
+        self.spilled -= len(records)
+        self.refill_size = 0
+
+    # --- I/O (fora do lock do dono) ---
+
+    def flush(self):
+        """Grava as entradas pendentes, em ordem de push."""
+        with self._io_lock:
+            self._write_pending()
+            self._release_if_requested()
+
+    def read_batch(self) -> List[Tuple]:
+        """Lê o lote solicitado por request_refill (após gravar as pendentes, que fazem parte da fila)."""
+        with self._io_lock:
+            if self._closed:
+                return []
+            self._write_pending()
+            records = self.spill.read(self.refill_size)
+            self._release_if_requested()
+        return records
+
+    def _write_pending(self):
+        while self._pending and not self._closed:
+            self.spill.append(self._pending[0])
+            self._pending.popleft()
+
+    def release_files(self):
+        """Libera os descritores (LRU do dono) sem aguardar uma I/O em andamento: nesse caso, ao fim dela."""
+        if self._io_lock.acquire(blocking=False):
+            try:
+                self.spill.release()
+            finally:
+                self._io_lock.release()
+        else:
+            self._release_requested = True
+
+    def _release_if_requested(self):
+        if self._release_requested:
+            self._release_requested = False
+            self.spill.release()
+
+    def close(self):
+        with self._io_lock:
+            self._closed = True
+            self._pending.clear()
+            self.spill.close()
+
+
+SPILL_DIR_PREFIX = "cortex-queue-"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def make_spill_directory(base: Optional[str] = None) -> str:
+    """
+    Cria um diretório exclusivo para os segmentos de uma fila (em CORTEX_QUEUE_SPILL_DIR ou no temp).
+    Diretórios deixados por processos encerrados abruptamente são removidos.
+    """
+    base = base or os.environ.get("CORTEX_QUEUE_SPILL_DIR") or tempfile.gettempdir()
+    os.makedirs(base, exist_ok=True)
+    for name in os.listdir(base):
+        owner = name[len(SPILL_DIR_PREFIX):].split("-", 1)[0]
+        if name.startswith(SPILL_DIR_PREFIX) and owner.isdigit() and not _pid_alive(int(owner)):
+            remove_spill_directory(os.path.join(base, name))
+    return tempfile.mkdtemp(prefix=f"{SPILL_DIR_PREFIX}{os.getpid()}-", dir=base)
+
+
+def remove_spill_directory(directory: str):
+    shutil.rmtree(directory, ignore_errors=True)
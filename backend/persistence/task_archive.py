@@ -0,0 +1,295 @@
+# backend/persistence/task_archive.py
+"""
+Arquivamento (tiering quente/frio) de Tasks terminais.
+
+Move Tasks COMPLETED/FAILED mais antigas que a janela de retenção, com seu trace,
+da tabela quente 'Tasks' para arquivos comprimidos particionados por data.
+Um índice (TaskArchiveIndex) permite localizar a partição de uma Task arquivada.
+
+Com um blob store configurado, cada ciclo também coleta os blobs que nenhuma Task
+(tabela quente, TaskTraces ou partições do arquivo frio) referencia mais.
+"""
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from .blob_store import BlobStore, referenced_digests
+from .db_models import TaskDBModel, TASK_COLUMNS
+from .task_repository import TaskRepository
+from ..utilities.logger import CORTEX_LOGGER
+
+TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+
+
+def _encode_row(row: Dict[str, Any]) -> str:
+    """Serializa uma linha da tabela Tasks em JSON (colunas binárias em base64)."""
+    return json.dumps({
+        k: {"$b64": base64.b64encode(v).decode("ascii")} if isinstance(v, (bytes, bytearray)) else v
+        for k, v in row.items()
+    })
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def _decode_row(line: str) -> Dict[str, Any]:
+    return {
+        k: base64.b64decode(v["$b64"]) if isinstance(v, dict) and "$b64" in v else v
+        for k, v in json.loads(line).items()
+    }
+
+
+def _referenced_in(values) -> Set[str]:
+    """Digests de blob referenciados nas colunas de uma linha (binárias ou texto)."""
+    live: Set[str] = set()
+    for value in values:
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        if isinstance(value, (bytes, bytearray)):
+            live |= referenced_digests(value)
+    return live
+
+
+class TaskArchiver(threading.Thread):
+    """
+    Move Tasks terminais antigas para o arquivo frio em lotes curtos,
+    para não manter a tabela quente bloqueada por longos períodos.
+    """
+
+    def __init__(self, task_repository: TaskRepository, archive_dir: Optional[str] = None,
+                 retention_days: Optional[float] = None, batch_size: int = 500,
+                 batch_pause_ms: int = 50, interval_s: int = 3600, blob_store: Optional[BlobStore] = None,
+                 blob_grace_s: Optional[float] = None):
+        """
+        :param archive_dir: Diretório raiz das partições (padrão: CORTEX_ARCHIVE_DIR).
+        :param retention_days: Idade mínima (dias) para uma Task terminal ser arquivada.
+        :param batch_size: Número máximo de Tasks movidas por transação.
+        :param batch_pause_ms: Pausa entre lotes para ceder a tabela quente ao tráfego normal.
+        :param interval_s: Intervalo entre execuções quando rodando como thread.
+        :param blob_store: Blob store local cujos blobs sem referência são coletados a cada ciclo (None desativa).
+        :param blob_grace_s: Idade mínima de um blob sem referência para a remoção
+                             (padrão: CORTEX_BLOB_GC_GRACE_S ou 86400; deve exceder a duração máxima de uma Task).
+        """
+        super().__init__(name="TaskArchiver-Thread", daemon=True)
+        self._repository = task_repository
+        self._archive_dir = archive_dir or os.environ.get("CORTEX_ARCHIVE_DIR", "cortex_archive")
+        self._retention_s = float(retention_days if retention_days is not None
+                                  else os.environ.get("CORTEX_ARCHIVE_RETENTION_DAYS", 30)) * 86400
+        self._batch_size = batch_size
+        self._batch_pause = batch_pause_ms / 1000.0
+        self._interval_s = interval_s
+        self._blob_store = blob_store
+        self._blob_grace_s = float(blob_grace_s if blob_grace_s is not None
+                                   else os.environ.get("CORTEX_BLOB_GC_GRACE_S", 86400))
+        self._stop_event = threading.Event()
+        # A conexão do repositório é compartilhada entre os lotes (esta thread) e load_task (API)
+        self._conn_lock = threading.Lock()
+
+    # --- Ciclo de Vida (Thread) ---
+
+    def run(self):
+        CORTEX_LOGGER.info(f"Archiver Thread '{self.name}' iniciada.", extra_data={'archive_dir': self._archive_dir})
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+                if self._blob_store is not None:
+                    self.collect_blobs()
+            except Exception as e:
+                CORTEX_LOGGER.error(f"Falha no ciclo de arquivamento: {e}")
+            self._stop_event.wait(self._interval_s)
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    # --- Movimentação em Lotes ---
+
+    def run_once(self, max_batches: Optional[int] = None) -> int:
+        """
+        Executa lotes de arquivamento até não restarem Tasks elegíveis.
+        :return: Número total de Tasks movidas para o arquivo frio.
+        """
+        if self._repository.conn is None:
+            CORTEX_LOGGER.info("Arquivamento ignorado (Modo MOCKING/CI_TEST).")
+            return 0
+
+        cutoff = time.time() - self._retention_s
+        moved = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with self._conn_lock:
+                rows = self._select_batch(cutoff)
+                if not rows:
+                    break
+                paths = self._write_partitions(rows)
+                moved += self._commit_batch(rows, paths)
+            batches += 1
+            if len(rows) < self._batch_size:
+                break
+            time.sleep(self._batch_pause)
+
+        if moved:
+            CORTEX_LOGGER.info(
+                f"Arquivamento concluído: {moved} Tasks movidas em {batches} lotes.",
+                extra_data={'moved': moved, 'batches': batches}
+            )
+        return moved
+
+    def _select_batch(self, cutoff: float) -> List[Dict[str, Any]]:
+        """Leitura consistente (sem lock) do próximo lote elegível, dos mais antigos aos mais novos."""
+        cursor = self._repository.conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"SELECT {', '.join(TASK_COLUMNS)} FROM Tasks "
+                f"WHERE status IN (%s, %s) AND last_update_time < %s "
+                f"ORDER BY last_update_time LIMIT %s",
+                (*TERMINAL_STATUSES, cutoff, self._batch_size)
+            )
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _partition_dir(self, timestamp: float) -> str:
+        return os.path.join(self._archive_dir, time.strftime("%Y/%m/%d", time.gmtime(timestamp)))
+
+    def _write_partitions(self, rows: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Grava o lote em arquivos gzip (um por partição diária). Retorna task_id -> caminho."""
+        by_partition: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            by_partition[self._partition_dir(row["last_update_time"])].append(row)
+
+        locations: Dict[str, str] = {}
+        batch_id = uuid.uuid4().hex[:8]
+        for partition, partition_rows in by_partition.items():
+            os.makedirs(partition, exist_ok=True)
+            path = os.path.join(partition, f"tasks-{batch_id}.jsonl.gz")
+            with gzip.open(path, "wt", encoding="utf-8") as fh:
+                for row in partition_rows:
+                    fh.write(_encode_row(row) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+            relative = os.path.relpath(path, self._archive_dir)
+            for row in partition_rows:
+                locations[row["task_id"]] = relative
+        return locations
+
+    def _commit_batch(self, rows: List[Dict[str, Any]], locations: Dict[str, str]) -> int:
+        """
+        Transação curta: trava as linhas do lote (SELECT ... FOR UPDATE) e, apenas para as que seguem
+        terminais e inalteradas desde a leitura, registra o índice e remove Task e trace da tabela quente.
+        Uma Task regravada nesse intervalo permanece na tabela quente (sua cópia na partição não é indexada).
+        :return: Número de Tasks arquivadas.
+        """
+        conn = self._repository.conn
+        cursor = conn.cursor()
+        selected = {row["task_id"]: row["last_update_time"] for row in rows}
+        try:
+            cursor.execute(
+                f"SELECT task_id, last_update_time FROM Tasks WHERE task_id IN ({_placeholders(selected)}) "
+                f"AND status IN (%s, %s) FOR UPDATE",
+                (*selected, *TERMINAL_STATUSES)
+            )
+            task_ids = [task_id for task_id, updated in cursor.fetchall() if selected.get(task_id) == updated]
+            if task_ids:
+                cursor.executemany(
+                    "INSERT INTO TaskArchiveIndex (task_id, partition_path, archived_at) VALUES (%s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE partition_path = VALUES(partition_path), archived_at = VALUES(archived_at)",
+                    [(task_id, locations[task_id], time.time()) for task_id in task_ids]
+                )
+                cursor.execute(f"DELETE FROM Tasks WHERE task_id IN ({_placeholders(task_ids)})", tuple(task_ids))
+                cursor.execute(f"DELETE FROM TaskTraces WHERE task_id IN ({_placeholders(task_ids)})", tuple(task_ids))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        if len(task_ids) < len(selected):
+            CORTEX_LOGGER.info(
+                f"Tasks alteradas durante o arquivamento mantidas na tabela quente.",
+                extra_data={'skipped': len(selected) - len(task_ids)}
+            )
+        return len(task_ids)
+
+    # --- Coleta de Blobs ---
+
+    def collect_blobs(self) -> int:
+        """
+        Marcação e varredura do blob store: coleta os digests referenciados na tabela quente,
+        em TaskTraces e nas partições do arquivo frio; remove os demais blobs mais antigos que a carência.
+        :return: Número de blobs removidos.
+        """
+        if self._blob_store is None or self._repository.conn is None:
+            return 0
+        # Blobs gravados ou reusados após o início da marcação nunca são removidos nesta rodada
+        older_than = time.time() - self._blob_grace_s
+        live = self._referenced_in_table("SELECT final_result_json, trace_history_json FROM Tasks")
+        live |= self._referenced_in_table("SELECT result_data FROM TaskTraces")
+        live |= self._referenced_in_archive()
+        return self._blob_store.collect_garbage(live, older_than)
+
+    def _referenced_in_table(self, sql: str, fetch_size: int = 1000) -> Set[str]:
+        live: Set[str] = set()
+        with self._conn_lock:
+            cursor = self._repository.conn.cursor()
+            try:
+                cursor.execute(sql)
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        live |= _referenced_in(row)
+            finally:
+                cursor.close()
+        return live
+
+    def _referenced_in_archive(self) -> Set[str]:
+        live: Set[str] = set()
+        for directory, _, files in os.walk(self._archive_dir):
+            for name in files:
+                if not name.endswith(".jsonl.gz"):
+                    continue
+                with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as fh:
+                    for line in fh:
+                        live |= _referenced_in(_decode_row(line).values())
+        return live
+
+    # --- Consulta ao Arquivo Frio ---
+
+    def load_task(self, task_id: str) -> Optional[TaskDBModel]:
+        """Localiza uma Task arquivada via índice e a carrega da partição comprimida."""
+        if self._repository.conn is None:
+            return None
+        with self._conn_lock:
+            cursor = self._repository.conn.cursor()
+            try:
+                cursor.execute("SELECT partition_path FROM TaskArchiveIndex WHERE task_id = %s", (task_id,))
+                found = cursor.fetchone()
+            finally:
+                cursor.close()
+        if not found:
+            return None
+
+        path = os.path.join(self._archive_dir, found[0])
+        needle = json.dumps(task_id)
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if needle not in line:
+                    continue
+                row = _decode_row(line)
+                if row["task_id"] == task_id:
+                    return TaskDBModel(**row)
+        CORTEX_LOGGER.error(
+            f"Task indexada no arquivo mas ausente da partição.",
+            extra_data={'task_id': task_id, 'partition': path}
+        )
+        return None
@@ -0,0 +1,314 @@
+# backend/persistence/task_leases.py
+"""
+Fila compartilhada entre nós de Scheduler baseada em leases no repositório.
+
+Cada nó reivindica (claim) lotes de Tasks PENDING/RETRY/DELEGATED ordenados por prioridade,
+registrando uma linha em 'TaskLeases' com validade limitada. O nó renova seus leases
+via heartbeat; leases expirados ou de nós sem heartbeat voltam a ser reivindicáveis.
+
+O lease só é removido quando a Task chega a um estado terminal; liberações (release, nó morto,
+encerramento) apenas o deixam sem dono, preservando a contagem de retentativas e o backoff.
+Tasks em RETRY voltam à fila com 'next_attempt_at' (backoff do RetryPolicy) e só são reivindicadas
+após esse instante; Tasks DELEGATED por encadeamento voltam imediatamente para o próximo ciclo.
+
+Backends:
+  - MySQL: SELECT ... FOR UPDATE SKIP LOCKED (nós concorrentes pulam linhas já em disputa).
+    É o backend do modo distribuído: as mesmas tabelas do TaskRepository.
+  - SQLite: BEGIN IMMEDIATE serializa o claim (transação curta, um escritor por vez).
+    Store de leases local a um único host, com tabela Tasks própria; o TaskRepository não o
+    utiliza. Serve aos testes e ao benchmark de throughput de claims (bench_lease_claims).
+Os tempos são de parede (time.time()); os nós devem ter relógios sincronizados (NTP)
+com desvio bem menor que a duração do lease.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from .db_models import TASK_COLUMNS
+from ..utilities.logger import CORTEX_LOGGER
+
+CLAIMABLE_STATUSES = ("PENDING", "RETRY", "DELEGATED")
+_STATUS_PLACEHOLDERS = ", ".join(["%s"] * len(CLAIMABLE_STATUSES))
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class LeaseStore:
+    """
+    Operações de lease comuns aos backends. Cada thread usa sua própria conexão
+    (o Scheduler e a thread de heartbeat acessam o store em paralelo).
+    """
+    placeholder = "%s"
+
+    def __init__(self, connection_factory: Callable[[], Any], lease_s: float = 30.0):
+        self._connection_factory = connection_factory
+        self._local = threading.local()
+        self.lease_s = lease_s
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connection_factory()
+        return conn
+
+    def _sql(self, statement: str) -> str:
+        return statement.replace("%s", self.placeholder)
+
+    # --- Dialeto (sobrescrito por backend) ---
+
+    def _begin(self, cursor):
+        cursor.execute("START TRANSACTION")
+
+    def _claim_select_sql(self) -> str:
+        raise NotImplementedError
+
+    def _upsert_lease_sql(self) -> str:
+        raise NotImplementedError
+
+    def _upsert_node_sql(self) -> str:
+        raise NotImplementedError
+
+    # --- Operações ---
+
+    def _execute(self, statement: str, params: tuple = ()) -> int:
+        conn = self._conn()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self._sql(statement), params)
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    def register(self, node_id: str):
+        now = time.time()
+        self._execute(self._upsert_node_sql(), (node_id, now, now))
+
+    def heartbeat(self, node_id: str) -> int:
+        """Atualiza o heartbeat do nó e renova todos os seus leases. Retorna os leases renovados."""
+        now = time.time()
+        self._execute(self._upsert_node_sql(), (node_id, now, now))
+        return self._execute("UPDATE TaskLeases SET lease_expires_at = %s WHERE node_id = %s",
+                             (now + self.lease_s, node_id))
+
+    def claim(self, node_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Reivindica até 'limit' Tasks livres (sem lease válido), por prioridade e antiguidade.
+        Retorna as linhas completas das Tasks (colunas de TaskDBModel).
+        """
+        conn = self._conn()
+        cursor = conn.cursor()
+        now = time.time()
+        try:
+            self._begin(cursor)
+            cursor.execute(self._sql(self._claim_select_sql()), (*CLAIMABLE_STATUSES, now, now, limit))
+            names = [d[0] for d in cursor.description]
+            rows = [dict(zip(names, r)) for r in cursor.fetchall()]
+            if rows:
+                cursor.executemany(self._sql(self._upsert_lease_sql()),
+                                   [(row["task_id"], node_id, now + self.lease_s) for row in rows])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return rows
+
+    def complete(self, node_id: str, task_id: str) -> bool:
+        """Remove o lease de uma Task terminal (apenas se ainda pertencer ao nó)."""
+        return self._execute("DELETE FROM TaskLeases WHERE task_id = %s AND node_id = %s", (task_id, node_id)) > 0
+
+    def release(self, node_id: str, task_id: str, next_attempt_at: float, retried: bool = False) -> bool:
+        """
+        Devolve uma Task não terminal à fila compartilhada, reivindicável a partir de next_attempt_at.
+        O lease fica sem dono (o heartbeat não o renova); retried=True conta mais uma retentativa.
+        """
+        return self._execute(
+            "UPDATE TaskLeases SET node_id = '', lease_expires_at = 0, next_attempt_at = %s, "
+            "retries = retries + %s WHERE task_id = %s AND node_id = %s",
+            (next_attempt_at, int(retried), task_id, node_id)) > 0
+
+    def retries(self, task_id: str) -> int:
+        """Retentativas (RETRY) já registradas para a Task."""
+        conn = self._conn()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self._sql("SELECT retries FROM TaskLeases WHERE task_id = %s"), (task_id,))
+            row = cursor.fetchone()
+            conn.commit()
+        finally:
+            cursor.close()
+        return row[0] if row else 0
+
+    def reclaim_dead(self, dead_after_s: float) -> int:
+        """
+        Libera os leases de nós sem heartbeat há mais de dead_after_s e remove esses nós.
+        As linhas ficam sem dono (como em release), preservando retries e next_attempt_at.
+        """
+        cutoff = time.time() - dead_after_s
+        released = self._execute(
+            "UPDATE TaskLeases SET node_id = '', lease_expires_at = 0 "
+            "WHERE node_id IN (SELECT node_id FROM SchedulerNodes WHERE heartbeat_at < %s)",
+            (cutoff,))
+        self._execute("DELETE FROM SchedulerNodes WHERE heartbeat_at < %s", (cutoff,))
+        return released
+
+    def deregister(self, node_id: str) -> int:
+        """Encerramento limpo: devolve os leases do nó (Tasks não processadas) à fila compartilhada."""
+        released = self._execute("UPDATE TaskLeases SET node_id = '', lease_expires_at = 0 WHERE node_id = %s",
+                                 (node_id,))
+        self._execute("DELETE FROM SchedulerNodes WHERE node_id = %s", (node_id,))
+        return released
+
+
+_CLAIM_COLUMNS = ", ".join(f"t.{c}" for c in TASK_COLUMNS)
+
+
+class MySQLLeaseStore(LeaseStore):
+    """Backend MySQL 8+: claim concorrente sem bloqueio mútuo via SKIP LOCKED."""
+
+    def _claim_select_sql(self) -> str:
+        return (f"SELECT {_CLAIM_COLUMNS} FROM Tasks t "
+                f"LEFT JOIN TaskLeases l ON l.task_id = t.task_id "
+                f"WHERE t.status IN ({_STATUS_PLACEHOLDERS}) "
+                f"AND (l.task_id IS NULL OR (l.lease_expires_at < %s AND l.next_attempt_at <= %s)) "
+                f"ORDER BY t.priority DESC, t.creation_time LIMIT %s "
+                f"FOR UPDATE OF t SKIP LOCKED")
+
+    def _upsert_lease_sql(self) -> str:
+        return ("INSERT INTO TaskLeases (task_id, node_id, lease_expires_at) VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE node_id = VALUES(node_id), "
+                "lease_expires_at = VALUES(lease_expires_at), claims = claims + 1")
+
+    def _upsert_node_sql(self) -> str:
+        return ("INSERT INTO SchedulerNodes (node_id, started_at, heartbeat_at) VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE heartbeat_at = VALUES(heartbeat_at)")
+
+    @classmethod
+    def from_env(cls, lease_s: float = 30.0) -> "MySQLLeaseStore":
+        """Conexões por thread com as mesmas variáveis de ambiente do TaskRepository."""
+        import mysql.connector
+
+        def connect():
+            return mysql.connector.connect(
+                host=os.environ.get("DB_HOST"), user=os.environ.get("DB_USER"),
+                password=os.environ.get("DB_PASS"), database=os.environ.get("DB_NAME"),
+                port=int(os.environ.get("DB_PORT", "3306")), autocommit=False,
+            )
+        return cls(connect, lease_s)
+
+
+class SQLiteLeaseStore(LeaseStore):
+    """
+    Store de leases em um arquivo SQLite/WAL (único host): BEGIN IMMEDIATE equivale ao lock de
+    escrita do claim. Mantém sua própria tabela Tasks e não é usado pelo TaskRepository.
+    """
+    placeholder = "?"
+
+    def __init__(self, path: str, lease_s: float = 30.0):
+        super().__init__(lambda: self._connect(path), lease_s)
+        self.path = path
+        self.ensure_schema()
+
+    @staticmethod
+    def _connect(path: str) -> "_SQLiteConnection":
+        conn = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return _SQLiteConnection(conn)
+
+    def ensure_schema(self):
+        conn = self._conn()
+        conn.raw.execute(
+            "CREATE TABLE IF NOT EXISTS Tasks (task_id TEXT PRIMARY KEY, description TEXT, context_json BLOB, "
+            "status TEXT NOT NULL, priority INTEGER NOT NULL, required_agent TEXT, delegated_to TEXT, "
+            "creation_time REAL NOT NULL, last_update_time REAL, final_result_json BLOB, trace_history_json BLOB)")
+        conn.raw.execute("CREATE INDEX IF NOT EXISTS idx_tasks_claim ON Tasks (status, priority, creation_time)")
+        conn.raw.execute(
+            "CREATE TABLE IF NOT EXISTS TaskLeases (task_id TEXT PRIMARY KEY, node_id TEXT NOT NULL, "
+            "lease_expires_at REAL NOT NULL, claims INTEGER NOT NULL DEFAULT 1, "
+            "next_attempt_at REAL NOT NULL DEFAULT 0, retries INTEGER NOT NULL DEFAULT 0)")
+        # Arquivos criados por versões anteriores recebem as colunas de backoff
+        existing = {row[1] for row in conn.raw.execute("PRAGMA table_info(TaskLeases)")}
+        for column in ("next_attempt_at REAL NOT NULL DEFAULT 0", "retries INTEGER NOT NULL DEFAULT 0"):
+            if column.split()[0] not in existing:
+                conn.raw.execute(f"ALTER TABLE TaskLeases ADD COLUMN {column}")
+        conn.raw.execute("CREATE INDEX IF NOT EXISTS idx_leases_node ON TaskLeases (node_id)")
+        conn.raw.execute(
+            "CREATE TABLE IF NOT EXISTS SchedulerNodes (node_id TEXT PRIMARY KEY, started_at REAL NOT NULL, "
+            "heartbeat_at REAL NOT NULL)")
+
+    def _begin(self, cursor):
+        cursor.execute("BEGIN IMMEDIATE")
+
+    def _claim_select_sql(self) -> str:
+        return (f"SELECT {_CLAIM_COLUMNS} FROM Tasks t "
+                f"LEFT JOIN TaskLeases l ON l.task_id = t.task_id "
+                f"WHERE t.status IN ({_STATUS_PLACEHOLDERS}) "
+                f"AND (l.task_id IS NULL OR (l.lease_expires_at < %s AND l.next_attempt_at <= %s)) "
+                f"ORDER BY t.priority DESC, t.creation_time LIMIT %s")
+
+    def _upsert_lease_sql(self) -> str:
+        return ("INSERT INTO TaskLeases (task_id, node_id, lease_expires_at) VALUES (%s, %s, %s) "
+                "ON CONFLICT(task_id) DO UPDATE SET node_id = excluded.node_id, "
+                "lease_expires_at = excluded.lease_expires_at, claims = claims + 1")
+
+    def _upsert_node_sql(self) -> str:
+        return ("INSERT INTO SchedulerNodes (node_id, started_at, heartbeat_at) VALUES (%s, %s, %s) "
+                "ON CONFLICT(node_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at")
+
+
+class _SQLiteConnection:
+    """Adapta sqlite3 (autocommit + BEGIN explícito) à interface commit/rollback usada pelo LeaseStore."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.raw = conn
+
+    def cursor(self):
+        return self.raw.cursor()
+
+    def commit(self):
+        if self.raw.in_transaction:
+            self.raw.execute("COMMIT")
+
+    def rollback(self):
+        if self.raw.in_transaction:
+            self.raw.execute("ROLLBACK")
+
+
+class LeaseHeartbeat(threading.Thread):
+    """Renova os leases do nó e reivindica de volta leases de nós mortos, periodicamente."""
+
+    def __init__(self, store: LeaseStore, node_id: str, interval_s: Optional[float] = None,
+                 dead_after_s: Optional[float] = None):
+        super().__init__(name="LeaseHeartbeat-Thread", daemon=True)
+        self._store = store
+        self._node_id = node_id
+        self._interval_s = interval_s or store.lease_s / 3.0
+        self._dead_after_s = dead_after_s or store.lease_s * 2.0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self._interval_s):
+            try:
+                self._store.heartbeat(self._node_id)
+                reclaimed = self._store.reclaim_dead(self._dead_after_s)
+                if reclaimed:
+                    CORTEX_LOGGER.warning(
+                        f"Leases de nós sem heartbeat liberados: {reclaimed}.",
+                        extra_data={'node_id': self._node_id, 'reclaimed': reclaimed}
+                    )
+            except Exception as e:
+                CORTEX_LOGGER.error(f"Falha no heartbeat de leases: {e}", extra_data={'node_id': self._node_id})
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
@@ -1,9 +1,42 @@
 # backend/persistence/task_repository.py (Versão Final para PythonAnywhere)
 
 import os
+import queue
+import threading
 import uuid
 import mysql.connector
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
 from ..core.dataclasses import Task, TaskStatus, TaskPriority, GlobalContext, ExecutionTrace 
+from .db_models import TaskDBModel, TASK_COLUMNS, encode_blob, decode_blob
+
+# Status não terminais: Tasks a retomar na recuperação de estado do Scheduler
+RESUMABLE_STATUSES = (TaskStatus.PENDING.value, TaskStatus.RETRY.value, TaskStatus.DELEGATED.value)
+
+_UPSERT_SQL = (
+    f"INSERT INTO Tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join(['%s'] * len(TASK_COLUMNS))}) "
+    f"ON DUPLICATE KEY UPDATE "
+    + ", ".join(f"{c} = VALUES({c})" for c in TASK_COLUMNS if c not in ("task_id", "creation_time"))
+)
+
+
+def task_from_row(row: Dict[str, Any]) -> Task:
+    """Reconstrói a Task do core a partir de uma linha de Tasks (colunas de TASK_COLUMNS)."""
+    model = row if isinstance(row, TaskDBModel) else TaskDBModel(**{c: row[c] for c in TASK_COLUMNS})
+    return Task(
+        task_id=model.task_id,
+        description=model.description,
+        context=GlobalContext(**model.context),
+        priority=TaskPriority(model.priority),
+        required_agent=None if model.required_agent == "None" else model.required_agent,
+        status=TaskStatus(model.status),
+        delegated_to=model.delegated_to,
+        creation_time=model.creation_time,
+        last_update_time=model.last_update_time,
+        final_result=model.final_result,
+        # Retomada (RETRY/DELEGATED): o encadeamento lê o último trace e save() regrava o histórico
+        trace_history=[ExecutionTrace(**t) for t in model.trace_history],
+    )
 
 class TaskRepository:
     def __init__(self):
@@ -36,5 +69,169 @@ class TaskRepository:
             print(f"ERRO DE CONEXÃO MySQL: {err}")
             raise err
 
-    # ... (Os métodos save_task e get_task permanecem inalterados) ...
-    
+    def save(self, task: Task) -> None:
+        """Insere ou atualiza (upsert por task_id) a linha completa da Task."""
+        if self.conn is None:
+            return
+        model = TaskDBModel.from_core(task)
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(_UPSERT_SQL, tuple(getattr(model, c) for c in TASK_COLUMNS))
+            self.conn.commit()
+        finally:
+            cursor.close()
+
+    def find_pending_tasks(self) -> List[Task]:
+        """Tasks não terminais (PENDING, RETRY, DELEGATED) por prioridade decrescente e ordem de criação."""
+        if self.conn is None:
+            return []
+        cursor = self.conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"SELECT {', '.join(TASK_COLUMNS)} FROM Tasks WHERE status IN (%s, %s, %s) "
+                f"ORDER BY priority DESC, creation_time",
+                RESUMABLE_STATUSES
+            )
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        return [task_from_row(row) for row in rows]
+
+    def load_task(self, task_id: str) -> Optional[TaskDBModel]:
+        """Carrega a linha completa da Task da tabela quente (colunas binárias decodificadas sob demanda)."""
+        if self.conn is None:
+            return None
+        cursor = self.conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"SELECT {', '.join(TASK_COLUMNS)} FROM Tasks WHERE task_id = %s", (task_id,))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        return TaskDBModel(**row) if row is not None else None
+
+    # --- Leitura Parcial: Cabeçalho da Task e Fatias do Trace ---
+
+    # Colunas de TaskTraces expostas na projeção do trace (seq é sempre incluído).
+    TRACE_COLUMNS = ("timestamp", "agent_name", "action_description", "result_data", "success")
+
+    def get_task_header(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Lê apenas o cabeçalho da Task (sem o trace), incluindo o total de traces persistidos.
+        Usado para ETag e respostas projetadas sem desserializar o histórico.
+        """
+        if self.conn is None:
+            return None
+        cursor = self.conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                "SELECT t.task_id, t.status, t.delegated_to, t.final_result_json, t.last_update_time, "
+                "(SELECT COALESCE(MAX(tr.seq), 0) FROM TaskTraces tr WHERE tr.task_id = t.task_id) AS trace_count "
+                "FROM Tasks t WHERE t.task_id = %s",
+                (task_id,)
+            )
+            header = cursor.fetchone()
+        finally:
+            cursor.close()
+        if header is not None:
+            header["final_result"] = decode_blob(header.pop("final_result_json"))
+        return header
+
+    def get_trace_slice(self, task_id: str, since_seq: int = 0, limit: int = 100,
+                        columns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Retorna os traces com seq > since_seq (ordem crescente), no máximo 'limit' linhas,
+        lendo apenas as colunas solicitadas.
+        """
+        if self.conn is None:
+            return []
+        columns = [c for c in (columns or self.TRACE_COLUMNS) if c in self.TRACE_COLUMNS]
+        cursor = self.conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"SELECT {', '.join(['seq', *columns])} FROM TaskTraces "
+                f"WHERE task_id = %s AND seq > %s ORDER BY seq LIMIT %s",
+                (task_id, since_seq, limit)
+            )
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        if "result_data" in columns:
+            for row in rows:
+                row["result_data"] = decode_blob(row["result_data"])
+        return rows
+
+    def append_traces(self, task: Task) -> int:
+        """
+        Persiste em TaskTraces os traces da Task ainda não gravados (seq = posição no histórico, 1-based).
+        :return: Número de traces inseridos.
+        """
+        if self.conn is None or not task.trace_history:
+            return 0
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM TaskTraces WHERE task_id = %s", (task.task_id,))
+            last_seq = cursor.fetchone()[0]
+            new_rows = [
+                (task.task_id, seq, t.timestamp, t.agent_name, t.action_description, encode_blob(t.result_data), t.success)
+                for seq, t in enumerate(task.trace_history[last_seq:], start=last_seq + 1)
+            ]
+            if new_rows:
+                cursor.executemany(
+                    "INSERT IGNORE INTO TaskTraces (task_id, seq, timestamp, agent_name, action_description, result_data, success) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    new_rows
+                )
+                self.conn.commit()
+            return len(new_rows)
+        finally:
+            cursor.close()
+
+
+class TaskRepositoryPool:
+    """
+    Conexões próprias para leitores concorrentes (threads de I/O da Interface HTTP).
+    A conexão do Scheduler é serializada por _repository_lock; a API nunca a utiliza.
+    Cada leitura empresta um TaskRepository (criado sob demanda, no máximo 'size').
+    """
+
+    def __init__(self, size: Optional[int] = None, factory: Callable[[], TaskRepository] = TaskRepository):
+        """:param size: Conexões simultâneas (padrão: CORTEX_API_DB_POOL ou 8)."""
+        self.size = size or int(os.environ.get("CORTEX_API_DB_POOL", "8"))
+        self._factory = factory
+        self._idle: "queue.LifoQueue[TaskRepository]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    @contextmanager
+    def borrow(self) -> Iterator[TaskRepository]:
+        """Empresta um repositório; conexões que falharam são descartadas em vez de devolvidas."""
+        with self._slots:
+            try:
+                repository = self._idle.get_nowait()
+            except queue.Empty:
+                repository = self._factory()
+            try:
+                yield repository
+                if repository.conn is not None:
+                    # Encerra a transação de leitura: a próxima consulta não reutiliza o snapshot antigo
+                    repository.conn.commit()
+            except Exception:
+                if repository.conn is not None:
+                    try:
+                        repository.conn.close()
+                    except Exception:
+                        pass
+                raise
+            self._idle.put(repository)
+
+    def load_task(self, task_id: str) -> Optional[TaskDBModel]:
+        with self.borrow() as repository:
+            return repository.load_task(task_id)
+
+    def get_task_header(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self.borrow() as repository:
+            return repository.get_task_header(task_id)
+
+    def get_trace_slice(self, task_id: str, since_seq: int = 0, limit: int = 100,
+                        columns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        with self.borrow() as repository:
+            return repository.get_trace_slice(task_id, since_seq, limit, columns)
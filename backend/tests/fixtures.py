@@ -0,0 +1,53 @@
+# backend/tests/fixtures.py
+"""Fixtures compartilhadas pelos testes (independentes dos módulos de benchmark)."""
+import time
+from backend.core.dataclasses import ExecutionTrace, GlobalContext, Task, TaskPriority, TaskStatus
+
+
+class FakeClock:
+    """
+    Relógio manual. Serve como relógio do Scheduler (now/sleep) e como função de tempo
+    (clock=fake) dos componentes que recebem um callable.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.t = start
+
+    def __call__(self) -> float:
+        return self.t
+
+    def now(self) -> float:
+        return self.t
+
+    def sleep(self, seconds: float):
+        self.t += seconds
+
+
+def make_realistic_task(n_traces: int) -> Task:
+    """Task concluída com contexto de tenant e um trace multi-pass de n_traces passos."""
+    now = time.time()
+    task = Task(
+        task_id="TASK-REALISTA",
+        description="Analisar e estruturar o plano de desenvolvimento do Módulo 1 (Scheduler).",
+        context=GlobalContext(session_id="s-realista", initial_prompt="Analisar e estruturar o plano de desenvolvimento.",
+                              environment_vars={"tenant": "acme", "region": "sa-east-1"}),
+        priority=TaskPriority.MEDIUM,
+        required_agent="Pesquisador_Agente",
+        status=TaskStatus.COMPLETED,
+        delegated_to="Engenheiro_Agente",
+        creation_time=now,
+        last_update_time=now,
+        final_result={"fix_applied": True, "details": "Dados recebidos do /system/deploy_patch"},
+    )
+    for i in range(n_traces):
+        task.trace_history.append(ExecutionTrace(
+            timestamp=now + i,
+            agent_name="Pesquisador_Agente" if i % 2 else "Engenheiro_Agente",
+            action_description=f"Executando via Agente (passo {i})",
+            result_data={
+                "output_data": f"Pesquisador_Agente analisou dados externos (passo {i})." * 2,
+                "next_action": "DELEGATE_TO_Engenheiro_Agente" if i % 2 else "TASK_COMPLETED",
+                "exec_time": 123.456 + i,
+            },
+        ))
+    return task
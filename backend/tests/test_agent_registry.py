@@ -0,0 +1,31 @@
+# backend/tests/test_agent_registry.py
+import sys
+import unittest
+from backend.core.agent_registry import AgentSpec, discover_agent_specs
+from backend.core.agente_manager import AgenteManager
+
+
+class TestAgentRegistry(unittest.TestCase):
+
+    def test_01_tags_from_entry_point_extras(self):
+        spec = AgentSpec.from_tags("Tradutor", "pkg.agentes:Tradutor", ["SERVER", "edge", "io"])
+        self.assertEqual(spec.modes, ("SERVER", "EDGE"))
+        self.assertEqual(spec.resources, ("io",))
+        with self.assertRaises(ValueError):
+            AgentSpec.from_tags("X", "pkg:X", ["gpu"])
+
+    def test_02_mode_filter_without_importing_agents(self):
+        self.assertIn("Pesquisador_Agente", discover_agent_specs())
+        manager = AgenteManager("EDGE")
+        self.assertEqual(manager.list_agents(), ["Sensor_Agente", "WorkerSimples"])
+        self.assertEqual(manager.agents_with_resource("cpu"), ["WorkerSimples"])
+        self.assertNotIn("backend.agents.agent_impls", sys.modules)
+
+    def test_03_lazy_core_attributes_resolve(self):
+        import backend.core as core
+        for name in core.__all__:
+            self.assertIsNotNone(getattr(core, name), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
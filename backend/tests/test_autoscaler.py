@@ -0,0 +1,140 @@
+# backend/tests/test_autoscaler.py
+import threading
+import time
+import unittest
+from backend.core.autoscaler import Autoscaler, AutoscaleSample, ConcurrencyLimits, ScalingPolicy
+from backend.utilities.metrics import Histogram, window_quantiles
+
+
+class _FakeScheduler:
+    """Scheduler mínimo: apenas a interface consultada pelo Autoscaler."""
+
+    def __init__(self, workers: int = 1):
+        self.worker_count = workers
+        self.busy_workers = 0
+        self.depth = 0
+
+    def queue_depth(self) -> int:
+        return self.depth
+
+    def resize(self, count: int):
+        self.worker_count = count
+
+
+def _sample(t: float, scheduler: _FakeScheduler, wait_p95: float, depth: int = 0, busy: int = 0) -> AutoscaleSample:
+    return AutoscaleSample(timestamp=t, workers=scheduler.worker_count, busy=busy, queue_depth=depth, wait_p95_s=wait_p95)
+
+
+class TestAutoscaler(unittest.TestCase):
+
+    def test_01_workers_scale_with_hysteresis_and_cooldowns(self):
+        scheduler = _FakeScheduler(workers=2)
+        policy = ScalingPolicy(min_workers=1, max_workers=8, up_samples=2, down_samples=3,
+                               up_cooldown_s=2.0, down_cooldown_s=10.0, max_step=4)
+        autoscaler = Autoscaler(scheduler, policy)
+
+        # Uma amostra alta isolada não escala; a banda morta zera a sequência
+        self.assertIsNone(autoscaler._scale_workers(_sample(0, scheduler, 1.0)))
+        self.assertIsNone(autoscaler._scale_workers(_sample(1, scheduler, 0.1, busy=2)))
+        self.assertIsNone(autoscaler._scale_workers(_sample(2, scheduler, 1.0)))
+        event = autoscaler._scale_workers(_sample(3, scheduler, 1.0, depth=40))
+        # Pressão 5x limitada a max_step: 2 -> 6
+        self.assertEqual((event.old, event.new, event.direction), (2, 6, "up"))
+        self.assertEqual(scheduler.worker_count, 6)
+
+        # Cooldown de aumento e teto em max_workers
+        autoscaler._scale_workers(_sample(4, scheduler, 1.0))
+        self.assertIsNone(autoscaler._scale_workers(_sample(4.5, scheduler, 1.0)))
+        event = autoscaler._scale_workers(_sample(5, scheduler, 1.0))
+        self.assertEqual((event.old, event.new), (6, 8))
+
+        # Recuo: exige down_samples amostras baixas e respeita o cooldown desde a última mudança
+        for t in (6, 7, 8):
+            self.assertIsNone(autoscaler._scale_workers(_sample(t, scheduler, 0.0)))
+        events = [autoscaler._scale_workers(_sample(t, scheduler, 0.0)) for t in range(9, 20)]
+        downs = [e for e in events if e is not None]
+        self.assertEqual([(e.old, e.new, e.direction) for e in downs], [(8, 7, "down")])
+        self.assertEqual(downs[0].timestamp, 15)
+
+    def test_02_agent_limit_backs_off_on_latency_and_grows_on_waits(self):
+        limits = ConcurrencyLimits({"Pesquisador_Agente": 8})
+        autoscaler = Autoscaler(_FakeScheduler(), ScalingPolicy(agent_cooldown_s=0.0), limits)
+
+        def step(t, p95):
+            sample = AutoscaleSample(t, 1, 0, 0, 0.0, {"Pesquisador_Agente": p95})
+            return autoscaler._scale_agents(sample)
+
+        self.assertEqual(step(0, 0.1), [])
+        self.assertEqual([(e.old, e.new) for e in step(1, 0.5)], [(8, 6)])
+
+        # Vagas esgotadas com latência na linha de base: o limite sobe de 1
+        limits.set_limit("Pesquisador_Agente", 1)
+        release = threading.Event()
+
+        def hold():
+            with limits.slot("Pesquisador_Agente"):
+                release.wait()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        time.sleep(0.05)
+        waiter = threading.Thread(target=hold)
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        holder.join()
+        waiter.join()
+        self.assertEqual([(e.old, e.new) for e in step(2, 0.1)], [(1, 2)])
+        self.assertEqual(limits.take_waits("Pesquisador_Agente"), 0)
+
+    def test_03_slot_waiters_do_not_count_as_worker_pressure(self):
+        scheduler = _FakeScheduler(workers=2)
+        limits = ConcurrencyLimits({"Pesquisador_Agente": 1})
+        autoscaler = Autoscaler(scheduler, ScalingPolicy(up_samples=1, up_cooldown_s=0.0), limits)
+        release = threading.Event()
+
+        def hold():
+            with limits.slot("Pesquisador_Agente"):
+                release.wait()
+
+        threads = [threading.Thread(target=hold) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        self.addCleanup(lambda: (release.set(), [t.join() for t in threads]))
+        deadline = time.monotonic() + 2.0
+        while limits.waiting() < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # Os dois workers estão "ocupados", mas um deles apenas aguarda a vaga do agente
+        scheduler.busy_workers, scheduler.depth = 2, 40
+        sample = autoscaler.sample()
+        self.assertEqual((sample.busy, sample.slot_waiters), (1, 1))
+        self.assertIsNone(autoscaler._scale_workers(sample))
+        self.assertEqual(scheduler.worker_count, 2)
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(limits.waiting(), 0)
+        event = autoscaler._scale_workers(autoscaler.sample())
+        self.assertEqual((event.old, event.direction), (2, "up"))
+
+    def test_04_window_quantiles_only_counts_new_observations(self):
+        histogram = Histogram("h", "teste", ["agent"], buckets=(0.01, 0.1, 1.0))
+        for _ in range(100):
+            histogram.labels("a").observe(0.005)
+        before = histogram.series_snapshot()
+        for _ in range(10):
+            histogram.labels("a").observe(0.5)
+        histogram.labels("b").observe(0.05)
+        after = histogram.series_snapshot()
+
+        quantiles, count = window_quantiles(histogram, before, after, (0.5, 0.95))
+        self.assertEqual((quantiles, count), ({0.5: 1.0, 0.95: 1.0}, 11))
+        quantiles, count = window_quantiles(histogram, before, after, (0.95,), labels=("b",))
+        self.assertEqual((quantiles, count), ({0.95: 0.1}, 1))
+        self.assertEqual(window_quantiles(histogram, after, after)[1], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# backend/tests/test_blob_store.py
+import os
+import tempfile
+import time
+import unittest
+from backend.persistence.blob_store import BlobStore, find_refs, is_blob_ref, referenced_digests, summarize
+
+
+class TestBlobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BlobStore(self.tmp.name, threshold_bytes=1024)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _files(self):
+        return [f for _, _, files in os.walk(self.tmp.name) for f in files]
+
+    def test_01_large_outputs_become_deduplicated_references(self):
+        small = {'patch': "diff --git a/x b/x"}
+        self.assertIs(self.store.externalize(small), small)
+
+        output = {'patch': "+linha adicionada\n" * 500, 'files': ["backend/core/cerne.py"]}
+        ref = self.store.externalize(output)
+        self.assertTrue(is_blob_ref(ref))
+        self.assertTrue(ref['$blob'].startswith("sha256:"))
+        self.assertEqual(ref['media_type'], "application/json")
+        self.assertLessEqual(len(ref['summary']), 200)
+
+        # Mesmo conteúdo: mesma referência e um único arquivo (comprimido, bem menor que o original)
+        self.assertEqual(self.store.externalize(dict(output)), ref)
+        self.assertEqual(len(self._files()), 1)
+        stored = os.path.getsize(os.path.join(self.tmp.name, ref['$blob'][7:9], ref['$blob'][7:]))
+        self.assertLess(stored, ref['size'] / 10)
+        self.assertEqual(self.store.load(ref), output)
+        self.assertIs(self.store.externalize(ref), ref)
+
+    def test_02_stream_returns_bounded_chunks_and_resolve_inlines_refs(self):
+        text = "".join(f"resultado de busca {i}\n" for i in range(20000))
+        ref = self.store.externalize(text)
+        chunks = list(self.store.stream(ref['$blob'], chunk_size=4096))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) <= 4096 for c in chunks))
+        self.assertEqual(b"".join(chunks).decode("utf-8"), text)
+
+        result = {'output_data': ref, 'next_action': "TASK_COMPLETED"}
+        self.assertEqual(find_refs([result, {'x': 1}]), [ref])
+        self.assertEqual(self.store.resolve(result), {'output_data': text, 'next_action': "TASK_COMPLETED"})
+        self.assertTrue(summarize(result).startswith("{'output_data': '<blob "))
+
+        with self.assertRaises(ValueError):
+            self.store.exists("../../etc/passwd")
+        with self.assertRaises(FileNotFoundError):
+            list(self.store.stream("sha256:" + "0" * 64))
+
+    def test_03_garbage_collection_spares_live_and_recent_blobs(self):
+        live, orphan, recent = (self.store.put(f"saída {name}") for name in ("viva", "órfã", "recente"))
+        old = time.time() - 3600
+        for ref in (live, orphan, recent):
+            path = self.store._path(ref['$blob'])
+            os.utime(path, (old, old))
+        self.store.put("saída recente")  # Reuso por deduplicação renova a carência
+        stale_tmp = os.path.join(self.tmp.name, live['$blob'][7:9], ".tmp-interrompido")
+        open(stale_tmp, "wb").close()
+        os.utime(stale_tmp, (old, old))
+
+        live_digests = referenced_digests(repr({'output_data': live}).encode("utf-8"))
+        self.assertEqual(live_digests, {live['$blob'][7:]})
+        self.assertEqual(self.store.collect_garbage(live_digests, older_than=time.time() - 60), 1)
+        self.assertFalse(self.store.exists(orphan['$blob']))
+        self.assertEqual((self.store.load(live), self.store.load(recent)), ("saída viva", "saída recente"))
+        self.assertFalse(os.path.exists(stale_tmp))
+
+
+if __name__ == '__main__':
+    unittest.main()
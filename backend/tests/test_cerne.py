@@ -0,0 +1,80 @@
+# backend/tests/test_cerne.py
+import contextvars
+import unittest
+from types import SimpleNamespace
+from backend.core import cerne as cerne_module
+from backend.core.cerne import CERNE
+from backend.core.dataclasses import GlobalContext, Task, TaskStatus
+from backend.core.protocolo import AgentResponse
+from backend.core.status_hub import StatusHub
+from backend.utilities.logger import CORTEX_LOGGER
+from backend.utilities.tracing import STATUS_ERROR, Tracer, _CURRENT_SPAN, _CURRENT_TRACE_TASK
+
+
+class RecordingTracer(Tracer):
+    """Tracer habilitado que retém os spans encerrados em memória (sem exportador)."""
+
+    def __init__(self):
+        super().__init__(enabled=True)
+        self.spans = []
+
+    def _export(self, span):
+        self.spans.append(span)
+
+
+class EchoWorker:
+
+    def execute_task(self, message):
+        return AgentResponse(message_id=message.message_id, task_id=message.task_id, success=True, status_code=200,
+                             output_data=message.raw_prompt, execution_time_ms=1.0,
+                             suggested_next_action="TASK_COMPLETED")
+
+
+def _task(status: TaskStatus) -> Task:
+    task = Task(task_id="TASK-1", description="resumo", context=GlobalContext(session_id="s-1"),
+                required_agent="WorkerSimples")
+    task.update_status(status, "CERNE", "estado inicial")
+    return task
+
+
+class TestCerneCycleSpans(unittest.TestCase):
+
+    def setUp(self):
+        self.tracer = RecordingTracer()
+        original = cerne_module.TRACER
+        cerne_module.TRACER = self.tracer
+        self.addCleanup(setattr, cerne_module, "TRACER", original)
+        manager = SimpleNamespace(get_agent=lambda name: EchoWorker())
+        self.cerne = CERNE(manager, status_hub=StatusHub(), blob_store=SimpleNamespace(externalize=lambda value: value))
+
+    def _run(self, task):
+        """Executa o ciclo em um contexto novo e devolve o estado de tracing/log deixado na thread."""
+        def cycle():
+            error = None
+            try:
+                self.cerne.processar_tarefa(task)
+            except Exception as e:
+                error = e
+            return error, _CURRENT_SPAN.get(), _CURRENT_TRACE_TASK.get(), CORTEX_LOGGER.current_task_id()
+        return contextvars.Context().run(cycle)
+
+    def test_01_cycle_spans_are_closed_in_order(self):
+        error, span, trace_task, log_task = self._run(_task(TaskStatus.PENDING))
+        self.assertEqual((error, span, trace_task, log_task), (None, None, None, "NONE"))
+        self.assertEqual([s.name for s in self.tracer.spans],
+                         ["cerne.analysis", "cerne.delegation", "agent.execute_task", "cerne.review", "cerne.cycle"])
+        cycle = self.tracer.spans[-1]
+        self.assertEqual(cycle.attributes['status'], "COMPLETED")
+        self.assertTrue(all(s.parent_span_id == cycle.span_id for s in self.tracer.spans[:-1]))
+
+    def test_02_exception_ends_spans_and_task_context(self):
+        # Encadeamento sem resultado no último trace: a fase de análise lança exceção
+        error, span, trace_task, log_task = self._run(_task(TaskStatus.DELEGATED))
+        self.assertIsInstance(error, AttributeError)
+        self.assertEqual((span, trace_task, log_task), (None, None, "NONE"))
+        self.assertEqual([(s.name, s.status_code) for s in self.tracer.spans],
+                         [("cerne.analysis", STATUS_ERROR), ("cerne.cycle", STATUS_ERROR)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+# backend/tests/test_clock.py
+import unittest
+from backend.utilities.clock import VirtualClock
+
+
+class TestVirtualClock(unittest.TestCase):
+
+    def test_01_events_run_in_time_order(self):
+        clock = VirtualClock()
+        fired = []
+        clock.call_later(5.0, lambda: fired.append(("b", clock.now())))
+        clock.call_later(1.0, lambda: fired.append(("a", clock.now())))
+        clock.call_later(5.0, lambda: fired.append(("c", clock.now())))  # Empate: FIFO
+        self.assertEqual(clock.run(), 3)
+        self.assertEqual(fired, [("a", 1.0), ("b", 5.0), ("c", 5.0)])
+
+    def test_02_run_until_and_chained_events(self):
+        clock = VirtualClock()
+        ticks = []
+
+        def tick():
+            ticks.append(clock.now())
+            clock.call_later(10.0, tick)
+
+        clock.call_at(0.0, tick)
+        clock.run(until=35.0)
+        self.assertEqual(ticks, [0.0, 10.0, 20.0, 30.0])
+        self.assertEqual(clock.now(), 35.0)
+        self.assertEqual(clock.pending_events, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# backend/tests/test_cortex_bench.py
+import os
+import random
+import unittest
+from types import SimpleNamespace
+from backend.benchmarks.cortex_bench import (DEFAULT_PRIORITY_MIX, _RecordingRepository, arrival_offsets,
+                                             compare_results, parse_mix, run_benchmark)
+
+
+class TestCortexBench(unittest.TestCase):
+
+    def test_01_arrival_patterns(self):
+        rng = random.Random(1)
+        self.assertEqual(list(arrival_offsets("constant", 2.0, 2.0, rng)), [0.0, 0.5, 1.0, 1.5])
+        burst = list(arrival_offsets("burst", 0, 10.0, rng, burst_size=3, burst_interval_s=5.0))
+        self.assertEqual(burst, [0.0, 0.0, 0.0, 5.0, 5.0, 5.0])
+        poisson = list(arrival_offsets("poisson", 100.0, 10.0, random.Random(1)))
+        self.assertEqual(poisson, list(arrival_offsets("poisson", 100.0, 10.0, random.Random(1))))
+        self.assertTrue(800 < len(poisson) < 1200)
+
+    def test_02_regression_threshold(self):
+        baseline = {"throughput_tps": 100.0, "e2e_ms": {"p50": 10.0, "p95": 20.0, "p99": 40.0}}
+        current = {"throughput_tps": 95.0, "e2e_ms": {"p50": 10.5, "p95": 20.0, "p99": 60.0}}
+        regressions = compare_results(current, baseline, threshold_pct=10.0)
+        self.assertEqual([r["metric"] for r in regressions], ["e2e_ms.p99"])
+        self.assertEqual(parse_mix("A=0.7,B=0.3", {}), {"A": 0.7, "B": 0.3})
+        # Throughput zerado é uma regressão, não um dado ausente
+        collapsed = compare_results({"throughput_tps": 0.0}, baseline, threshold_pct=10.0)
+        self.assertEqual([r["metric"] for r in collapsed], ["throughput_tps"])
+
+    def test_03_only_terminal_saves_count_as_finished(self):
+        repository = _RecordingRepository(SimpleNamespace(save=lambda task: None))
+        repository.expected = 1
+        task = SimpleNamespace(task_id="TASK-1", status=SimpleNamespace(value="PENDING"))
+        for status in ("PENDING", "RETRY", "DELEGATED", "RETRY"):
+            task.status = SimpleNamespace(value=status)
+            repository.save(task)
+        self.assertEqual(repository.finished, {})
+        task.status = SimpleNamespace(value="COMPLETED")
+        repository.save(task)
+        self.assertEqual(repository.finished["TASK-1"][1], "COMPLETED")
+        self.assertTrue(repository.all_finished.is_set())
+
+    def test_04_smoke_run_through_the_real_stack(self):
+        from backend.utilities.network_simulator import NETWORK_SIMULATOR
+
+        # Repositório em modo CI_TEST (sem MySQL) e rede sem falhas: sem RETRY, o dreno é determinístico
+        previous_mode = os.environ.get("CORTEX_MODE")
+        os.environ["CORTEX_MODE"] = "CI_TEST"
+        self.addCleanup(lambda: os.environ.pop("CORTEX_MODE") if previous_mode is None
+                        else os.environ.__setitem__("CORTEX_MODE", previous_mode))
+        previous_failure_rate = NETWORK_SIMULATOR.default_profile.failure_rate
+        NETWORK_SIMULATOR.default_profile.failure_rate = 0.0
+        self.addCleanup(setattr, NETWORK_SIMULATOR.default_profile, "failure_rate", previous_failure_rate)
+
+        results = run_benchmark({
+            "mode": "SERVER", "pattern": "constant", "rate": 8.0, "duration_s": 1.0, "burst_size": 1,
+            "burst_interval_s": 1.0, "step_factor": 1.0, "workers": 4, "autoscale": False, "max_workers": 4,
+            "seed": 7, "agent_mix": {"Pesquisador_Agente": 0.5, "Engenheiro_Agente": 0.5},
+            "priority_mix": DEFAULT_PRIORITY_MIX, "tenant_mix": {"a": 0.5, "b": 0.5}, "net_profile": None,
+            "drain_timeout_s": 15.0,
+        })
+        self.assertTrue(results["drained"])
+        self.assertEqual(results["tasks"]["submitted"], 8)
+        self.assertEqual(results["tasks"]["by_status"], {"COMPLETED": 8})
+        self.assertEqual(results["e2e_ms"]["count"], 8)
+        self.assertEqual(set(results["tenant_queue_wait_ms"]), {"a", "b"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+# backend/tests/test_db_models.py
+import json
+import unittest
+from backend.persistence.db_models import (
+    TaskDBModel, TraceDBModel, CODECS, JsonCodec, MsgPackCodec, SCHEMA_VERSION,
+    encode_blob, decode_blob,
+)
+from backend.tests.fixtures import make_realistic_task
+
+
+class TestDBModelCodecs(unittest.TestCase):
+
+    def test_01_roundtrip_all_codecs(self):
+        task = make_realistic_task(5)
+        for codec in CODECS.values():
+            model = TaskDBModel.from_core(task, codec)
+            self.assertEqual(model.trace_history_json[0], codec.codec_id)
+            self.assertEqual(model.trace_history_json[1], SCHEMA_VERSION)
+            self.assertEqual(model.final_result, task.final_result)
+            self.assertEqual(model.context["session_id"], task.context.session_id)
+            trace = model.trace_history
+            self.assertEqual(len(trace), 5)
+            self.assertEqual(trace[3]["result_data"], task.trace_history[3].result_data)
+
+    def test_02_legacy_json_rows_still_decode(self):
+        legacy_trace = json.dumps([{
+            "timestamp": 1.0, "agent_name": "WorkerSimples", "action_description": "x",
+            "result_data_json": json.dumps({"next_action": "TASK_COMPLETED"}), "success": True,
+        }])
+        model = TaskDBModel(
+            task_id="TASK-legacy", description="d", context_json=json.dumps({"session_id": "s"}),
+            status="COMPLETED", priority=2, required_agent="WorkerSimples", delegated_to=None,
+            creation_time=0.0, last_update_time=0.0, final_result_json=json.dumps("ok"),
+            trace_history_json=legacy_trace,
+        )
+        self.assertEqual(model.final_result, "ok")
+        self.assertEqual(model.trace_history[0]["result_data"], {"next_action": "TASK_COMPLETED"})
+
+    def test_03_trace_is_decoded_lazily(self):
+        model = TaskDBModel.from_core(make_realistic_task(3), CODECS[JsonCodec.codec_id])
+        _ = model.final_result
+        self.assertNotIn("trace_history_json", model._lazy)
+        _ = model.trace_history
+        self.assertTrue(model._lazy["trace_history_json"].is_decoded)
+
+    @unittest.skipUnless(MsgPackCodec.codec_id in CODECS, "msgpack não instalado")
+    def test_04_msgpack_trace_model(self):
+        trace = make_realistic_task(1).trace_history[0]
+        db_trace = TraceDBModel.from_core(trace, CODECS[MsgPackCodec.codec_id])
+        self.assertEqual(db_trace.result_data, trace.result_data)
+        self.assertEqual(decode_blob(encode_blob(None)), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+# backend/tests/test_fair_share.py
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from backend.core.fair_share import DEFAULT_TENANT, OTHER_TENANTS_LABEL, FairQueue, TenantPolicy
+from backend.persistence.queue_spill import SpillFile, SpillRun
+
+
+class TestFairShare(unittest.TestCase):
+
+    def setUp(self):
+        self.seq = 0
+
+    def _push(self, queue, tenant, priority=2, spill=False):
+        self.seq += 1
+        return queue.push(tenant, (-priority, float(self.seq), self.seq, 0.0, f"{tenant}-{self.seq}"), spill)
+
+    def _flush(self, run):
+        if run is not None:
+            run.flush()
+
+    def _pop(self, queue):
+        """pop() aplicando as reidratações solicitadas (na TaskQueue, executadas fora do lock)."""
+        while True:
+            popped = queue.pop()
+            run = queue.next_refill()
+            if run is not None:
+                queue.refilled(run, run.read_batch())
+            if popped is not None or run is None:
+                return popped
+
+    def _drain(self, queue, done=True):
+        order = []
+        while True:
+            popped = self._pop(queue)
+            if popped is None:
+                return order
+            order.append(popped[0])
+            if done:
+                queue.done(popped[0])
+
+    def test_01_flooding_tenant_does_not_delay_others_and_weights_apply(self):
+        queue = FairQueue(TenantPolicy(weights={'gold': 2.0}))
+        for _ in range(100):
+            self._push(queue, "flood")
+        self._push(queue, "small")
+        self._push(queue, "small")
+        self._push(queue, "urgent", priority=4)
+        order = self._drain(queue)
+        self.assertEqual(order[0], "urgent")                       # Prioridade continua estrita
+        self.assertEqual(order[1:5], ["flood", "small", "flood", "small"])
+
+        for _ in range(30):
+            self._push(queue, "gold")
+            self._push(queue, "basic")
+        first = self._drain(queue)[:30]
+        self.assertEqual(first.count("gold"), 20)                  # Fatia proporcional ao peso 2:1
+        self.assertEqual(len(queue), 0)
+
+    def test_02_in_flight_cap_parks_tenant_until_done(self):
+        queue = FairQueue(TenantPolicy(max_in_flight={'capped': 2}))
+        for _ in range(5):
+            self._push(queue, "capped")
+        self._push(queue, "other")
+        self.assertEqual(self._drain(queue, done=False), ["capped", "other", "capped"])
+        self.assertEqual((len(queue), queue.ready, queue.in_flight("capped")), (3, 0, 2))
+        self._push(queue, "capped")
+        self.assertIsNone(queue.pop())
+
+        self.assertTrue(queue.done("capped"))
+        self.assertEqual(queue.ready, 4)
+        self.assertEqual(queue.pop()[0], "capped")
+        self.assertIsNone(queue.pop())
+
+    def test_03_spilled_flows_keep_per_tenant_order_with_bounded_open_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            make_run = lambda name: SpillRun(SpillFile(tmp, name, segment_bytes=512), prefetch=4)
+            queue = FairQueue(TenantPolicy(), make_run, max_open_spills=2)
+            for i in range(40):
+                self._flush(self._push(queue, f"t{i % 4}", spill=i >= 4))
+            self.assertEqual(queue.heap_size, 4)
+            self.assertGreater(queue.spill_bytes(), 0)
+            self.assertLessEqual(sum(1 for run in queue._open_spills if run.spill._writer is not None), 2)
+
+            seen = {}
+            while True:
+                popped = self._pop(queue)
+                if popped is None:
+                    break
+                tenant, entry, _ = popped
+                self.assertGreater(entry[2], seen.get(tenant, 0))
+                seen[tenant] = entry[2]
+                queue.done(tenant)
+            self.assertEqual(len(seen), 4)
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_04_policy_from_metadata_with_bounded_metric_labels(self):
+        policy = TenantPolicy(metric_tenants=1)
+        task = SimpleNamespace(context=SimpleNamespace(environment_vars={'tenant': "acme"}))
+        self.assertEqual(policy.tenant_of(task), "acme")
+        self.assertEqual(policy.tenant_of(SimpleNamespace(context=SimpleNamespace(environment_vars={}))),
+                         DEFAULT_TENANT)
+        self.assertEqual(policy.tenant_of(SimpleNamespace(task_id="SIM-1")), DEFAULT_TENANT)  # Sem contexto
+        self.assertEqual([policy.metric_label("acme"), policy.metric_label("beta")], ["acme", OTHER_TENANTS_LABEL])
+        with self.assertRaises(ValueError):
+            TenantPolicy(weights={'x': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
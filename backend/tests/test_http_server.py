@@ -0,0 +1,162 @@
+# backend/tests/test_http_server.py
+import threading
+import unittest
+from types import SimpleNamespace
+
+try:
+    from fastapi.testclient import TestClient
+except ImportError:  # fastapi/httpx ausentes: as rotas não podem ser exercitadas
+    TestClient = None
+
+
+class FakeRepository:
+    """TaskRepository mínimo: cabeçalho e fatias de trace em memória."""
+
+    def __init__(self):
+        self.headers = {}
+        self.traces = {}
+
+    def get_task_header(self, task_id):
+        return self.headers.get(task_id)
+
+    def get_trace_slice(self, task_id, since_seq, limit):
+        return [t for t in self.traces.get(task_id, []) if t["seq"] > since_seq][:limit]
+
+    def load_task(self, task_id):
+        return None
+
+
+class FakeScheduler:
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit_task(self, description, context, priority, initial_agent=None, task_id=None):
+        self.submitted.append((description, context, priority, initial_agent))
+        return SimpleNamespace(task_id=f"TASK-{len(self.submitted)}", status="PENDING", delegated_to=None)
+
+
+@unittest.skipUnless(TestClient is not None, "fastapi/httpx não instalados")
+class TestHttpRoutes(unittest.TestCase):
+
+    def setUp(self):
+        from backend.interface import http_server
+        self.server = http_server
+        self.repo = FakeRepository()
+        self.scheduler = FakeScheduler()
+        # Sem o gerenciador de contexto, o TestClient não executa o lifespan (init_cortex)
+        self.client = TestClient(http_server.app)
+        self._install(SimpleNamespace(
+            mode="SERVER", api_repo=self.repo, scheduler=self.scheduler, archiver=None,
+            agente_manager=SimpleNamespace(list_agents=lambda: ["Pesquisador_Agente", "Revisor_Agente"]),
+        ))
+
+    def _install(self, instance):
+        previous = self.server.CORTEX_INSTANCE
+        self.server.CORTEX_INSTANCE = instance
+        self.addCleanup(setattr, self.server, "CORTEX_INSTANCE", previous)
+
+    def test_01_health_reports_uninitialized_and_running(self):
+        body = self.client.get("/health").json()
+        self.assertEqual((body["status"], body["cortex_mode"], body["agents_count"]), ("RUNNING", "SERVER", 2))
+        self._install(None)
+        self.assertEqual(self.client.get("/health").json()["status"], "UNINITIALIZED")
+
+    def test_02_submit_returns_202_and_503_when_inactive(self):
+        response = self.client.post("/task/submit", json={"description": "Resumir o relatório",
+                                                            "metadata": {"tenant": "acme"}})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.json()["task_id"], response.json()["status"]), ("TASK-1", "PENDING"))
+        description, context, _, _ = self.scheduler.submitted[0]
+        self.assertEqual((description, context.environment_vars), ("Resumir o relatório", {"tenant": "acme"}))
+
+        self._install(None)
+        self.assertEqual(self.client.post("/task/submit", json={"description": "x"}).status_code, 503)
+
+    def test_03_task_status_found_and_not_found(self):
+        self.repo.headers["TASK-9"] = {"status": "COMPLETED", "delegated_to": "Revisor_Agente",
+                                       "last_update_time": 10.0, "trace_count": 0, "final_result": None}
+        response = self.client.get("/task/TASK-9")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "COMPLETED")
+        self.assertEqual(response.json()["delegated_to"], "Revisor_Agente")
+        self.assertIn("ETag", response.headers)
+
+        self.assertEqual(self.client.get("/task/TASK-404").status_code, 404)
+        self.assertEqual(self.client.get("/task/TASK-9?fields=bogus").status_code, 400)
+        self._install(None)
+        self.assertEqual(self.client.get("/task/TASK-9").status_code, 503)
+
+    def _seed(self, traces: int, status: str = "IN_PROGRESS", updated: float = 10.0):
+        self.repo.headers["TASK-1"] = {"status": status, "delegated_to": "Pesquisador_Agente",
+                                       "last_update_time": updated, "trace_count": traces, "final_result": None}
+        self.repo.traces["TASK-1"] = [{"seq": seq, "agent_name": "CERNE"} for seq in range(1, traces + 1)]
+
+    def test_04_etag_returns_304_until_the_task_changes(self):
+        self._seed(traces=3)
+        first = self.client.get("/task/TASK-1")
+        etag = first.headers["ETag"]
+        cached = self.client.get("/task/TASK-1", headers={"If-None-Match": etag})
+        self.assertEqual((cached.status_code, cached.content, cached.headers["ETag"]), (304, b"", etag))
+        self.assertEqual(self.client.get("/task/TASK-1", headers={"If-None-Match": f"W/{etag}"}).status_code, 304)
+        # Outra página é outra representação
+        self.assertEqual(self.client.get("/task/TASK-1?since_seq=1",
+                                         headers={"If-None-Match": etag}).status_code, 200)
+
+        self._seed(traces=4, updated=11.0)
+        changed = self.client.get("/task/TASK-1", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
+    def test_05_trace_pages_follow_since_seq_and_limit(self):
+        self._seed(traces=5)
+        seen, cursor = [], 0
+        while True:
+            body = self.client.get(f"/task/TASK-1?since_seq={cursor}&limit=2").json()
+            seen.extend(t["seq"] for t in body["trace_history"])
+            cursor = body["trace_next_seq"]
+            if not body["trace_has_more"]:
+                break
+        self.assertEqual(seen, [1, 2, 3, 4, 5])
+        self.assertEqual(cursor, 5)
+        empty = self.client.get("/task/TASK-1?since_seq=5").json()
+        self.assertEqual((empty["trace_history"], empty["trace_next_seq"], empty["trace_has_more"]), ([], 5, False))
+
+    def test_06_fields_projection(self):
+        self._seed(traces=2)
+        body = self.client.get("/task/TASK-1?fields=status").json()
+        self.assertEqual(body, {"task_id": "TASK-1", "status": "IN_PROGRESS"})
+        body = self.client.get("/task/TASK-1?fields=delegated_to,trace_history&limit=1").json()
+        self.assertEqual(set(body), {"task_id", "delegated_to", "trace_history", "trace_next_seq", "trace_has_more"})
+        self.assertEqual([t["seq"] for t in body["trace_history"]], [1])
+
+    def test_07_long_poll_rereads_only_after_the_persisted_event(self):
+        from backend.core.status_hub import STATUS_HUB
+
+        self._seed(traces=1)
+        etag = self.client.get("/task/TASK-1").headers["ETag"]
+        task = SimpleNamespace(task_id="TASK-1", status=SimpleNamespace(value="COMPLETED"), final_result="ok")
+
+        def persist():
+            self._seed(traces=2, status="COMPLETED", updated=11.0)
+            STATUS_HUB.publish(task, "Scheduler", "Estado persistido.", persisted=True)
+
+        # O CERNE publica a transição antes do save: o long-poll não pode responder com o estado antigo
+        timers = [threading.Timer(0.1, STATUS_HUB.publish, (task, "CERNE", "concluída")),
+                  threading.Timer(0.3, persist)]
+        for timer in timers:
+            timer.start()
+        response = self.client.get("/task/TASK-1?wait=5", headers={"If-None-Match": etag})
+        for timer in timers:
+            timer.join()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "COMPLETED")
+
+    def test_08_rejects_multiple_uvicorn_workers(self):
+        # Cada processo iniciaria seu próprio Scheduler: rejeitado antes de subir o uvicorn
+        with self.assertRaises(ValueError):
+            self.server.run_http_server(workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
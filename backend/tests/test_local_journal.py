@@ -0,0 +1,60 @@
+# backend/tests/test_local_journal.py
+import os
+import tempfile
+import unittest
+from backend.persistence.local_journal import LocalJournal, KIND_TASK, KIND_OUTBOUND
+
+
+class TestLocalJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _open(self, **kwargs):
+        return LocalJournal(self.dir, background_flush=False, **kwargs)
+
+    def test_01_unacked_entries_replayed_after_restart(self):
+        journal = self._open()
+        s1 = journal.append(KIND_TASK, {"task_id": "TASK-1"})
+        journal.append(KIND_OUTBOUND, {"endpoint": "/telemetry/send", "payload": {"n": 1}})
+        journal.ack(s1)
+        journal.close()
+
+        recovered = self._open()
+        pending = recovered.pending()
+        self.assertEqual([e.kind for e in pending], [KIND_OUTBOUND])
+        self.assertEqual(pending[0].data["payload"], {"n": 1})
+        self.assertGreater(recovered.append(KIND_TASK, {"task_id": "TASK-2"}), s1)
+        recovered.close()
+
+    def test_02_torn_tail_is_discarded(self):
+        journal = self._open()
+        journal.append(KIND_TASK, {"task_id": "TASK-1"})
+        journal.append(KIND_TASK, {"task_id": "TASK-2"})
+        segment = journal._segments[-1]
+        # Simula escrita parcial corrompendo o último byte do último registro
+        segment._mmap[segment.offset - 1] ^= 0xFF
+        journal.close()
+
+        recovered = self._open()
+        self.assertEqual([e.data["task_id"] for e in recovered.pending()], ["TASK-1"])
+        self.assertIsNone(recovered.find(KIND_TASK, "task_id", "TASK-2"))
+        recovered.close()
+
+    def test_03_fully_acked_segments_are_compacted(self):
+        journal = self._open(segment_size=256)
+        seqs = [journal.append(KIND_TASK, {"task_id": f"TASK-{i}"}) for i in range(20)]
+        self.assertGreater(len(os.listdir(self.dir)), 1)
+        for seq in seqs:
+            journal.ack(seq)
+        self.assertEqual(len(os.listdir(self.dir)), 1)
+        journal.close()
+        self.assertEqual(self._open().pending(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
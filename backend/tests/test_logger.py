@@ -0,0 +1,130 @@
+# backend/tests/test_logger.py
+import asyncio
+import io
+import json
+import logging
+import queue
+import threading
+import unittest
+from backend.utilities.logger import (OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST, CortexLogger,
+                                      JsonLineFormatter, TaskLogPolicy, _BoundedQueueHandler)
+
+
+class RenderProbe:
+    """Valor de extra_data que registra em qual thread foi renderizado."""
+
+    def __init__(self):
+        self.rendered_by = []
+
+    def __repr__(self):
+        self.rendered_by.append(threading.current_thread().name)
+        return "probe"
+
+
+class TestCortexLoggerTaskContext(unittest.TestCase):
+
+    def _logger(self, name, policy=None):
+        self.out = io.StringIO()
+        return CortexLogger(name=name, stream=self.out, async_writer=False, task_policy=policy or TaskLogPolicy())
+
+    def test_01_task_context_isolated_across_asyncio_tasks(self):
+        logger = self._logger("CORTEX_TEST_CTX")
+
+        async def run_task(task_id):
+            logger.set_task_context(task_id)
+            await asyncio.sleep(0)
+            logger.info("passo")
+            return logger.current_task_id()
+
+        async def main():
+            return await asyncio.gather(run_task("TASK-A"), run_task("TASK-B"))
+
+        self.assertEqual(asyncio.run(main()), ["TASK-A", "TASK-B"])
+        lines = self.out.getvalue().splitlines()
+        self.assertTrue(any("[TASK-A] passo" in line for line in lines))
+        self.assertTrue(any("[TASK-B] passo" in line for line in lines))
+
+    def test_02_failures_flush_debug_successes_are_sampled(self):
+        logger = self._logger("CORTEX_TEST_SAMPLING", TaskLogPolicy(success_sample_rate=0.0, buffer_debug=True))
+
+        logger.set_task_context("TASK-OK")
+        logger.info("info sucesso")
+        logger.debug("debug sucesso")
+        logger.end_task_context(success=True)
+
+        logger.set_task_context("TASK-FAIL")
+        logger.info("info falha")
+        logger.debug("debug falha")
+        logger.error("erro imediato")
+        logger.end_task_context(success=False)
+
+        output = self.out.getvalue()
+        self.assertNotIn("sucesso", output)
+        self.assertIn("info falha", output)
+        self.assertIn("debug falha", output)
+        self.assertLess(output.index("erro imediato"), output.index("info falha"))
+
+
+
+class TestCortexLoggerPipeline(unittest.TestCase):
+
+    def _handler(self, policy):
+        handler = _BoundedQueueHandler(queue.Queue(maxsize=2), policy)
+        for i in range(3):
+            handler.enqueue(logging.makeLogRecord({'msg': f"registro {i}"}))
+        return handler
+
+    def _queued(self, handler):
+        return [handler.queue.get_nowait().msg for _ in range(handler.queue.qsize())]
+
+    def test_01_drop_newest_and_drop_oldest_overflow(self):
+        newest = self._handler(OVERFLOW_DROP_NEWEST)
+        self.assertEqual((self._queued(newest), newest.dropped), (["registro 0", "registro 1"], 1))
+        oldest = self._handler(OVERFLOW_DROP_OLDEST)
+        self.assertEqual((self._queued(oldest), oldest.dropped), (["registro 1", "registro 2"], 1))
+
+    def test_02_block_overflow_waits_for_space_without_loss(self):
+        handler = _BoundedQueueHandler(queue.Queue(maxsize=1), OVERFLOW_BLOCK)
+        handler.enqueue(logging.makeLogRecord({'msg': "registro 0"}))
+        producer = threading.Thread(target=handler.enqueue, args=(logging.makeLogRecord({'msg': "registro 1"}),))
+        producer.start()
+        producer.join(0.1)
+        self.assertTrue(producer.is_alive())
+        self.assertEqual(handler.queue.get().msg, "registro 0")
+        producer.join(5.0)
+        self.assertFalse(producer.is_alive())
+        self.assertEqual((self._queued(handler), handler.dropped), (["registro 1"], 0))
+
+    def test_03_json_line_formatter(self):
+        out = io.StringIO()
+        logger = CortexLogger(name="CORTEX_TEST_JSON", log_format="json", stream=out, async_writer=False,
+                              task_policy=TaskLogPolicy())
+        logger.set_task_context("TASK-J")
+        logger.warning("fila cheia", extra_data={'depth': 3})
+        logger.end_task_context(success=True)
+        logger.logger.error("sem contexto %s", "lazy")
+        first, second = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual((first['level'], first['logger'], first['msg']), ("WARNING", "CORTEX_TEST_JSON", "fila cheia"))
+        self.assertEqual((first['task_id'], first['depth']), ("TASK-J", 3))
+        self.assertEqual(second['msg'], "sem contexto lazy")
+        self.assertNotIn('task_id', second)
+        self.assertIsInstance(JsonLineFormatter().format(logging.makeLogRecord({'msg': "x"})), str)
+
+    def test_04_disabled_levels_are_not_formatted(self):
+        out, probe = io.StringIO(), RenderProbe()
+        logger = CortexLogger(name="CORTEX_TEST_LEVELS", log_level="WARNING", stream=out, async_writer=True,
+                              task_policy=TaskLogPolicy())
+        logger.debug("detalhe", extra_data={'probe': probe})
+        logger.info("detalhe", extra_data={'probe': probe})
+        self.assertEqual(probe.rendered_by, [])
+        # Nível habilitado: renderizado pela thread escritora, não pelo chamador
+        logger.warning("alerta", extra_data={'probe': probe})
+        logger.shutdown()
+        self.assertEqual(len(probe.rendered_by), 1)
+        self.assertNotEqual(probe.rendered_by[0], threading.current_thread().name)
+        self.assertEqual(out.getvalue().count("alerta"), 1)
+        self.assertNotIn("detalhe", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# backend/tests/test_metrics.py
+import threading
+import unittest
+from backend.utilities.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_01_counter_aggregates_thread_shards(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("cortex_test_total", "teste", ["status_code"])
+
+        def work():
+            for _ in range(1000):
+                counter.labels(200).inc()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+        self.assertEqual(counter.labels("200").value, 4000)
+        self.assertIn('cortex_test_total{status_code="200"} 4000', registry.render_prometheus())
+
+    def test_02_histogram_exposition(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("cortex_test_seconds", "teste", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+        text = registry.render_prometheus()
+        self.assertIn('cortex_test_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('cortex_test_seconds_bucket{le="1"} 2', text)
+        self.assertIn('cortex_test_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('cortex_test_seconds_count 3', text)
+        self.assertEqual(histogram.quantile(0.5), 1.0)
+
+    def test_03_finished_thread_shards_are_folded(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("cortex_test_folded_total", "teste")
+        histogram = registry.histogram("cortex_test_folded_seconds", "teste", buckets=(1.0,))
+        for _ in range(20):
+            thread = threading.Thread(target=lambda: (counter.inc(2), histogram.observe(0.5)))
+            thread.start()
+            thread.join()
+        counter.inc()
+        self.assertEqual(counter.value, 41)
+        self.assertIn('cortex_test_folded_seconds_count 20', registry.render_prometheus())
+        # Apenas a cópia da thread viva permanece
+        self.assertEqual(len(counter._cells._shards), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+# backend/tests/test_network_simulator.py
+import unittest
+from backend.utilities.network_simulator import EndpointProfile, NetworkSimulator, OutageModel, ReplayLatency
+from backend.tests.fixtures import FakeClock
+
+
+def _build(clock: FakeClock) -> NetworkSimulator:
+    profiles = {
+        '/data/': EndpointProfile(latency=ReplayLatency([10.0, 20.0, 30.0], sequential=True),
+                                  failure_rate=0.1, outage_group="storage"),
+    }
+    outages = {'storage': OutageModel(mean_interval_s=5.0, mean_duration_s=2.0)}
+    return NetworkSimulator(seed=42, profiles=profiles, outages=outages, clock=clock, sleep=lambda _: None)
+
+
+class TestNetworkSimulator(unittest.TestCase):
+
+    def _draws(self, order):
+        clock = FakeClock()
+        simulator = _build(clock)
+        draws = []
+        for endpoint in order:
+            clock.t += 0.5
+            draws.append((endpoint, simulator.draw(endpoint)))
+        return draws
+
+    def test_01_same_seed_and_clock_reproduce_draws_including_outages(self):
+        order = ["/data/a", "/data/b"] * 60
+        first, second = self._draws(order), self._draws(order)
+        self.assertEqual(first, second)
+        self.assertTrue(any(in_outage for _, (_, _, in_outage) in first))
+        self.assertTrue(any(not in_outage for _, (_, _, in_outage) in first))
+
+    def test_02_replay_cursor_is_per_endpoint(self):
+        # Endpoints que casam o mesmo perfil percorrem as amostras independentemente
+        draws = self._draws(["/data/a", "/data/b", "/data/a", "/data/b", "/data/a"])
+        latencies = lambda name: [draw[0] for endpoint, draw in draws if endpoint == name]
+        self.assertEqual(latencies("/data/a"), [10, 20, 30])
+        self.assertEqual(latencies("/data/b"), [10, 20])
+
+
+if __name__ == '__main__':
+    unittest.main()
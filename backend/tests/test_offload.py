@@ -0,0 +1,200 @@
+# backend/tests/test_offload.py
+import asyncio
+import multiprocessing
+import queue
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from backend.core.dataclasses import GlobalContext, Task, TaskStatus
+from backend.core.offload import OffloadForwarder, OffloadReceiver, HttpOffloadTransport, pack_batch, unpack_batch
+from backend.persistence.local_journal import LocalJournal, KIND_OFFLOAD
+
+
+def _serve_offload(port: int):
+    """Processo SERVER: receptor de offload que conclui cada Task recebida em um executor próprio."""
+    submitted = queue.Queue()
+    receiver = OffloadReceiver(submitted.put)
+
+    def execute():
+        while True:
+            data = submitted.get()
+            receiver.task_finished(SimpleNamespace(
+                task_id=data['task_id'], status="COMPLETED", delegated_to=data['required_agent'],
+                final_result=f"SERVER:{data['description']}", trace_history=[{'agent_name': data['required_agent']}]))
+
+    threading.Thread(target=execute, daemon=True).start()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            reply = receiver.handle(self.path, self.rfile.read(int(self.headers['Content-Length'])))
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _edge_task(i: int):
+    context = SimpleNamespace(session_id="S", cortex_mode="EDGE", initial_prompt=f"p{i}", environment_vars={})
+    return SimpleNamespace(task_id=f"TASK-{i}", description=f"relatorio {i}", context=context,
+                           priority=SimpleNamespace(name="HIGH"))
+
+
+class TestOffload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_01_store_and_forward_across_two_processes(self):
+        port = _free_port()
+        journal = LocalJournal(self.tmp.name, background_flush=False)
+        results = queue.Queue()
+        forwarder = OffloadForwarder(HttpOffloadTransport(f"http://127.0.0.1:{port}", timeout_s=2.0), journal,
+                                     origin="edge-1", linger_s=0.01, poll_wait_s=1.0, max_backoff_s=0.2)
+
+        def on_result(task, data, result):
+            results.put((task, data, result))
+            forwarder.ack(result['task_id'])
+
+        forwarder.on_result = on_result
+        forwarder.start()
+        server = None
+        try:
+            # Uplink indisponível: Tasks retidas no journal local
+            for i in range(5):
+                forwarder.submit(_edge_task(i), "Engenheiro_Agente")
+            time.sleep(0.5)
+            self.assertFalse(forwarder.uplink_up)
+            self.assertEqual(forwarder.backlog(), 5)
+
+            server = multiprocessing.get_context("spawn").Process(target=_serve_offload, args=(port,), daemon=True)
+            server.start()
+            received = [results.get(timeout=30) for _ in range(5)]
+        finally:
+            forwarder.stop()
+            if server is not None:
+                server.terminate()
+                server.join()
+
+        self.assertTrue(forwarder.uplink_up)
+        by_id = {result['task_id']: (task, data, result) for task, data, result in received}
+        self.assertEqual(sorted(by_id), [f"TASK-{i}" for i in range(5)])
+        task, data, result = by_id["TASK-3"]
+        self.assertEqual(task.description, "relatorio 3")
+        self.assertEqual(data['required_agent'], "Engenheiro_Agente")
+        self.assertEqual(result['final_result'], "SERVER:relatorio 3")
+        self.assertEqual(forwarder.backlog(), 0)
+        journal.close()
+        self.assertEqual(LocalJournal(self.tmp.name, background_flush=False).pending(KIND_OFFLOAD), [])
+
+    def test_02_receiver_deduplicates_and_holds_results_until_ack(self):
+        submitted = []
+        receiver = OffloadReceiver(submitted.append)
+        payload = {'task_id': "TASK-1", 'description': "x"}
+        self.assertEqual(receiver.accept_batch("edge-1", [payload])['accepted'], ["TASK-1"])
+        self.assertEqual(receiver.accept_batch("edge-1", [payload])['duplicates'], 1)
+        self.assertEqual(len(submitted), 1)
+
+        receiver.task_finished(SimpleNamespace(task_id="TASK-1", status="FAILED", delegated_to=None,
+                                               final_result="erro", trace_history=[]))
+        request = pack_batch({'origin': "edge-1", 'outstanding': ["TASK-1", "TASK-9"], 'ack': [], 'wait': 0.0})
+        reply = unpack_batch(receiver.handle("/offload/results", request))
+        self.assertEqual([r['status'] for r in reply['results']], ["FAILED"])
+        self.assertEqual(reply['unknown'], ["TASK-9"])  # Desconhecida: o EDGE deve reenviá-la
+
+        # Resultado retido até a confirmação; depois dela, a Task é desconhecida
+        self.assertEqual(len(receiver.collect_results("edge-1", ["TASK-1"], [], 0.0)['results']), 1)
+        reply = receiver.collect_results("edge-1", ["TASK-1"], ["TASK-1"], 0.0)
+        self.assertEqual((reply['results'], reply['unknown']), ([], ["TASK-1"]))
+
+    def test_03_async_long_poll_waits_without_holding_executor_threads(self):
+        receiver = OffloadReceiver(lambda data: None)
+        receiver.accept_batch("edge-1", [{'task_id': "TASK-1"}])
+        receiver.accept_batch("edge-2", [{'task_id': "TASK-2"}])
+        calls = []
+
+        async def run_blocking(func, *args):
+            calls.append(func.__name__)
+            return func(*args)  # Executor síncrono: qualquer espera bloqueante travaria o event loop
+
+        async def scenario():
+            request = pack_batch({'origin': "edge-1", 'outstanding': ["TASK-1", "TASK-2"], 'ack': [], 'wait': 5.0})
+            finisher = threading.Timer(0.1, receiver.task_finished, (SimpleNamespace(
+                task_id="TASK-1", status="COMPLETED", delegated_to=None, final_result="ok", trace_history=[]),))
+            start = time.monotonic()
+            finisher.start()
+            reply = unpack_batch(await receiver.handle_async("/offload/results", request, run_blocking))
+            finisher.join()
+            return reply, time.monotonic() - start
+
+        reply, elapsed = asyncio.run(scenario())
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual([r['task_id'] for r in reply['results']], ["TASK-1"])
+        self.assertEqual(reply['unknown'], ["TASK-2"])  # Em execução, mas para outra origem
+        self.assertEqual(calls, ["unpack_batch", "collect_results", "collect_results", "pack_batch"])
+        self.assertEqual(receiver._waiters, {})
+
+    def test_04_forwarder_index_survives_restart(self):
+        journal = LocalJournal(self.tmp.name, background_flush=False)
+        forwarder = OffloadForwarder(None, journal, origin="edge-1", batch_size=2)
+        seqs = [forwarder.submit(_edge_task(i), "Engenheiro_Agente") for i in range(3)]
+        self.assertEqual(forwarder.submit(_edge_task(1), "Engenheiro_Agente"), seqs[1])  # Idempotente
+        self.assertEqual(forwarder.backlog(), 3)
+        self.assertEqual([e.seq for e in forwarder._unsent()], seqs[:2])
+        forwarder.ack("TASK-0")
+        self.assertEqual(forwarder.backlog(), 2)
+        journal.close()
+
+        journal = LocalJournal(self.tmp.name, background_flush=False)
+        restarted = OffloadForwarder(None, journal, origin="edge-1", batch_size=2)
+        self.assertEqual([e.data['task_id'] for e in restarted._unsent()], ["TASK-1", "TASK-2"])
+        self.assertFalse(restarted.is_offloaded("TASK-1"))  # Submetida por outro processo
+        restarted.ack("TASK-1")
+        restarted.ack("TASK-2")
+        self.assertEqual((restarted.backlog(), journal.pending(KIND_OFFLOAD)), (0, []))
+        journal.close()
+
+    def test_05_receiver_deduplicates_against_repository_after_restart(self):
+        persisted = {}
+        for task_id, status in (("TASK-1", TaskStatus.COMPLETED), ("TASK-2", TaskStatus.IN_PROGRESS)):
+            task = Task(task_id=task_id, description="x", context=GlobalContext(session_id="S"))
+            task.update_status(status, "Engenheiro_Agente", "ciclo anterior ao reinício", result={'output_data': "ok"})
+            task.final_result = "ok" if status == TaskStatus.COMPLETED else None
+            persisted[task_id] = task
+        submitted = []
+        # Receptor recém-iniciado: sem estado em memória das Tasks já recebidas
+        receiver = OffloadReceiver(submitted.append, load_task=persisted.get)
+        reply = receiver.accept_batch("edge-1", [{'task_id': f"TASK-{i}", 'description': "x"} for i in (1, 2, 3)])
+        self.assertEqual((reply['accepted'], reply['duplicates']), (["TASK-1", "TASK-2", "TASK-3"], 2))
+        self.assertEqual([data['task_id'] for data in submitted], ["TASK-3"])
+
+        # Concluída: resultado montado a partir do estado persistido
+        reply = receiver.collect_results("edge-1", ["TASK-1", "TASK-2", "TASK-3"], [], 0.0)
+        self.assertEqual([(r['task_id'], r['status'], r['final_result']) for r in reply['results']],
+                         [("TASK-1", "COMPLETED", "ok")])
+        self.assertEqual(reply['unknown'], [])
+        # Em andamento (retomada pela recuperação do Scheduler): entregue na conclusão
+        persisted["TASK-2"].update_status(TaskStatus.COMPLETED, "Engenheiro_Agente", "ok")
+        receiver.task_finished(persisted["TASK-2"])
+        reply = receiver.collect_results("edge-1", ["TASK-2"], ["TASK-1"], 0.0)
+        self.assertEqual([r['task_id'] for r in reply['results']], ["TASK-2"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# backend/tests/test_profiler.py
+import os
+import signal
+import tempfile
+import threading
+import time
+import unittest
+from backend.utilities.profiler import SamplingProfiler, AgentTimer, agent_time_snapshot
+
+
+def _busy_agent_work(stop: threading.Event):
+    with AgentTimer("Test_Profiler_Agent"):
+        while not stop.is_set():
+            sum(range(1000))
+
+
+class TestSamplingProfiler(unittest.TestCase):
+
+    def test_01_collapsed_stacks_and_agent_split(self):
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = SamplingProfiler(output_dir=directory, interval_ms=2)
+            stop = threading.Event()
+            worker = threading.Thread(target=_busy_agent_work, args=(stop,), name="CERNEScheduler-Test")
+            worker.start()
+
+            output = profiler.start(0.3)
+            self.assertIsNone(profiler.start(0.3))  # Uma sessão por vez
+            while profiler.is_running:
+                time.sleep(0.05)
+            stop.set()
+            worker.join()
+
+            with open(output, encoding="utf-8") as fh:
+                lines = fh.read().splitlines()
+            self.assertTrue(lines)
+            self.assertTrue(all(line.startswith("CERNEScheduler-Test;") for line in lines))
+            self.assertTrue(any("_busy_agent_work" in line for line in lines))
+            self.assertTrue(os.path.exists(output + ".agents.tsv"))
+
+        cpu, wall = agent_time_snapshot()["Test_Profiler_Agent"]
+        self.assertGreater(wall, 0.2)
+        self.assertGreater(cpu, 0.0)
+
+    @unittest.skipUnless(hasattr(signal, "SIGUSR1"), "SIGUSR1 indisponível nesta plataforma")
+    def test_02_signal_while_session_lock_is_held(self):
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = SamplingProfiler(output_dir=directory, interval_ms=2)
+            previous = signal.getsignal(signal.SIGUSR1)
+            self.addCleanup(signal.signal, signal.SIGUSR1, previous)
+            self.assertTrue(profiler.install_signal_handler(signal.SIGUSR1, seconds=0.1))
+
+            # O handler executa nesta thread, que ainda detém o lock da sessão
+            with profiler._session_lock:
+                os.kill(os.getpid(), signal.SIGUSR1)
+                time.sleep(0.05)
+            deadline = time.monotonic() + 5.0
+            while profiler.last_output is None and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertIsNotNone(profiler.last_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# backend/tests/test_queue_spill.py
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from backend.core.dataclasses import TaskPriority
+from backend.core.scheduler import TaskQueue
+from backend.persistence.queue_spill import SpillFile, SpillRun
+
+
+class LockCheckingSpillFile(SpillFile):
+    """Registra se cada gravação/leitura acontece com o lock da TaskQueue em posse da thread."""
+
+    def __init__(self, queue, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queue = queue
+        self.io_under_lock = []
+
+    def append(self, record):
+        self.io_under_lock.append(self.queue._cond._is_owned())
+        return super().append(record)
+
+    def read(self, max_records):
+        self.io_under_lock.append(self.queue._cond._is_owned())
+        return super().read(max_records)
+
+
+class TestQueueSpill(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_01_fifo_across_segments_interleaving_reads_and_writes(self):
+        spill = SpillFile(self.dir, "p3", segment_bytes=256)
+        for i in range(50):
+            spill.append({'i': i, 'body': "x" * 20})
+        self.assertGreater(len(os.listdir(self.dir)), 1)
+
+        received = [r['i'] for r in spill.read(30)]
+        for i in range(50, 80):
+            spill.append({'i': i, 'body': "x" * 20})
+        received += [r['i'] for r in spill.read(1000)]
+        self.assertEqual(received, list(range(80)))
+        self.assertEqual((len(spill), spill.bytes_on_disk), (0, 0))
+        # Segmentos consumidos são removidos; a fila vazia recomeça em um segmento novo
+        self.assertEqual(os.listdir(self.dir), [])
+        spill.append({'i': 80})
+        self.assertEqual(spill.read(10), [{'i': 80}])
+        spill.close()
+
+    def test_02_run_keeps_head_in_memory_and_rejects_out_of_order_keys(self):
+        run = SpillRun(SpillFile(self.dir, "p2"), prefetch=4)
+        for seq in range(10):
+            self.assertTrue(run.accepts((-2, 100.0 + seq, seq)))
+            run.push((-2, 100.0 + seq, seq), (-2, 100.0 + seq, seq, 0.0, f"TASK-{seq}"))
+        self.assertFalse(run.accepts((-2, 99.0, 10)))  # Retry com tempo de criação antigo: fica no heap
+        # Gravação adiada para o flush (fora do lock do dono)
+        self.assertEqual((len(run.buffer), run.spilled, len(run.spill)), (1, 9, 0))
+        run.flush()
+        self.assertEqual(len(run.spill), 9)
+
+        popped = [run.pop()[4]]
+        self.assertTrue(run.blocked)
+        self.assertTrue(run.request_refill())
+        self.assertFalse(run.request_refill())  # Já em andamento
+        run.refilled(run.read_batch())
+        self.assertEqual((len(run.buffer), len(run.spill)), (4, 5))  # Lote pré-carregado
+        while len(run):
+            self.assertLessEqual(len(run.buffer), 4)
+            popped.append(run.pop()[4])
+            if run.request_refill():
+                run.refilled(run.read_batch())
+        self.assertEqual(popped, [f"TASK-{i}" for i in range(10)])
+        self.assertIsNone(run.head())
+        self.assertTrue(run.accepts((-2, 0.0, 11)))
+        run.close()
+
+    def test_03_task_queue_spills_above_watermark_and_drains_in_order(self):
+        queue = TaskQueue(memory_watermark=5, prefetch=4, spill_dir=self.dir)
+        priorities = list(TaskPriority)
+        tasks = [SimpleNamespace(task_id=f"TASK-{i:02d}", priority=priorities[i % 4], creation_time=100.0 + i)
+                 for i in range(50)]
+        tasks.append(SimpleNamespace(task_id="RETRY", priority=TaskPriority.MEDIUM, creation_time=1.0))
+        for task in tasks:
+            queue.enqueue(task)
+        self.assertEqual(queue.qsize(), 51)
+        self.assertLessEqual(queue.resident_size(), 5 + 4 + 1)  # Heap + cabeça de cada fila de spill
+        self.assertGreater(queue.spill_bytes(), 0)
+        spill_dirs = os.listdir(self.dir)
+        self.assertEqual(len(spill_dirs), 1)
+
+        drained = []
+        while not queue.is_empty():
+            task = queue.dequeue()
+            drained.append(task.task_id)
+            queue.task_done(task)
+            self.assertLessEqual(queue.resident_size(), 5 + 4 * 4)
+        expected = sorted(tasks, key=lambda t: (-t.priority.value, t.creation_time))
+        self.assertEqual(drained, [t.task_id for t in expected])
+
+        queue.enqueue(tasks[0])
+        queue.close()
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_04_spill_io_runs_outside_the_queue_lock(self):
+        queue = TaskQueue(memory_watermark=2, prefetch=4, spill_dir=self.dir)
+        self.addCleanup(queue.close)
+        files = []
+
+        def make_run(name):
+            files.append(LockCheckingSpillFile(queue, self.dir, name))
+            return SpillRun(files[-1], queue._prefetch)
+
+        queue._flows._make_run = make_run
+        for i in range(20):
+            queue.enqueue(SimpleNamespace(task_id=f"TASK-{i:02d}", priority=TaskPriority.HIGH, creation_time=100.0 + i))
+        drained = [queue.dequeue().task_id for _ in range(20)]
+        self.assertEqual(drained, [f"TASK-{i:02d}" for i in range(20)])
+        self.assertEqual(len(files), 1)
+        self.assertGreater(len(files[0].io_under_lock), 17)
+        self.assertFalse(any(files[0].io_under_lock))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# backend/tests/test_rate_limiter.py
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from backend.utilities.rate_limiter import RateLimit, RateLimiter
+from backend.tests.fixtures import FakeClock
+
+
+def _hammer(state_path, deadline, results):
+    limiter = RateLimiter({'/data/': RateLimit(rate=20.0, burst=5.0)}, state_path=state_path)
+    granted = 0
+    while time.monotonic() < deadline:
+        if limiter.acquire("/data/search_index", timeout=0.05):
+            granted += 1
+    results.put(granted)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock(1000.0)
+        self.limiter = RateLimiter({'/data/': RateLimit(rate=2.0, burst=3.0),
+                                    '/data/search_index': RateLimit(rate=1.0, burst=1.0)},
+                                   clock=self.clock, sleep=self.clock.sleep)
+
+    def test_01_burst_then_paced_by_longest_prefix(self):
+        self.assertEqual(self.limiter.bucket_for("/data/search_index"), "/data/search_index")
+        self.assertEqual(self.limiter.bucket_for("/data/simple_echo"), "/data/")
+        self.assertIsNone(self.limiter.bucket_for("/system/deploy_patch"))
+
+        waits = [self.limiter.reserve("/data/simple_echo") for _ in range(5)]
+        self.assertEqual(waits, [0.0, 0.0, 0.0, 0.5, 1.0])  # Rajada de 3, depois 2/s em ordem de chegada
+        self.assertIsNone(self.limiter.reserve("/data/simple_echo", max_wait=1.0))
+        self.assertEqual(self.limiter.reserve("/system/deploy_patch"), 0.0)
+
+        start = self.clock.t
+        for _ in range(4):
+            self.assertTrue(self.limiter.acquire("/data/search_index"))
+        self.assertAlmostEqual(self.clock.t - start, 3.0)
+        self.assertTrue(asyncio.run(self.limiter.acquire_async("/data/search_index", timeout=0.0)) is False)
+
+    def test_02_all_or_nothing_and_prepaid_credit(self):
+        endpoints = ["/data/simple_echo", "/data/search_index"]
+        self.assertEqual(self.limiter.try_acquire_all(endpoints), (0.0, None))
+        wait, blocked = self.limiter.try_acquire_all(endpoints)
+        self.assertEqual(blocked, "/data/search_index")
+        self.assertAlmostEqual(wait, 1.0)
+        self.assertAlmostEqual(self.limiter.delay("/data/simple_echo"), 0.0)
+        self.assertEqual(self.limiter.reserve("/data/simple_echo"), 0.0)  # O token de /data/ foi devolvido
+        self.assertEqual(self.limiter.reserve("/data/simple_echo"), 0.0)
+
+        self.clock.t += 1.0
+        self.assertEqual(self.limiter.try_acquire_all(["/data/search_index"]), (0.0, None))
+        with self.limiter.prepaid(["/data/search_index", "/data/simple_echo"]) as credit:
+            self.assertEqual(self.limiter.reserve("/data/search_index"), 0.0)  # Usa o crédito
+            self.assertEqual(credit, {'/data/search_index': 0.0, '/data/': 1.0})
+        # Crédito não usado de /data/ voltou ao bucket
+        self.assertEqual(self.limiter.reserve("/data/simple_echo"), 0.0)
+
+    def test_03_quota_is_shared_across_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            state_path = os.path.join(tmp, "ratelimit")
+            ctx = multiprocessing.get_context("spawn")
+            results = ctx.Queue()
+            duration, start = 1.0, time.monotonic() + 1.0
+            procs = [ctx.Process(target=_hammer, args=(state_path, start + duration, results)) for _ in range(3)]
+            for proc in procs:
+                proc.start()
+            granted = sum(results.get(timeout=30) for _ in procs)
+            for proc in procs:
+                proc.join(timeout=10)
+            # Os processos partem em instantes diferentes: o limite vale desde o primeiro token
+            elapsed = time.monotonic() - (start - 1.0)
+            self.assertLessEqual(granted, 20.0 * elapsed + 5)
+            self.assertGreaterEqual(granted, 20.0 * duration)
+
+
+if __name__ == '__main__':
+    unittest.main()
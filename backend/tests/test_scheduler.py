@@ -0,0 +1,200 @@
+# backend/tests/test_scheduler.py
+import os
+import tempfile
+import time
+import unittest
+from backend.core.dataclasses import GlobalContext, Task, TaskPriority, TaskStatus
+from backend.core.retry_policy import MAX_RETRIES
+from backend.core.scheduler import CERNEScheduler
+from backend.persistence.db_models import TASK_COLUMNS, TaskDBModel
+from backend.persistence.local_journal import LocalJournal, KIND_TASK
+from backend.persistence.task_leases import SQLiteLeaseStore
+from backend.persistence.task_repository import RESUMABLE_STATUSES, task_from_row
+from backend.utilities.clock import VirtualClock
+from backend.utilities.rate_limiter import RateLimiter
+
+
+class InMemoryTaskRepository:
+    """Repositório em memória com as mesmas linhas (TaskDBModel) e conversões do TaskRepository."""
+
+    def __init__(self):
+        self.rows = {}
+        self.saves = []
+
+    def save(self, task):
+        self.rows[task.task_id] = TaskDBModel.from_core(task)
+        self.saves.append((task.task_id, task.status.value))
+
+    def append_traces(self, task):
+        return 0
+
+    def load_task(self, task_id):
+        return self.rows.get(task_id)
+
+    def find_pending_tasks(self):
+        pending = [row for row in self.rows.values() if row.status in RESUMABLE_STATUSES]
+        pending.sort(key=lambda row: (-row.priority, row.creation_time))
+        return [task_from_row(row) for row in pending]
+
+
+class CompletingCerne:
+    """Conclui cada Task em um único ciclo e registra a ordem de processamento."""
+
+    def __init__(self):
+        self.processed = []
+
+    def endpoints_for(self, task):
+        return ()
+
+    def processar_tarefa(self, task):
+        self.processed.append(task.task_id)
+        task.update_status(TaskStatus.COMPLETED, "FakeAgent", "ok", result={'output_data': task.description})
+        return task
+
+
+def _task(task_id: str, status: TaskStatus, priority: TaskPriority = TaskPriority.MEDIUM) -> Task:
+    task = Task(task_id=task_id, description=f"descrição {task_id}", context=GlobalContext(session_id="s-1"),
+                priority=priority, required_agent="WorkerSimples", status=status)
+    task.update_status(status, "CERNE", "estado inicial")
+    return task
+
+
+class TestSchedulerWithRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = InMemoryTaskRepository()
+        self.cerne = CompletingCerne()
+        self.scheduler = CERNEScheduler(self.cerne, self.repo, rate_limiter=RateLimiter({}), workers=1)
+
+    def _run_until(self, condition, timeout: float = 5.0):
+        self.scheduler.start()
+        self.addCleanup(self.scheduler.stop)
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_01_recovers_resumable_tasks_and_persists_the_result(self):
+        for task in (_task("low", TaskStatus.PENDING, TaskPriority.LOW), _task("retry", TaskStatus.RETRY),
+                     _task("done", TaskStatus.COMPLETED), _task("high", TaskStatus.PENDING, TaskPriority.HIGH)):
+            self.repo.save(task)
+
+        self._run_until(lambda: len(self.cerne.processed) == 3)
+        self.assertEqual(self.cerne.processed, ["high", "retry", "low"])
+        restored = task_from_row(self.repo.load_task("retry"))
+        self.assertEqual((restored.status, restored.context.session_id), (TaskStatus.COMPLETED, "s-1"))
+        # Histórico preservado na ida e volta pelo modelo de persistência
+        self.assertEqual([t.agent_name for t in restored.trace_history], ["CERNE", "FakeAgent"])
+
+    def test_02_submitted_task_is_saved_before_processing(self):
+        self._run_until(lambda: self.scheduler.is_alive())
+        task = self.scheduler.submit_task("Resumir", GlobalContext(session_id="s-2"), TaskPriority.HIGH, "WorkerSimples")
+        deadline = time.monotonic() + 5.0
+        while self.repo.rows[task.task_id].status != "COMPLETED" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([s for t, s in self.repo.saves if t == task.task_id], ["PENDING", "COMPLETED"])
+        self.assertEqual(task_from_row(self.repo.load_task(task.task_id)).priority, TaskPriority.HIGH)
+
+    def test_03_save_failure_with_journal_accepts_and_reconciles(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        journal = LocalJournal(tmp.name, background_flush=False)
+        self.addCleanup(journal.close)
+        self.scheduler = CERNEScheduler(self.cerne, self.repo, journal=journal, rate_limiter=RateLimiter({}))
+        original_save = self.repo.save
+
+        def failing_save(task):
+            self.repo.save = original_save  # Banco indisponível apenas na submissão
+            raise ConnectionError("MySQL indisponível")
+
+        self.repo.save = failing_save
+        self.cerne.processar_tarefa = self._checking_journal(self.cerne.processar_tarefa, journal)
+        self._run_until(lambda: self.scheduler.is_alive())
+        task = self.scheduler.submit_task("Resumir", GlobalContext(session_id="s-3"), TaskPriority.MEDIUM, "WorkerSimples")
+
+        deadline = time.monotonic() + 5.0
+        # A confirmação do journal acontece logo após o save do ciclo
+        while (task.task_id not in self.repo.rows or journal.pending(KIND_TASK)) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Aceita sem a linha no Repositório (entrada do journal pendente) e reconciliada pelo save do ciclo
+        self.assertEqual(self.journal_during_cycle, [task.task_id])
+        self.assertEqual(self.repo.rows[task.task_id].status, "COMPLETED")
+        self.assertEqual(self.cerne.processed, [task.task_id])
+        self.assertEqual(journal.pending(KIND_TASK), [])
+
+    def _checking_journal(self, process, journal):
+        def wrapper(task):
+            self.journal_during_cycle = [e.data['task_id'] for e in journal.pending(KIND_TASK)]
+            self.assertNotIn(task.task_id, self.repo.rows)
+            return process(task)
+        return wrapper
+
+    def test_04_save_failure_without_journal_is_raised(self):
+        def failing_save(task):
+            raise ConnectionError("MySQL indisponível")
+
+        self.repo.save = failing_save
+        with self.assertRaises(ConnectionError):
+            self.scheduler.submit_task("Resumir", GlobalContext(session_id="s-4"), TaskPriority.MEDIUM)
+        self.assertEqual(self.scheduler._task_queue.qsize(), 0)
+
+    def test_05_virtual_clock_is_rejected_by_threaded_scheduler(self):
+        scheduler = CERNEScheduler(self.cerne, self.repo, clock=VirtualClock(), rate_limiter=RateLimiter({}))
+        with self.assertRaises(ValueError):
+            scheduler.start()
+        self.assertFalse(scheduler.is_alive())
+
+
+class RaisingCerne(CompletingCerne):
+    """Ciclo interrompido por exceção (antes de o Scheduler persistir e liquidar o lease)."""
+
+    def processar_tarefa(self, task):
+        self.processed.append(task.task_id)
+        raise RuntimeError("agente indisponível")
+
+
+class TestSchedulerLeaseRelease(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = SQLiteLeaseStore(os.path.join(tmp.name, "cortex.db"), lease_s=30.0)
+        self.repo = InMemoryTaskRepository()
+        self.cerne = RaisingCerne()
+        row = TaskDBModel.from_core(_task("T1", TaskStatus.PENDING))
+        self.store._conn().raw.execute(
+            f"INSERT INTO Tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' * len(TASK_COLUMNS))})",
+            tuple(getattr(row, c) for c in TASK_COLUMNS))
+
+    def _lease(self):
+        return self.store._conn().raw.execute(
+            "SELECT node_id, lease_expires_at, next_attempt_at, retries FROM TaskLeases WHERE task_id = 'T1'").fetchone()
+
+    def _run_until(self, condition, timeout: float = 5.0):
+        scheduler = CERNEScheduler(self.cerne, self.repo, lease_store=self.store, rate_limiter=RateLimiter({}), workers=1)
+        scheduler.start()
+        self.addCleanup(scheduler.stop)
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_01_failed_cycle_releases_the_lease_with_backoff(self):
+        self._run_until(lambda: self.store.retries("T1") == 1)
+        node_id, expires_at, next_attempt_at, _ = self._lease()
+        # Sem dono (o heartbeat não o renova) e reivindicável apenas após o backoff da 1ª retentativa
+        self.assertEqual((node_id, expires_at), ("", 0))
+        self.assertGreater(next_attempt_at, time.time() + 4)
+        self.assertEqual(self.cerne.processed, ["T1"])
+
+    def test_02_exhausted_retries_are_persisted_as_failed(self):
+        self.store._conn().raw.execute(
+            "INSERT INTO TaskLeases (task_id, node_id, lease_expires_at, retries) VALUES ('T1', '', 0, ?)",
+            (MAX_RETRIES,))
+        self._run_until(lambda: "T1" in self.repo.rows)
+        self.assertEqual(self.repo.rows["T1"].status, "FAILED")
+        self.assertIsNone(self._lease())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# backend/tests/test_scheduler_rate_limit.py
+import unittest
+from types import SimpleNamespace
+from backend.core.dataclasses import TaskPriority
+from backend.core.scheduler import CERNEScheduler
+from backend.utilities.metrics import QUEUE_WAIT_SECONDS
+from backend.utilities.rate_limiter import RateLimit, RateLimiter
+from backend.tests.fixtures import FakeClock
+
+
+class FakeCerne:
+    """Todas as Tasks chamam o mesmo endpoint limitado."""
+
+    def endpoints_for(self, task):
+        return ["/data/search_index"]
+
+
+def _task(task_id: str, priority: TaskPriority, created: float):
+    return SimpleNamespace(task_id=task_id, priority=priority, creation_time=created, status="PENDING")
+
+
+def _wait_sum(priority: TaskPriority) -> float:
+    return QUEUE_WAIT_SECONDS.labels(priority.name).snapshot()[1]
+
+
+class TestSchedulerRateLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock(100.0)
+        self.limiter = RateLimiter({'/data/': RateLimit(rate=1.0, burst=1.0)}, clock=self.clock.now)
+        self.scheduler = CERNEScheduler(FakeCerne(), SimpleNamespace(), clock=self.clock,
+                                        rate_limiter=self.limiter, prepaid_hold_s=2.0)
+        self.processed = []
+        # O ciclo do CERNE e a persistência não fazem parte deste teste: a Task apenas chama o endpoint
+        self.scheduler._process_task = self._call_endpoint
+
+    def _call_endpoint(self, task):
+        self.assertEqual(self.limiter.reserve("/data/search_index"), 0.0)  # Usa o token do despacho
+        self.processed.append(task.task_id)
+
+    def _tokens(self) -> float:
+        return 1.0 - self.limiter.delay("/data/search_index")
+
+    def test_01_throttled_tasks_are_deferred_and_released_by_priority(self):
+        for task in (_task("low", TaskPriority.LOW, 1.0), _task("high", TaskPriority.HIGH, 2.0),
+                     _task("medium", TaskPriority.MEDIUM, 3.0)):
+            self.scheduler._task_queue.enqueue(task)
+        for _ in range(3):
+            self.assertTrue(self.scheduler._dispatch_next("w"))
+        self.assertFalse(self.scheduler._dispatch_next("w"))
+        # Um token: 'high' despachada, as demais adiadas sem ocupar a fila pronta
+        self.assertEqual(self.processed, ["high"])
+        self.assertEqual((self.scheduler.deferred_count(), self.scheduler.queue_depth()), (2, 0))
+
+        # Com um novo token, a de maior prioridade volta à fila já com o token adquirido
+        self.clock.t += 1.0
+        self.assertAlmostEqual(self.scheduler._release_deferred(), 0.1)
+        self.assertEqual((self.scheduler.deferred_count(), self.scheduler.queue_depth()), (1, 1))
+        self.assertAlmostEqual(self._tokens(), 0.0)
+        before = _wait_sum(TaskPriority.MEDIUM)
+        self.clock.t += 0.5
+        self.assertTrue(self.scheduler._dispatch_next("w"))
+        self.assertEqual(self.processed, ["high", "medium"])
+        # A espera em fila conta desde o enfileiramento original (inclui o tempo adiado)
+        self.assertAlmostEqual(_wait_sum(TaskPriority.MEDIUM) - before, 1.5)
+
+    def test_02_prepaid_tokens_are_refunded_after_hold_and_on_stop(self):
+        self.scheduler._task_queue.enqueue(_task("first", TaskPriority.HIGH, 1.0))
+        self.scheduler._task_queue.enqueue(_task("second", TaskPriority.HIGH, 2.0))
+        self.scheduler._dispatch_next("w")
+        self.scheduler._dispatch_next("w")
+        self.clock.t += 1.0
+        self.scheduler._release_deferred()
+        self.assertAlmostEqual(self._tokens(), 0.0)
+
+        # Liberada e sem worker por mais de prepaid_hold_s: o token volta ao bucket
+        self.clock.t += 2.0
+        self.scheduler._release_deferred()
+        self.assertEqual(self.scheduler._prepaid_tasks, {})
+        self.assertAlmostEqual(self._tokens(), 1.0)
+        self.assertTrue(self.scheduler._dispatch_next("w"))  # Adquire o token de novo no despacho
+        self.assertEqual(self.processed, ["first", "second"])
+        self.assertAlmostEqual(self._tokens(), 0.0)
+
+        self.scheduler._task_queue.enqueue(_task("third", TaskPriority.HIGH, 3.0))
+        self.scheduler._dispatch_next("w")
+        self.clock.t += 1.0
+        self.scheduler._release_deferred()
+        self.assertIn("third", self.scheduler._prepaid_tasks)
+        self.scheduler.stop()
+        self.assertEqual(self.scheduler._prepaid_tasks, {})
+        self.assertAlmostEqual(self._tokens(), 1.0)
+
+    def test_03_deferred_set_is_capped_and_backlog_stays_queued(self):
+        scheduler = CERNEScheduler(FakeCerne(), SimpleNamespace(), clock=self.clock,
+                                   rate_limiter=self.limiter, max_deferred=2)
+        scheduler._process_task = self._call_endpoint
+        for i in range(6):
+            scheduler._task_queue.enqueue(_task(f"t{i}", TaskPriority.MEDIUM, float(i)))
+        while scheduler._dispatch_next("w"):
+            pass
+        # Um despachado, dois adiados; o restante continua na TaskQueue (spill e fair share)
+        self.assertEqual(self.processed, ["t0"])
+        self.assertEqual((scheduler.deferred_count(), scheduler._task_queue.qsize()), (2, 3))
+
+        # Uma liberação abre espaço: os workers voltam a retirar Tasks da fila
+        self.clock.t += 1.0
+        scheduler._release_deferred()
+        self.assertEqual(scheduler.deferred_count(), 1)
+        self.assertTrue(scheduler._dispatch_next("w"))
+        self.assertEqual(self.processed, ["t0", "t1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
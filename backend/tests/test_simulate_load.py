@@ -0,0 +1,35 @@
+# backend/tests/test_simulate_load.py
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from backend.benchmarks import simulate_load
+
+
+class TestSimulateLoad(unittest.TestCase):
+
+    def _run(self, tmp: str, name: str) -> dict:
+        output = os.path.join(tmp, name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            code = simulate_load.main(["--duration", "30", "--rate", "20", "--workers", "2", "--seed", "7",
+                                       "--timeout", "0.2", "--sample-interval", "1", "--output", output])
+        self.assertEqual(code, 0)
+        with open(output, "r", encoding="utf-8") as fh:
+            report = json.load(fh)
+        for key in ("wall_s", "speedup"):  # Únicas medidas de tempo real
+            report.pop(key)
+        return report
+
+    def test_01_same_seed_reproduces_identical_runs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first, second = self._run(tmp, "a.json"), self._run(tmp, "b.json")
+        self.assertEqual(first, second)
+        self.assertGreater(first["tasks"]["submitted"], 400)
+        self.assertGreater(first["tasks"]["completed"], 0)
+        self.assertGreaterEqual(first["simulated_s"], 30.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
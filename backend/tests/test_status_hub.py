@@ -0,0 +1,68 @@
+# backend/tests/test_status_hub.py
+import asyncio
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from backend.core.status_hub import StatusHub
+
+
+def _task(status: str, final_result=None):
+    return SimpleNamespace(task_id="TASK-1", status=SimpleNamespace(value=status), final_result=final_result)
+
+
+class TestStatusHub(unittest.TestCase):
+
+    def setUp(self):
+        self.hub = StatusHub(max_buffer=3)
+
+    def test_01_slow_subscriber_is_dropped_without_blocking_the_publisher(self):
+        slow = self.hub.subscribe("TASK-1")
+        fast = self.hub.subscribe("TASK-1")
+        received = []
+        start = time.monotonic()
+        for step in range(5):
+            self.hub.publish(_task("IN_PROGRESS"), "CERNE", f"passo {step}")
+            received.append(fast.get_blocking(timeout=1.0)['message'])
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(received, [f"passo {step}" for step in range(5)])
+
+        # O buffer do assinante lento ficou limitado a max_buffer e a assinatura foi descartada
+        self.assertTrue(slow.dropped and slow.closed)
+        self.assertEqual(self.hub.subscriber_count("TASK-1"), 1)
+        self.assertEqual([slow.get_blocking(timeout=0)['message'] for _ in range(3)], ["passo 0", "passo 1", "passo 2"])
+        self.assertIsNone(slow.get_blocking(timeout=1.0))  # Encerrada: não espera
+
+        fast.close()
+        self.assertEqual(self.hub.subscriber_count(), 0)
+        self.hub.publish(_task("IN_PROGRESS"), "CERNE", "sem assinantes")
+
+    def test_02_terminal_event_carries_the_final_result(self):
+        subscription = self.hub.subscribe("TASK-1")
+        self.hub.publish(_task("COMPLETED", final_result="relatório pronto"), "Revisor_Agente", "fim")
+        event = subscription.get_blocking(timeout=1.0)
+        self.assertEqual((event['status'], event['agent'], event['final']), ("COMPLETED", "Revisor_Agente", True))
+        self.assertIn("relatório pronto", event['final_result_summary'])
+        self.assertEqual(event['final_result_blobs'], [])
+        subscription.close()
+
+    def test_03_publisher_thread_wakes_async_subscriber(self):
+        async def scenario():
+            subscription = self.hub.subscribe("TASK-1")
+            self.assertIsNone(await subscription.get(timeout=0.05))
+            publisher = threading.Timer(0.05, self.hub.publish, (_task("IN_PROGRESS"), "CERNE", "acordou"))
+            start = time.monotonic()
+            publisher.start()
+            event = await subscription.get(timeout=5.0)
+            elapsed = time.monotonic() - start
+            publisher.join()
+            subscription.close()
+            return event, elapsed
+
+        event, elapsed = asyncio.run(scenario())
+        self.assertEqual(event['message'], "acordou")
+        self.assertLess(elapsed, 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+# backend/tests/test_task_archive.py
+import gzip
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from backend.persistence.blob_store import BlobStore
+from backend.persistence.db_models import TASK_COLUMNS, encode_blob
+from backend.persistence.task_archive import TaskArchiver
+
+DAY = 86400.0
+
+
+class FakeCursor:
+    """Interpreta apenas as consultas emitidas pelo TaskArchiver."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._result = []
+
+    def execute(self, sql, params=()):
+        if sql.startswith("SELECT final_result_json"):
+            self._result = [(r["final_result_json"], r["trace_history_json"]) for r in self._conn.tasks]
+        elif sql.startswith("SELECT result_data"):
+            self._result = [(data,) for data in self._conn.trace_results]
+        elif sql.startswith("SELECT partition_path"):
+            path = self._conn.index.get(params[0])
+            self._result = [(path,)] if path else []
+        elif sql.endswith("FOR UPDATE"):
+            ids, statuses = set(params[:-2]), params[-2:]
+            self._result = [(r["task_id"], r["last_update_time"]) for r in self._conn.tasks
+                            if r["task_id"] in ids and r["status"] in statuses]
+        elif sql.startswith("SELECT"):
+            *statuses, cutoff, limit = params
+            eligible = sorted((r for r in self._conn.tasks if r["status"] in statuses and r["last_update_time"] < cutoff),
+                              key=lambda r: r["last_update_time"])
+            self._result = [{c: row[c] for c in TASK_COLUMNS} for row in eligible[:limit]]
+        elif sql.startswith("DELETE FROM Tasks"):
+            self._conn.tasks = [r for r in self._conn.tasks if r["task_id"] not in params]
+        elif sql.startswith("DELETE FROM TaskTraces"):
+            self._conn.traces_deleted.update(params)
+
+    def executemany(self, sql, rows):
+        for task_id, path, _ in rows:
+            self._conn.index[task_id] = path
+
+    def fetchall(self):
+        return self._result
+
+    def fetchmany(self, size):
+        rows, self._result = self._result[:size], self._result[size:]
+        return rows
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.index = {}
+        self.traces_deleted = set()
+        self.trace_results = []
+        self.commits = 0
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def _row(task_id, status, updated):
+    return {
+        'task_id': task_id, 'description': f"Task {task_id}",
+        'context_json': encode_blob({'session_id': "s-1", 'environment_vars': {}}),
+        'status': status, 'priority': 2, 'required_agent': "Revisor_Agente", 'delegated_to': "Revisor_Agente",
+        'creation_time': updated - 10.0, 'last_update_time': updated,
+        'final_result_json': encode_blob({'summary': f"resultado {task_id}"}),
+        'trace_history_json': encode_blob([]),
+    }
+
+
+class TestTaskArchive(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.archive_dir = tmp.name
+        now = time.time()
+        self.old = now - 40 * DAY
+        self.conn = FakeConnection([
+            _row("OLD-OK", "COMPLETED", self.old),
+            _row("OLD-FAIL", "FAILED", self.old + DAY),
+            _row("OLD-PENDING", "PENDING", self.old),
+            _row("RECENT", "COMPLETED", now - DAY),
+        ])
+        self.archiver = TaskArchiver(SimpleNamespace(conn=self.conn), archive_dir=self.archive_dir,
+                                     retention_days=30, batch_size=1, batch_pause_ms=0)
+
+    def test_01_run_once_moves_old_terminal_tasks_in_batches(self):
+        self.assertEqual(self.archiver.run_once(), 2)
+        self.assertEqual(self.conn.commits, 2)  # Um lote (transação curta) por Task com batch_size=1
+        self.assertEqual(sorted(r["task_id"] for r in self.conn.tasks), ["OLD-PENDING", "RECENT"])
+        self.assertEqual(self.conn.traces_deleted, {"OLD-OK", "OLD-FAIL"})
+
+        # Índice -> partição diária comprimida contendo a linha
+        self.assertEqual(set(self.conn.index), {"OLD-OK", "OLD-FAIL"})
+        path = self.conn.index["OLD-OK"]
+        self.assertTrue(path.startswith(time.strftime("%Y/%m/%d", time.gmtime(self.old))))
+        with gzip.open(os.path.join(self.archive_dir, path), "rt", encoding="utf-8") as fh:
+            self.assertIn('"OLD-OK"', fh.read())
+        self.assertNotEqual(os.path.dirname(path), os.path.dirname(self.conn.index["OLD-FAIL"]))
+        self.assertEqual(self.archiver.run_once(), 0)
+
+    def test_02_load_task_reads_back_archived_rows(self):
+        self.archiver.run_once()
+        task = self.archiver.load_task("OLD-FAIL")
+        self.assertEqual((task.task_id, task.status, task.delegated_to), ("OLD-FAIL", "FAILED", "Revisor_Agente"))
+        self.assertEqual(task.final_result, {'summary': "resultado OLD-FAIL"})
+        self.assertEqual(task.context["session_id"], "s-1")
+        self.assertIsNone(self.archiver.load_task("RECENT"))  # Ainda na tabela quente
+
+    def test_03_tasks_changed_after_the_batch_read_are_kept_hot(self):
+        self.archiver._batch_size = 10
+        write_partitions = self.archiver._write_partitions
+
+        def resumed_while_writing(rows):
+            paths = write_partitions(rows)
+            # Enquanto o lote era gravado, OLD-OK foi retomada e OLD-FAIL regravada
+            by_id = {r["task_id"]: r for r in self.conn.tasks}
+            by_id["OLD-OK"]["status"] = "RETRY"
+            by_id["OLD-FAIL"]["last_update_time"] = time.time()
+            return paths
+
+        self.archiver._write_partitions = resumed_while_writing
+        self.assertEqual(self.archiver.run_once(), 0)
+        self.assertEqual((self.conn.index, self.conn.traces_deleted), ({}, set()))
+        self.assertEqual(len(self.conn.tasks), 4)
+
+    def test_04_collect_blobs_keeps_blobs_referenced_hot_or_archived(self):
+        store = BlobStore(os.path.join(self.archive_dir, "blobs"), threshold_bytes=0)
+        archived, hot, traced, orphan = (store.put(f"saída {name}") for name in ("arquivada", "quente", "trace", "órfã"))
+        by_id = {r["task_id"]: r for r in self.conn.tasks}
+        by_id["OLD-OK"]["final_result_json"] = encode_blob({'output_data': archived})
+        by_id["RECENT"]["trace_history_json"] = encode_blob([{'result_data': {'output_data': hot}}])
+        self.conn.trace_results.append(encode_blob({'output_data': traced}))
+        self.archiver.run_once()
+        self.archiver._blob_store, self.archiver._blob_grace_s = store, -60.0  # Sem carência: todos elegíveis
+
+        self.assertEqual(self.archiver.collect_blobs(), 1)
+        self.assertFalse(store.exists(orphan['$blob']))
+        self.assertEqual([store.load(ref) for ref in (archived, hot, traced)],
+                         ["saída arquivada", "saída quente", "saída trace"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# backend/tests/test_task_leases.py
+import os
+import tempfile
+import time
+import unittest
+from backend.persistence.task_leases import SQLiteLeaseStore
+
+
+class TestSQLiteLeaseStore(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, "cortex.db")
+        self.store = SQLiteLeaseStore(self.path, lease_s=30.0)
+        conn = self.store._conn().raw
+        for i, (priority, status) in enumerate([(1, "PENDING"), (4, "PENDING"), (2, "RETRY"), (4, "COMPLETED"), (3, "PENDING")]):
+            conn.execute("INSERT INTO Tasks (task_id, status, priority, creation_time) VALUES (?, ?, ?, ?)",
+                         (f"T{i}", status, priority, 1000.0 + i))
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_01_priority_ordered_batches_are_exclusive(self):
+        other = SQLiteLeaseStore(self.path, lease_s=30.0)
+        first = [r["task_id"] for r in self.store.claim("node-a", 2)]
+        second = [r["task_id"] for r in other.claim("node-b", 10)]
+        self.assertEqual(first, ["T1", "T4"])
+        self.assertEqual(second, ["T2", "T0"])  # COMPLETED nunca é reivindicada
+        self.assertEqual(other.claim("node-b", 10), [])
+
+        self.assertFalse(other.complete("node-b", "T1"))  # Lease pertence a outro nó
+        self.assertTrue(self.store.complete("node-a", "T1"))
+        self.assertEqual([r["task_id"] for r in other.claim("node-b", 10)], ["T1"])
+
+    def test_02_expired_and_dead_node_leases_are_reclaimed(self):
+        short = SQLiteLeaseStore(self.path, lease_s=0.05)
+        short.register("node-dead")
+        self.assertEqual(len(short.claim("node-dead", 2)), 2)
+        time.sleep(0.1)
+        self.assertEqual([r["task_id"] for r in self.store.claim("node-live", 1)], ["T1"])  # Lease expirado
+
+        self.store.register("node-live")
+        self.assertEqual(self.store.reclaim_dead(dead_after_s=0.05), 1)  # Restante de node-dead (T4)
+        self.assertEqual(self.store.heartbeat("node-live"), 1)
+
+    def test_03_retry_waits_for_next_attempt_and_delegated_is_claimable(self):
+        conn = self.store._conn().raw
+        conn.execute("UPDATE Tasks SET status = 'COMPLETED' WHERE task_id != 'T2'")
+        conn.execute("INSERT INTO Tasks (task_id, status, priority, creation_time) VALUES ('T5', 'DELEGATED', 1, 0)")
+        self.store.register("node-a")
+        self.assertEqual([r["task_id"] for r in self.store.claim("node-a", 10)], ["T2", "T5"])
+        self.assertEqual(self.store.retries("T2"), 0)
+
+        # RETRY: volta à fila sem dono, apenas após o backoff
+        self.assertTrue(self.store.release("node-a", "T2", time.time() + 0.2, retried=True))
+        self.assertTrue(self.store.release("node-a", "T5", time.time()))
+        self.assertEqual(self.store.retries("T2"), 1)
+        self.assertEqual(self.store.heartbeat("node-a"), 0)  # Leases liberados não são renovados
+        self.assertEqual([r["task_id"] for r in self.store.claim("node-b", 10)], ["T5"])
+        time.sleep(0.25)
+        self.assertEqual([r["task_id"] for r in self.store.claim("node-b", 10)], ["T2"])
+        self.assertEqual(self.store.retries("T2"), 1)  # Contagem preservada entre claims
+
+    def test_04_dead_node_and_deregister_keep_retry_state(self):
+        short = SQLiteLeaseStore(self.path, lease_s=30.0)
+        short.register("node-dead")
+        self.assertEqual([r["task_id"] for r in short.claim("node-dead", 1)], ["T1"])
+        short.release("node-dead", "T1", time.time() + 0.2, retried=True)
+        self.assertEqual([r["task_id"] for r in short.claim("node-dead", 1)], ["T4"])  # T1 em backoff
+        time.sleep(0.25)
+        self.assertEqual([r["task_id"] for r in short.claim("node-dead", 1)], ["T1"])
+        short.release("node-dead", "T1", time.time() + 0.2, retried=True)
+        self.assertEqual(self.store.reclaim_dead(dead_after_s=0.1), 1)  # T4
+        # Sem dono, mas com a contagem e o backoff da retentativa preservados
+        self.assertEqual(self.store.retries("T1"), 2)
+        self.assertEqual([r["task_id"] for r in self.store.claim("node-live", 2)], ["T4", "T2"])
+        time.sleep(0.25)
+        self.assertEqual([r["task_id"] for r in self.store.claim("node-live", 1)], ["T1"])
+
+        self.assertEqual(self.store.deregister("node-live"), 3)
+        self.assertEqual(self.store.retries("T1"), 2)
+        self.assertEqual([r["task_id"] for r in short.claim("node-b", 3)], ["T1", "T4", "T2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
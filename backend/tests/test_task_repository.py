@@ -0,0 +1,88 @@
+# backend/tests/test_task_repository.py
+import threading
+import unittest
+from types import SimpleNamespace
+from backend.persistence.task_repository import TaskRepositoryPool
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.commits = 0
+        self.closed = False
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRepository:
+    """TaskRepository mínimo: registra a thread de cada leitura."""
+
+    def __init__(self):
+        self.conn = FakeConnection()
+        self.readers = []
+
+    def get_task_header(self, task_id):
+        if task_id == "boom":
+            raise ConnectionError("conexão perdida")
+        self.readers.append(threading.get_ident())
+        return {"task_id": task_id}
+
+
+class TestTaskRepositoryPool(unittest.TestCase):
+
+    def setUp(self):
+        self.created = []
+        self.pool = TaskRepositoryPool(size=2, factory=self._factory)
+
+    def _factory(self):
+        repository = FakeRepository()
+        self.created.append(repository)
+        return repository
+
+    def test_01_connections_are_created_lazily_and_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.pool.get_task_header("TASK-1"), {"task_id": "TASK-1"})
+        self.assertEqual(len(self.created), 1)
+        # Cada empréstimo encerra a transação de leitura
+        self.assertEqual(self.created[0].conn.commits, 3)
+
+    def test_02_size_bounds_concurrent_connections(self):
+        release, inside = threading.Event(), threading.Barrier(3)
+
+        def hold():
+            with self.pool.borrow():
+                inside.wait()
+                release.wait()
+
+        holders = [threading.Thread(target=hold) for _ in range(2)]
+        for holder in holders:
+            holder.start()
+        inside.wait()
+        # Pool esgotado: o terceiro leitor aguarda uma devolução
+        waiter = threading.Thread(target=self.pool.get_task_header, args=("TASK-2",))
+        waiter.start()
+        waiter.join(0.1)
+        self.assertTrue(waiter.is_alive())
+        release.set()
+        for thread in (*holders, waiter):
+            thread.join()
+        self.assertEqual(len(self.created), 2)
+
+    def test_03_failed_connection_is_discarded(self):
+        with self.assertRaises(ConnectionError):
+            self.pool.get_task_header("boom")
+        self.assertTrue(self.created[0].conn.closed)
+        self.pool.get_task_header("TASK-3")
+        self.assertEqual(len(self.created), 2)
+
+    def test_04_ci_mode_repository_without_connection(self):
+        pool = TaskRepositoryPool(size=1, factory=lambda: SimpleNamespace(conn=None, load_task=lambda task_id: None))
+        self.assertIsNone(pool.load_task("TASK-4"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# backend/tests/test_tracing.py
+import contextvars
+import json
+import os
+import tempfile
+import unittest
+from backend.utilities.tracing import (NOOP_SPAN, SPAN_KIND_CLIENT, STATUS_ERROR, STATUS_OK, Span, Tracer,
+                                       trace_id_for_task)
+
+
+def _isolated(func, *args):
+    """Executa em um contexto novo: span e Task correntes não vazam entre testes."""
+    return contextvars.Context().run(func, *args)
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "spans.otlp.jsonl")
+
+    def _tracer(self, **kwargs) -> Tracer:
+        tracer = Tracer(enabled=True, export_path=self.path, **kwargs)
+        self.addCleanup(tracer.shutdown)
+        return tracer
+
+    def test_01_disabled_tracer_returns_the_shared_noop_span(self):
+        tracer = Tracer(enabled=False, export_path=self.path)
+        self.assertIs(tracer.start_span("cerne.cycle", {'task_id': "TASK-1"}), NOOP_SPAN)
+        with tracer.span("repository.save") as span:
+            self.assertIs(span, NOOP_SPAN)
+        tracer.record_span("scheduler.queue_wait", 0, 1)
+        self.assertIsNone(tracer._exporter)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_02_trace_id_is_derived_from_the_task(self):
+        tracer = self._tracer()
+
+        def cycle():
+            tracer.set_task("TASK-1")
+            with tracer.span("cerne.cycle") as root:
+                with tracer.span("agent.execute_task") as child:
+                    return root, child
+
+        first_root, child = _isolated(cycle)
+        second_root, _ = _isolated(cycle)
+        self.assertEqual(first_root.trace_id, trace_id_for_task("TASK-1"))
+        self.assertEqual(second_root.trace_id, first_root.trace_id)  # Ciclos da mesma Task, mesmo trace
+        self.assertNotEqual(second_root.span_id, first_root.span_id)
+        self.assertEqual((child.trace_id, child.parent_span_id), (first_root.trace_id, first_root.span_id))
+        self.assertEqual(first_root.attributes['task_id'], "TASK-1")
+        other = _isolated(tracer.start_span, "cerne.cycle", {'task_id': "TASK-2"})
+        self.assertNotEqual(other.trace_id, first_root.trace_id)
+
+    def test_03_sampling_keeps_or_drops_whole_traces(self):
+        tracer = self._tracer(sample_rate=0.5)
+
+        def spans(task_id):
+            tracer.set_task(task_id)
+            root = tracer.start_span("cerne.cycle")
+            child = tracer.start_span("agent.execute_task")
+            child.end()
+            root.end()
+            retried = tracer.start_span("cerne.cycle", {'task_id': task_id})
+            retried.end()
+            return [isinstance(s, Span) for s in (root, child, retried)]
+
+        decisions = [_isolated(spans, f"TASK-{i}") for i in range(400)]
+        self.assertTrue(all(len(set(d)) == 1 for d in decisions))  # Tudo ou nada por Task
+        sampled = sum(d[0] for d in decisions)
+        self.assertTrue(120 < sampled < 280, sampled)
+        self.assertEqual(sum(_isolated(spans, f"TASK-{i}")[0] for i in range(400)), sampled)
+
+    def test_04_exporter_writes_otlp_json(self):
+        tracer = self._tracer()
+
+        def request():
+            with tracer.span("net.request", {'task_id': "TASK-1", 'endpoint': "/data/search_index"},
+                             kind=SPAN_KIND_CLIENT) as span:
+                span.set_attribute('latency_ms', 120)
+                span.set_attribute('ratio', 0.5)
+                span.set_attribute('outage', False)
+                try:
+                    with tracer.span("agent.execute_task"):
+                        raise ConnectionError("falha simulada")
+                except ConnectionError:
+                    pass
+            return span
+
+        parent = _isolated(request)
+        tracer.shutdown()
+        with open(self.path, "r", encoding="utf-8") as fh:
+            requests = [json.loads(line) for line in fh]
+        resource_spans = [rs for r in requests for rs in r["resourceSpans"]]
+        resource = {a["key"]: a["value"] for a in resource_spans[0]["resource"]["attributes"]}
+        self.assertEqual(resource["service.name"], {"stringValue": "cortex"})
+        scope_spans = [ss for rs in resource_spans for ss in rs["scopeSpans"]]
+        self.assertEqual({ss["scope"]["name"] for ss in scope_spans}, {"cortex"})
+        spans = {s["name"]: s for ss in scope_spans for s in ss["spans"]}
+        self.assertEqual(set(spans), {"net.request", "agent.execute_task"})
+
+        root, child = spans["net.request"], spans["agent.execute_task"]
+        self.assertEqual((root["traceId"], root["spanId"], root["kind"]),
+                         (trace_id_for_task("TASK-1"), parent.span_id, SPAN_KIND_CLIENT))
+        self.assertNotIn("parentSpanId", root)
+        self.assertEqual((child["traceId"], child["parentSpanId"]), (root["traceId"], root["spanId"]))
+        self.assertLessEqual(int(root["startTimeUnixNano"]), int(child["startTimeUnixNano"]))
+        self.assertLessEqual(int(child["endTimeUnixNano"]), int(root["endTimeUnixNano"]))
+        attributes = {a["key"]: a["value"] for a in root["attributes"]}
+        self.assertEqual(attributes, {
+            'task_id': {"stringValue": "TASK-1"}, 'endpoint': {"stringValue": "/data/search_index"},
+            'latency_ms': {"intValue": "120"}, 'ratio': {"doubleValue": 0.5}, 'outage': {"boolValue": False},
+        })
+        self.assertEqual(root["status"], {"code": STATUS_OK, "message": ""})
+        self.assertEqual(child["status"], {"code": STATUS_ERROR, "message": "ConnectionError: falha simulada"})
+
+
+if __name__ == '__main__':
+    unittest.main()
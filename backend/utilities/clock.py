@@ -0,0 +1,75 @@
+# backend/utilities/clock.py
+"""
+Relógios injetáveis do C.O.R.T.E.X.
+
+SystemClock delega para time.monotonic/time.sleep (produção). VirtualClock é um relógio
+de eventos discretos: o tempo só avança quando o laço de eventos processa o próximo
+evento (ou via sleep em código sequencial), permitindo simular horas de tráfego em segundos.
+"""
+import heapq
+import itertools
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class SystemClock:
+    """Relógio de parede monotônico (comportamento padrão)."""
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Relógio virtual com laço de eventos discretos.
+    Callbacks agendados com call_at/call_later são executados em ordem de tempo (FIFO em empates);
+    dentro de um callback, agende a continuação em vez de chamar sleep.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._events: List[Tuple[float, int, Callable, Tuple[Any, ...]]] = []
+        self._sequence = itertools.count()
+        self.processed_events = 0
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float):
+        """Avança o tempo (uso em código sequencial, fora do laço de eventos)."""
+        self._now += max(0.0, seconds)
+
+    def call_at(self, when: float, callback: Callable, *args):
+        heapq.heappush(self._events, (max(when, self._now), next(self._sequence), callback, args))
+
+    def call_later(self, delay: float, callback: Callable, *args):
+        self.call_at(self._now + delay, callback, *args)
+
+    @property
+    def pending_events(self) -> int:
+        return len(self._events)
+
+    def run(self, until: Optional[float] = None) -> int:
+        """
+        Processa eventos até esgotá-los (ou até o instante 'until').
+        :return: Número de eventos processados nesta chamada.
+        """
+        processed = 0
+        while self._events:
+            when = self._events[0][0]
+            if until is not None and when > until:
+                self._now = until
+                break
+            _, _, callback, args = heapq.heappop(self._events)
+            self._now = when
+            callback(*args)
+            processed += 1
+        self.processed_events += processed
+        return processed
+
+
+# Instância Singleton do relógio de produção
+SYSTEM_CLOCK = SystemClock()
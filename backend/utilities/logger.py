@@ -1,74 +1,306 @@
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
 import os
-from typing import Optional, Dict, Any
+import queue
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Deque, Tuple
+
+# Políticas de overflow da fila de logs (buffer limitado entre chamador e thread escritora)
+OVERFLOW_DROP_NEWEST = "drop_newest"  # Descarta o registro novo (padrão: nunca bloqueia o hot path)
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # Descarta o registro mais antigo da fila
+OVERFLOW_BLOCK = "block"              # Bloqueia o chamador até haver espaço (sem perda)
+
+
+# Contexto da Task corrente: isolado por thread e por task asyncio (não é um dict global).
+_CURRENT_TASK_ID: contextvars.ContextVar[str] = contextvars.ContextVar("cortex_task_id", default="NONE")
+_CURRENT_TASK_BUFFER: contextvars.ContextVar[Optional["_TaskLogBuffer"]] = contextvars.ContextVar(
+    "cortex_task_log_buffer", default=None
+)
+
+
+@dataclass
+class TaskLogPolicy:
+    """
+    Política de amostragem e verbosidade por Task.
+    Registros abaixo de WARNING ficam retidos durante a Task e são liberados no fim,
+    conforme o desfecho: falhas liberam tudo (inclusive DEBUG); sucessos são amostrados.
+    """
+    success_sample_rate: float = 1.0   # Fração de Tasks bem-sucedidas com logs INFO emitidos
+    failure_sample_rate: float = 1.0   # Fração de Tasks com falha com logs retidos emitidos
+    buffer_debug: bool = False         # Captura DEBUG durante a Task (emitido apenas em falhas)
+    max_buffered: int = 500            # Limite de registros retidos por Task (descarta os mais antigos)
+
+    @property
+    def buffers(self) -> bool:
+        """Retenção só é necessária quando há amostragem ou captura de DEBUG."""
+        return self.success_sample_rate < 1.0 or self.failure_sample_rate < 1.0 or self.buffer_debug
+
+    @classmethod
+    def from_env(cls) -> "TaskLogPolicy":
+        return cls(
+            success_sample_rate=float(os.environ.get("CORTEX_LOG_SUCCESS_SAMPLE", "1.0")),
+            failure_sample_rate=float(os.environ.get("CORTEX_LOG_FAILURE_SAMPLE", "1.0")),
+            buffer_debug=os.environ.get("CORTEX_LOG_BUFFER_DEBUG", "0") in ("1", "true", "True"),
+            max_buffered=int(os.environ.get("CORTEX_LOG_MAX_BUFFERED", "500")),
+        )
+
+    def is_sampled(self, task_id: str, success: bool) -> bool:
+        """Amostragem determinística por task_id (todos os ciclos da mesma Task têm a mesma decisão)."""
+        rate = self.success_sample_rate if success else self.failure_sample_rate
+        if rate >= 1.0:
+            return True
+        return (zlib.crc32(task_id.encode("utf-8")) % 10000) < rate * 10000
+
+
+class _TaskLogBuffer:
+    """Registros retidos de uma Task: (nível, mensagem, timestamp de criação)."""
+    __slots__ = ("task_id", "records")
+
+    def __init__(self, task_id: str, max_buffered: int):
+        self.task_id = task_id
+        self.records: Deque[Tuple[int, "_LazyMessage", float]] = deque(maxlen=max_buffered)
+
+
+class _LazyMessage:
+    """
+    Mensagem de log com renderização adiada.
+    Captura apenas referências no momento da chamada; a string final é montada
+    pela thread escritora (ou pelo formatter JSON) quando o registro é emitido.
+    """
+    __slots__ = ("message", "task_id", "base_context", "extra_data")
+
+    def __init__(self, message: str, task_id: str, base_context: Dict[str, str], extra_data: Optional[Dict[str, Any]]):
+        self.message = message
+        self.task_id = task_id
+        self.base_context = base_context
+        self.extra_data = extra_data
+
+    def context(self) -> Dict[str, Any]:
+        return {
+            'task_id': self.task_id,
+            'cortex_mode': self.base_context['cortex_mode'],
+            'pid': self.base_context['pid'],
+            **(self.extra_data or {})
+        }
+
+    def __str__(self) -> str:
+        return f"[{self.task_id}] {self.message} | Data: {self.context()}"
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Formatter JSON (uma linha por registro) para ingestão em sistemas APM/ELK."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            'ts': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+        }
+        msg = record.msg
+        if isinstance(msg, _LazyMessage):
+            payload['msg'] = msg.message
+            payload.update(msg.context())
+        else:
+            payload['msg'] = record.getMessage()
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler com fila limitada e política de overflow; não formata no thread chamador."""
+
+    def __init__(self, log_queue: queue.Queue, overflow_policy: str):
+        super().__init__(log_queue)
+        self.overflow_policy = overflow_policy
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A renderização fica para a thread escritora (QueueListener).
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.overflow_policy == OVERFLOW_BLOCK:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.overflow_policy == OVERFLOW_DROP_OLDEST:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.put_nowait(record)
+                except (queue.Empty, queue.Full):
+                    pass
+
 
 class CortexLogger:
     """
     Sistema de Log e Telemetria estruturada do C.O.R.T.E.X.
     Adiciona contexto operacional (MODE, TASK_ID) a todas as entradas de log.
+    Registros passam por uma fila limitada até uma thread escritora em background;
+    o nível é verificado antes de qualquer formatação.
     """
-    
-    def __init__(self, name: str = 'CORTEX_SYSTEM', log_level: str = 'INFO'):
+
+    def __init__(self, name: str = 'CORTEX_SYSTEM', log_level: str = 'INFO',
+                 log_format: Optional[str] = None, async_writer: Optional[bool] = None,
+                 queue_size: Optional[int] = None, overflow_policy: Optional[str] = None,
+                 stream=None, task_policy: Optional[TaskLogPolicy] = None):
+        """
+        :param log_format: 'text' ou 'json' (padrão: CORTEX_LOG_FORMAT ou 'text').
+        :param async_writer: Se True, escreve via fila + thread (padrão: CORTEX_LOG_ASYNC ou True).
+        :param queue_size: Capacidade da fila de registros (padrão: CORTEX_LOG_QUEUE_SIZE ou 10000).
+        :param overflow_policy: drop_newest | drop_oldest | block (padrão: CORTEX_LOG_OVERFLOW).
+        :param stream: Stream de saída do handler (padrão: stderr).
+        :param task_policy: Amostragem/verbosidade por Task (padrão: TaskLogPolicy.from_env()).
+        """
         self.logger = logging.getLogger(name)
         self.logger.setLevel(log_level.upper())
+        self.logger.propagate = False
         self.context: Dict[str, str] = {
             'cortex_mode': os.environ.get("CORTEX_MODE", "UNDEFINED"),
             'pid': str(os.getpid()),
         }
+        self._log_format = (log_format or os.environ.get("CORTEX_LOG_FORMAT", "text")).lower()
+        if async_writer is None:
+            async_writer = os.environ.get("CORTEX_LOG_ASYNC", "1") not in ("0", "false", "False")
+        self._async_writer = async_writer
+        self._queue_size = queue_size or int(os.environ.get("CORTEX_LOG_QUEUE_SIZE", "10000"))
+        self._overflow_policy = overflow_policy or os.environ.get("CORTEX_LOG_OVERFLOW", OVERFLOW_DROP_NEWEST)
+        self._stream = stream
+        self.task_policy = task_policy or TaskLogPolicy.from_env()
+        self._queue_handler: Optional[_BoundedQueueHandler] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
         self._setup_handler()
-        
+
     def _setup_handler(self):
-        """Configura o handler e o formatter para saídas em console (JSON estruturado opcionalmente)."""
+        """Configura o handler e o formatter para saídas em console (texto ou JSON estruturado)."""
         if not self.logger.handlers:
-            
-            # Formato de Log: Adiciona campos chave para rastreamento.
-            # Em produção, este formato seria JSON para fácil ingestão em sistemas APM/ELK.
-            formatter = logging.Formatter(
-                fmt=f"[%(asctime)s] | %(levelname)-8s | CORE: {self.context['cortex_mode']} | PID: {self.context['pid']} | %(name)s | MSG: %(message)s",
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            
+
+            if self._log_format == "json":
+                formatter = JsonLineFormatter()
+            else:
+                # Formato de Log: Adiciona campos chave para rastreamento.
+                formatter = logging.Formatter(
+                    fmt=f"[%(asctime)s] | %(levelname)-8s | CORE: {self.context['cortex_mode']} | PID: {self.context['pid']} | %(name)s | MSG: %(message)s",
+                    datefmt='%Y-%m-%d %H:%M:%S'
+                )
+
             # Handler para saída padrão (console)
-            handler = logging.StreamHandler()
+            handler = logging.StreamHandler(self._stream)
             handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
-            
+
+            if not self._async_writer:
+                self.logger.addHandler(handler)
+                return
+
+            # Pipeline assíncrono: chamador -> fila limitada -> thread escritora -> StreamHandler
+            log_queue: queue.Queue = queue.Queue(maxsize=self._queue_size)
+            self._queue_handler = _BoundedQueueHandler(log_queue, self._overflow_policy)
+            self._listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=False)
+            self._listener.start()
+            self.logger.addHandler(self._queue_handler)
+            atexit.register(self.shutdown)
+
+    @property
+    def dropped_records(self) -> int:
+        """Número de registros descartados por overflow da fila."""
+        return self._queue_handler.dropped if self._queue_handler else 0
+
+    def shutdown(self):
+        """Drena a fila e encerra a thread escritora."""
+        listener, self._listener = self._listener, None
+        if listener is not None and listener._thread is not None:
+            # Sentinela com put bloqueante: aguarda espaço em vez de falhar com a fila cheia.
+            listener.queue.put(listener._sentinel)
+            listener._thread.join()
+            listener._thread = None
+
     def set_task_context(self, task_id: Optional[str]):
-        """Define o ID da Task atual para logs específicos da execução."""
-        self.context['task_id'] = task_id or "NONE"
+        """
+        Define o ID da Task atual (contextvar: correto por thread e por task asyncio).
+        Com task_id=None, encerra o contexto como sucesso (ver end_task_context).
+        """
+        if task_id is None:
+            self.end_task_context(success=True)
+            return
+        _CURRENT_TASK_ID.set(task_id)
+        _CURRENT_TASK_BUFFER.set(
+            _TaskLogBuffer(task_id, self.task_policy.max_buffered) if self.task_policy.buffers else None
+        )
+
+    def end_task_context(self, success: bool):
+        """
+        Encerra o contexto da Task corrente e aplica a política de amostragem aos registros retidos:
+        falha -> libera tudo (inclusive DEBUG); sucesso amostrado -> libera registros no nível configurado.
+        """
+        buffer = _CURRENT_TASK_BUFFER.get()
+        _CURRENT_TASK_BUFFER.set(None)
+        _CURRENT_TASK_ID.set("NONE")
+        if buffer is None or not self.task_policy.is_sampled(buffer.task_id, success):
+            return
+        for level, lazy, created in buffer.records:
+            if success and not self.logger.isEnabledFor(level):
+                continue  # DEBUG retido só é emitido quando a Task falha
+            self._emit(level, lazy, created)
+
+    def current_task_id(self) -> str:
+        return _CURRENT_TASK_ID.get()
+
+    def is_enabled_for(self, level: int) -> bool:
+        """Permite ao chamador evitar montar mensagens/dados caros quando o nível está desabilitado."""
+        return self.logger.isEnabledFor(level)
+
+    def debug(self, message: str, extra_data: Optional[Dict[str, Any]] = None):
+        """Registra um detalhe de depuração (retido por Task quando buffer_debug está ativo)."""
+        buffer = _CURRENT_TASK_BUFFER.get()
+        if self.logger.isEnabledFor(logging.DEBUG) or (buffer is not None and self.task_policy.buffer_debug):
+            self._log(logging.DEBUG, message, extra_data)
 
     def info(self, message: str, extra_data: Optional[Dict[str, Any]] = None):
         """Registra uma mensagem informativa."""
-        self._log(logging.INFO, message, extra_data)
+        if self.logger.isEnabledFor(logging.INFO):
+            self._log(logging.INFO, message, extra_data)
 
     def warning(self, message: str, extra_data: Optional[Dict[str, Any]] = None):
         """Registra um alerta."""
-        self._log(logging.WARNING, message, extra_data)
-        
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._log(logging.WARNING, message, extra_data)
+
     def error(self, message: str, extra_data: Optional[Dict[str, Any]] = None):
         """Registra um erro crítico."""
-        self._log(logging.ERROR, message, extra_data)
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, message, extra_data)
 
     def critical(self, message: str, extra_data: Optional[Dict[str, Any]] = None):
         """Registra uma falha irrecuperável."""
-        self._log(logging.CRITICAL, message, extra_data)
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self._log(logging.CRITICAL, message, extra_data)
 
     def _log(self, level: int, message: str, extra_data: Optional[Dict[str, Any]]):
-        """Função interna para formatação e envio do log."""
-        
-        # Cria um dicionário com o contexto base e dados extras
-        log_context = {
-            'task_id': self.context.get('task_id', 'NONE'),
-            'cortex_mode': self.context['cortex_mode'],
-            'pid': self.context['pid'],
-            **(extra_data or {})
-        }
-        
-        # Formata a mensagem com o contexto relevante
-        formatted_message = f"[{log_context['task_id']}] {message} | Data: {log_context}"
-        
-        self.logger.log(level, formatted_message)
+        """Função interna de envio do log. A formatação é adiada para o handler."""
+        lazy = _LazyMessage(message, _CURRENT_TASK_ID.get(), self.context, extra_data)
+        buffer = _CURRENT_TASK_BUFFER.get()
+        if buffer is not None and level < logging.WARNING:
+            # Retido até o fim da Task; WARNING+ é sempre emitido imediatamente.
+            buffer.records.append((level, lazy, time.time()))
+            return
+        self._emit(level, lazy)
+
+    def _emit(self, level: int, lazy: "_LazyMessage", created: Optional[float] = None):
+        # makeRecord + handle evita a inspeção de stack (findCaller) de logger.log no hot path.
+        record = self.logger.makeRecord(self.logger.name, level, "(cortex)", 0, lazy, None, None)
+        if created is not None:
+            record.created = created
+            record.msecs = (created - int(created)) * 1000
+        self.logger.handle(record)
 
 # Instância Singleton do Logger para uso em todo o Core
 CORTEX_LOGGER = CortexLogger()
-
@@ -0,0 +1,325 @@
+# backend/utilities/metrics.py
+"""
+Registro de métricas de baixo overhead do C.O.R.T.E.X. (Counters, Gauges e Histogramas).
+
+Contadores e histogramas gravam em células por thread (sem lock no hot path);
+a agregação acontece apenas na coleta (render_prometheus).
+"""
+import threading
+import weakref
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Buckets padrão de latência (segundos): de 1ms a 30s
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _ShardOwner:
+    """Célula de uma thread guardada no threading.local; o finalizador roda quando a thread termina."""
+    __slots__ = ("cells", "__weakref__")
+
+    def __init__(self, cells: List[float]):
+        self.cells = cells
+
+
+class _ShardedCells:
+    """
+    Vetor de valores com uma cópia por thread. Escrita sem lock; leitura soma as cópias.
+    Quando uma thread termina, a sua cópia é somada à base e descartada (pools que trocam de
+    threads não acumulam cópias mortas).
+    """
+    __slots__ = ("_size", "_local", "_shards", "_base", "_lock", "__weakref__")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+        self._base = [0.0] * size   # Soma das cópias de threads encerradas
+        self._lock = threading.Lock()
+
+    def cells(self) -> List[float]:
+        try:
+            return self._local.owner.cells
+        except AttributeError:
+            cells = [0.0] * self._size
+            with self._lock:
+                self._shards.append(cells)
+            owner = _ShardOwner(cells)
+            weakref.finalize(owner, _ShardedCells._fold, weakref.ref(self), cells)
+            self._local.owner = owner
+            return cells
+
+    @staticmethod
+    def _fold(ref: "weakref.ref[_ShardedCells]", cells: List[float]):
+        sharded = ref()
+        if sharded is None:
+            return
+        with sharded._lock:
+            for i, value in enumerate(cells):
+                sharded._base[i] += value
+            # Remoção por identidade (cópias com os mesmos valores são listas iguais)
+            for index, shard in enumerate(sharded._shards):
+                if shard is cells:
+                    del sharded._shards[index]
+                    break
+
+    def snapshot(self) -> List[float]:
+        with self._lock:
+            shards = list(self._shards)
+            totals = list(self._base)
+        for cells in shards:
+            for i, value in enumerate(cells):
+                totals[i] += value
+        return totals
+
+
+class _Metric:
+    """Base comum: nome, ajuda, rótulos e filhos por combinação de rótulos."""
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple, "_Metric"] = {}               # Cache por chave original (hot path)
+        self._series_map: Dict[Tuple[str, ...], "_Metric"] = {}   # Séries por rótulos normalizados
+        self._children_lock = threading.Lock()
+
+    def labels(self, *values, **kwargs) -> "_Metric":
+        """Retorna (criando sob demanda) a série para os valores de rótulo informados."""
+        key = values or tuple(kwargs[n] for n in self.label_names)
+        child = self._children.get(key)
+        if child is None:
+            child = self._resolve_child(key)
+        return child
+
+    def _resolve_child(self, key: Tuple) -> "_Metric":
+        """Caminho lento: normaliza os valores para str e registra o alias da chave original."""
+        if len(key) != len(self.label_names):
+            raise ValueError(f"Métrica '{self.name}' espera rótulos {self.label_names}.")
+        normalized = tuple(str(v) for v in key)
+        with self._children_lock:
+            child = self._series_map.get(normalized)
+            if child is None:
+                child = self._series_map[normalized] = self._new_child()
+            self._children[key] = child
+        return child
+
+    def _new_child(self) -> "_Metric":
+        raise NotImplementedError
+
+    def _series(self):
+        """Itera (valores_de_rótulo, série). Métricas sem rótulos são a própria série."""
+        if not self.label_names:
+            return [((), self)]
+        with self._children_lock:
+            return list(self._series_map.items())
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._cells = _ShardedCells(1)
+
+    def _new_child(self) -> "Counter":
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount: float = 1.0):
+        self._cells.cells()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._cells.snapshot()[0]
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._value = 0.0
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def _new_child(self) -> "Gauge":
+        return Gauge(self.name, self.documentation)
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Avalia o valor apenas na coleta (custo zero no hot path)."""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        return float(self._function()) if self._function is not None else self._value
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Células: uma por bucket, +Inf e a soma das observações
+        self._cells = _ShardedCells(len(self.buckets) + 2)
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value: float):
+        cells = self._cells.cells()
+        cells[bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """Retorna (contagens cumulativas por bucket incluindo +Inf, soma, contagem)."""
+        cells = self._cells.snapshot()
+        cumulative, running = [], 0.0
+        for count in cells[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, cells[-1], running
+
+    def quantile(self, q: float) -> float:
+        """Estimativa do quantil q (0..1) pelo limite superior do bucket."""
+        cumulative, _, total = self.snapshot()
+        if not total:
+            return 0.0
+        target = q * total
+        for bound, count in zip(self.buckets + (float("inf"),), cumulative):
+            if count >= target:
+                return bound
+        return float("inf")
+
+    def series_snapshot(self) -> Dict[Tuple[str, ...], Tuple[List[float], float, float]]:
+        """Snapshot de todas as séries (valores_de_rótulo -> snapshot()), base para janelas de tempo."""
+        return {labels: series.snapshot() for labels, series in self._series()}
+
+
+def window_quantiles(histogram: Histogram, before: Dict[Tuple[str, ...], Any], after: Dict[Tuple[str, ...], Any],
+                     quantiles: Sequence[float] = (0.5, 0.95, 0.99),
+                     labels: Optional[Tuple[str, ...]] = None) -> Tuple[Dict[float, float], int]:
+    """
+    Quantis (limite superior do bucket) das observações entre dois series_snapshot().
+    :param labels: Restringe a uma série; se omitido, agrega todas as séries.
+    :return: ({q: valor}, contagem de observações na janela). Sem observações, os quantis valem 0.0.
+    """
+    bounds = histogram.buckets + (float("inf"),)
+    counts = [0.0] * len(bounds)
+    for key, (cumulative, _, _) in after.items():
+        if labels is not None and key != labels:
+            continue
+        previous = before.get(key, ([0.0] * len(bounds), 0.0, 0.0))[0]
+        for i, (a, b) in enumerate(zip(cumulative, previous)):
+            counts[i] += a - b
+    total = counts[-1]
+    result = {}
+    for q in quantiles:
+        target = q * total
+        result[q] = next((bd for bd, c in zip(bounds, counts) if c >= target), float("inf")) if total else 0.0
+    return result, int(total)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+class MetricsRegistry:
+    """Registro de métricas do processo e exposição no formato texto do Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render_prometheus(self) -> str:
+        """Renderiza todas as métricas no formato de exposição texto do Prometheus (0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for label_values, series in metric._series():
+                if isinstance(series, Histogram):
+                    cumulative, total_sum, count = series.snapshot()
+                    for bound, bucket_count in zip(series.buckets + (float("inf"),), cumulative):
+                        labels = _format_labels(metric.label_names, label_values, ("le", _format_value(bound)))
+                        lines.append(f"{metric.name}_bucket{labels} {_format_value(bucket_count)}")
+                    labels = _format_labels(metric.label_names, label_values)
+                    lines.append(f"{metric.name}_sum{labels} {_format_value(total_sum)}")
+                    lines.append(f"{metric.name}_count{labels} {_format_value(count)}")
+                else:
+                    labels = _format_labels(metric.label_names, label_values)
+                    lines.append(f"{metric.name}{labels} {_format_value(series.value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Instância Singleton do Registro para uso em todo o Core
+METRICS = MetricsRegistry()
+
+# --- Métricas Padrão do CORTEX ---
+
+QUEUE_DEPTH = METRICS.gauge(
+    "cortex_queue_depth", "Tasks aguardando na TaskQueue por prioridade.", ["priority"])
+QUEUE_WAIT_SECONDS = METRICS.histogram(
+    "cortex_queue_wait_seconds", "Tempo entre enfileiramento e despacho de uma Task.", ["priority"])
+AGENT_EXECUTION_SECONDS = METRICS.histogram(
+    "cortex_agent_execution_seconds", "Latência de execute_task por agente.", ["agent"])
+AGENT_RESPONSES_TOTAL = METRICS.counter(
+    "cortex_agent_responses_total", "Respostas de agentes por status_code e sucesso.", ["agent", "status_code", "success"])
+QUEUE_TENANT_WAIT_SECONDS = METRICS.histogram(
+    "cortex_queue_tenant_wait_seconds", "Tempo em fila por tenant (cardinalidade limitada; excedentes em '_other').",
+    ["tenant"])
+QUEUE_SPILLED = METRICS.gauge(
+    "cortex_queue_spilled", "Tasks da TaskQueue com corpo em disco (spill) por prioridade.", ["priority"])
+QUEUE_REHYDRATE_SECONDS = METRICS.histogram(
+    "cortex_queue_rehydrate_seconds", "Latência de leitura de um lote de Tasks do spill da TaskQueue.")
+REPOSITORY_SAVE_SECONDS = METRICS.histogram(
+    "cortex_repository_save_seconds", "Latência de persistência de Tasks no repositório.")
+SCHEDULER_WORKERS = METRICS.gauge(
+    "cortex_scheduler_workers", "Threads worker ativas do Scheduler.")
+SCHEDULER_DEFERRED = METRICS.gauge(
+    "cortex_scheduler_deferred", "Tasks adiadas pelo Scheduler por cota de endpoint esgotada.", ["bucket"])
+SCHEDULER_DEFERRED_TOTAL = METRICS.counter(
+    "cortex_scheduler_deferred_total", "Adiamentos de Tasks por cota de endpoint esgotada.", ["bucket"])
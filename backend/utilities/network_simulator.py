@@ -1,33 +1,296 @@
+import json
+import math
+import os
 import time
 import random
-from typing import Any, Dict, Optional
+import threading
+import zlib
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
 from ..utilities.logger import CORTEX_LOGGER
-from ..core.protocol import AgentMessage, AgentResponse # Dependência do protocolo
+from ..utilities.tracing import TRACER, SPAN_KIND_CLIENT
+from ..utilities.rate_limiter import RateLimiter, RateLimitExceeded, RATE_LIMITER
+
+# --- Distribuições de Latência ---
+# Cada distribuição recebe o RNG do endpoint (nunca o 'random' global) e os cursores de replay
+# do endpoint, e retorna milissegundos.
+
+@dataclass
+class UniformLatency:
+    """Latência uniforme entre min_ms e max_ms (comportamento histórico do simulador)."""
+    min_ms: float = 50.0
+    max_ms: float = 250.0
+
+    def sample(self, rng: random.Random, cursors: Optional[Dict[int, int]] = None) -> float:
+        return rng.uniform(self.min_ms, self.max_ms)
+
+
+@dataclass
+class LognormalLatency:
+    """Latência log-normal: mediana em median_ms, cauda controlada por sigma."""
+    median_ms: float
+    sigma: float = 0.5
+    max_ms: Optional[float] = None
+
+    def sample(self, rng: random.Random, cursors: Optional[Dict[int, int]] = None) -> float:
+        value = rng.lognormvariate(math.log(self.median_ms), self.sigma)
+        return min(value, self.max_ms) if self.max_ms is not None else value
+
+
+@dataclass
+class BimodalLatency:
+    """Mistura de duas distribuições (ex.: cache hit/miss); slow_probability escolhe o modo lento."""
+    fast: Any
+    slow: Any
+    slow_probability: float = 0.1
+
+    def sample(self, rng: random.Random, cursors: Optional[Dict[int, int]] = None) -> float:
+        mode = self.slow if rng.random() < self.slow_probability else self.fast
+        return mode.sample(rng, cursors)
+
+
+@dataclass
+class ReplayLatency:
+    """
+    Reamostra latências gravadas em produção (sequencial ou aleatoriamente).
+    No modo sequencial a posição fica nos cursores do endpoint (o mesmo perfil pode atender
+    vários endpoints por prefixo); sem cursores, usa uma posição própria do objeto.
+    """
+    samples_ms: Sequence[float]
+    sequential: bool = False
+    _cursor: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self):
+        if not self.samples_ms:
+            raise ValueError("ReplayLatency exige ao menos uma amostra.")
+
+    @classmethod
+    def from_file(cls, path: str, sequential: bool = False) -> "ReplayLatency":
+        """Carrega amostras de um arquivo texto (uma latência em ms por linha)."""
+        with open(path, "r", encoding="utf-8") as fh:
+            return cls([float(line) for line in fh if line.strip()], sequential=sequential)
+
+    def sample(self, rng: random.Random, cursors: Optional[Dict[int, int]] = None) -> float:
+        if not self.sequential:
+            return rng.choice(self.samples_ms)
+        if cursors is None:
+            position = self._cursor
+            self._cursor += 1
+        else:
+            position = cursors.get(id(self), 0)
+            cursors[id(self)] = position + 1
+        return self.samples_ms[position % len(self.samples_ms)]
+
+
+def latency_from_config(config: Dict[str, Any]):
+    """Constrói uma distribuição a partir de um dicionário {'type': ..., parâmetros}."""
+    config = dict(config)
+    kind = config.pop("type")
+    if kind == "uniform":
+        return UniformLatency(**config)
+    if kind == "lognormal":
+        return LognormalLatency(**config)
+    if kind == "bimodal":
+        return BimodalLatency(latency_from_config(config["fast"]), latency_from_config(config["slow"]),
+                              config.get("slow_probability", 0.1))
+    if kind == "replay":
+        if "file" in config:
+            return ReplayLatency.from_file(config["file"], config.get("sequential", False))
+        return ReplayLatency(config["samples_ms"], config.get("sequential", False))
+    raise ValueError(f"Distribuição de latência desconhecida: '{kind}'.")
+
+
+# --- Perfis e Indisponibilidades ---
+
+@dataclass
+class OutageModel:
+    """
+    Janelas de indisponibilidade correlacionadas: todos os endpoints do mesmo grupo
+    falham juntos. Intervalos e durações são exponenciais (processo liga/desliga).
+    """
+    mean_interval_s: float
+    mean_duration_s: float
+
+
+@dataclass
+class EndpointProfile:
+    """Comportamento de rede de um endpoint (ou prefixo de endpoints)."""
+    latency: Any = field(default_factory=UniformLatency)
+    failure_rate: float = 0.05
+    outage_group: Optional[str] = None
+    # Capacidade nominal (req/s). Acima de ~70% de utilização a latência cresce como em uma fila M/M/1.
+    capacity_rps: Optional[float] = None
+    max_load_factor: float = 20.0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "EndpointProfile":
+        config = dict(config)
+        if "latency" in config:
+            config["latency"] = latency_from_config(config["latency"])
+        return cls(**config)
+
+
+class _OutageSchedule:
+    """Cronograma determinístico (gerado sob demanda a partir da seed) das janelas de um grupo."""
+
+    def __init__(self, model: OutageModel, rng: random.Random):
+        self._model = model
+        self._rng = rng
+        self._starts: List[float] = []
+        self._ends: List[float] = []
+        self._horizon = 0.0
+        self._lock = threading.Lock()
+
+    def _extend(self, until: float):
+        while self._horizon <= until:
+            start = self._horizon + self._rng.expovariate(1.0 / self._model.mean_interval_s)
+            end = start + self._rng.expovariate(1.0 / self._model.mean_duration_s)
+            self._starts.append(start)
+            self._ends.append(end)
+            self._horizon = end
+
+    def is_down(self, elapsed_s: float) -> bool:
+        with self._lock:
+            self._extend(elapsed_s)
+            index = bisect_right(self._starts, elapsed_s) - 1
+            return index >= 0 and elapsed_s < self._ends[index]
+
+
+class _EndpointState:
+    """RNG, cursores de replay (por distribuição) e janela de taxa recente de um endpoint."""
+    __slots__ = ("rng", "cursors", "recent", "lock")
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.cursors: Dict[int, int] = {}
+        self.recent: Deque[float] = deque()
+        self.lock = threading.Lock()
+
 
 class NetworkSimulator:
     """
     Simula latência, falha e erros de I/O de rede para testar a resiliência do CERNE e dos Agentes.
+
+    Cada endpoint tem um RNG próprio derivado de (seed, endpoint), de modo que a sequência
+    de latências/falhas de um endpoint não depende da intercalação de requisições entre threads.
+    Com a mesma seed (e o mesmo relógio, ver 'clock'), execuções são reproduzíveis.
     """
-    
-    def __init__(self, base_latency_ms: int = 50, failure_rate: float = 0.05):
+
+    RATE_WINDOW_S = 1.0
+
+    def __init__(self, base_latency_ms: int = 50, failure_rate: float = 0.05, seed: Optional[int] = None,
+                 profiles: Optional[Dict[str, EndpointProfile]] = None,
+                 outages: Optional[Dict[str, OutageModel]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 rate_limit_wait_s: Optional[float] = None):
         """
         Inicializa o simulador com parâmetros padrão.
         :param base_latency_ms: Latência mínima garantida em milissegundos.
         :param failure_rate: Probabilidade de falha da conexão (0.0 a 1.0).
+        :param seed: Semente do RNG (padrão: CORTEX_NET_SEED; None = não determinístico).
+        :param profiles: Perfis por endpoint; a chave é casada pelo prefixo mais longo.
+        :param outages: Modelos de indisponibilidade por outage_group.
+        :param clock: Relógio (segundos) usado para janelas de indisponibilidade e taxa.
+        :param sleep: Função de espera (substituível por um relógio virtual).
+        :param rate_limiter: Cotas por endpoint aplicadas antes de cada requisição (None = sem limite).
+        :param rate_limit_wait_s: Espera máxima por tokens antes de falhar com RateLimitExceeded
+                                  (padrão: CORTEX_RATE_LIMIT_MAX_WAIT_S ou 30).
         """
         self.base_latency = base_latency_ms
         self.failure_rate = failure_rate
         self.max_additional_latency = 200 # Latência máxima adicional (em ms)
+        if seed is None and os.environ.get("CORTEX_NET_SEED"):
+            seed = int(os.environ["CORTEX_NET_SEED"])
+        self.seed = seed
+        self._seed_material = str(seed) if seed is not None else f"{os.getpid()}:{time.time_ns()}"
+        self.default_profile = EndpointProfile(
+            latency=UniformLatency(base_latency_ms, base_latency_ms + self.max_additional_latency),
+            failure_rate=failure_rate,
+        )
+        self._profiles = dict(profiles or {})
+        self._prefixes = sorted(self._profiles, key=len, reverse=True)
+        self._outages = {
+            group: _OutageSchedule(model, self._rng_for(f"outage:{group}"))
+            for group, model in (outages or {}).items()
+        }
+        self._endpoints: Dict[str, _EndpointState] = {}
+        self._endpoints_lock = threading.Lock()
+        self._clock = clock
+        self._sleep = sleep
+        self._started_at = clock()
+        self._rate_limiter = rate_limiter
+        self._rate_limit_wait_s = rate_limit_wait_s if rate_limit_wait_s is not None \
+            else float(os.environ.get("CORTEX_RATE_LIMIT_MAX_WAIT_S", "30"))
         CORTEX_LOGGER.info(
             f"NetworkSimulator ativo. Latência base: {base_latency_ms}ms, Falha: {failure_rate*100:.1f}%.",
-            extra_data={'latency_ms': base_latency_ms, 'failure_rate': failure_rate}
+            extra_data={'latency_ms': base_latency_ms, 'failure_rate': failure_rate,
+                        'seed': seed, 'profiles': len(self._profiles)}
         )
-        
-    def _simulate_delay(self):
-        """Adiciona latência aleatória ao tempo de execução."""
-        delay_ms = self.base_latency + random.randint(0, self.max_additional_latency)
-        delay_s = delay_ms / 1000.0
-        time.sleep(delay_s)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs) -> "NetworkSimulator":
+        """
+        Constrói o simulador a partir de um dicionário (ex.: JSON de CORTEX_NET_PROFILE_FILE):
+        {"seed": 42, "endpoints": {"/data/": {...}}, "outages": {"grupo": {...}}}
+        """
+        profiles = {name: EndpointProfile.from_config(p) for name, p in config.get("endpoints", {}).items()}
+        outages = {name: OutageModel(**o) for name, o in config.get("outages", {}).items()}
+        kwargs.setdefault("seed", config.get("seed"))
+        kwargs.setdefault("base_latency_ms", config.get("base_latency_ms", 50))
+        kwargs.setdefault("failure_rate", config.get("failure_rate", 0.05))
+        return cls(profiles=profiles, outages=outages, **kwargs)
+
+    def _rng_for(self, stream: str) -> random.Random:
+        return random.Random(f"{self._seed_material}:{stream}")
+
+    def profile_for(self, endpoint: str) -> EndpointProfile:
+        for prefix in self._prefixes:
+            if endpoint.startswith(prefix):
+                return self._profiles[prefix]
+        return self.default_profile
+
+    def _state_for(self, endpoint: str) -> _EndpointState:
+        state = self._endpoints.get(endpoint)
+        if state is None:
+            with self._endpoints_lock:
+                state = self._endpoints.setdefault(endpoint, _EndpointState(self._rng_for(f"endpoint:{endpoint}")))
+        return state
+
+    def _load_factor(self, profile: EndpointProfile, state: _EndpointState, now: float) -> float:
+        """Multiplicador de latência pela utilização recente (aprox. M/M/1: 1 / (1 - rho))."""
+        state.recent.append(now)
+        while state.recent and state.recent[0] < now - self.RATE_WINDOW_S:
+            state.recent.popleft()
+        if not profile.capacity_rps:
+            return 1.0
+        utilization = len(state.recent) / (self.RATE_WINDOW_S * profile.capacity_rps)
+        if utilization >= 1.0:
+            return profile.max_load_factor
+        return min(1.0 / (1.0 - utilization), profile.max_load_factor)
+
+    def draw(self, endpoint: str) -> Tuple[int, bool, bool]:
+        """
+        Sorteia (latência_ms, falha, em_indisponibilidade) para a próxima requisição do endpoint,
+        sem aplicar a espera (usado diretamente pela simulação de eventos discretos).
+        """
+        profile = self.profile_for(endpoint)
+        state = self._state_for(endpoint)
+        now = self._clock()
+        with state.lock:
+            factor = self._load_factor(profile, state, now)
+            delay_ms = int(round(profile.latency.sample(state.rng, state.cursors) * factor))
+            failed = state.rng.random() < profile.failure_rate
+        schedule = self._outages.get(profile.outage_group) if profile.outage_group else None
+        in_outage = schedule is not None and schedule.is_down(now - self._started_at)
+        return delay_ms, failed or in_outage, in_outage
+
+    def _simulate_delay(self, delay_ms: int):
+        """Aplica a latência sorteada ao tempo de execução."""
+        self._sleep(delay_ms / 1000.0)
         return delay_ms
 
     def simulate_request(self, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -36,26 +299,46 @@ class NetworkSimulator:
         :returns: Dicionário simulando uma resposta de dados.
         :raises ConnectionError: Se a falha for disparada.
         """
-        delay = self._simulate_delay()
-        
-        # 1. Simulação de Falha
-        if random.random() < self.failure_rate:
-            CORTEX_LOGGER.error(f"Simulação de Falha de Rede no endpoint: {endpoint}.", 
-                                extra_data={'latency': delay, 'endpoint': endpoint})
-            raise ConnectionError(f"Simulação: Falha de conexão ao {endpoint}.")
-        
+        with TRACER.span("net.request", {'endpoint': endpoint}, kind=SPAN_KIND_CLIENT) as span:
+            # 0. Cota do endpoint (compartilhada entre threads e processos do host)
+            if self._rate_limiter is not None and self._rate_limiter.enabled:
+                wait_start = time.monotonic()
+                if not self._rate_limiter.acquire(endpoint, timeout=self._rate_limit_wait_s):
+                    span.set_attribute('rate_limited', True)
+                    CORTEX_LOGGER.warning(f"Cota do endpoint esgotada: {endpoint}.", extra_data={'endpoint': endpoint})
+                    raise RateLimitExceeded(f"Cota de requisições esgotada para {endpoint}.")
+                span.set_attribute('rate_wait_ms', int((time.monotonic() - wait_start) * 1000))
+            delay, failed, in_outage = self.draw(endpoint)
+            self._simulate_delay(delay)
+            span.set_attribute('latency_ms', delay)
+
+            # 1. Simulação de Falha (aleatória ou janela de indisponibilidade)
+            if failed:
+                span.set_attribute('outage', in_outage)
+                CORTEX_LOGGER.error(f"Simulação de Falha de Rede no endpoint: {endpoint}.",
+                                    extra_data={'latency': delay, 'endpoint': endpoint, 'outage': in_outage})
+                raise ConnectionError(f"Simulação: Falha de conexão ao {endpoint}.")
+
         # 2. Simulação de Resposta de Sucesso
-        CORTEX_LOGGER.info(f"Requisição simulada com sucesso.", 
+        CORTEX_LOGGER.info(f"Requisição simulada com sucesso.",
                            extra_data={'latency': delay, 'endpoint': endpoint})
-                           
-        # Retorna um payload de resposta simulada
+
+        # Retorna um payload de resposta simulada (hash estável entre processos)
         return {
             "status": "OK",
             "message": f"Dados recebidos do {endpoint}",
             "processed_delay_ms": delay,
-            "original_data_hash": hash(str(data))
+            "original_data_hash": zlib.crc32(str(data).encode("utf-8"))
         }
 
+
+def _build_default_simulator() -> NetworkSimulator:
+    path = os.environ.get("CORTEX_NET_PROFILE_FILE")
+    if path:
+        with open(path, "r", encoding="utf-8") as fh:
+            return NetworkSimulator.from_config(json.load(fh), rate_limiter=RATE_LIMITER)
+    return NetworkSimulator(rate_limiter=RATE_LIMITER)
+
 # --- Instância Singleton para Acesso ---
 
-NETWORK_SIMULATOR = NetworkSimulator()
+NETWORK_SIMULATOR = _build_default_simulator()
@@ -0,0 +1,178 @@
+# backend/utilities/profiler.py
+"""
+Profiling sob demanda do C.O.R.T.E.X.
+
+Um profiler por amostragem (sys._current_frames) pode ser disparado em tempo de execução,
+via endpoint administrativo ou sinal (SIGUSR1), por N segundos sobre as threads do Scheduler.
+O resultado é gravado em disco no formato "collapsed stacks" (compatível com flamegraph.pl,
+speedscope e inferno). Enquanto nenhuma sessão está ativa, o custo é zero; apenas uma sessão
+roda por vez e a duração é limitada, o que torna seguro mantê-lo armado em produção.
+"""
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter as _StackCounter
+from typing import Dict, Optional, Tuple
+
+from .logger import CORTEX_LOGGER
+from .metrics import METRICS
+
+# Tempo acumulado por agente (CPU da thread vs. parede), sempre ativo: dois relógios por execução.
+AGENT_CPU_SECONDS = METRICS.counter(
+    "cortex_agent_cpu_seconds_total", "Tempo de CPU acumulado em execute_task por agente.", ["agent"])
+AGENT_WALL_SECONDS = METRICS.counter(
+    "cortex_agent_wall_seconds_total", "Tempo de parede acumulado em execute_task por agente.", ["agent"])
+
+MAX_PROFILE_SECONDS = 300
+
+
+class AgentTimer:
+    """Context manager que contabiliza CPU e parede de uma execução de agente."""
+    __slots__ = ("agent", "_cpu", "_wall")
+
+    def __init__(self, agent: str):
+        self.agent = agent
+
+    def __enter__(self):
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        AGENT_CPU_SECONDS.labels(self.agent).inc(time.thread_time() - self._cpu)
+        AGENT_WALL_SECONDS.labels(self.agent).inc(time.perf_counter() - self._wall)
+        return False
+
+
+def agent_time_snapshot() -> Dict[str, Tuple[float, float]]:
+    """Retorna {agente: (cpu_s, wall_s)} acumulados desde o início do processo."""
+    cpu = {labels[0]: series.value for labels, series in AGENT_CPU_SECONDS._series()}
+    wall = {labels[0]: series.value for labels, series in AGENT_WALL_SECONDS._series()}
+    return {agent: (cpu.get(agent, 0.0), wall.get(agent, 0.0)) for agent in set(cpu) | set(wall)}
+
+
+class SamplingProfiler:
+    """Amostra periodicamente as stacks das threads selecionadas e agrega em collapsed stacks."""
+
+    def __init__(self, output_dir: Optional[str] = None, interval_ms: Optional[float] = None,
+                 thread_prefixes: Tuple[str, ...] = ("CERNEScheduler",)):
+        """
+        :param output_dir: Diretório dos perfis (padrão: CORTEX_PROFILE_DIR ou 'profiles').
+        :param interval_ms: Intervalo de amostragem (padrão: CORTEX_PROFILE_INTERVAL_MS ou 10ms).
+        :param thread_prefixes: Prefixos de nome das threads amostradas (vazio = todas).
+        """
+        self._output_dir = output_dir or os.environ.get("CORTEX_PROFILE_DIR", "profiles")
+        self._interval = float(interval_ms or os.environ.get("CORTEX_PROFILE_INTERVAL_MS", "10")) / 1000.0
+        self._thread_prefixes = thread_prefixes
+        self._session_lock = threading.Lock()
+        self._active: Optional[threading.Thread] = None
+        self.last_output: Optional[str] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._active is not None and self._active.is_alive()
+
+    def start(self, seconds: float) -> Optional[str]:
+        """
+        Inicia uma sessão em background. Retorna o caminho do arquivo que será gerado,
+        ou None se já houver uma sessão ativa.
+        """
+        seconds = max(0.1, min(float(seconds), MAX_PROFILE_SECONDS))
+        with self._session_lock:
+            if self.is_running:
+                return None
+            os.makedirs(self._output_dir, exist_ok=True)
+            path = os.path.join(self._output_dir, f"cortex-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed")
+            self._active = threading.Thread(
+                target=self._run_session, args=(seconds, path), name="CortexProfiler-Thread", daemon=True
+            )
+            self._active.start()
+        CORTEX_LOGGER.warning(
+            f"Profiler: sessão de {seconds:.1f}s iniciada.",
+            extra_data={'output': path, 'interval_ms': self._interval * 1000}
+        )
+        return path
+
+    def _selected_threads(self) -> Dict[int, str]:
+        own = threading.get_ident()
+        return {
+            t.ident: t.name for t in threading.enumerate()
+            if t.ident != own and (not self._thread_prefixes or t.name.startswith(self._thread_prefixes))
+        }
+
+    @staticmethod
+    def _collapse(frame, thread_name: str) -> str:
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        parts.append(thread_name)
+        return ";".join(reversed(parts))
+
+    def _run_session(self, seconds: float, path: str):
+        stacks: _StackCounter = _StackCounter()
+        agents_before = agent_time_snapshot()
+        deadline = time.monotonic() + seconds
+        samples = 0
+        while time.monotonic() < deadline:
+            threads = self._selected_threads()
+            for ident, frame in sys._current_frames().items():
+                name = threads.get(ident)
+                if name is not None:
+                    stacks[self._collapse(frame, name)] += 1
+            samples += 1
+            time.sleep(self._interval)
+
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+        # Divisão CPU/parede por agente durante a sessão (CPU baixa + parede alta = espera de I/O)
+        agents_after = agent_time_snapshot()
+        with open(path + ".agents.tsv", "w", encoding="utf-8") as fh:
+            fh.write("agent\tcpu_s\twall_s\tcpu_ratio\n")
+            for agent, (cpu, wall) in sorted(agents_after.items()):
+                cpu_before, wall_before = agents_before.get(agent, (0.0, 0.0))
+                cpu_delta, wall_delta = cpu - cpu_before, wall - wall_before
+                ratio = cpu_delta / wall_delta if wall_delta > 0 else 0.0
+                fh.write(f"{agent}\t{cpu_delta:.6f}\t{wall_delta:.6f}\t{ratio:.3f}\n")
+
+        self.last_output = path
+        CORTEX_LOGGER.warning(
+            f"Profiler: sessão concluída ({samples} amostras, {len(stacks)} stacks distintas).",
+            extra_data={'output': path}
+        )
+
+    def install_signal_handler(self, signum: int = getattr(signal, "SIGUSR1", 0), seconds: Optional[float] = None) -> bool:
+        """
+        Arma o disparo por sinal (ex.: kill -USR1 <pid>). Deve ser chamado na thread principal.
+        :return: True se o handler foi instalado.
+        """
+        if not signum:
+            return False
+        seconds = seconds or float(os.environ.get("CORTEX_PROFILE_SECONDS", "30"))
+        # O handler roda na thread principal entre bytecodes, possivelmente com _session_lock (não
+        # reentrante) ou locks do logging já adquiridos por ela: apenas sinaliza o evento, e uma
+        # thread dedicada inicia a sessão.
+        trigger = threading.Event()
+        try:
+            signal.signal(signum, lambda *_: trigger.set())
+        except ValueError:
+            return False  # Fora da thread principal
+        threading.Thread(target=self._serve_signal, args=(trigger, seconds),
+                         name="CortexProfiler-Signal", daemon=True).start()
+        return True
+
+    def _serve_signal(self, trigger: threading.Event, seconds: float):
+        """Inicia uma sessão a cada disparo por sinal (sinais durante uma sessão ativa são ignorados)."""
+        while True:
+            trigger.wait()
+            trigger.clear()
+            self.start(seconds)
+
+
+# Instância Singleton do Profiler para uso em todo o Core
+PROFILER = SamplingProfiler()
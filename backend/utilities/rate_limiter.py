@@ -0,0 +1,337 @@
+# backend/utilities/rate_limiter.py
+"""
+Limitação de taxa por endpoint externo (token bucket) para a camada de chamadas dos Agentes.
+
+Cada endpoint é associado ao bucket do prefixo configurado mais longo (endpoints sem
+prefixo configurado não são limitados). Um bucket tem taxa (tokens/s) e rajada (capacidade).
+
+O estado dos buckets fica em um arquivo mapeado em memória (CORTEX_RATE_LIMIT_STATE), de modo
+que todos os processos do mesmo host compartilham a mesma cota; cada slot é protegido por um
+lock de região (fcntl.lockf) entre processos e por um threading.Lock entre threads. Sem fcntl
+(ou com CORTEX_RATE_LIMIT_STATE=0), o estado é local ao processo.
+
+As aquisições reservam tokens (o saldo pode ficar negativo) e esperam o tempo correspondente,
+o que atende os chamadores em ordem de chegada sem espera ativa, em threads ou em tarefas async.
+O Scheduler adquire os tokens no despacho e os repassa à chamada via prepaid().
+"""
+import asyncio
+import contextvars
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: estado apenas local ao processo
+    fcntl = None
+
+from .logger import CORTEX_LOGGER
+from .metrics import METRICS
+
+RATE_LIMIT_WAIT_SECONDS = METRICS.histogram(
+    "cortex_rate_limit_wait_seconds", "Espera por tokens antes de uma chamada externa, por bucket.", ["bucket"])
+RATE_LIMIT_REJECTED_TOTAL = METRICS.counter(
+    "cortex_rate_limit_rejected_total", "Aquisições recusadas (espera acima do limite), por bucket.", ["bucket"])
+
+# Slot do arquivo de estado: hash do nome do bucket (0 = livre), tokens, instante da última atualização
+SLOT = struct.Struct("<Qdd")
+SLOT_COUNT = 256
+# Byte após os slots: lock de registro de buckets (nunca o arquivo inteiro: locks POSIX são por
+# processo e desbloquear o arquivo todo liberaria os locks de slot de outras threads)
+REGISTRY_OFFSET = SLOT.size * SLOT_COUNT
+STATE_FILE_SIZE = REGISTRY_OFFSET + 8
+
+# Tokens pré-adquiridos pelo Scheduler para a Task em execução: {bucket: tokens}
+_PREPAID: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("cortex_rate_prepaid", default=None)
+
+
+class RateLimitExceeded(ConnectionError):
+    """A cota do endpoint não libera tokens dentro da espera máxima (tratada pelos agentes como falha de rede)."""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float    # Tokens por segundo
+    burst: float   # Capacidade do bucket
+
+
+class _LocalSlots:
+    """Estado dos buckets em memória (um processo)."""
+
+    def __init__(self):
+        self._state: Dict[str, Tuple[float, float]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def locked(self, bucket: str):
+        lock = self._locks.get(bucket)
+        if lock is None:
+            with self._guard:
+                lock = self._locks.setdefault(bucket, threading.Lock())
+        with lock:
+            yield
+
+    def read(self, bucket: str) -> Optional[Tuple[float, float]]:
+        return self._state.get(bucket)
+
+    def write(self, bucket: str, tokens: float, updated: float):
+        self._state[bucket] = (tokens, updated)
+
+
+class _SharedSlots:
+    """
+    Estado dos buckets em um arquivo mmap compartilhado pelos processos do host.
+    Uma instância por arquivo e processo (ver _shared_slots): fechar outro descritor do
+    mesmo arquivo liberaria os locks POSIX deste processo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, "r+b")
+        self._fd = fd
+        with self._registry_lock():
+            if os.fstat(fd).st_size < STATE_FILE_SIZE:
+                os.ftruncate(fd, STATE_FILE_SIZE)
+        self._mmap = mmap.mmap(fd, STATE_FILE_SIZE)
+        self._offsets: Dict[str, int] = {}
+        self._locks = [threading.Lock() for _ in range(SLOT_COUNT)]
+        self._guard = threading.Lock()
+
+    @staticmethod
+    def _key(bucket: str) -> int:
+        return int.from_bytes(hashlib.blake2b(bucket.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+    def _offset(self, bucket: str) -> int:
+        """Localiza (ou reserva) o slot do bucket por sondagem linear sob o lock de registro."""
+        offset = self._offsets.get(bucket)
+        if offset is not None:
+            return offset
+        key = self._key(bucket)
+        with self._guard, self._registry_lock():
+            for probe in range(SLOT_COUNT):
+                index = (key + probe) % SLOT_COUNT
+                slot_key, _, _ = SLOT.unpack_from(self._mmap, index * SLOT.size)
+                if slot_key in (0, key):
+                    if slot_key == 0:
+                        SLOT.pack_into(self._mmap, index * SLOT.size, key, float("nan"), 0.0)
+                    offset = self._offsets[bucket] = index * SLOT.size
+                    return offset
+        raise RuntimeError(f"Arquivo de estado de rate limit cheio ({SLOT_COUNT} buckets): {self.path}")
+
+    @contextmanager
+    def _registry_lock(self):
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, REGISTRY_OFFSET)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, REGISTRY_OFFSET)
+
+    @contextmanager
+    def locked(self, bucket: str):
+        offset = self._offset(bucket)
+        # lockf é por processo: o threading.Lock serializa as threads deste processo
+        with self._locks[offset // SLOT.size]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, SLOT.size, offset)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, SLOT.size, offset)
+
+    def read(self, bucket: str) -> Optional[Tuple[float, float]]:
+        _, tokens, updated = SLOT.unpack_from(self._mmap, self._offset(bucket))
+        return None if tokens != tokens else (tokens, updated)  # NaN: bucket ainda não usado
+
+    def write(self, bucket: str, tokens: float, updated: float):
+        offset = self._offset(bucket)
+        SLOT.pack_into(self._mmap, offset, self._key(bucket), tokens, updated)
+
+
+_SHARED_SLOTS: Dict[str, _SharedSlots] = {}
+_SHARED_SLOTS_LOCK = threading.Lock()
+
+
+def _shared_slots(path: str) -> _SharedSlots:
+    path = os.path.abspath(path)
+    with _SHARED_SLOTS_LOCK:
+        slots = _SHARED_SLOTS.get(path)
+        if slots is None:
+            slots = _SHARED_SLOTS[path] = _SharedSlots(path)
+        return slots
+
+
+class RateLimiter:
+    """Token buckets por prefixo de endpoint, compartilhados entre threads, tarefas async e processos do host."""
+
+    def __init__(self, limits: Optional[Dict[str, RateLimit]] = None, state_path: Optional[str] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        :param limits: {prefixo_de_endpoint: RateLimit}; o prefixo mais longo define o bucket.
+        :param state_path: Arquivo de estado compartilhado (None = estado local ao processo).
+        :param clock: Relógio monotônico do host (o mesmo em todos os processos que compartilham o estado).
+        """
+        self._limits = dict(limits or {})
+        self._prefixes = sorted(self._limits, key=len, reverse=True)
+        self._state_path = state_path if fcntl is not None else None
+        self._slots = None
+        self._slots_lock = threading.Lock()
+        self._clock = clock
+        self._sleep = sleep
+        self._bucket_cache: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        CORTEX_RATE_LIMITS='/data/search_index=5:10,/telemetry/=2' (taxa[:rajada]; rajada padrão = taxa)
+        e CORTEX_RATE_LIMIT_STATE (arquivo de estado; padrão em /dev/shm ou no temp; '0' = local).
+        """
+        limits = {}
+        for item in os.environ.get("CORTEX_RATE_LIMITS", "").split(","):
+            prefix, _, spec = item.strip().rpartition("=")
+            if not prefix:
+                continue
+            rate, _, burst = spec.partition(":")
+            limits[prefix] = RateLimit(float(rate), float(burst) if burst else max(1.0, float(rate)))
+        state = os.environ.get("CORTEX_RATE_LIMIT_STATE")
+        if state is None:
+            base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            state = os.path.join(base, f"cortex-ratelimit-{os.getuid() if hasattr(os, 'getuid') else 0}")
+        return cls(limits, state_path=None if state in ("", "0") else state)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._limits)
+
+    def _state(self):
+        if self._slots is None:
+            with self._slots_lock:
+                if self._slots is None:
+                    self._slots = _shared_slots(self._state_path) if self._state_path else _LocalSlots()
+                    CORTEX_LOGGER.info("RateLimiter ativo.", extra_data={
+                        'buckets': {p: (l.rate, l.burst) for p, l in self._limits.items()},
+                        'shared_state': self._state_path})
+        return self._slots
+
+    def bucket_for(self, endpoint: str) -> Optional[str]:
+        """Nome do bucket (prefixo configurado) que limita o endpoint; None se ilimitado."""
+        try:
+            return self._bucket_cache[endpoint]
+        except KeyError:
+            bucket = next((p for p in self._prefixes if endpoint.startswith(p)), None)
+            self._bucket_cache[endpoint] = bucket
+            return bucket
+
+    def _refill(self, bucket: str, now: float) -> float:
+        limit = self._limits[bucket]
+        state = self._slots.read(bucket)
+        if state is None:
+            return limit.burst
+        tokens, updated = state
+        return min(limit.burst, tokens + max(0.0, now - updated) * limit.rate)
+
+    # --- Aquisição ---
+
+    def reserve(self, endpoint: str, tokens: float = 1.0, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Reserva tokens do bucket do endpoint.
+        :return: Segundos que o chamador deve esperar antes da chamada (0.0 = imediato), ou None
+                 (sem reservar) se a espera passaria de max_wait.
+        """
+        bucket = self.bucket_for(endpoint)
+        if bucket is None:
+            return 0.0
+        credit = _PREPAID.get()
+        if credit and credit.get(bucket, 0.0) >= tokens:
+            credit[bucket] -= tokens
+            return 0.0
+        slots, limit = self._state(), self._limits[bucket]
+        with slots.locked(bucket):
+            now = self._clock()
+            available = self._refill(bucket, now)
+            wait = max(0.0, (tokens - available) / limit.rate)
+            if max_wait is not None and wait > max_wait:
+                RATE_LIMIT_REJECTED_TOTAL.labels(bucket).inc()
+                return None
+            slots.write(bucket, available - tokens, now)
+        RATE_LIMIT_WAIT_SECONDS.labels(bucket).observe(wait)
+        return wait
+
+    def acquire(self, endpoint: str, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até obter os tokens. :return: False se a espera passaria de timeout."""
+        wait = self.reserve(endpoint, tokens, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            self._sleep(wait)
+        return True
+
+    async def acquire_async(self, endpoint: str, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Versão async de acquire(): aguarda sem bloquear o event loop."""
+        wait = self.reserve(endpoint, tokens, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def delay(self, endpoint: str, tokens: float = 1.0) -> float:
+        """Segundos até o bucket do endpoint ter 'tokens' disponíveis (sem consumir)."""
+        bucket = self.bucket_for(endpoint)
+        if bucket is None:
+            return 0.0
+        slots = self._state()
+        with slots.locked(bucket):
+            available = self._refill(bucket, self._clock())
+        return max(0.0, (tokens - available) / self._limits[bucket].rate)
+
+    def try_acquire_all(self, endpoints: Iterable[str]) -> Tuple[float, Optional[str]]:
+        """
+        Adquire um token de cada bucket envolvido, sem esperar (tudo ou nada).
+        :return: (0.0, None) se adquiridos; senão (espera estimada, bucket esgotado).
+        """
+        taken = []
+        for bucket in dict.fromkeys(b for b in map(self.bucket_for, endpoints) if b is not None):
+            if self.reserve(bucket, max_wait=0.0) is None:
+                for previous in taken:
+                    self.refund(previous)
+                return max(self.delay(bucket), 1e-3), bucket
+            taken.append(bucket)
+        return 0.0, None
+
+    def refund(self, endpoint: str, tokens: float = 1.0):
+        """Devolve tokens não utilizados (ex.: aquisição parcial desfeita)."""
+        bucket = self.bucket_for(endpoint)
+        if bucket is None:
+            return
+        slots, limit = self._state(), self._limits[bucket]
+        with slots.locked(bucket):
+            now = self._clock()
+            slots.write(bucket, min(limit.burst, self._refill(bucket, now) + tokens), now)
+
+    @contextmanager
+    def prepaid(self, endpoints: Sequence[str]):
+        """Credita o token já adquirido de cada bucket às chamadas feitas neste contexto (thread ou tarefa async)."""
+        # Um token por bucket, como em try_acquire_all()
+        credit = {b: 1.0 for b in map(self.bucket_for, endpoints) if b is not None}
+        token = _PREPAID.set(credit)
+        try:
+            yield credit
+        finally:
+            _PREPAID.reset(token)
+            # Créditos não usados voltam ao bucket
+            for bucket, remaining in credit.items():
+                if remaining > 0:
+                    self.refund(bucket, remaining)
+
+
+# --- Instância Singleton para Acesso ---
+
+RATE_LIMITER = RateLimiter.from_env()
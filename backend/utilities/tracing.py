@@ -0,0 +1,269 @@
+# backend/utilities/tracing.py
+"""
+Tracing baseado em spans do C.O.R.T.E.X.
+
+Spans são ligados por task_id (o trace_id é derivado do task_id, de modo que todos os
+ciclos de uma Task compartilham o mesmo trace) e exportados para um arquivo local em
+JSON compatível com OTLP (ExportTraceServiceRequest, um lote por linha).
+Com o tracing desabilitado, start_span retorna um span nulo compartilhado (custo desprezível).
+"""
+import atexit
+import contextvars
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+# Tipos de span (OTLP SpanKind)
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+
+# Códigos de status (OTLP StatusCode)
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_CURRENT_SPAN: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("cortex_current_span", default=None)
+# Task corrente (definida pelo Scheduler/CERNE) para ligar spans sem pai ao trace da Task.
+_CURRENT_TRACE_TASK: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("cortex_trace_task", default=None)
+
+
+def trace_id_for_task(task_id: str) -> str:
+    """trace_id determinístico (128 bits em hex) derivado do task_id."""
+    return hashlib.md5(task_id.encode("utf-8")).hexdigest()
+
+
+class _NoopSpan:
+    """Span nulo: usado quando o tracing está desabilitado ou o trace não foi amostrado."""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def end(self, error: Optional[str] = None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Span ativo. Torna-se o span corrente do contexto até end()."""
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_span_id", "start_ns", "end_ns",
+                 "attributes", "status_code", "status_message", "_token", "_tracer")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_span_id: Optional[str],
+                 attributes: Dict[str, Any], kind: int, start_ns: Optional[int] = None):
+        self._tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent_span_id
+        self.attributes = attributes
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status_code = STATUS_OK
+        self.status_message = ""
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self, error: Optional[str] = None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status_code = STATUS_ERROR
+            self.status_message = error
+        if self._token is not None:
+            try:
+                _CURRENT_SPAN.reset(self._token)
+            except ValueError:
+                _CURRENT_SPAN.set(None)  # Encerrado fora do contexto de criação
+            self._token = None
+        self._tracer._export(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(error=f"{exc_type.__name__}: {exc}" if exc_type else None)
+        return False
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status_code, "message": self.status_message},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class _FileSpanExporter(threading.Thread):
+    """Exporta spans em lote (thread de fundo) para um arquivo OTLP/JSON (uma requisição por linha)."""
+
+    def __init__(self, path: str, resource: Dict[str, Any], max_queue: int = 10000,
+                 batch_size: int = 512, flush_interval_s: float = 1.0):
+        super().__init__(name="SpanExporter-Thread", daemon=True)
+        self._path = path
+        self._resource = {"attributes": [_otlp_attribute(k, v) for k, v in resource.items()]}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval_s
+        self._stopped = threading.Event()
+        self.dropped = 0
+
+    def submit(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1  # Nunca bloqueia o hot path
+
+    def run(self):
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch: List[Span] = []
+            deadline = time.monotonic() + self._flush_interval
+            while len(batch) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Span]):
+        request = {"resourceSpans": [{
+            "resource": self._resource,
+            "scopeSpans": [{"scope": {"name": "cortex"}, "spans": [s.to_otlp() for s in batch]}],
+        }]}
+        with open(self._path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(request, default=str) + "\n")
+
+    def shutdown(self):
+        self._stopped.set()
+        if self.is_alive():
+            self.join(timeout=self._flush_interval * 2)
+
+
+class Tracer:
+    """Cria spans ligados por task_id/message_id com amostragem configurável por trace."""
+
+    def __init__(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                 export_path: Optional[str] = None):
+        """
+        :param enabled: Liga o tracing (padrão: CORTEX_TRACING=1).
+        :param sample_rate: Fração de traces (Tasks) amostrados (padrão: CORTEX_TRACE_SAMPLE ou 1.0).
+        :param export_path: Arquivo de saída OTLP/JSON (padrão: CORTEX_TRACE_FILE).
+        """
+        if enabled is None:
+            enabled = os.environ.get("CORTEX_TRACING", "0") in ("1", "true", "True")
+        self.enabled = enabled
+        self.sample_rate = float(sample_rate if sample_rate is not None else os.environ.get("CORTEX_TRACE_SAMPLE", "1.0"))
+        self._export_path = export_path or os.environ.get("CORTEX_TRACE_FILE", "cortex_spans.otlp.jsonl")
+        self._exporter: Optional[_FileSpanExporter] = None
+        self._exporter_lock = threading.Lock()
+
+    def _sampled(self, trace_id: str) -> bool:
+        if self.sample_rate >= 1.0:
+            return True
+        return int(trace_id[:8], 16) / 0xFFFFFFFF < self.sample_rate
+
+    def _resolve_trace(self, attributes: Dict[str, Any]):
+        """Retorna (trace_id, parent_span_id) ou None se o trace não for amostrado."""
+        parent = _CURRENT_SPAN.get()
+        if parent is not None:
+            return parent.trace_id, parent.span_id
+        task_id = attributes.get("task_id") or _CURRENT_TRACE_TASK.get()
+        trace_id = trace_id_for_task(task_id) if task_id else uuid.uuid4().hex
+        if not self._sampled(trace_id):
+            return None
+        if task_id:
+            attributes.setdefault("task_id", task_id)
+        return trace_id, None
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+                   kind: int = SPAN_KIND_INTERNAL):
+        """Inicia um span filho do span corrente (ou raiz ligado à Task corrente)."""
+        if not self.enabled:
+            return NOOP_SPAN
+        attributes = dict(attributes) if attributes else {}
+        resolved = self._resolve_trace(attributes)
+        if resolved is None:
+            return NOOP_SPAN
+        span = Span(self, name, resolved[0], resolved[1], attributes, kind)
+        span._token = _CURRENT_SPAN.set(span)
+        return span
+
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = SPAN_KIND_INTERNAL):
+        """Forma context manager de start_span (with TRACER.span(...):)."""
+        return self.start_span(name, attributes, kind)
+
+    def record_span(self, name: str, start_ns: int, end_ns: int, attributes: Optional[Dict[str, Any]] = None):
+        """Registra um span já concluído (ex.: espera em fila medida retroativamente)."""
+        if not self.enabled:
+            return
+        attributes = dict(attributes) if attributes else {}
+        resolved = self._resolve_trace(attributes)
+        if resolved is None:
+            return
+        span = Span(self, name, resolved[0], resolved[1], attributes, SPAN_KIND_INTERNAL, start_ns=start_ns)
+        span.end_ns = end_ns
+        self._export(span)
+
+    def set_task(self, task_id: Optional[str]):
+        """Liga spans subsequentes deste contexto ao trace da Task."""
+        _CURRENT_TRACE_TASK.set(task_id)
+
+    def _export(self, span: Span):
+        exporter = self._exporter
+        if exporter is None:
+            with self._exporter_lock:
+                if self._exporter is None:
+                    self._exporter = _FileSpanExporter(self._export_path, {
+                        "service.name": "cortex",
+                        "cortex.mode": os.environ.get("CORTEX_MODE", "UNDEFINED"),
+                        "process.pid": os.getpid(),
+                    })
+                    self._exporter.start()
+                    atexit.register(self._exporter.shutdown)
+                exporter = self._exporter
+        exporter.submit(span)
+
+    def shutdown(self):
+        if self._exporter is not None:
+            self._exporter.shutdown()
+
+
+# Instância Singleton do Tracer para uso em todo o Core
+TRACER = Tracer()
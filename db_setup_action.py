@@ -1,16 +1,120 @@
 # db_setup_action.py (ADICIONAR NA RAIZ)
 
 import os, sys, mysql.connector
+# Colunas de Tasks (espelham TaskDBModel em backend/persistence/db_models.py).
+TASKS_COLUMNS = (
+    ("description", "TEXT"),
+    ("context_json", "MEDIUMBLOB"),
+    ("status", "VARCHAR(16) NOT NULL DEFAULT 'PENDING'"),
+    ("priority", "INT NOT NULL DEFAULT 2"),
+    ("required_agent", "VARCHAR(128)"),
+    ("delegated_to", "VARCHAR(128)"),
+    ("creation_time", "DOUBLE NOT NULL DEFAULT 0"),
+    ("last_update_time", "DOUBLE"),
+    ("final_result_json", "MEDIUMBLOB"),
+    ("trace_history_json", "MEDIUMBLOB"),
+)
 CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS Tasks (
     task_id VARCHAR(36) PRIMARY KEY,
-    content TEXT NOT NULL,
-    status VARCHAR(10) NOT NULL DEFAULT 'PENDING',
-    priority VARCHAR(10) NOT NULL DEFAULT 'MEDIUM',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    %s,
+    INDEX idx_tasks_claim (status, priority, creation_time),
+    INDEX idx_tasks_archive (status, last_update_time)
+);
+""" % ",\n    ".join(f"{name} {ddl}" for name, ddl in TASKS_COLUMNS)
+# Índice do arquivo frio: localiza a partição de Tasks terminais movidas pelo TaskArchiver.
+CREATE_ARCHIVE_INDEX_SQL = """
+CREATE TABLE IF NOT EXISTS TaskArchiveIndex (
+    task_id VARCHAR(36) PRIMARY KEY,
+    partition_path VARCHAR(255) NOT NULL,
+    archived_at DOUBLE NOT NULL
+);
+"""
+# Histórico de rastreamento por linha: permite leitura paginada (seq > cursor) sem desserializar o trace inteiro.
+CREATE_TRACES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS TaskTraces (
+    task_id VARCHAR(36) NOT NULL,
+    seq INT NOT NULL,
+    timestamp DOUBLE NOT NULL,
+    agent_name VARCHAR(128) NOT NULL,
+    action_description TEXT,
+    result_data MEDIUMBLOB,
+    success BOOLEAN NOT NULL,
+    PRIMARY KEY (task_id, seq)
+);
+"""
+# Fila compartilhada entre nós de Scheduler (modo distribuído): leases e heartbeats.
+# next_attempt_at/retries: backoff do RetryPolicy entre ciclos de uma Task em RETRY.
+TASK_LEASES_COLUMNS = (
+    ("node_id", "VARCHAR(64) NOT NULL"),
+    ("lease_expires_at", "DOUBLE NOT NULL"),
+    ("claims", "INT NOT NULL DEFAULT 1"),
+    ("next_attempt_at", "DOUBLE NOT NULL DEFAULT 0"),
+    ("retries", "INT NOT NULL DEFAULT 0"),
+)
+CREATE_LEASES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS TaskLeases (
+    task_id VARCHAR(36) PRIMARY KEY,
+    %s,
+    INDEX idx_leases_node (node_id)
+);
+""" % ",\n    ".join(f"{name} {ddl}" for name, ddl in TASK_LEASES_COLUMNS)
+CREATE_NODES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS SchedulerNodes (
+    node_id VARCHAR(64) PRIMARY KEY,
+    started_at DOUBLE NOT NULL,
+    heartbeat_at DOUBLE NOT NULL
 );
 """
+# Esquema original de Tasks (content, priority por nome, timestamps SQL): migrado por migrate_legacy_tasks.
+LEGACY_TASKS_COLUMNS = ("content", "created_at", "updated_at")
+LEGACY_PRIORITIES = {"LOW": 1, "MEDIUM": 2, "HIGH": 3, "CRITICAL": 4}
+def existing_columns(cursor, table):
+    """Colunas atuais da tabela: nome -> tipo (ex.: 'varchar(10)')."""
+    cursor.execute(
+        "SELECT COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    return {name: column_type.decode() if isinstance(column_type, (bytes, bytearray)) else column_type
+            for name, column_type in cursor.fetchall()}
+
+def add_missing_columns(cursor, table, columns):
+    """Migração aditiva: tabelas criadas por versões anteriores recebem as colunas que faltam."""
+    existing = existing_columns(cursor, table)
+    for name, ddl in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+
+def migrate_legacy_tasks(cursor):
+    """
+    Converte Tasks do esquema original para as colunas de TaskDBModel (após add_missing_columns)
+    e remove as colunas legadas: 'content TEXT NOT NULL' sem default rejeitaria os INSERTs do
+    TaskRepository, 'priority VARCHAR' ordenaria os claims por nome e 'status VARCHAR(10)' não
+    comporta IN_PROGRESS. Contexto e trace das linhas legadas são gravados como JSON (schema v1).
+    """
+    columns = existing_columns(cursor, "Tasks")
+    ddl = dict(TASKS_COLUMNS)
+    if columns["priority"].startswith("varchar"):
+        cases = " ".join(f"WHEN '{name}' THEN '{value}'" for name, value in LEGACY_PRIORITIES.items())
+        cursor.execute(f"UPDATE Tasks SET priority = CASE priority {cases} ELSE '2' END")
+        cursor.execute(f"ALTER TABLE Tasks MODIFY priority {ddl['priority']}")
+    if columns["status"] != "varchar(16)":
+        cursor.execute(f"ALTER TABLE Tasks MODIFY status {ddl['status']}")
+    if "content" in columns:
+        cursor.execute(
+            "UPDATE Tasks SET description = content, "
+            "context_json = JSON_OBJECT('session_id', task_id, 'cortex_mode', 'SERVER', "
+            "'initial_prompt', content, 'environment_vars', JSON_OBJECT()), trace_history_json = '[]' "
+            "WHERE context_json IS NULL"
+        )
+    if "created_at" in columns:
+        cursor.execute("UPDATE Tasks SET creation_time = UNIX_TIMESTAMP(created_at) WHERE creation_time = 0")
+    if "updated_at" in columns:
+        cursor.execute("UPDATE Tasks SET last_update_time = UNIX_TIMESTAMP(updated_at) WHERE last_update_time IS NULL")
+    legacy = [name for name in LEGACY_TASKS_COLUMNS if name in columns]
+    if legacy:
+        cursor.execute("ALTER TABLE Tasks " + ", ".join(f"DROP COLUMN {name}" for name in legacy))
+
 def setup_database():
     try:
         if not all(os.environ.get(v) for v in ["DB_HOST", "DB_USER", "DB_PASS", "DB_NAME", "DB_PORT"]):
@@ -26,8 +130,15 @@ def setup_database():
         )
         cursor = conn.cursor()
         cursor.execute(CREATE_TABLE_SQL)
+        add_missing_columns(cursor, "Tasks", TASKS_COLUMNS)
+        migrate_legacy_tasks(cursor)
+        cursor.execute(CREATE_ARCHIVE_INDEX_SQL)
+        cursor.execute(CREATE_TRACES_TABLE_SQL)
+        cursor.execute(CREATE_LEASES_TABLE_SQL)
+        add_missing_columns(cursor, "TaskLeases", TASK_LEASES_COLUMNS)
+        cursor.execute(CREATE_NODES_TABLE_SQL)
         conn.commit()
-        print("✅ SUCESSO! Tabela 'Tasks' criada ou já existente.")
+        print("✅ SUCESSO! Tabelas 'Tasks', 'TaskTraces', 'TaskArchiveIndex', 'TaskLeases' e 'SchedulerNodes' criadas ou já existentes.")
     except Exception as err:
         print(f"🛑 ERRO: {err}")
         sys.exit(1)